@@ -185,18 +185,31 @@ class FilesApi:
         )
 
     @validate_arguments
-    def files_get_file(self, file_path: StrictStr, **kwargs) -> object:  # noqa: E501
+    def files_get_file(
+        self,
+        file_path: StrictStr,
+        range: Optional[StrictStr] = None,
+        if_none_match: Optional[StrictStr] = None,
+        if_modified_since: Optional[StrictStr] = None,
+        **kwargs,
+    ) -> object:  # noqa: E501
         """Get File  # noqa: E501
 
         Retrieve a file.  # noqa: E501
         This method makes a synchronous HTTP request by default. To make an
         asynchronous HTTP request, please pass async_req=True
 
-        >>> thread = api.files_get_file(file_path, async_req=True)
+        >>> thread = api.files_get_file(file_path, range, if_none_match, if_modified_since, async_req=True)
         >>> result = thread.get()
 
         :param file_path: (required)
         :type file_path: str
+        :param range: Byte ranges to fetch instead of the whole file, e.g. `bytes=0-99` or `bytes=-500`.
+        :type range: str
+        :param if_none_match: ETag of a copy of the file the client already has. If it is current, 304 is returned.
+        :type if_none_match: str
+        :param if_modified_since: Date of a copy of the file the client already has. If it is current, 304 is returned.
+        :type if_modified_since: str
         :param async_req: Whether to execute the request asynchronously.
         :type async_req: bool, optional
         :param _request_timeout: timeout setting for this request.
@@ -212,21 +225,36 @@ class FilesApi:
         if "_preload_content" in kwargs:
             message = "Error! Please call the files_get_file_with_http_info method with `_preload_content` instead and obtain raw data from ApiResponse.raw_data"  # noqa: E501
             raise ValueError(message)
-        return self.files_get_file_with_http_info(file_path, **kwargs)  # noqa: E501
+        return self.files_get_file_with_http_info(
+            file_path, range, if_none_match, if_modified_since, **kwargs
+        )  # noqa: E501
 
     @validate_arguments
-    def files_get_file_with_http_info(self, file_path: StrictStr, **kwargs) -> ApiResponse:  # noqa: E501
+    def files_get_file_with_http_info(
+        self,
+        file_path: StrictStr,
+        range: Optional[StrictStr] = None,
+        if_none_match: Optional[StrictStr] = None,
+        if_modified_since: Optional[StrictStr] = None,
+        **kwargs,
+    ) -> ApiResponse:  # noqa: E501
         """Get File  # noqa: E501
 
         Retrieve a file.  # noqa: E501
         This method makes a synchronous HTTP request by default. To make an
         asynchronous HTTP request, please pass async_req=True
 
-        >>> thread = api.files_get_file_with_http_info(file_path, async_req=True)
+        >>> thread = api.files_get_file_with_http_info(file_path, range, if_none_match, if_modified_since, async_req=True)
         >>> result = thread.get()
 
         :param file_path: (required)
         :type file_path: str
+        :param range: Byte ranges to fetch instead of the whole file, e.g. `bytes=0-99` or `bytes=-500`.
+        :type range: str
+        :param if_none_match: ETag of a copy of the file the client already has. If it is current, 304 is returned.
+        :type if_none_match: str
+        :param if_modified_since: Date of a copy of the file the client already has. If it is current, 304 is returned.
+        :type if_modified_since: str
         :param async_req: Whether to execute the request asynchronously.
         :type async_req: bool, optional
         :param _preload_content: if False, the ApiResponse.data will
@@ -254,7 +282,7 @@ class FilesApi:
 
         _params = locals()
 
-        _all_params = ["file_path"]
+        _all_params = ["file_path", "range", "if_none_match", "if_modified_since"]
         _all_params.extend(
             [
                 "async_req",
@@ -285,6 +313,15 @@ class FilesApi:
         _query_params = []
         # process the header parameters
         _header_params = dict(_params.get("_headers", {}))
+        if _params["range"] is not None:
+            _header_params["range"] = _params["range"]
+
+        if _params["if_none_match"] is not None:
+            _header_params["if-none-match"] = _params["if_none_match"]
+
+        if _params["if_modified_since"] is not None:
+            _header_params["if-modified-since"] = _params["if_modified_since"]
+
         # process the form parameters
         _form_params = []
         _files = {}
@@ -292,7 +329,7 @@ class FilesApi:
         _body_params = None
         # set the HTTP header `Accept`
         _header_params["Accept"] = self.api_client.select_header_accept(
-            ["application/json", "application/octet-stream"]
+            ["application/json", "application/octet-stream", "multipart/byteranges"]
         )  # noqa: E501
 
         # authentication setting
@@ -300,7 +337,10 @@ class FilesApi:
 
         _response_types_map = {
             "200": "object",
+            "206": "object",
+            "304": None,
             "404": None,
+            "416": None,
             "422": "HTTPValidationError",
         }
 
@@ -324,18 +364,28 @@ class FilesApi:
         )
 
     @validate_arguments
-    def files_get_file_metadata(self, file_path: StrictStr, **kwargs) -> object:  # noqa: E501
+    def files_get_file_metadata(
+        self,
+        file_path: StrictStr,
+        if_none_match: Optional[StrictStr] = None,
+        if_modified_since: Optional[StrictStr] = None,
+        **kwargs,
+    ) -> object:  # noqa: E501
         """Get File Metadata  # noqa: E501
 
         Retrieve file metadata.  Note: by convention, HEAD requests MUST NOT return a body in the response.  # noqa: E501
         This method makes a synchronous HTTP request by default. To make an
         asynchronous HTTP request, please pass async_req=True
 
-        >>> thread = api.files_get_file_metadata(file_path, async_req=True)
+        >>> thread = api.files_get_file_metadata(file_path, if_none_match, if_modified_since, async_req=True)
         >>> result = thread.get()
 
         :param file_path: (required)
         :type file_path: str
+        :param if_none_match: ETag of a copy of the file the client already has. If it is current, 304 is returned.
+        :type if_none_match: str
+        :param if_modified_since: Date of a copy of the file the client already has. If it is current, 304 is returned.
+        :type if_modified_since: str
         :param async_req: Whether to execute the request asynchronously.
         :type async_req: bool, optional
         :param _request_timeout: timeout setting for this request.
@@ -351,21 +401,33 @@ class FilesApi:
         if "_preload_content" in kwargs:
             message = "Error! Please call the files_get_file_metadata_with_http_info method with `_preload_content` instead and obtain raw data from ApiResponse.raw_data"  # noqa: E501
             raise ValueError(message)
-        return self.files_get_file_metadata_with_http_info(file_path, **kwargs)  # noqa: E501
+        return self.files_get_file_metadata_with_http_info(
+            file_path, if_none_match, if_modified_since, **kwargs
+        )  # noqa: E501
 
     @validate_arguments
-    def files_get_file_metadata_with_http_info(self, file_path: StrictStr, **kwargs) -> ApiResponse:  # noqa: E501
+    def files_get_file_metadata_with_http_info(
+        self,
+        file_path: StrictStr,
+        if_none_match: Optional[StrictStr] = None,
+        if_modified_since: Optional[StrictStr] = None,
+        **kwargs,
+    ) -> ApiResponse:  # noqa: E501
         """Get File Metadata  # noqa: E501
 
         Retrieve file metadata.  Note: by convention, HEAD requests MUST NOT return a body in the response.  # noqa: E501
         This method makes a synchronous HTTP request by default. To make an
         asynchronous HTTP request, please pass async_req=True
 
-        >>> thread = api.files_get_file_metadata_with_http_info(file_path, async_req=True)
+        >>> thread = api.files_get_file_metadata_with_http_info(file_path, if_none_match, if_modified_since, async_req=True)
         >>> result = thread.get()
 
         :param file_path: (required)
         :type file_path: str
+        :param if_none_match: ETag of a copy of the file the client already has. If it is current, 304 is returned.
+        :type if_none_match: str
+        :param if_modified_since: Date of a copy of the file the client already has. If it is current, 304 is returned.
+        :type if_modified_since: str
         :param async_req: Whether to execute the request asynchronously.
         :type async_req: bool, optional
         :param _preload_content: if False, the ApiResponse.data will
@@ -393,7 +455,7 @@ class FilesApi:
 
         _params = locals()
 
-        _all_params = ["file_path"]
+        _all_params = ["file_path", "if_none_match", "if_modified_since"]
         _all_params.extend(
             [
                 "async_req",
@@ -426,6 +488,12 @@ class FilesApi:
         _query_params = []
         # process the header parameters
         _header_params = dict(_params.get("_headers", {}))
+        if _params["if_none_match"] is not None:
+            _header_params["if-none-match"] = _params["if_none_match"]
+
+        if _params["if_modified_since"] is not None:
+            _header_params["if-modified-since"] = _params["if_modified_since"]
+
         # process the form parameters
         _form_params = []
         _files = {}
@@ -439,6 +507,7 @@ class FilesApi:
 
         _response_types_map = {
             "200": "object",
+            "304": None,
             "404": None,
             "422": "HTTPValidationError",
         }
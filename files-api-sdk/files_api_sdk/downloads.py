@@ -0,0 +1,442 @@
+"""
+Download files from the Files API straight to disk.
+
+Not generated by OpenAPI Generator: this module is listed in `.openapi-generator-ignore`
+so that regenerating the client does not overwrite it.
+
+`FilesApi.files_get_file` reads the whole response into memory before returning it. The
+functions here stream the response body instead, chunk by chunk, so that memory use does not
+grow with the size of the file: `iter_file_chunks` yields the chunks, `download_to_fileobj`
+writes them to a file object, and `download_file` writes them to disk and uses `Range` requests
+so that an interrupted download picks up where it left off rather than starting over, unless the
+file was replaced in between. Each can report progress and check the content against the ETag of
+the file as it streams.
+
+`download_file_in_parallel` splits large files into byte ranges fetched concurrently over the
+client's connection pool, so that throughput grows with the number of connections rather than
+being capped by the speed of one.
+"""
+
+import hashlib
+import os
+import re
+import time
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    as_completed,
+)
+from typing import (
+    IO,
+    Callable,
+    Dict,
+    Iterator,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import urllib3
+from files_api_sdk.api_client import ApiClient
+from files_api_sdk.exceptions import (
+    ApiException,
+    ServiceException,
+)
+from files_api_sdk.urls import file_url
+
+DEFAULT_CHUNK_SIZE_BYTES = 1024 * 1024
+DEFAULT_PART_SIZE_BYTES = 16 * 1024 * 1024
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_MAX_ATTEMPTS = 3
+
+# the ETag of a file uploaded in one request is the MD5 of its content; that of a multipart upload is not
+_MD5_ETAG_PATTERN = re.compile(r'^"?([0-9a-f]{32})"?$')
+_CONTENT_RANGE_SIZE_PATTERN = re.compile(r"^bytes \d+-\d+/(\d+)$")
+
+# called with the number of bytes of the file received so far and its size, or None if unknown
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+
+class DownloadError(Exception):
+    """A download could not be completed, or its content does not match the file."""
+
+
+def iter_file_chunks(
+    api_client: ApiClient,
+    file_path: str,
+    chunk_size_bytes: int = DEFAULT_CHUNK_SIZE_BYTES,
+    on_progress: Optional[ProgressCallback] = None,
+    verify_checksum: bool = False,
+) -> Iterator[bytes]:
+    """
+    Yield the content of a file in chunks as they arrive.
+
+    The response stays open until the generator is exhausted or closed, so close it (e.g. with
+    `contextlib.closing`) when stopping early.
+
+    :param api_client: Client configured with the host of the Files API.
+    :param file_path: Path of the file in the Files API.
+    :param chunk_size_bytes: Max size of the chunks the response body is read in.
+    :param on_progress: Called after each chunk is consumed, with the bytes received so far and the size of the file.
+    :param verify_checksum: Whether to check the MD5 of the content against the ETag of the file, when the
+        ETag is one. Files uploaded to S3 in parts have ETags that are not, and are not checked.
+
+    :raises files_api_sdk.exceptions.ApiException: if the server responds with an error.
+    :raises DownloadError: if `verify_checksum` is set and the content does not match the ETag. The check
+        runs once the last chunk was yielded, so the content is only known to be valid when the generator
+        is exhausted.
+    """
+    response = _open_file_stream(api_client, file_path)
+    md5 = hashlib.md5() if verify_checksum else None
+    yield from _iter_response_chunks(response, file_path, chunk_size_bytes, on_progress=on_progress, md5=md5)
+
+
+def download_to_fileobj(
+    api_client: ApiClient,
+    file_path: str,
+    fileobj: IO[bytes],
+    chunk_size_bytes: int = DEFAULT_CHUNK_SIZE_BYTES,
+    on_progress: Optional[ProgressCallback] = None,
+    verify_checksum: bool = False,
+) -> int:
+    """
+    Write the content of a file to a binary file object, e.g. an open file, a socket or a pipe, as it arrives.
+
+    :param api_client: Client configured with the host of the Files API.
+    :param file_path: Path of the file in the Files API.
+    :param fileobj: Object to write the content to, from its current position.
+    :param chunk_size_bytes: Max size of the chunks the response body is read and written in.
+    :param on_progress: Called after each chunk is written, with the bytes received so far and the size of the file.
+    :param verify_checksum: Whether to check the MD5 of the content against the ETag of the file, when the ETag is one.
+
+    :raises files_api_sdk.exceptions.ApiException: if the server responds with an error.
+    :raises DownloadError: if `verify_checksum` is set and the content written does not match the ETag.
+
+    :return: The number of bytes written.
+    """
+    written_bytes = 0
+    for chunk in iter_file_chunks(api_client, file_path, chunk_size_bytes, on_progress, verify_checksum):
+        fileobj.write(chunk)
+        written_bytes += len(chunk)
+    return written_bytes
+
+
+def download_file(
+    api_client: ApiClient,
+    file_path: str,
+    destination: Union[str, "os.PathLike[str]"],
+    chunk_size_bytes: int = DEFAULT_CHUNK_SIZE_BYTES,
+    resume: bool = True,
+    on_progress: Optional[ProgressCallback] = None,
+    verify_checksum: bool = False,
+) -> int:
+    """
+    Download a file to `destination`, resuming a previous partial download of it if there is one.
+
+    While a download is in progress, the ETag of the file is kept next to `destination`, in a file
+    with the same name ending in `.partial-etag`, and removed once the download completes. If
+    `resume` is true and a partial download left by this function is found, only the bytes after
+    the end of `destination` are requested with a `Range` header and appended to it, provided the
+    file still has the same ETag: they are requested with an `If-Range` header, and the ETag of the
+    range received is checked too. Otherwise, including when the file was replaced since, the whole
+    file is downloaded again and `destination` is overwritten.
+
+    :param api_client: Client configured with the host of the Files API.
+    :param file_path: Path of the file in the Files API.
+    :param destination: Local path to write the file to.
+    :param chunk_size_bytes: Size of the chunks the response body is read and written in.
+    :param resume: Whether to continue a partial download left in `destination` by a previous call.
+    :param on_progress: Called after each chunk is written, with the bytes of `destination` so far,
+        including those of the previous partial download, and the size of the file.
+    :param verify_checksum: Whether to check the MD5 of `destination` against the ETag of the file, when the
+        ETag is one. The bytes of a previous partial download are read back to hash them before the rest is
+        appended.
+
+    :raises files_api_sdk.exceptions.ApiException: if the server responds with an error.
+    :raises DownloadError: if `verify_checksum` is set and `destination` does not match the ETag, in
+        which case `destination` is removed, since resuming from it would keep the corrupt bytes.
+
+    :return: The size of the downloaded file in bytes.
+    """
+    etag_path = f"{os.fspath(destination)}.partial-etag"
+    partial_etag = _read_partial_etag(etag_path) if resume and os.path.exists(destination) else None
+    offset = os.path.getsize(destination) if partial_etag is not None else 0
+
+    response, offset = _open_resumed_file_stream(api_client, file_path, offset, partial_etag)
+    md5 = hashlib.md5() if verify_checksum else None
+    try:
+        if md5 is not None and offset:
+            _update_md5_from_file(md5, destination, chunk_size_bytes)
+        _write_partial_etag(etag_path, response.headers.get("ETag"))
+        with open(destination, "ab" if offset else "wb") as file:
+            chunks = _iter_response_chunks(response, file_path, chunk_size_bytes, on_progress, md5=md5, offset=offset)
+            for chunk in chunks:
+                file.write(chunk)
+                offset += len(chunk)
+    except DownloadError:
+        os.remove(destination)
+        _remove_partial_etag(etag_path)
+        raise
+    finally:
+        # in case the body was never read, e.g. because `destination` could not be opened
+        response.release_conn()
+
+    _remove_partial_etag(etag_path)
+    return offset
+
+
+def download_file_in_parallel(
+    api_client: ApiClient,
+    file_path: str,
+    destination: Union[str, "os.PathLike[str]"],
+    part_size_bytes: int = DEFAULT_PART_SIZE_BYTES,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    verify_checksum: bool = True,
+    chunk_size_bytes: int = DEFAULT_CHUNK_SIZE_BYTES,
+) -> int:
+    """
+    Download a file to `destination` as byte ranges fetched concurrently, each written at its offset.
+
+    The size and ETag of the file are read first with a `HEAD` request, and `destination` is
+    preallocated to that size. Each range is then fetched with its own `Range` request by one of
+    `max_concurrency` threads. A range whose transfer fails is retried on its own, from the
+    last byte received, up to `max_attempts` times. If the ETag of any range differs from the
+    one read first, the file was replaced during the download, which is abandoned.
+
+    The client's connection pool should hold at least `max_concurrency` connections, i.e.
+    `Configuration.connection_pool_maxsize`, or connections beyond it are not reused.
+
+    :param api_client: Client configured with the host of the Files API.
+    :param file_path: Path of the file in the Files API.
+    :param destination: Local path to write the file to. Any existing file is overwritten.
+    :param part_size_bytes: Size of the byte range fetched by each request.
+    :param max_concurrency: Max number of ranges fetched at once.
+    :param max_attempts: Max number of attempts, including the first, to fetch each range.
+    :param verify_checksum: Whether to check the MD5 of the downloaded file against its ETag, when the
+        ETag is one. Files uploaded to S3 in parts have ETags that are not, and are only checked by size.
+    :param chunk_size_bytes: Size of the chunks each response body is read and written in.
+
+    :raises files_api_sdk.exceptions.ApiException: if the server responds with an error that is not retried.
+    :raises DownloadError: if a range still fails after `max_attempts`, or the file changed or is corrupt.
+
+    :return: The size of the downloaded file in bytes.
+    """
+    size_bytes, etag = _head_file(api_client, file_path)
+    with open(destination, "wb") as file:
+        file.truncate(size_bytes)
+    byte_ranges = [
+        (first_byte, min(first_byte + part_size_bytes, size_bytes) - 1)
+        for first_byte in range(0, size_bytes, part_size_bytes)
+    ]
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(byte_ranges)))) as executor:
+        futures = [
+            executor.submit(
+                _download_byte_range,
+                api_client,
+                file_path,
+                destination,
+                byte_range,
+                etag,
+                max_attempts=max_attempts,
+                chunk_size_bytes=chunk_size_bytes,
+            )
+            for byte_range in byte_ranges
+        ]
+        try:
+            downloaded_bytes = sum(future.result() for future in as_completed(futures))
+        except BaseException:
+            # ranges not started yet are dropped, and those in flight finish before the error is raised
+            for future in futures:
+                future.cancel()
+            raise
+
+    if downloaded_bytes != size_bytes:
+        raise DownloadError(f"Downloaded {downloaded_bytes} bytes of {file_path} rather than {size_bytes}")
+    if verify_checksum:
+        _verify_md5_etag(destination, etag, chunk_size_bytes=chunk_size_bytes)
+    return size_bytes
+
+
+def _iter_response_chunks(
+    response: urllib3.HTTPResponse,
+    file_path: str,
+    chunk_size_bytes: int,
+    on_progress: Optional[ProgressCallback] = None,
+    md5: Optional["hashlib._Hash"] = None,
+    offset: int = 0,
+) -> Iterator[bytes]:
+    """
+    Yield the chunks of the body of a file response, then release its connection.
+
+    :param md5: Hash of the bytes of the file before the body, updated with each chunk and checked
+        against the ETag of the file after the last one.
+    :param offset: Position of the body in the file, i.e. the bytes received before it, for progress.
+    """
+    size_bytes = _response_file_size(response)
+    try:
+        for chunk in response.stream(chunk_size_bytes):
+            if md5 is not None:
+                md5.update(chunk)
+            offset += len(chunk)
+            yield chunk
+            if on_progress is not None:
+                on_progress(offset, size_bytes)
+    finally:
+        response.release_conn()
+    if md5 is not None:
+        _check_md5_etag(md5, response.headers.get("ETag"), file_path)
+
+
+def _response_file_size(response: urllib3.HTTPResponse) -> Optional[int]:
+    """Return the size of the whole file of a full or partial response, or None if the server did not send it."""
+    size_match = _CONTENT_RANGE_SIZE_PATTERN.match(response.headers.get("Content-Range", ""))
+    if size_match is not None:
+        return int(size_match.group(1))
+    content_length = response.headers.get("Content-Length")
+    if response.status == 200 and content_length is not None:
+        return int(content_length)
+    return None
+
+
+def _open_resumed_file_stream(
+    api_client: ApiClient, file_path: str, offset: int, partial_etag: Optional[str]
+) -> Tuple[urllib3.HTTPResponse, int]:
+    """
+    Request the bytes of a file after `offset` if it still has the ETag `partial_etag`, else the whole file.
+
+    :return: The response, with its body still unread, and the position of its body in the file.
+    """
+    if offset and partial_etag is not None:
+        try:
+            response = _open_file_stream(
+                api_client, file_path, {"Range": f"bytes={offset}-", "If-Range": partial_etag}
+            )
+        except ApiException as err:
+            # the partial file is not shorter than the file, so it cannot be a prefix of it
+            if err.status != 416:
+                raise
+        else:
+            if response.status == 206 and response.headers.get("ETag") == partial_etag:
+                return response, offset
+            if response.status == 200:
+                # the server evaluated `If-Range` and sent the whole file, which changed
+                return response, 0
+            # a range of another version of the file, from a server that does not evaluate `If-Range`:
+            # its body is left unread, so the connection cannot be reused
+            response.close()
+            response.release_conn()
+    return _open_file_stream(api_client, file_path), 0
+
+
+def _read_partial_etag(etag_path: str) -> Optional[str]:
+    """Return the ETag of the file a partial download is of, or None if there is no partial download."""
+    try:
+        with open(etag_path, encoding="utf-8") as file:
+            return file.read() or None
+    except FileNotFoundError:
+        return None
+
+
+def _write_partial_etag(etag_path: str, etag: Optional[str]) -> None:
+    """Record the ETag of the file being downloaded, so that the download can be resumed if it is interrupted."""
+    if etag is None:
+        # a partial download of a file without an ETag cannot be told from one of another version
+        _remove_partial_etag(etag_path)
+        return
+    with open(etag_path, "w", encoding="utf-8") as file:
+        file.write(etag)
+
+
+def _remove_partial_etag(etag_path: str) -> None:
+    try:
+        os.remove(etag_path)
+    except FileNotFoundError:
+        pass
+
+
+def _head_file(api_client: ApiClient, file_path: str) -> Tuple[int, Optional[str]]:
+    """Return the size and ETag of a file, read with `HEAD /files/{file_path}`."""
+    response = api_client.request("HEAD", file_url(api_client, file_path), headers=dict(api_client.default_headers))
+    return int(response.getheader("Content-Length")), response.getheader("ETag")
+
+
+def _download_byte_range(
+    api_client: ApiClient,
+    file_path: str,
+    destination: Union[str, "os.PathLike[str]"],
+    byte_range: Tuple[int, int],
+    etag: Optional[str],
+    max_attempts: int,
+    chunk_size_bytes: int,
+) -> int:
+    """Fetch the bytes of `byte_range`, both included, into `destination`, retrying from where an attempt stopped."""
+    first_byte, last_byte = byte_range
+    offset = first_byte
+    for attempt in range(max_attempts):
+        if offset > last_byte:
+            # every byte was received, possibly by an attempt whose connection dropped right after
+            break
+        if attempt:
+            time.sleep(min(2**attempt * 0.1, 5))
+        try:
+            response = _open_file_stream(api_client, file_path, {"Range": f"bytes={offset}-{last_byte}"})
+        except (urllib3.exceptions.HTTPError, ServiceException):
+            continue
+        try:
+            _check_range_response(response, file_path, offset, etag)
+            with open(destination, "r+b") as file:
+                file.seek(offset)
+                for chunk in response.stream(chunk_size_bytes):
+                    file.write(chunk)
+                    offset += len(chunk)
+        except urllib3.exceptions.HTTPError:
+            # the connection dropped mid-transfer, so the next attempt asks for the bytes not received yet
+            response.close()
+            continue
+        finally:
+            response.release_conn()
+    if offset > last_byte:
+        return offset - first_byte
+    raise DownloadError(f"Bytes {offset}-{last_byte} of {file_path} could not be fetched in {max_attempts} attempts")
+
+
+def _check_range_response(
+    response: urllib3.HTTPResponse, file_path: str, first_byte: int, etag: Optional[str]
+) -> None:
+    """Reject a response that is not the requested range of the same version of the file."""
+    content_range = response.headers.get("Content-Range", "")
+    if response.status != 206 or not content_range.startswith(f"bytes {first_byte}-"):
+        raise DownloadError(
+            f"Expected bytes {first_byte}- of {file_path}, got status {response.status} {content_range!r}"
+        )
+    if etag is not None and response.headers.get("ETag") != etag:
+        raise DownloadError(f"{file_path} changed during the download")
+
+
+def _verify_md5_etag(path: Union[str, "os.PathLike[str]"], etag: Optional[str], chunk_size_bytes: int) -> None:
+    """Check the MD5 of a downloaded file against its ETag, if the ETag is an MD5."""
+    if _MD5_ETAG_PATTERN.match(etag or "") is None:
+        return
+    md5 = hashlib.md5()
+    _update_md5_from_file(md5, path, chunk_size_bytes)
+    _check_md5_etag(md5, etag, str(path))
+
+
+def _update_md5_from_file(md5: "hashlib._Hash", path: Union[str, "os.PathLike[str]"], chunk_size_bytes: int) -> None:
+    with open(path, "rb") as file:
+        while chunk := file.read(chunk_size_bytes):
+            md5.update(chunk)
+
+
+def _check_md5_etag(md5: "hashlib._Hash", etag: Optional[str], name: str) -> None:
+    """Raise if an ETag is an MD5 and differs from `md5`. Other ETags are not checked."""
+    md5_match = _MD5_ETAG_PATTERN.match(etag or "")
+    if md5_match is not None and md5.hexdigest() != md5_match.group(1):
+        raise DownloadError(f"The MD5 of {name} does not match the ETag {etag}")
+
+
+def _open_file_stream(api_client: ApiClient, file_path: str, headers: Optional[Dict[str, str]] = None):
+    """Send `GET /files/{file_path}` and return the `urllib3.HTTPResponse` with its body still unread."""
+    request_headers = {**api_client.default_headers, **(headers or {})}
+    return api_client.request("GET", file_url(api_client, file_path), headers=request_headers, _preload_content=False)
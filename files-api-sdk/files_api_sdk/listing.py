@@ -0,0 +1,56 @@
+"""
+List every file under a directory of the Files API as a generator.
+
+Not generated by OpenAPI Generator: this module is listed in `.openapi-generator-ignore`
+so that regenerating the client does not overwrite it.
+
+`FilesApi.files_list_files` returns one page at a time, and the caller has to pass each page's
+token back to get the next one. `iter_files` reads the newline-delimited JSON of `GET /listing`
+instead, which lists the whole directory in one response, and yields each file as soon as its
+line arrives, so that memory use does not grow with the number of files.
+"""
+
+from typing import Iterator
+from urllib.parse import urlencode
+
+from files_api_sdk.api_client import ApiClient
+from files_api_sdk.models.file_metadata import FileMetadata
+
+DEFAULT_CHUNK_SIZE_BYTES = 64 * 1024
+
+
+def iter_files(
+    api_client: ApiClient,
+    directory: str = "",
+    chunk_size_bytes: int = DEFAULT_CHUNK_SIZE_BYTES,
+) -> Iterator[FileMetadata]:
+    """
+    Yield the metadata of every file whose path starts with `directory`, in path order.
+
+    The response stays open until the generator is exhausted or closed, so close it (e.g. with
+    `contextlib.closing`) when stopping early.
+
+    :param api_client: Client configured with the host of the Files API.
+    :param directory: Prefix of the paths of the files to list. All files are listed by default.
+    :param chunk_size_bytes: Size of the chunks the response body is read in.
+
+    :raises files_api_sdk.exceptions.ApiException: if the server responds with an error.
+    """
+    configuration = api_client.configuration
+    url = configuration.host + "/listing?" + urlencode({"directory": directory})
+    response = api_client.request("GET", url, headers=dict(api_client.default_headers), _preload_content=False)
+    exhausted = False
+    try:
+        partial_line = b""
+        for chunk in response.stream(chunk_size_bytes):
+            *lines, partial_line = (partial_line + chunk).split(b"\n")
+            for line in lines:
+                yield FileMetadata.from_json(line.decode("utf-8"))
+        if partial_line.strip():
+            yield FileMetadata.from_json(partial_line.decode("utf-8"))
+        exhausted = True
+    finally:
+        if not exhausted:
+            # the rest of the listing is still unread, so the connection cannot be reused
+            response.close()
+        response.release_conn()
@@ -0,0 +1,367 @@
+"""
+Upload files to the Files API from disk, file objects or iterators without loading them into memory.
+
+Not generated by OpenAPI Generator: this module is listed in `.openapi-generator-ignore`
+so that regenerating the client does not overwrite it.
+
+`FilesApi.files_upload_file` takes the content of the file as bytes, so the whole file has to
+be in memory, and the generated client copies it again to build the multipart body. `upload_file`
+streams the multipart body from a path, a binary file object or an iterable of chunks instead.
+
+Large files whose size is known in advance are sent through a resumable upload session
+(`/upload-sessions`) when the server has them: as parts uploaded concurrently, each retried on
+its own if its transfer fails, so that a dropped connection costs one part rather than the whole
+file. Memory use is then bounded by the part size times the number of parts in flight.
+"""
+
+import io
+import json
+import mimetypes
+import os
+import time
+import uuid
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextlib import (
+    contextmanager,
+    nullcontext,
+    suppress,
+)
+from functools import partial
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Set,
+    Union,
+)
+
+import urllib3
+from files_api_sdk.api_client import ApiClient
+from files_api_sdk.downloads import ProgressCallback
+from files_api_sdk.exceptions import (
+    ApiException,
+    BadRequestException,
+    ForbiddenException,
+    NotFoundException,
+    ServiceException,
+    UnauthorizedException,
+)
+from files_api_sdk.models.put_file_response import PutFileResponse
+from files_api_sdk.rest import RESTResponse
+from files_api_sdk.urls import file_url
+
+DEFAULT_CHUNK_SIZE_BYTES = 1024 * 1024
+DEFAULT_RESUMABLE_THRESHOLD_BYTES = 64 * 1024 * 1024
+DEFAULT_PART_SIZE_BYTES = 16 * 1024 * 1024
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_MAX_ATTEMPTS = 3
+
+# a path to a local file, a binary file object read from its current position, or an iterable of chunks
+UploadSource = Union[str, "os.PathLike[str]", bytes, IO[bytes], Iterable[bytes]]
+
+# the same mapping of error statuses to exceptions as the generated `RESTClientObject.request`
+_EXCEPTIONS_BY_STATUS = {
+    400: BadRequestException,
+    401: UnauthorizedException,
+    403: ForbiddenException,
+    404: NotFoundException,
+}
+
+
+class UploadError(Exception):
+    """An upload could not be completed."""
+
+
+def upload_file(
+    api_client: ApiClient,
+    file_path: str,
+    source: UploadSource,
+    content_type: Optional[str] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    resumable_threshold_bytes: int = DEFAULT_RESUMABLE_THRESHOLD_BYTES,
+    part_size_bytes: int = DEFAULT_PART_SIZE_BYTES,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    chunk_size_bytes: int = DEFAULT_CHUNK_SIZE_BYTES,
+) -> PutFileResponse:
+    """
+    Upload a file to `file_path`, replacing any file already there, streaming its content from `source`.
+
+    Files of at least `resumable_threshold_bytes` whose size is known, i.e. local files and seekable
+    file objects, are sent through a resumable upload session if the server has them, in parts of
+    `part_size_bytes` of which up to `max_concurrency` are sent at once. A part whose transfer fails
+    is sent again, up to `max_attempts` times, and the session is aborted if it still fails. Other
+    files, and iterables of chunks, are sent as one streamed `PUT /files/{file_path}` request.
+
+    :param api_client: Client configured with the host of the Files API.
+    :param file_path: Path of the file in the Files API.
+    :param source: Content of the file: the path of a local file, a binary file object, which is read
+        from its current position, bytes, or an iterable of chunks of bytes, e.g. a generator.
+    :param content_type: The MIME type of the file. Guessed from the extension of `file_path` by default.
+    :param on_progress: Called as the content is sent, with the bytes sent so far and the size of the
+        file, or None if unknown. With an upload session, it is called as each part is received.
+    :param resumable_threshold_bytes: Size from which files are sent through an upload session.
+    :param part_size_bytes: Size of the parts of upload sessions. It is raised if the server requires
+        larger parts, or if the file would not fit in the max number of parts otherwise.
+    :param max_concurrency: Max number of parts sent at once, and read in memory, in upload sessions.
+    :param max_attempts: Max number of attempts, including the first, to send each part.
+    :param chunk_size_bytes: Size of the chunks files and file objects are read in for streamed requests.
+
+    :raises files_api_sdk.exceptions.ApiException: if the server responds with an error that is not retried.
+    :raises UploadError: if a part still fails after `max_attempts`.
+
+    :return: The response of the server.
+    """
+    content_type = content_type or mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    size_bytes = _source_size(source)
+
+    if size_bytes is not None and size_bytes >= resumable_threshold_bytes:
+        session = _create_upload_session(api_client, file_path, content_type, size_bytes)
+        if session is not None:
+            # the part size that fits the file in the server's max number of parts, rounded up
+            min_part_size_bytes = max(session["min_part_size_bytes"], -(-size_bytes // session["max_parts"]))
+            if max(part_size_bytes, min_part_size_bytes) <= session["max_part_size_bytes"]:
+                return _upload_in_session(
+                    api_client,
+                    session["session_id"],
+                    source,
+                    size_bytes,
+                    part_size_bytes=max(part_size_bytes, min_part_size_bytes),
+                    max_concurrency=max_concurrency,
+                    max_attempts=max_attempts,
+                    on_progress=on_progress,
+                )
+            # the file does not fit in the server's max number of parts of the max size
+            _abort_upload_session(api_client, session["session_id"])
+
+    return _upload_in_one_request(
+        api_client, file_path, source, content_type, size_bytes, on_progress, chunk_size_bytes=chunk_size_bytes
+    )
+
+
+def _source_size(source: UploadSource) -> Optional[int]:
+    """Return the number of bytes left to read from a source, or None if it cannot be known without reading it."""
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    if hasattr(source, "read") and hasattr(source, "seekable") and source.seekable():
+        position = source.tell()
+        size_bytes = source.seek(0, os.SEEK_END) - position
+        source.seek(position)
+        return size_bytes
+    return None
+
+
+def _upload_in_one_request(
+    api_client: ApiClient,
+    file_path: str,
+    source: UploadSource,
+    content_type: str,
+    size_bytes: Optional[int],
+    on_progress: Optional[ProgressCallback],
+    chunk_size_bytes: int,
+) -> PutFileResponse:
+    """Send `PUT /files/{file_path}` with a multipart body streamed from `source`."""
+    boundary = uuid.uuid4().hex
+    filename = os.path.basename(file_path).replace('"', "%22")
+    head = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file_content"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode("utf-8")
+    tail = f"\r\n--{boundary}--\r\n".encode("utf-8")
+    headers = {**api_client.default_headers, "Content-Type": f"multipart/form-data; boundary={boundary}"}
+    if size_bytes is not None:
+        headers["Content-Length"] = str(len(head) + size_bytes + len(tail))
+
+    body = _iter_multipart_body(head, _iter_source_chunks(source, chunk_size_bytes), tail, size_bytes, on_progress)
+    # `RESTClientObject.request` only sends bodies already in memory, so the pool is used directly
+    response = api_client.rest_client.pool_manager.request(
+        "PUT",
+        file_url(api_client, file_path),
+        body=body,
+        headers=headers,
+        # without a size, the body is sent in chunks of its own size
+        chunked=size_bytes is None,
+        # a body read from a generator cannot be sent again
+        retries=False,
+    )
+    _raise_for_status(response)
+    return PutFileResponse.from_json(response.data.decode("utf-8"))
+
+
+def _iter_multipart_body(
+    head: bytes,
+    chunks: Iterable[bytes],
+    tail: bytes,
+    size_bytes: Optional[int],
+    on_progress: Optional[ProgressCallback],
+) -> Iterator[bytes]:
+    yield head
+    sent_bytes = 0
+    for chunk in chunks:
+        if not chunk:
+            # an empty chunk would end a chunked body early
+            continue
+        yield chunk
+        sent_bytes += len(chunk)
+        if on_progress is not None:
+            on_progress(sent_bytes, size_bytes)
+    yield tail
+
+
+def _iter_source_chunks(source: UploadSource, chunk_size_bytes: int) -> Iterator[bytes]:
+    if isinstance(source, (str, os.PathLike)) or hasattr(source, "read"):
+        with _open_source(source) as file:
+            yield from iter(partial(file.read, chunk_size_bytes), b"")
+    else:
+        yield from source
+
+
+@contextmanager
+def _open_source(source: Union[str, "os.PathLike[str]", IO[bytes]]) -> Iterator[IO[bytes]]:
+    """Open a local file, or use a file object as is, leaving it open."""
+    with open(source, "rb") if isinstance(source, (str, os.PathLike)) else nullcontext(source) as file:
+        yield file
+
+
+def _create_upload_session(
+    api_client: ApiClient, file_path: str, content_type: str, size_bytes: int
+) -> Optional[Dict[str, Any]]:
+    """Start an upload session, or return None if the server has no upload sessions."""
+    try:
+        response = api_client.request(
+            "POST",
+            api_client.configuration.host + "/upload-sessions",
+            headers={**api_client.default_headers, "Content-Type": "application/json"},
+            body={"file_path": file_path, "content_type": content_type, "size_bytes": size_bytes},
+        )
+    except ApiException as err:
+        if err.status in (404, 405):
+            return None
+        raise
+    return json.loads(response.data)
+
+
+def _upload_in_session(
+    api_client: ApiClient,
+    session_id: str,
+    source: Union[str, "os.PathLike[str]", IO[bytes]],
+    size_bytes: int,
+    part_size_bytes: int,
+    max_concurrency: int,
+    max_attempts: int,
+    on_progress: Optional[ProgressCallback],
+) -> PutFileResponse:
+    """Send `source` as the parts of an upload session and complete it, or abort it if that fails."""
+    session_url = api_client.configuration.host + "/upload-sessions/" + session_id
+    try:
+        with _open_source(source) as file:
+            _upload_parts(
+                api_client,
+                session_url,
+                _iter_parts(file, part_size_bytes),
+                size_bytes,
+                max_concurrency=max_concurrency,
+                max_attempts=max_attempts,
+                on_progress=on_progress,
+            )
+        response = api_client.request("POST", session_url + "/complete", headers=dict(api_client.default_headers))
+    except BaseException:
+        _abort_upload_session(api_client, session_id)
+        raise
+    return PutFileResponse.from_json(response.data.decode("utf-8"))
+
+
+def _iter_parts(file: IO[bytes], part_size_bytes: int) -> Iterator[bytes]:
+    """Read a file object in parts of `part_size_bytes`, but for the last one."""
+    while part := file.read(part_size_bytes):
+        # unbuffered file objects may return less than asked before the end of the file
+        while len(part) < part_size_bytes and (rest := file.read(part_size_bytes - len(part))):
+            part += rest
+        yield part
+
+
+def _upload_parts(
+    api_client: ApiClient,
+    session_url: str,
+    parts: Iterator[bytes],
+    size_bytes: int,
+    max_concurrency: int,
+    max_attempts: int,
+    on_progress: Optional[ProgressCallback],
+) -> None:
+    """Send parts to an upload session, reading the next part only once fewer than `max_concurrency` are in flight."""
+    sent_bytes = 0
+    in_flight: Set["Future[int]"] = set()
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        try:
+            for part_number, part in enumerate(parts, start=1):
+                if len(in_flight) >= max_concurrency:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    sent_bytes = _count_sent_bytes(done, sent_bytes, size_bytes, on_progress)
+                in_flight.add(executor.submit(_upload_part, api_client, session_url, part_number, part, max_attempts))
+            _count_sent_bytes(wait(in_flight).done, sent_bytes, size_bytes, on_progress)
+        except BaseException:
+            # parts not started yet are dropped, and those in flight finish before the error is raised
+            for future in in_flight:
+                future.cancel()
+            raise
+
+
+def _count_sent_bytes(
+    done: Set["Future[int]"], sent_bytes: int, size_bytes: int, on_progress: Optional[ProgressCallback]
+) -> int:
+    """Add the sizes of the parts sent by `done` to `sent_bytes`, raising the error of any part that failed."""
+    for future in done:
+        sent_bytes += future.result()
+        if on_progress is not None:
+            on_progress(sent_bytes, size_bytes)
+    return sent_bytes
+
+
+def _upload_part(api_client: ApiClient, session_url: str, part_number: int, part: bytes, max_attempts: int) -> int:
+    """Send a part to an upload session, retrying failed transfers, and return its size."""
+    for attempt in range(max_attempts):
+        if attempt:
+            time.sleep(min(2**attempt * 0.1, 5))
+        try:
+            api_client.request(
+                "PUT",
+                f"{session_url}/parts/{part_number}",
+                headers={**api_client.default_headers, "Content-Type": "application/octet-stream"},
+                body=part,
+            )
+        except (urllib3.exceptions.HTTPError, ServiceException):
+            continue
+        return len(part)
+    raise UploadError(f"Part {part_number} could not be uploaded to {session_url} in {max_attempts} attempts")
+
+
+def _abort_upload_session(api_client: ApiClient, session_id: str) -> None:
+    """Abort an upload session, if possible: the server eventually aborts abandoned sessions anyway."""
+    with suppress(ApiException, urllib3.exceptions.HTTPError):
+        api_client.request(
+            "DELETE",
+            api_client.configuration.host + "/upload-sessions/" + session_id,
+            headers=dict(api_client.default_headers),
+        )
+
+
+def _raise_for_status(response: urllib3.HTTPResponse) -> None:
+    """Raise the exception the generated client raises for an error response."""
+    if 200 <= response.status <= 299:
+        return
+    rest_response = RESTResponse(response)
+    if 500 <= response.status <= 599:
+        raise ServiceException(http_resp=rest_response)
+    raise _EXCEPTIONS_BY_STATUS.get(response.status, ApiException)(http_resp=rest_response)
@@ -0,0 +1,16 @@
+"""
+URLs of the Files API routes called by the hand-written helpers, which send their requests through the client's pool.
+
+Not generated by OpenAPI Generator: this module is listed in `.openapi-generator-ignore`
+so that regenerating the client does not overwrite it.
+"""
+
+from urllib.parse import quote
+
+from files_api_sdk.api_client import ApiClient
+
+
+def file_url(api_client: ApiClient, file_path: str) -> str:
+    """Return the URL of `/files/{file_path}`, quoting `file_path` like the generated `FilesApi` methods do."""
+    configuration = api_client.configuration
+    return configuration.host + "/files/" + quote(file_path, safe=configuration.safe_chars_for_path_param)
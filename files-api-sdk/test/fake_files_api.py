@@ -0,0 +1,321 @@
+"""
+An in-memory stand-in for the Files API, served over HTTP on localhost, for the tests of the hand-written helpers.
+
+The helpers stream request and response bodies through the client's urllib3 pool rather than
+through the generated `FilesApi` methods, so they are tested against a real HTTP server. This one
+implements the routes they use, records the requests it receives, and can be told to cut a
+response short or to fail the upload of a part, to exercise the retries of the helpers.
+"""
+
+import hashlib
+import json
+import re
+import socket
+import sys
+import tempfile
+import threading
+import unittest
+import uuid
+from http.server import (
+    BaseHTTPRequestHandler,
+    ThreadingHTTPServer,
+)
+from typing import (
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+from urllib.parse import (
+    parse_qs,
+    unquote,
+    urlsplit,
+)
+
+from files_api_sdk.api_client import ApiClient
+from files_api_sdk.configuration import Configuration
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d+)-(\d*)$")
+_BOUNDARY_PATTERN = re.compile(r"boundary=([^;]+)")
+
+
+class RecordedRequest(NamedTuple):
+    """A request received by the fake server, with its body for those that have one."""
+
+    method: str
+    path: str
+    headers: Dict[str, str]
+    body: bytes = b""
+
+
+class FakeFilesApi:
+    """
+    Files API serving files from a dict, on a free port of localhost, while used as a context manager.
+
+    Files are stored by path in `files`, and their ETag is the quoted MD5 of their content unless
+    set in `etags`. The fault injection attributes apply to the requests received after they are set.
+    """
+
+    def __init__(self) -> None:
+        self.files: Dict[str, bytes] = {}
+        self.etags: Dict[str, str] = {}
+        self.requests: List[RecordedRequest] = []
+        # the body of each of the next `GET /files/...` responses is cut after this many bytes
+        self.cut_responses_after_bytes: List[int] = []
+        # called with the path of each `GET /files/...` request before it is answered
+        self.on_get_file: Optional[Callable[[str], None]] = None
+        # status answered to `POST /upload-sessions`, e.g. 404 for a server without upload sessions
+        self.upload_sessions_status: Optional[int] = None
+        self.min_part_size_bytes = 1
+        self.max_part_size_bytes = 1024 * 1024
+        self.max_parts = 10_000
+        # number of times the upload of a part, by part number, is answered with 500 before succeeding
+        self.part_failures: Dict[int, int] = {}
+        self.upload_sessions: Dict[str, Dict[str, object]] = {}
+        self.aborted_session_ids: List[str] = []
+        self.lock = threading.Lock()
+        self._server = _HTTPServer(("127.0.0.1", 0), _make_handler(self))
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+
+    @property
+    def url(self) -> str:
+        """The base URL of the server."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def api_client(self) -> ApiClient:
+        """Return a client of the server, to be closed by the caller."""
+        return ApiClient(Configuration(host=self.url))
+
+    def etag(self, file_path: str) -> str:
+        """Return the ETag of a file."""
+        if file_path in self.etags:
+            return self.etags[file_path]
+        return '"' + hashlib.md5(self.files[file_path]).hexdigest() + '"'
+
+    def requests_to(self, method: str, path_prefix: str) -> List[RecordedRequest]:
+        """Return the requests received with `method` for paths starting with `path_prefix`, in order."""
+        return [
+            request for request in self.requests if request.method == method and request.path.startswith(path_prefix)
+        ]
+
+    def __enter__(self) -> "FakeFilesApi":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+
+class FakeFilesApiTestCase(unittest.TestCase):
+    """Test case with a fake Files API, a client of it, and a temporary directory, all set up for each test."""
+
+    def setUp(self) -> None:
+        self.fake_api = FakeFilesApi().__enter__()
+        self.addCleanup(self.fake_api.__exit__, None, None, None)
+        self.api_client = self.fake_api.api_client()
+        self.addCleanup(self.api_client.close)
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = temp_dir.name
+
+
+def _content_range(content: bytes, first_byte: int, last_byte: str) -> Tuple[str, bytes]:
+    """Return the `Content-Range` of the bytes of `content` from `first_byte` to `last_byte`, if any, and those bytes."""
+    end = min(int(last_byte) + 1 if last_byte else len(content), len(content))
+    return f"bytes {first_byte}-{end - 1}/{len(content)}", content[first_byte:end]
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request: object, client_address: object) -> None:
+        # clients closing connections whose response they do not read is expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def _make_handler(api: FakeFilesApi) -> type:
+    class Handler(_FakeFilesApiHandler):
+        fake_api = api
+
+    return Handler
+
+
+class _FakeFilesApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fake_api: FakeFilesApi
+
+    def log_message(self, format: str, *args: object) -> None:  # pylint: disable=redefined-builtin
+        pass
+
+    def do_HEAD(self) -> None:
+        self._handle()
+
+    def do_GET(self) -> None:
+        self._handle()
+
+    def do_PUT(self) -> None:
+        self._handle()
+
+    def do_POST(self) -> None:
+        self._handle()
+
+    def do_DELETE(self) -> None:
+        self._handle()
+
+    def _handle(self) -> None:
+        api = self.fake_api
+        url = urlsplit(self.path)
+        path = unquote(url.path)
+        body = self._read_body()
+        with api.lock:
+            api.requests.append(RecordedRequest(self.command, path, dict(self.headers.items()), body))
+
+        path_segments = path.split("/")[1:]
+        if path_segments[0] == "files" and self.command in ("GET", "HEAD"):
+            self._get_file("/".join(path_segments[1:]))
+        elif path_segments[0] == "files" and self.command == "PUT":
+            self._put_file("/".join(path_segments[1:]), body)
+        elif path == "/listing" and self.command == "GET":
+            self._list_files(parse_qs(url.query).get("directory", [""])[0])
+        elif path == "/upload-sessions" and self.command == "POST":
+            self._create_upload_session(json.loads(body))
+        elif path_segments[0] == "upload-sessions":
+            self._handle_upload_session(path_segments[1:], body)
+        else:
+            self._send_json(404, {"detail": "Not Found"})
+
+    def _read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding") == "chunked":
+            body = b""
+            while chunk_size := int(self.rfile.readline().split(b";")[0], 16):
+                body += self.rfile.read(chunk_size)
+                self.rfile.readline()
+            # the trailer section ends with an empty line
+            while self.rfile.readline() not in (b"\r\n", b""):
+                pass
+            return body
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _get_file(self, file_path: str) -> None:
+        api = self.fake_api
+        if self.command == "GET" and api.on_get_file is not None:
+            api.on_get_file(file_path)
+        if file_path not in api.files:
+            self._send_json(404, {"detail": "File not found"})
+            return
+        content = api.files[file_path]
+        headers = {"ETag": api.etag(file_path), "Accept-Ranges": "bytes", "Content-Type": "application/octet-stream"}
+        status = 200
+        # like the Files API, `If-Range` is not evaluated
+        range_match = _RANGE_PATTERN.match(self.headers.get("Range", ""))
+        if range_match is not None:
+            first_byte = int(range_match.group(1))
+            if first_byte >= len(content):
+                self._send_json(416, {"detail": "Range Not Satisfiable"}, {"Content-Range": f"bytes */{len(content)}"})
+                return
+            headers["Content-Range"], content = _content_range(content, first_byte, range_match.group(2))
+            status = 206
+        self._send_file(status, content, headers)
+
+    def _send_file(self, status: int, content: bytes, headers: Dict[str, str]) -> None:
+        api = self.fake_api
+        with api.lock:
+            cut_after_bytes = (
+                api.cut_responses_after_bytes.pop(0)
+                if self.command == "GET" and api.cut_responses_after_bytes
+                else None
+            )
+        if self.command == "HEAD":
+            self._send(status, b"", headers, content_length=len(content))
+        elif cut_after_bytes is not None:
+            # the connection drops mid-transfer: the client gets fewer bytes than the `Content-Length`
+            self._send(status, content[:cut_after_bytes], headers, content_length=len(content))
+            self.wfile.flush()
+            self.connection.shutdown(socket.SHUT_RDWR)
+            self.close_connection = True
+        else:
+            self._send(status, content, headers)
+
+    def _put_file(self, file_path: str, body: bytes) -> None:
+        boundary = _BOUNDARY_PATTERN.search(self.headers["Content-Type"]).group(1)
+        head, _, rest = body.partition(b"\r\n\r\n")
+        assert head.startswith(f"--{boundary}\r\n".encode("utf-8"))
+        content, tail, _ = rest.rpartition(f"\r\n--{boundary}--\r\n".encode("utf-8"))
+        assert tail, "the multipart body is not terminated"
+        self.fake_api.files[file_path] = content
+        self._send_json(201, {"file_path": file_path, "message": f"New file uploaded at path: /{file_path}"})
+
+    def _list_files(self, directory: str) -> None:
+        api = self.fake_api
+        lines = [
+            json.dumps({"file_path": path, "last_modified": "2024-01-01T00:00:00Z", "size_bytes": len(content)})
+            for path, content in sorted(api.files.items())
+            if path.startswith(directory)
+        ]
+        self._send(
+            200, "".join(line + "\n" for line in lines).encode("utf-8"), {"Content-Type": "application/x-ndjson"}
+        )
+
+    def _create_upload_session(self, request_body: Dict[str, object]) -> None:
+        api = self.fake_api
+        if api.upload_sessions_status is not None:
+            self._send_json(api.upload_sessions_status, {"detail": "Not Found"})
+            return
+        session = {
+            "session_id": uuid.uuid4().hex,
+            "file_path": request_body["file_path"],
+            "min_part_size_bytes": api.min_part_size_bytes,
+            "max_part_size_bytes": api.max_part_size_bytes,
+            "max_parts": api.max_parts,
+            "parts": {},
+        }
+        api.upload_sessions[session["session_id"]] = session
+        self._send_json(201, {name: value for name, value in session.items() if name != "parts"})
+
+    def _handle_upload_session(self, path_segments: List[str], body: bytes) -> None:
+        api = self.fake_api
+        session = api.upload_sessions.get(path_segments[0])
+        if session is None:
+            self._send_json(404, {"detail": "Upload session not found"})
+        elif self.command == "PUT" and len(path_segments) == 3 and path_segments[1] == "parts":
+            self._upload_part(session, int(path_segments[2]), body)
+        elif self.command == "POST" and path_segments[1:] == ["complete"]:
+            parts = session["parts"]
+            api.files[session["file_path"]] = b"".join(parts[part_number] for part_number in sorted(parts))
+            del api.upload_sessions[session["session_id"]]
+            self._send_json(201, {"file_path": session["file_path"], "message": "Upload session completed"})
+        elif self.command == "DELETE" and len(path_segments) == 1:
+            api.aborted_session_ids.append(session["session_id"])
+            del api.upload_sessions[session["session_id"]]
+            self._send(204, b"", {})
+        else:
+            self._send_json(405, {"detail": "Method Not Allowed"})
+
+    def _upload_part(self, session: Dict[str, object], part_number: int, body: bytes) -> None:
+        api = self.fake_api
+        with api.lock:
+            failures_left = api.part_failures.get(part_number, 0)
+            if failures_left:
+                api.part_failures[part_number] = failures_left - 1
+        if failures_left:
+            self._send_json(500, {"detail": "Internal Server Error"})
+            return
+        session["parts"][part_number] = body
+        self._send_json(200, {"part_number": part_number, "size_bytes": len(body)})
+
+    def _send_json(self, status: int, body: object, headers: Optional[Dict[str, str]] = None) -> None:
+        self._send(status, json.dumps(body).encode("utf-8"), {"Content-Type": "application/json", **(headers or {})})
+
+    def _send(self, status: int, body: bytes, headers: Dict[str, str], content_length: Optional[int] = None) -> None:
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body) if content_length is None else content_length))
+        self.end_headers()
+        self.wfile.write(body)
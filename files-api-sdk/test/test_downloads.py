@@ -0,0 +1,256 @@
+"""Tests of `files_api_sdk.downloads`, against a fake Files API."""
+
+import io
+import os
+import unittest
+from typing import List
+
+import urllib3
+from files_api_sdk.downloads import (
+    DownloadError,
+    download_file,
+    download_file_in_parallel,
+    download_to_fileobj,
+    iter_file_chunks,
+)
+from files_api_sdk.exceptions import NotFoundException
+
+from .fake_files_api import FakeFilesApiTestCase
+
+FILE_PATH = "videos/clip.bin"
+CONTENT = bytes(range(256)) * 1000
+
+
+class TestIterFileChunks(FakeFilesApiTestCase):
+    """iter_file_chunks unit test"""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.fake_api.files[FILE_PATH] = CONTENT
+
+    def test_iter_file_chunks(self) -> None:
+        progress = []
+
+        chunks = list(
+            iter_file_chunks(
+                self.api_client,
+                FILE_PATH,
+                chunk_size_bytes=64 * 1024,
+                on_progress=lambda *args: progress.append(args),
+                verify_checksum=True,
+            )
+        )
+
+        self.assertEqual(b"".join(chunks), CONTENT)
+        self.assertTrue(all(len(chunk) <= 64 * 1024 for chunk in chunks))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(progress[-1], (len(CONTENT), len(CONTENT)))
+
+    def test_raise_after_last_chunk_not_matching_etag(self) -> None:
+        self.fake_api.etags[FILE_PATH] = '"' + "0" * 32 + '"'
+        chunks = []
+
+        with self.assertRaisesRegex(DownloadError, "does not match the ETag"):
+            for chunk in iter_file_chunks(self.api_client, FILE_PATH, verify_checksum=True):
+                chunks.append(chunk)
+
+        self.assertEqual(b"".join(chunks), CONTENT)
+
+    def test_skip_check_of_etag_not_md5(self) -> None:
+        # the ETag of a file uploaded in parts is not the MD5 of its content
+        self.fake_api.etags[FILE_PATH] = '"' + "0" * 32 + '-2"'
+
+        self.assertEqual(b"".join(iter_file_chunks(self.api_client, FILE_PATH, verify_checksum=True)), CONTENT)
+
+    def test_raise_for_missing_file(self) -> None:
+        with self.assertRaises(NotFoundException):
+            list(iter_file_chunks(self.api_client, "missing.bin"))
+
+
+class TestDownloadToFileobj(FakeFilesApiTestCase):
+    """download_to_fileobj unit test"""
+
+    def test_download_to_fileobj(self) -> None:
+        self.fake_api.files[FILE_PATH] = CONTENT
+        fileobj = io.BytesIO(b"head:")
+        fileobj.seek(0, io.SEEK_END)
+
+        written_bytes = download_to_fileobj(self.api_client, FILE_PATH, fileobj, verify_checksum=True)
+
+        self.assertEqual(written_bytes, len(CONTENT))
+        self.assertEqual(fileobj.getvalue(), b"head:" + CONTENT)
+
+
+class TestDownloadFile(FakeFilesApiTestCase):
+    """download_file unit test"""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.fake_api.files[FILE_PATH] = CONTENT
+        self.destination = os.path.join(self.temp_dir, "clip.bin")
+        self.etag_path = self.destination + ".partial-etag"
+
+    def read_destination(self) -> bytes:
+        with open(self.destination, "rb") as file:
+            return file.read()
+
+    def interrupt_download(self, cut_after_bytes: int) -> None:
+        self.fake_api.cut_responses_after_bytes = [cut_after_bytes]
+        with self.assertRaises(urllib3.exceptions.HTTPError):
+            download_file(self.api_client, FILE_PATH, self.destination, chunk_size_bytes=1024)
+        self.assertTrue(os.path.exists(self.etag_path))
+
+    def test_download_file(self) -> None:
+        progress = []
+
+        size_bytes = download_file(
+            self.api_client, FILE_PATH, self.destination, on_progress=lambda *args: progress.append(args)
+        )
+
+        self.assertEqual(size_bytes, len(CONTENT))
+        self.assertEqual(self.read_destination(), CONTENT)
+        self.assertEqual(progress[-1], (len(CONTENT), len(CONTENT)))
+        self.assertFalse(os.path.exists(self.etag_path))
+
+    def test_resume_interrupted_download(self) -> None:
+        self.interrupt_download(cut_after_bytes=100_000)
+        partial_size_bytes = os.path.getsize(self.destination)
+        self.assertGreater(partial_size_bytes, 0)
+
+        size_bytes = download_file(self.api_client, FILE_PATH, self.destination, verify_checksum=True)
+
+        self.assertEqual(size_bytes, len(CONTENT))
+        self.assertEqual(self.read_destination(), CONTENT)
+        self.assertFalse(os.path.exists(self.etag_path))
+        resumed_request = self.fake_api.requests_to("GET", "/files/")[-1]
+        self.assertEqual(resumed_request.headers["Range"], f"bytes={partial_size_bytes}-")
+        self.assertEqual(resumed_request.headers["If-Range"], self.fake_api.etag(FILE_PATH))
+
+    def test_restart_download_of_replaced_file(self) -> None:
+        self.interrupt_download(cut_after_bytes=100_000)
+        new_content = CONTENT[::-1]
+        self.fake_api.files[FILE_PATH] = new_content
+
+        size_bytes = download_file(self.api_client, FILE_PATH, self.destination, verify_checksum=True)
+
+        self.assertEqual(size_bytes, len(new_content))
+        self.assertEqual(self.read_destination(), new_content)
+        # the range was of the new version of the file, so the whole file was requested again
+        resumed_request, restarted_request = self.fake_api.requests_to("GET", "/files/")[-2:]
+        self.assertIn("Range", resumed_request.headers)
+        self.assertNotIn("Range", restarted_request.headers)
+
+    def test_restart_download_of_replaced_file_with_partial_download_as_long(self) -> None:
+        self.interrupt_download(cut_after_bytes=100_000)
+        self.fake_api.files[FILE_PATH] = b"short"
+
+        size_bytes = download_file(self.api_client, FILE_PATH, self.destination)
+
+        self.assertEqual(size_bytes, 5)
+        self.assertEqual(self.read_destination(), b"short")
+
+    def test_download_again_file_not_left_by_download_file(self) -> None:
+        with open(self.destination, "wb") as file:
+            file.write(CONTENT[:1000])
+
+        download_file(self.api_client, FILE_PATH, self.destination)
+
+        self.assertEqual(self.read_destination(), CONTENT)
+        self.assertNotIn("Range", self.fake_api.requests_to("GET", "/files/")[-1].headers)
+
+    def test_remove_download_not_matching_etag(self) -> None:
+        self.fake_api.etags[FILE_PATH] = '"' + "0" * 32 + '"'
+
+        with self.assertRaises(DownloadError):
+            download_file(self.api_client, FILE_PATH, self.destination, verify_checksum=True)
+
+        self.assertFalse(os.path.exists(self.destination))
+        self.assertFalse(os.path.exists(self.etag_path))
+
+
+class TestDownloadFileInParallel(FakeFilesApiTestCase):
+    """download_file_in_parallel unit test"""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.fake_api.files[FILE_PATH] = CONTENT
+        self.destination = os.path.join(self.temp_dir, "clip.bin")
+
+    def read_destination(self) -> bytes:
+        with open(self.destination, "rb") as file:
+            return file.read()
+
+    def range_requests(self) -> List[str]:
+        return [request.headers["Range"] for request in self.fake_api.requests_to("GET", "/files/")]
+
+    def test_download_file_in_parallel(self) -> None:
+        size_bytes = download_file_in_parallel(
+            self.api_client, FILE_PATH, self.destination, part_size_bytes=10_000, max_concurrency=4
+        )
+
+        self.assertEqual(size_bytes, len(CONTENT))
+        self.assertEqual(self.read_destination(), CONTENT)
+        self.assertEqual(
+            sorted(self.range_requests()),
+            sorted(
+                f"bytes={first_byte}-{min(first_byte + 10_000, len(CONTENT)) - 1}"
+                for first_byte in range(0, len(CONTENT), 10_000)
+            ),
+        )
+
+    def test_retry_range_from_last_byte_received(self) -> None:
+        self.fake_api.cut_responses_after_bytes = [3_000]
+
+        download_file_in_parallel(
+            self.api_client,
+            FILE_PATH,
+            self.destination,
+            part_size_bytes=10_000,
+            max_concurrency=1,
+            chunk_size_bytes=1024,
+        )
+
+        self.assertEqual(self.read_destination(), CONTENT)
+        first_range, retried_range = self.range_requests()[:2]
+        self.assertEqual(first_range, "bytes=0-9999")
+        retried_first_byte = int(retried_range.split("=")[1].split("-")[0])
+        self.assertTrue(0 < retried_first_byte <= 3_000, retried_range)
+
+    def test_give_up_range_after_max_attempts(self) -> None:
+        self.fake_api.cut_responses_after_bytes = [1_000, 1_000, 1_000]
+
+        with self.assertRaises(DownloadError):
+            download_file_in_parallel(
+                self.api_client,
+                FILE_PATH,
+                self.destination,
+                part_size_bytes=10_000,
+                max_concurrency=1,
+                max_attempts=3,
+                chunk_size_bytes=1024,
+            )
+
+    def test_abort_when_file_replaced_during_download(self) -> None:
+        ranges_requested = []
+
+        def replace_file_after_first_range(file_path: str) -> None:
+            ranges_requested.append(file_path)
+            if len(ranges_requested) == 2:
+                self.fake_api.files[FILE_PATH] = CONTENT[::-1]
+
+        self.fake_api.on_get_file = replace_file_after_first_range
+
+        with self.assertRaisesRegex(DownloadError, "changed during the download"):
+            download_file_in_parallel(
+                self.api_client, FILE_PATH, self.destination, part_size_bytes=10_000, max_concurrency=1
+            )
+
+    def test_reject_download_not_matching_etag(self) -> None:
+        self.fake_api.etags[FILE_PATH] = '"' + "0" * 32 + '"'
+
+        with self.assertRaisesRegex(DownloadError, "does not match the ETag"):
+            download_file_in_parallel(self.api_client, FILE_PATH, self.destination, part_size_bytes=10_000)
+
+
+if __name__ == "__main__":
+    unittest.main()
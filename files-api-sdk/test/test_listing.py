@@ -0,0 +1,41 @@
+"""Tests of `files_api_sdk.listing`, against a fake Files API."""
+
+import unittest
+from contextlib import closing
+
+from files_api_sdk.listing import iter_files
+
+from .fake_files_api import FakeFilesApiTestCase
+
+
+class TestIterFiles(FakeFilesApiTestCase):
+    """iter_files unit test"""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.fake_api.files.update({f"logs/{file_num:04}.log": b"x" * file_num for file_num in range(1000)})
+        self.fake_api.files["other.txt"] = b"abc"
+
+    def test_iter_files(self) -> None:
+        # lines are split across chunks, so each is reassembled before it is parsed
+        files = list(iter_files(self.api_client, chunk_size_bytes=100))
+
+        self.assertEqual([file.file_path for file in files], sorted(self.fake_api.files))
+        self.assertEqual(files[-1].size_bytes, 3)
+
+    def test_iter_files_in_directory(self) -> None:
+        files = list(iter_files(self.api_client, directory="logs/"))
+
+        self.assertEqual(len(files), 1000)
+        self.assertEqual((files[0].file_path, files[0].size_bytes), ("logs/0000.log", 0))
+
+    def test_stop_early(self) -> None:
+        with closing(iter_files(self.api_client, chunk_size_bytes=100)) as files:
+            self.assertEqual(next(files).file_path, "logs/0000.log")
+
+        # the connection of the unfinished listing was dropped rather than reused
+        self.assertEqual(len(list(iter_files(self.api_client))), 1001)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+"""Tests of `files_api_sdk.uploads`, against a fake Files API."""
+
+import io
+import os
+import unittest
+from typing import (
+    Any,
+    List,
+)
+
+from files_api_sdk.uploads import (
+    UploadError,
+    upload_file,
+)
+
+from .fake_files_api import FakeFilesApiTestCase
+
+FILE_PATH = "logs/app.log"
+CONTENT = bytes(range(256)) * 1000
+
+
+class TestUploadFileInOneRequest(FakeFilesApiTestCase):
+    """upload_file unit test, for files sent as one streamed request"""
+
+    def test_upload_file_from_path(self) -> None:
+        source_path = os.path.join(self.temp_dir, "app.log")
+        with open(source_path, "wb") as file:
+            file.write(CONTENT)
+        progress = []
+
+        response = upload_file(
+            self.api_client, FILE_PATH, source_path, on_progress=lambda *args: progress.append(args)
+        )
+
+        self.assertEqual(response.file_path, FILE_PATH)
+        self.assertEqual(self.fake_api.files[FILE_PATH], CONTENT)
+        (request,) = self.fake_api.requests_to("PUT", "/files/")
+        self.assertEqual(int(request.headers["Content-Length"]), len(request.body))
+        self.assertNotIn("Transfer-Encoding", request.headers)
+        self.assertEqual(progress[-1], (len(CONTENT), len(CONTENT)))
+
+    def test_upload_file_from_file_object_position(self) -> None:
+        upload_file(self.api_client, FILE_PATH, io.BytesIO(b"skipped" + CONTENT), chunk_size_bytes=1024)
+
+        self.assertEqual(self.fake_api.files[FILE_PATH], b"skipped" + CONTENT)
+
+        source = io.BytesIO(b"skipped" + CONTENT)
+        source.seek(len(b"skipped"))
+        upload_file(self.api_client, FILE_PATH, source, chunk_size_bytes=1024)
+
+        self.assertEqual(self.fake_api.files[FILE_PATH], CONTENT)
+
+    def test_upload_file_from_iterable_in_chunks(self) -> None:
+        chunks = [CONTENT[:1000], b"", CONTENT[1000:]]
+        progress = []
+
+        upload_file(self.api_client, FILE_PATH, iter(chunks), on_progress=lambda *args: progress.append(args))
+
+        self.assertEqual(self.fake_api.files[FILE_PATH], CONTENT)
+        (request,) = self.fake_api.requests_to("PUT", "/files/")
+        self.assertEqual(request.headers["Transfer-Encoding"], "chunked")
+        self.assertNotIn("Content-Length", request.headers)
+        self.assertEqual(progress, [(1000, None), (len(CONTENT), None)])
+
+
+class TestUploadFileInSession(FakeFilesApiTestCase):
+    """upload_file unit test, for files sent as the parts of an upload session"""
+
+    def upload(self, **kwargs: Any) -> None:
+        upload_file(
+            self.api_client,
+            FILE_PATH,
+            io.BytesIO(CONTENT),
+            resumable_threshold_bytes=1000,
+            part_size_bytes=10_000,
+            **kwargs,
+        )
+
+    def part_sizes(self) -> List[int]:
+        return [len(request.body) for request in self.fake_api.requests_to("PUT", "/upload-sessions/")]
+
+    def test_upload_file_in_session(self) -> None:
+        progress = []
+
+        self.upload(max_concurrency=4, on_progress=lambda *args: progress.append(args))
+
+        self.assertEqual(self.fake_api.files[FILE_PATH], CONTENT)
+        self.assertEqual(self.fake_api.requests_to("PUT", "/files/"), [])
+        self.assertEqual(sorted(self.part_sizes()), [6_000] + [10_000] * 25)
+        self.assertEqual(self.fake_api.upload_sessions, {})
+        self.assertEqual(progress[-1], (len(CONTENT), len(CONTENT)))
+
+    def test_raise_part_size_to_server_min(self) -> None:
+        self.fake_api.min_part_size_bytes = 100_000
+
+        self.upload()
+
+        self.assertEqual(self.fake_api.files[FILE_PATH], CONTENT)
+        self.assertEqual(sorted(self.part_sizes()), [56_000, 100_000, 100_000])
+
+    def test_fall_back_to_one_request_without_upload_sessions(self) -> None:
+        for status in (404, 405):
+            with self.subTest(status=status):
+                self.fake_api.upload_sessions_status = status
+                self.fake_api.requests.clear()
+
+                self.upload()
+
+                self.assertEqual(self.fake_api.files.pop(FILE_PATH), CONTENT)
+                self.assertEqual(len(self.fake_api.requests_to("PUT", "/files/")), 1)
+                self.assertEqual(self.part_sizes(), [])
+
+    def test_retry_failed_part(self) -> None:
+        self.fake_api.part_failures = {3: 2}
+
+        self.upload(max_attempts=3)
+
+        self.assertEqual(self.fake_api.files[FILE_PATH], CONTENT)
+        part_requests = self.fake_api.requests_to("PUT", "/upload-sessions/")
+        self.assertEqual(len([request for request in part_requests if request.path.endswith("/parts/3")]), 3)
+
+    def test_abort_session_when_part_fails_every_attempt(self) -> None:
+        self.fake_api.part_failures = {3: 3}
+
+        with self.assertRaisesRegex(UploadError, "Part 3"):
+            self.upload(max_attempts=3)
+
+        self.assertNotIn(FILE_PATH, self.fake_api.files)
+        self.assertEqual(len(self.fake_api.aborted_session_ids), 1)
+        self.assertEqual(self.fake_api.requests_to("POST", "/upload-sessions/"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -88,6 +88,11 @@ function run-mock {
     #lsof -i :5002 | grep LISTEN | awk '{print $2}' | xargs kill -9
 }
 
+# compare the metadata index with the bucket and repair any difference, e.g. ./run.sh reconcile-metadata-index --directory some/dir/
+function reconcile-metadata-index {
+    python scripts/reconcile-metadata-index.py "$@"
+}
+
 # run linting, formatting, and other static code quality tools
 function lint {
     pre-commit run --all-files
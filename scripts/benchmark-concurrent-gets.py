@@ -0,0 +1,229 @@
+# pylint: disable=invalid-name
+"""
+Load benchmark for `GET /files/{file_path}` against a local moto S3 server.
+
+Fires bursts of concurrent GET requests at two apps served by uvicorn on one worker each:
+
+- `baseline`: a minimal app whose async handler calls the blocking `object_exists_in_s3` and
+  `fetch_s3_object` directly, which is how the routes behaved before the async S3 layer existed.
+- `files-api`: the real app created by `files_api.main.create_app`.
+
+and prints latency percentiles for each, e.g.
+
+    python scripts/benchmark-concurrent-gets.py --concurrency 200 --rounds 5
+
+A local moto server answers in about a millisecond, far faster than S3 does over a network,
+so `--s3-latency-ms` adds a simulated round trip time to every call the apps make to S3.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from typing import (
+    List,
+    NamedTuple,
+)
+
+import boto3
+import httpx
+import uvicorn
+from fastapi import (
+    FastAPI,
+    HTTPException,
+    Request,
+    status,
+)
+from fastapi.responses import StreamingResponse
+
+from files_api.main import create_app
+from files_api.s3.read_objects import (
+    fetch_s3_object,
+    object_exists_in_s3,
+)
+from files_api.settings import Settings
+
+BUCKET_NAME = "benchmark-concurrent-gets"
+OBJECT_KEY = "benchmark/object.bin"
+
+
+class Args(NamedTuple):
+    """CLI arguments for the script."""
+
+    concurrency: int
+    rounds: int
+    object_size_bytes: int
+    s3_latency_ms: int
+    moto_port: int
+    app_port: int
+
+
+class LatencyReport(NamedTuple):
+    """Latency percentiles (in milliseconds) of one benchmarked app."""
+
+    name: str
+    p50: float
+    p90: float
+    p99: float
+    requests_per_second: float
+
+
+def main() -> None:
+    args = parse_args()
+
+    point_at_moto_server(port=args.moto_port)
+    moto_server = start_moto_server(port=args.moto_port)
+
+    try:
+        s3_client = boto3.client("s3")
+        s3_client.create_bucket(Bucket=BUCKET_NAME)
+        s3_client.put_object(Bucket=BUCKET_NAME, Key=OBJECT_KEY, Body=os.urandom(args.object_size_bytes))
+        simulate_s3_latency(latency_ms=args.s3_latency_ms)
+
+        apps = {
+            "baseline": create_blocking_baseline_app(),
+            "files-api": create_app(settings=Settings(s3_bucket_name=BUCKET_NAME)),
+        }
+        reports = [benchmark_app(name=name, app=app, args=args) for name, app in apps.items()]
+    finally:
+        moto_server.terminate()
+        moto_server.wait()
+
+    print(
+        f"{args.concurrency} concurrent GETs x {args.rounds} rounds, {args.object_size_bytes} byte object, "
+        f"{args.s3_latency_ms} ms simulated S3 latency"
+    )
+    print(f"{'app':<12}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+    for report in reports:
+        print(
+            f"{report.name:<12}{report.p50:>10.1f}{report.p90:>10.1f}{report.p99:>10.1f}"
+            f"{report.requests_per_second:>10.0f}"
+        )
+
+
+def parse_args() -> Args:
+    parser = argparse.ArgumentParser(description="Benchmark concurrent GET /files/{file_path} requests")
+    parser.add_argument("--concurrency", type=int, default=200, help="Number of in-flight GET requests")
+    parser.add_argument("--rounds", type=int, default=5, help="Number of bursts of concurrent requests")
+    parser.add_argument("--object-size-bytes", type=int, default=64 * 1024, help="Size of the object fetched")
+    parser.add_argument("--s3-latency-ms", type=int, default=20, help="Simulated round trip time per S3 call")
+    parser.add_argument("--moto-port", type=int, default=5055, help="Port for the moto S3 server")
+    parser.add_argument("--app-port", type=int, default=8055, help="Port for the app under test")
+    args = parser.parse_args()
+    return Args(
+        concurrency=args.concurrency,
+        rounds=args.rounds,
+        object_size_bytes=args.object_size_bytes,
+        s3_latency_ms=args.s3_latency_ms,
+        moto_port=args.moto_port,
+        app_port=args.app_port,
+    )
+
+
+def point_at_moto_server(port: int) -> None:
+    os.environ["AWS_ACCESS_KEY_ID"] = "testing"
+    os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"
+    os.environ["AWS_DEFAULT_REGION"] = "us-east-1"
+    os.environ["AWS_ENDPOINT_URL"] = f"http://127.0.0.1:{port}"
+
+
+def start_moto_server(port: int, max_retries: int = 50, retry_delay_seconds: float = 0.1) -> subprocess.Popen:
+    """Start a moto server in its own process so that it does not compete with the apps for the GIL."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "moto.server", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    for _ in range(max_retries):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/moto-api/")
+            return process
+        except httpx.ConnectError:
+            time.sleep(retry_delay_seconds)
+
+    process.terminate()
+    raise RuntimeError(f"Moto server at port {port} failed to start after {max_retries} attempts.")
+
+
+def simulate_s3_latency(latency_ms: int) -> None:
+    """Sleep for `latency_ms` before every S3 request sent by clients of the default boto3 session."""
+
+    def _sleep(**kwargs) -> None:
+        time.sleep(latency_ms / 1000)
+
+    boto3.DEFAULT_SESSION.events.register("before-send.s3", _sleep)
+
+
+def create_blocking_baseline_app() -> FastAPI:
+    """Create an app whose GET handler blocks the event loop while calling S3."""
+    app = FastAPI()
+
+    @app.get("/files/{file_path:path}")
+    async def get_file(request: Request, file_path: str) -> StreamingResponse:
+        if not object_exists_in_s3(bucket_name=BUCKET_NAME, object_key=file_path):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+        get_object_response = fetch_s3_object(bucket_name=BUCKET_NAME, object_key=file_path)
+        return StreamingResponse(content=get_object_response["Body"], media_type=get_object_response["ContentType"])
+
+    return app
+
+
+def benchmark_app(name: str, app: FastAPI, args: Args) -> LatencyReport:
+    """Serve `app` with uvicorn in a background thread and measure GET latencies against it."""
+    config = uvicorn.Config(app, host="127.0.0.1", port=args.app_port, log_level="warning", timeout_keep_alive=120)
+    server = uvicorn.Server(config)
+    server_thread = threading.Thread(target=server.run, daemon=True)
+    server_thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    try:
+        latencies_ms, elapsed_seconds = asyncio.run(
+            fire_requests(
+                url=f"http://127.0.0.1:{args.app_port}/files/{OBJECT_KEY}",
+                concurrency=args.concurrency,
+                rounds=args.rounds,
+            )
+        )
+    finally:
+        server.should_exit = True
+        server_thread.join()
+
+    quantiles = statistics.quantiles(latencies_ms, n=100)
+    return LatencyReport(
+        name=name,
+        p50=quantiles[49],
+        p90=quantiles[89],
+        p99=quantiles[98],
+        requests_per_second=len(latencies_ms) / elapsed_seconds,
+    )
+
+
+async def fire_requests(url: str, concurrency: int, rounds: int) -> tuple[List[float], float]:
+    """Send `rounds` bursts of `concurrency` simultaneous GETs; return per-request latencies and total time."""
+    latencies_ms: List[float] = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        # warm up connections so that connection setup is not part of the measurement
+        await asyncio.gather(*(client.get(url) for _ in range(concurrency)))
+
+        async def timed_get() -> None:
+            start = time.perf_counter()
+            response = await client.get(url)
+            response.raise_for_status()
+            latencies_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            await asyncio.gather(*(timed_get() for _ in range(concurrency)))
+        elapsed_seconds = time.perf_counter() - start
+
+    return latencies_ms, elapsed_seconds
+
+
+if __name__ == "__main__":
+    main()
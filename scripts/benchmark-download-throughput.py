@@ -0,0 +1,260 @@
+# pylint: disable=invalid-name
+"""
+Throughput benchmark for `GET /files/{file_path}` downloads against a local moto S3 server.
+
+Downloads objects of several sizes from two apps served by uvicorn on one worker each:
+
+- `baseline`: a minimal app that hands the botocore `StreamingBody` straight to `StreamingResponse`,
+  which is how `get_file` streamed files before `iter_s3_object_body_async` existed. Starlette then
+  iterates the body in 1 KiB chunks, with one hop to a worker thread per chunk.
+- `files-api`: the real app created by `files_api.main.create_app`.
+
+and prints the throughput of each in MB/s per worker, e.g.
+
+    python scripts/benchmark-download-throughput.py --object-sizes 1024 1048576 1073741824 --chunk-size-bytes 262144
+
+For each object size, enough downloads are made to transfer about `--bytes-per-size` bytes in total
+(at least one, and at most `--max-downloads`), with `--concurrency` downloads in flight at once.
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import (
+    List,
+    NamedTuple,
+)
+
+import boto3
+import httpx
+import uvicorn
+from fastapi import (
+    FastAPI,
+    Request,
+)
+from fastapi.responses import StreamingResponse
+
+from files_api.main import create_app
+from files_api.s3.async_objects import DEFAULT_STREAM_CHUNK_SIZE_BYTES
+from files_api.s3.read_objects import fetch_s3_object
+from files_api.settings import Settings
+
+BUCKET_NAME = "benchmark-download-throughput"
+KIB = 1024
+MIB = 1024 * KIB
+GIB = 1024 * MIB
+
+
+class Args(NamedTuple):
+    """CLI arguments for the script."""
+
+    object_sizes: List[int]
+    chunk_size_bytes: int
+    concurrency: int
+    bytes_per_size: int
+    max_downloads: int
+    moto_port: int
+    app_port: int
+
+
+class ThroughputReport(NamedTuple):
+    """Download throughput of one benchmarked app for one object size."""
+
+    name: str
+    object_size_bytes: int
+    downloads: int
+    megabytes_per_second: float
+    downloads_per_second: float
+
+
+def main() -> None:
+    args = parse_args()
+
+    point_at_moto_server(port=args.moto_port)
+    moto_server = start_moto_server(port=args.moto_port)
+
+    try:
+        s3_client = boto3.client("s3")
+        s3_client.create_bucket(Bucket=BUCKET_NAME)
+        for object_size in args.object_sizes:
+            s3_client.upload_fileobj(RandomBytesReader(object_size), BUCKET_NAME, object_key(object_size))
+
+        apps = {
+            "baseline": create_sync_body_baseline_app(),
+            "files-api": create_app(
+                settings=Settings(s3_bucket_name=BUCKET_NAME, download_chunk_size_bytes=args.chunk_size_bytes)
+            ),
+        }
+        reports = [report for name, app in apps.items() for report in benchmark_app(name=name, app=app, args=args)]
+    finally:
+        moto_server.terminate()
+        moto_server.wait()
+
+    print(f"{args.concurrency} concurrent downloads, {args.chunk_size_bytes} byte chunks, 1 uvicorn worker")
+    print(f"{'app':<12}{'object size':>14}{'downloads':>12}{'MB/s':>10}{'downloads/s':>14}")
+    for report in reports:
+        print(
+            f"{report.name:<12}{report.object_size_bytes:>14}{report.downloads:>12}"
+            f"{report.megabytes_per_second:>10.1f}{report.downloads_per_second:>14.1f}"
+        )
+
+
+def parse_args() -> Args:
+    parser = argparse.ArgumentParser(description="Benchmark the throughput of GET /files/{file_path} downloads")
+    parser.add_argument(
+        "--object-sizes",
+        type=int,
+        nargs="+",
+        default=[KIB, MIB, GIB],
+        help="Sizes in bytes of the objects downloaded",
+    )
+    parser.add_argument(
+        "--chunk-size-bytes",
+        type=int,
+        default=DEFAULT_STREAM_CHUNK_SIZE_BYTES,
+        help="Chunk size of the files-api app's downloads",
+    )
+    parser.add_argument("--concurrency", type=int, default=8, help="Number of downloads in flight at once")
+    parser.add_argument("--bytes-per-size", type=int, default=2 * GIB, help="Bytes to download per object size")
+    parser.add_argument("--max-downloads", type=int, default=5000, help="Max downloads per object size")
+    parser.add_argument("--moto-port", type=int, default=5056, help="Port for the moto S3 server")
+    parser.add_argument("--app-port", type=int, default=8056, help="Port for the app under test")
+    args = parser.parse_args()
+    return Args(
+        object_sizes=args.object_sizes,
+        chunk_size_bytes=args.chunk_size_bytes,
+        concurrency=args.concurrency,
+        bytes_per_size=args.bytes_per_size,
+        max_downloads=args.max_downloads,
+        moto_port=args.moto_port,
+        app_port=args.app_port,
+    )
+
+
+def object_key(object_size: int) -> str:
+    return f"benchmark/{object_size}.bin"
+
+
+class RandomBytesReader(io.RawIOBase):
+    """File-like object of `size` pseudo-random bytes, generated as they are read rather than held in memory."""
+
+    def __init__(self, size: int):
+        self._remaining = size
+        self._block = os.urandom(MIB)
+
+    def readable(self) -> bool:
+        """Report that the stream supports reading."""
+        return True
+
+    def readinto(self, buffer) -> int:
+        """Fill `buffer` with up to one block of the remaining bytes; return how many were written."""
+        size = min(len(buffer), self._remaining, len(self._block))
+        buffer[:size] = self._block[:size]
+        self._remaining -= size
+        return size
+
+
+def point_at_moto_server(port: int) -> None:
+    os.environ["AWS_ACCESS_KEY_ID"] = "testing"
+    os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"
+    os.environ["AWS_DEFAULT_REGION"] = "us-east-1"
+    os.environ["AWS_ENDPOINT_URL"] = f"http://127.0.0.1:{port}"
+
+
+def start_moto_server(port: int, max_retries: int = 50, retry_delay_seconds: float = 0.1) -> subprocess.Popen:
+    """Start a moto server in its own process so that it does not compete with the apps for the GIL."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "moto.server", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    for _ in range(max_retries):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/moto-api/")
+            return process
+        except httpx.ConnectError:
+            time.sleep(retry_delay_seconds)
+
+    process.terminate()
+    raise RuntimeError(f"Moto server at port {port} failed to start after {max_retries} attempts.")
+
+
+def create_sync_body_baseline_app() -> FastAPI:
+    """Create an app whose GET handler streams the botocore body as a synchronous iterator."""
+    app = FastAPI()
+
+    @app.get("/files/{file_path:path}")
+    async def get_file(request: Request, file_path: str) -> StreamingResponse:
+        get_object_response = fetch_s3_object(bucket_name=BUCKET_NAME, object_key=file_path)
+        return StreamingResponse(content=get_object_response["Body"], media_type=get_object_response["ContentType"])
+
+    return app
+
+
+def benchmark_app(name: str, app: FastAPI, args: Args) -> List[ThroughputReport]:
+    """Serve `app` with uvicorn in a background thread and measure download throughput against it."""
+    config = uvicorn.Config(app, host="127.0.0.1", port=args.app_port, log_level="warning", timeout_keep_alive=120)
+    server = uvicorn.Server(config)
+    server_thread = threading.Thread(target=server.run, daemon=True)
+    server_thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    reports: List[ThroughputReport] = []
+    try:
+        for object_size in args.object_sizes:
+            downloads = min(max(args.bytes_per_size // object_size, 1), args.max_downloads)
+            bytes_received, elapsed_seconds = asyncio.run(
+                download_repeatedly(
+                    url=f"http://127.0.0.1:{args.app_port}/files/{object_key(object_size)}",
+                    downloads=downloads,
+                    concurrency=args.concurrency,
+                )
+            )
+            assert bytes_received == downloads * object_size, "a download was truncated"
+            reports.append(
+                ThroughputReport(
+                    name=name,
+                    object_size_bytes=object_size,
+                    downloads=downloads,
+                    megabytes_per_second=bytes_received / elapsed_seconds / 1_000_000,
+                    downloads_per_second=downloads / elapsed_seconds,
+                )
+            )
+    finally:
+        server.should_exit = True
+        server_thread.join()
+
+    return reports
+
+
+async def download_repeatedly(url: str, downloads: int, concurrency: int) -> tuple[int, float]:
+    """Download `url` `downloads` times with `concurrency` downloads in flight; return bytes received and total time."""
+    bytes_received = 0
+    remaining = downloads
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=600) as client:
+
+        async def download_until_done() -> None:
+            nonlocal bytes_received, remaining
+            while remaining > 0:
+                remaining -= 1
+                async with client.stream("GET", url) as response:
+                    response.raise_for_status()
+                    async for chunk in response.aiter_raw():
+                        bytes_received += len(chunk)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(download_until_done() for _ in range(concurrency)))
+        elapsed_seconds = time.perf_counter() - start
+
+    return bytes_received, elapsed_seconds
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# pylint: disable=invalid-name
+"""
+Compare the metadata index of the Files API with a listing of its bucket, and repair any difference.
+
+The index only learns of the writes made through the API, so run this after files were written to
+the bucket some other way, e.g. on a schedule. Run on a new index file, this is the initial scan:
+
+    S3_BUCKET_NAME=some-bucket METADATA_INDEX_PATH=index.sqlite3 python scripts/reconcile-metadata-index.py
+
+The same can be done on a running API with `POST /admin/metadata-index/reconcile`.
+"""
+
+import argparse
+import sys
+from typing import (
+    NamedTuple,
+    Optional,
+)
+
+import boto3
+
+from files_api.s3.metadata_index import (
+    MetadataIndex,
+    reconcile_metadata_index,
+)
+from files_api.s3.read_objects import DEFAULT_LISTING_MAX_CONCURRENCY
+from files_api.settings import Settings
+
+
+class Args(NamedTuple):
+    """CLI arguments for the script."""
+
+    index_path: Optional[str]
+    directory: str
+    max_concurrency: int
+
+
+def main() -> None:
+    args = parse_args()
+    # the bucket, and by default the index, of the API, read from the same environment variables
+    settings = Settings()
+    index_path = args.index_path or settings.metadata_index_path
+    if index_path is None:
+        sys.exit("No metadata index: pass --index-path or set METADATA_INDEX_PATH")
+
+    metadata_index = MetadataIndex(path=index_path)
+    try:
+        report = reconcile_metadata_index(
+            metadata_index,
+            settings.s3_bucket_name,
+            prefix=args.directory,
+            max_concurrency=args.max_concurrency,
+            s3_client=boto3.client("s3"),
+        )
+    finally:
+        metadata_index.close()
+
+    print(
+        f"Reconciled s3://{settings.s3_bucket_name}/{args.directory}: {report.files_added} files added, "
+        f"{report.files_updated} updated, {report.files_removed} removed"
+    )
+
+
+def parse_args() -> Args:
+    parser = argparse.ArgumentParser(description="Reconcile the metadata index of the Files API with its bucket")
+    parser.add_argument("--index-path", help="Path of the SQLite index file. Defaults to `METADATA_INDEX_PATH`")
+    parser.add_argument("--directory", default="", help="Only reconcile the files under this directory")
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=DEFAULT_LISTING_MAX_CONCURRENCY,
+        help="Max number of ranges of keys listed at once",
+    )
+    args = parser.parse_args()
+    return Args(index_path=args.index_path, directory=args.directory, max_concurrency=args.max_concurrency)
+
+
+if __name__ == "__main__":
+    main()
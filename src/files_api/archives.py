@@ -0,0 +1,258 @@
+"""
+Download of every file under a directory as one zip or tar archive, built while it is being sent.
+
+The files are fetched from S3 by `prefetch_s3_objects_async`, a bounded number ahead of the one being
+written, and each one is written to the archive chunk by chunk as it is read. Nothing is buffered
+beyond the prefetch window and the chunk being sent, so memory use does not grow with the size of
+the directory, and the client starts receiving the archive as soon as the first file is fetched.
+
+Since the archive is sent as it is built, an error from S3 partway through can no longer change the
+response status: the response is cut short instead, and the client sees a truncated archive.
+"""
+
+import tarfile
+import zipfile
+import zlib
+from abc import (
+    ABC,
+    abstractmethod,
+)
+from contextlib import asynccontextmanager
+from datetime import (
+    datetime,
+    timezone,
+)
+from enum import Enum
+from typing import (
+    IO,
+    AsyncIterator,
+    List,
+    Optional,
+)
+
+from anyio import to_thread
+
+from files_api.s3.async_objects import (
+    DEFAULT_STREAM_CHUNK_SIZE_BYTES,
+    iter_s3_object_keys_async,
+)
+from files_api.s3.prefetch import (
+    DEFAULT_PREFETCH_MAX_BUFFERED_OBJECT_BYTES,
+    DEFAULT_PREFETCH_MAX_OBJECTS,
+    PrefetchedObject,
+    prefetch_s3_objects_async,
+)
+
+try:
+    from mypy_boto3_s3 import S3Client
+except ImportError:
+    ...
+
+# the earliest timestamp a zip entry can record
+_MIN_ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+class ArchiveFormat(str, Enum):
+    """Formats a directory can be downloaded as."""
+
+    ZIP = "zip"
+    TAR = "tar"
+    TAR_GZ = "tar.gz"
+
+    @property
+    def media_type(self) -> str:
+        """The `Content-Type` of archives in this format."""
+        return {
+            ArchiveFormat.ZIP: "application/zip",
+            ArchiveFormat.TAR: "application/x-tar",
+            ArchiveFormat.TAR_GZ: "application/gzip",
+        }[self]
+
+
+@asynccontextmanager
+async def open_archive_stream(
+    bucket_name: str,
+    directory: str,
+    archive_format: ArchiveFormat,
+    s3_client: "S3Client",
+    max_prefetch: int = DEFAULT_PREFETCH_MAX_OBJECTS,
+    max_buffered_object_bytes: int = DEFAULT_PREFETCH_MAX_BUFFERED_OBJECT_BYTES,
+    chunk_size_bytes: int = DEFAULT_STREAM_CHUNK_SIZE_BYTES,
+) -> AsyncIterator[AsyncIterator[bytes]]:
+    """
+    Start fetching the files under `directory` and give an iterator over the bytes of an archive of them.
+
+    Paths in the archive are relative to the directory holding `directory`, so that e.g. the files
+    under "photos/2024/" are archived as "2024/...". Uploading the archive with
+    `POST /files/bulk-upload` to the same parent directory therefore restores the same paths.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param directory: Prefix of the paths of the files to archive.
+    :param archive_format: The format of the archive.
+    :param s3_client: The boto3 S3 client to fetch the files with.
+    :param max_prefetch: Max number of files fetched ahead of the one being written.
+    :param max_buffered_object_bytes: Size up to which files are read in full ahead of time.
+    :param chunk_size_bytes: Size of the chunks larger files are read in.
+
+    :return: A context manager giving the archive as an iterator of chunks, to be consumed inside it.
+    """
+    parent_directory, _, _ = directory.rstrip("/").rpartition("/")
+    object_keys = iter_s3_object_keys_async(bucket_name=bucket_name, prefix=directory, s3_client=s3_client)
+    async with prefetch_s3_objects_async(
+        bucket_name=bucket_name,
+        object_keys=object_keys,
+        max_prefetch=max_prefetch,
+        max_buffered_object_bytes=max_buffered_object_bytes,
+        s3_client=s3_client,
+    ) as prefetched_objects:
+        yield _iter_archive_chunks(
+            archive_format=archive_format,
+            prefetched_objects=prefetched_objects,
+            base_directory=f"{parent_directory}/" if parent_directory else "",
+            chunk_size_bytes=chunk_size_bytes,
+        )
+
+
+async def _iter_archive_chunks(
+    archive_format: ArchiveFormat,
+    prefetched_objects: AsyncIterator[PrefetchedObject],
+    base_directory: str,
+    chunk_size_bytes: int,
+) -> AsyncIterator[bytes]:
+    """Write each object to the archive as it is read, yielding the archive's bytes as they are produced."""
+    writer: _ArchiveWriter = _ZipWriter() if archive_format == ArchiveFormat.ZIP else _TarWriter()
+    # gzip is applied to the tar stream as a whole, in worker threads since compression is CPU-bound
+    compressor = zlib.compressobj(wbits=31) if archive_format == ArchiveFormat.TAR_GZ else None
+
+    async def encode(data: bytes) -> bytes:
+        return await to_thread.run_sync(compressor.compress, data) if compressor is not None and data else data
+
+    async for prefetched_object in prefetched_objects:
+        file_path = prefetched_object.object_key.removeprefix(base_directory)
+        last_modified = prefetched_object.last_modified or datetime.now(timezone.utc)
+        if data := await encode(writer.start_file(file_path, prefetched_object.size_bytes, last_modified)):
+            yield data
+        async for chunk in prefetched_object.iter_chunks(chunk_size_bytes=chunk_size_bytes):
+            if data := await encode(writer.write(chunk)):
+                yield data
+        if data := await encode(writer.end_file()):
+            yield data
+
+    data = await encode(writer.close())
+    yield data + compressor.flush() if compressor is not None else data
+
+
+class _ArchiveWriter(ABC):
+    """Incremental writer of an archive: each method returns the archive bytes it produced."""
+
+    @abstractmethod
+    def start_file(self, file_path: str, size_bytes: int, last_modified: datetime) -> bytes:
+        """Start the entry of a file of the given size."""
+
+    @abstractmethod
+    def write(self, chunk: bytes) -> bytes:
+        """Write the next chunk of the current file."""
+
+    @abstractmethod
+    def end_file(self) -> bytes:
+        """Finish the entry of the current file."""
+
+    @abstractmethod
+    def close(self) -> bytes:
+        """Finish the archive."""
+
+
+class _TarWriter(_ArchiveWriter):
+    """Writes tar entries directly: a header block, the content, then padding to the next 512-byte block."""
+
+    def __init__(self) -> None:
+        self._file_size_bytes = 0
+        self._archive_size_bytes = 0
+
+    def start_file(self, file_path: str, size_bytes: int, last_modified: datetime) -> bytes:
+        """Write the header of the file, in PAX format so that long paths and large sizes are allowed."""
+        member = tarfile.TarInfo(file_path)
+        member.size = size_bytes
+        member.mtime = int(last_modified.timestamp())
+        member.mode = 0o644
+        self._file_size_bytes = size_bytes
+        return self._count(member.tobuf(format=tarfile.PAX_FORMAT))
+
+    def write(self, chunk: bytes) -> bytes:
+        """Pass content through unchanged."""
+        return self._count(chunk)
+
+    def end_file(self) -> bytes:
+        """Pad the content to a whole number of blocks."""
+        return self._count(tarfile.NUL * (-self._file_size_bytes % tarfile.BLOCKSIZE))
+
+    def close(self) -> bytes:
+        """Write the two empty end-of-archive blocks and pad the archive to a whole record, as `tarfile` does."""
+        end_of_archive_size = 2 * tarfile.BLOCKSIZE
+        record_padding_size = -(self._archive_size_bytes + end_of_archive_size) % tarfile.RECORDSIZE
+        return tarfile.NUL * (end_of_archive_size + record_padding_size)
+
+    def _count(self, data: bytes) -> bytes:
+        self._archive_size_bytes += len(data)
+        return data
+
+
+class _WriteBuffer:
+    """Write-only file object collecting what `zipfile` writes until it is taken with `take`."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        """Collect the bytes written."""
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        """Do nothing: the bytes are taken by `take`."""
+
+    def take(self) -> bytes:
+        """Return and forget everything written since the last call."""
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class _ZipWriter(_ArchiveWriter):
+    """
+    Writes a zip archive with `zipfile`, to a buffer that is emptied after every call.
+
+    The buffer cannot seek, so `zipfile` records the size and CRC of each file in a data descriptor
+    after its content rather than in its header. Files are stored uncompressed: most large files are
+    already compressed, and compressing the others would hold up the event loop.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = _WriteBuffer()
+        self._archive = zipfile.ZipFile(self._buffer, mode="w", compression=zipfile.ZIP_STORED)  # type: ignore
+        self._file: Optional[IO[bytes]] = None
+
+    def start_file(self, file_path: str, size_bytes: int, last_modified: datetime) -> bytes:
+        """Write the local header of the file, using zip64 extensions if it is too large for plain zip."""
+        member = zipfile.ZipInfo(file_path, date_time=max(last_modified.timetuple()[:6], _MIN_ZIP_DATE_TIME))
+        member.external_attr = 0o644 << 16
+        # `zipfile` decides whether the entry needs zip64 extensions from the announced size
+        member.file_size = size_bytes
+        self._file = self._archive.open(member, mode="w")
+        return self._buffer.take()
+
+    def write(self, chunk: bytes) -> bytes:
+        """Write content, updating the CRC of the file."""
+        self._file.write(chunk)
+        return self._buffer.take()
+
+    def end_file(self) -> bytes:
+        """Write the data descriptor of the file."""
+        self._file.close()
+        self._file = None
+        return self._buffer.take()
+
+    def close(self) -> bytes:
+        """Write the central directory, listing every file of the archive."""
+        self._archive.close()
+        return self._buffer.take()
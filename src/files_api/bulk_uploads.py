@@ -0,0 +1,325 @@
+"""
+Upload of many files in one request, sent either as the files of a `multipart/form-data` form or as a tar or zip archive.
+
+The files are read from the request body one after the other, and each one is uploaded to S3 as
+soon as it has been read, while the next ones are still being read. Up to `max_concurrency`
+uploads are in flight at once; reading the body pauses while all of them are busy, so at most
+that many files are held in memory. Files larger than `max_file_bytes` are rejected rather than
+buffered: upload those individually with `PUT /files/{file_path}`, which streams them.
+
+Archives are read by `tarfile` and `zipfile` in a worker thread, which pulls the request body
+from the event loop as it needs it. Zip archives keep their table of contents at the end, so a
+zip body is spooled to a temporary file before its entries can be read.
+"""
+
+import io
+import mimetypes
+import posixpath
+import tarfile
+import tempfile
+import zipfile
+from functools import partial
+from typing import (
+    Awaitable,
+    Callable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+import anyio
+from anyio import (
+    from_thread,
+    to_thread,
+)
+from anyio.streams.memory import (
+    MemoryObjectReceiveStream,
+    MemoryObjectSendStream,
+)
+from botocore.exceptions import ClientError
+from fastapi import (
+    HTTPException,
+    Request,
+    status,
+)
+from python_multipart.multipart import parse_options_header
+
+from files_api.s3.async_objects import create_or_replace_s3_object_async
+from files_api.schemas import (
+    BulkUploadResult,
+    BulkUploadStatus,
+)
+from files_api.streaming_forms import iter_form_parts
+
+try:
+    from mypy_boto3_s3 import S3Client
+except ImportError:
+    ...
+
+DEFAULT_BULK_UPLOAD_MAX_CONCURRENCY = 32
+DEFAULT_BULK_UPLOAD_MAX_FILE_BYTES = 16 * 1024 * 1024
+
+# zip bodies are spooled in memory up to this size, and to a temporary file on disk beyond it
+_ZIP_SPOOL_MAX_MEMORY_BYTES = 16 * 1024 * 1024
+
+# tar archives, plain or compressed with gzip, bzip2 or xz: `tarfile` detects the compression itself
+_TAR_CONTENT_TYPES = {
+    b"application/x-tar",
+    b"application/tar",
+    b"application/gzip",
+    b"application/x-gzip",
+    b"application/x-gtar",
+    b"application/x-compressed-tar",
+    b"application/x-bzip2",
+    b"application/x-bzip-compressed-tar",
+    b"application/x-xz",
+    b"application/x-xz-compressed-tar",
+}
+_ZIP_CONTENT_TYPES = {b"application/zip", b"application/x-zip-compressed"}
+
+
+class UploadEntry(NamedTuple):
+    """One file read from a bulk upload request: its content, or why it cannot be uploaded."""
+
+    file_path: str
+    content: bytes = b""
+    content_type: Optional[str] = None
+    error: Optional[str] = None
+
+
+async def upload_files_from_request(
+    request: Request,
+    bucket_name: str,
+    directory: str,
+    s3_client: "S3Client",
+    max_concurrency: int = DEFAULT_BULK_UPLOAD_MAX_CONCURRENCY,
+    max_file_bytes: int = DEFAULT_BULK_UPLOAD_MAX_FILE_BYTES,
+    on_uploaded: Optional[Callable[[str], None]] = None,
+) -> List[BulkUploadResult]:
+    """
+    Upload every file in the body of a bulk upload request to S3, several at a time.
+
+    :param request: Request whose body is a `multipart/form-data` form, a tar archive (optionally
+        compressed) or a zip archive, according to its `Content-Type`.
+    :param bucket_name: The name of the S3 bucket.
+    :param directory: Prefix prepended to the path of every file, e.g. "path/to/".
+    :param s3_client: The boto3 S3 client to upload with.
+    :param max_concurrency: Max number of files being uploaded, and held in memory, at once.
+    :param max_file_bytes: Size above which a file is reported as failed instead of being uploaded.
+    :param on_uploaded: Called with the path of each file once it has been uploaded.
+
+    :raises HTTPException: 415 if the `Content-Type` of the request is not supported, 400 if the
+        archive cannot be read.
+
+    :return: The outcome for each file, in the order of the files in the request.
+    """
+    read_errors: List[HTTPException] = []
+    content_type, _ = parse_options_header(request.headers.get("Content-Type", ""))
+    if content_type == b"multipart/form-data":
+        read_entries = partial(_send_form_entries, request, directory, max_file_bytes)
+    elif content_type in _TAR_CONTENT_TYPES:
+        read_entries = partial(
+            _send_archive_entries, request, directory, max_file_bytes, _iter_tar_members, read_errors
+        )
+    elif content_type in _ZIP_CONTENT_TYPES:
+        read_entries = partial(
+            _send_archive_entries, request, directory, max_file_bytes, _iter_zip_members, read_errors
+        )
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Request body must be multipart/form-data, a tar archive or a zip archive",
+        )
+
+    # the reader waits for the uploader to take each entry, so that it never runs ahead of the uploads
+    send_entries, receive_entries = anyio.create_memory_object_stream[UploadEntry]()
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(read_entries, send_entries)
+        results = await _upload_entries(
+            bucket_name=bucket_name,
+            entries=receive_entries,
+            max_concurrency=max_concurrency,
+            s3_client=s3_client,
+            on_uploaded=on_uploaded,
+        )
+
+    # raised here rather than in the task group, which would wrap it in an exception group
+    if read_errors:
+        raise read_errors[0]
+    return results
+
+
+async def _upload_entries(
+    bucket_name: str,
+    entries: MemoryObjectReceiveStream[UploadEntry],
+    max_concurrency: int,
+    s3_client: "S3Client",
+    on_uploaded: Optional[Callable[[str], None]],
+) -> List[BulkUploadResult]:
+    """Upload entries as they are received, with at most `max_concurrency` uploads in flight."""
+    results: List[BulkUploadResult] = []
+    upload_slots = anyio.Semaphore(max_concurrency)
+
+    async def _upload(result_index: int, entry: UploadEntry) -> None:
+        try:
+            object_created = await create_or_replace_s3_object_async(
+                bucket_name=bucket_name,
+                object_key=entry.file_path,
+                file_content=entry.content,
+                content_type=entry.content_type,
+                s3_client=s3_client,
+            )
+            results[result_index] = BulkUploadResult(
+                file_path=entry.file_path,
+                status=BulkUploadStatus.CREATED if object_created else BulkUploadStatus.UPDATED,
+            )
+            if on_uploaded is not None:
+                on_uploaded(entry.file_path)
+        except ClientError as err:
+            results[result_index] = BulkUploadResult(
+                file_path=entry.file_path, status=BulkUploadStatus.FAILED, error=str(err)
+            )
+        finally:
+            upload_slots.release()
+
+    async with entries, anyio.create_task_group() as task_group:
+        async for entry in entries:
+            results.append(
+                BulkUploadResult(file_path=entry.file_path, status=BulkUploadStatus.FAILED, error=entry.error)
+            )
+            if entry.error is None:
+                # wait for a free slot *before* reading the next file to bound memory use
+                await upload_slots.acquire()
+                task_group.start_soon(_upload, len(results) - 1, entry)
+
+    return results
+
+
+async def _send_form_entries(
+    request: Request,
+    directory: str,
+    max_file_bytes: int,
+    send_entries: MemoryObjectSendStream[UploadEntry],
+) -> None:
+    """Send every file of a `multipart/form-data` body, named after its filename; other form fields are ignored."""
+    async with send_entries:
+        async for part in iter_form_parts(request):
+            if not part.filename:
+                continue
+            file_path = _join_file_path(directory, part.filename)
+            content = bytearray()
+            async for chunk in part.iter_chunks():
+                content += chunk
+                if len(content) > max_file_bytes:
+                    await send_entries.send(UploadEntry(file_path=file_path, error=_too_large_error(max_file_bytes)))
+                    break
+            else:
+                await send_entries.send(
+                    UploadEntry(file_path=file_path, content=bytes(content), content_type=part.content_type)
+                )
+
+
+# an archive member: its path in the archive, its size, and a function reading its content
+_ArchiveMember = Tuple[str, int, Callable[[], bytes]]
+
+
+async def _send_archive_entries(
+    request: Request,
+    directory: str,
+    max_file_bytes: int,
+    iter_members: Callable[[io.RawIOBase], Iterator[_ArchiveMember]],
+    read_errors: List[HTTPException],
+    send_entries: MemoryObjectSendStream[UploadEntry],
+) -> None:
+    """Read the members of an archive in a worker thread and send each regular file among them.
+
+    An archive that cannot be read is reported by appending a 400 error to `read_errors`.
+    """
+    body_chunks = request.stream().__aiter__()
+
+    async def next_body_chunk() -> bytes:
+        return await anext(body_chunks, b"")
+
+    def read_archive() -> None:
+        try:
+            for member_path, member_size, read_member in iter_members(_BlockingBodyReader(next_body_chunk)):
+                file_path = _join_file_path(directory, member_path)
+                if member_size > max_file_bytes:
+                    entry = UploadEntry(file_path=file_path, error=_too_large_error(max_file_bytes))
+                else:
+                    entry = UploadEntry(
+                        file_path=file_path, content=read_member(), content_type=mimetypes.guess_type(file_path)[0]
+                    )
+                from_thread.run(send_entries.send, entry)
+        except (tarfile.TarError, zipfile.BadZipFile, EOFError) as err:
+            read_errors.append(
+                HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid archive: {err}")
+            )
+
+    async with send_entries:
+        await to_thread.run_sync(read_archive)
+
+
+def _iter_tar_members(body: io.RawIOBase) -> Iterator[_ArchiveMember]:
+    """Read a tar archive, compressed or not, as a stream: each member is read as the body arrives."""
+    with tarfile.open(fileobj=body, mode="r|*") as archive:
+        for member in archive:
+            if member.isfile():
+                yield member.name, member.size, partial(_read_tar_member, archive, member)
+
+
+def _read_tar_member(archive: tarfile.TarFile, member: tarfile.TarInfo) -> bytes:
+    member_file = archive.extractfile(member)
+    assert member_file is not None, "regular files always have content"
+    return member_file.read()
+
+
+def _iter_zip_members(body: io.RawIOBase) -> Iterator[_ArchiveMember]:
+    """Spool a zip archive, then read its members using the table of contents at its end."""
+    with tempfile.SpooledTemporaryFile(max_size=_ZIP_SPOOL_MAX_MEMORY_BYTES) as spooled_body:
+        while chunk := body.read(1024 * 1024):
+            spooled_body.write(chunk)
+        spooled_body.seek(0)
+        with zipfile.ZipFile(spooled_body) as archive:
+            for member in archive.infolist():
+                if not member.is_dir():
+                    yield member.filename, member.file_size, partial(archive.read, member)
+
+
+class _BlockingBodyReader(io.RawIOBase):
+    """File-like view of a request body for use in a worker thread, fetching each chunk from the event loop."""
+
+    def __init__(self, next_chunk: Callable[[], Awaitable[bytes]]):
+        self._next_chunk = next_chunk
+        self._buffer = memoryview(b"")
+        self._at_end = False
+
+    def readable(self) -> bool:
+        """Report that the body can be read."""
+        return True
+
+    def readinto(self, buffer) -> int:
+        """Copy the next bytes of the body into `buffer`, waiting for the client to send them if needed."""
+        while not self._buffer and not self._at_end:
+            # a memoryview, so that consuming the start of a large chunk does not copy the rest of it
+            self._buffer = memoryview(from_thread.run(self._next_chunk))
+            # starlette signals the end of the body with an empty chunk
+            self._at_end = not self._buffer
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+def _join_file_path(directory: str, path_in_upload: str) -> str:
+    """Path of an uploaded file in the bucket, without the leading `/` or `./` archives often contain."""
+    return directory + posixpath.normpath(path_in_upload).lstrip("/")
+
+
+def _too_large_error(max_file_bytes: int) -> str:
+    return (
+        f"File is larger than the {max_file_bytes} bytes accepted in bulk uploads; "
+        "upload it on its own with PUT /files/{file_path} instead."
+    )
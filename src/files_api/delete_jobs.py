@@ -0,0 +1,360 @@
+"""
+Background jobs that delete every file under a directory, i.e. every object under a key prefix.
+
+Submitting a job returns immediately. The job then runs in the app's background task group,
+listing the prefix one page at a time and deleting the listed keys in concurrent batches. Its
+progress is checkpointed to a `JobStore` after every batch, so that:
+
+- its status can be read by any request, including ones served by another worker process sharing the store,
+- it can be cancelled, by leaving a cancellation request in the store for the job to pick up,
+- it resumes when the app restarts. Deleted keys are gone from the listing, so a resumed
+  job simply lists the prefix again from the start.
+
+A runner claims a job in the store before running it, so that when several worker processes
+share the store, each job is run by one of them at a time: a worker starting up resumes only
+the unfinished jobs that no live worker is running.
+"""
+
+import fcntl
+import os
+import time
+import uuid
+from abc import (
+    ABC,
+    abstractmethod,
+)
+from contextlib import (
+    aclosing,
+    asynccontextmanager,
+)
+from datetime import (
+    datetime,
+    timezone,
+)
+from enum import Enum
+from pathlib import Path
+from typing import (
+    IO,
+    AsyncIterator,
+    Dict,
+    List,
+    Optional,
+)
+
+import anyio
+from anyio import to_thread
+from anyio.abc import TaskGroup
+from pydantic import (
+    BaseModel,
+    Field,
+)
+
+from files_api.s3.async_objects import (
+    DEFAULT_DELETE_MAX_CONCURRENCY,
+    iter_delete_s3_objects_async,
+    iter_s3_object_keys_async,
+)
+from files_api.s3.content_cache import ContentCache
+from files_api.s3.metadata_cache import MetadataCache
+from files_api.s3.metadata_index import MetadataIndex
+
+try:
+    from mypy_boto3_s3 import S3Client
+except ImportError:
+    ...
+
+# failures beyond this many are counted but not recorded individually, to bound the size of the job state
+MAX_RECORDED_FAILURES = 100
+
+
+class JobStatus(str, Enum):
+    """Lifecycle of a background job."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+    FAILED = "failed"
+
+
+class DeleteFailure(BaseModel):
+    """A file that a delete job could not delete."""
+
+    file_path: str
+    error_code: Optional[str] = None
+    error_message: Optional[str] = None
+
+
+class DeletePrefixJob(BaseModel):
+    """State of a job deleting every file under a directory, as checkpointed to the job store."""
+
+    job_id: str
+    directory: str
+    status: JobStatus = JobStatus.PENDING
+    keys_scanned: int = 0
+    keys_deleted: int = 0
+    keys_failed: int = 0
+    failures: List[DeleteFailure] = Field(default_factory=list)
+    # time spent running, summed over every run of the job if it was resumed
+    elapsed_seconds: float = 0.0
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        """Whether the job has stopped for good, one way or another."""
+        return self.status in (JobStatus.COMPLETED, JobStatus.CANCELLED, JobStatus.FAILED)
+
+    @property
+    def keys_per_second(self) -> float:
+        """Average rate at which keys were deleted while the job was running."""
+        return self.keys_deleted / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+class JobStore(ABC):
+    """Interface of the durable storage of background job state."""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[DeletePrefixJob]:
+        """Return the last checkpointed state of a job, or None if there is no such job."""
+
+    @abstractmethod
+    def save(self, job: DeletePrefixJob) -> None:
+        """Checkpoint the state of a job."""
+
+    @abstractmethod
+    def list_unfinished(self) -> List[DeletePrefixJob]:
+        """Return the jobs that were pending or running when last checkpointed."""
+
+    @abstractmethod
+    def request_cancel(self, job_id: str) -> None:
+        """Ask a job to stop at its next checkpoint."""
+
+    @abstractmethod
+    def is_cancel_requested(self, job_id: str) -> bool:
+        """Whether a job has been asked to stop."""
+
+    @abstractmethod
+    def claim(self, job_id: str) -> bool:
+        """
+        Take exclusive ownership of a job, unless it is owned by a live runner, e.g. of another process.
+
+        An owner that dies without releasing its jobs must lose them, so that they can be resumed.
+
+        :return: Whether the job was claimed.
+        """
+
+    @abstractmethod
+    def release(self, job_id: str) -> None:
+        """Give up the ownership of a job taken with `claim`."""
+
+
+class FileJobStore(JobStore):
+    """
+    Job store keeping each job as a JSON file in a local directory, created on first use.
+
+    Cancellation requests are separate marker files, so that a running job checkpointing its
+    progress cannot overwrite a request made at the same time. A job is owned by holding an
+    exclusive `flock` on its lock file, which the OS releases when the owning process dies, so
+    ownership works across the processes of one host sharing the directory.
+    """
+
+    def __init__(self, directory: str):
+        self._directory = Path(directory)
+        self._claimed_lock_files: Dict[str, IO[str]] = {}
+
+    def get(self, job_id: str) -> Optional[DeletePrefixJob]:
+        """Read the state of a job from its file."""
+        # job ids come from request paths, so anything but the ids generated by `DeleteJobRunner.submit` is rejected
+        if not job_id.isalnum():
+            return None
+        try:
+            return DeletePrefixJob.model_validate_json(self._job_path(job_id).read_text())
+        except FileNotFoundError:
+            return None
+
+    def save(self, job: DeletePrefixJob) -> None:
+        """Write the state of a job to its file, atomically so that readers never see a partial file."""
+        self._directory.mkdir(parents=True, exist_ok=True)
+        job_path = self._job_path(job.job_id)
+        tmp_path = job_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(job.model_dump_json())
+        os.replace(tmp_path, job_path)
+
+    def list_unfinished(self) -> List[DeletePrefixJob]:
+        """Read every job file and keep the jobs that have not finished."""
+        if not self._directory.exists():
+            return []
+        jobs = (DeletePrefixJob.model_validate_json(path.read_text()) for path in self._directory.glob("*.json"))
+        return [job for job in jobs if not job.finished]
+
+    def request_cancel(self, job_id: str) -> None:
+        """Leave a marker file next to the job's file."""
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._job_path(job_id).with_suffix(".cancel").touch()
+
+    def is_cancel_requested(self, job_id: str) -> bool:
+        """Check for the job's marker file."""
+        return self._job_path(job_id).with_suffix(".cancel").exists()
+
+    def claim(self, job_id: str) -> bool:
+        """Lock the job's lock file, without waiting if another runner holds the lock."""
+        self._directory.mkdir(parents=True, exist_ok=True)
+        # the lock belongs to the open file, so a second claim from this process fails like one from another
+        lock_file = open(  # pylint: disable=consider-using-with
+            self._job_path(job_id).with_suffix(".lock"), "a", encoding="utf-8"
+        )
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        self._claimed_lock_files[job_id] = lock_file
+        return True
+
+    def release(self, job_id: str) -> None:
+        """Close the job's lock file, which releases the lock."""
+        lock_file = self._claimed_lock_files.pop(job_id, None)
+        if lock_file is not None:
+            lock_file.close()
+
+    def _job_path(self, job_id: str) -> Path:
+        return self._directory / f"{job_id}.json"
+
+
+class DeleteJobRunner:
+    """
+    Runs prefix delete jobs in the background of the app.
+
+    Jobs are started in the task group opened by `running()`, which the app enters for its
+    lifetime. Jobs still running when it exits are left unfinished in the store, and are
+    resumed by the next `running()`, e.g. after the app restarts.
+
+    The store is only accessed from worker threads, as its reads and writes may be slow file I/O.
+    """
+
+    def __init__(
+        self,
+        job_store: JobStore,
+        bucket_name: str,
+        s3_client: "S3Client",
+        metadata_cache: MetadataCache,
+        content_cache: Optional[ContentCache] = None,
+        metadata_index: Optional[MetadataIndex] = None,
+        max_concurrency: int = DEFAULT_DELETE_MAX_CONCURRENCY,
+    ):
+        self.job_store = job_store
+        self._bucket_name = bucket_name
+        self._s3_client = s3_client
+        self._metadata_cache = metadata_cache
+        self._content_cache = content_cache
+        self._metadata_index = metadata_index
+        self._max_concurrency = max_concurrency
+        self._task_group: Optional[TaskGroup] = None
+
+    @asynccontextmanager
+    async def running(self) -> AsyncIterator[None]:
+        """Accept jobs while the block runs, starting with the unfinished jobs found in the store."""
+        async with anyio.create_task_group() as task_group:
+            self._task_group = task_group
+            for job in await to_thread.run_sync(self.job_store.list_unfinished):
+                task_group.start_soon(self.run, job)
+            try:
+                yield
+            finally:
+                self._task_group = None
+                task_group.cancel_scope.cancel()
+
+    async def submit(self, directory: str) -> DeletePrefixJob:
+        """Create a job deleting every file under `directory` and start it in the background."""
+        if self._task_group is None:
+            raise RuntimeError("Delete jobs can only be submitted while the runner is running.")
+        job = DeletePrefixJob(job_id=uuid.uuid4().hex, directory=directory, created_at=datetime.now(timezone.utc))
+        await to_thread.run_sync(self.job_store.save, job)
+        self._task_group.start_soon(self.run, job)
+        return job
+
+    async def run(self, job: DeletePrefixJob) -> None:
+        """
+        Run a job to completion, checkpointing its progress after every batch of deletes.
+
+        Nothing is done if another runner owns the job, or if it finished since `job` was read.
+
+        Errors are recorded in the job rather than raised, so that one failing job cannot take the
+        app's other background jobs down with it. Cancellation of the task, e.g. at shutdown, is
+        not caught: the job is left as running in the store, to be resumed later.
+        """
+        if not await to_thread.run_sync(self.job_store.claim, job.job_id):
+            return
+        try:
+            # a previous owner may have made progress since `job` was read, e.g. by `list_unfinished`
+            job = await to_thread.run_sync(self.job_store.get, job.job_id) or job
+            if not job.finished:
+                await self._run_claimed(job)
+        finally:
+            # releasing is not awaited, so that it happens even when the task is cancelled
+            self.job_store.release(job.job_id)
+
+    async def _run_claimed(self, job: DeletePrefixJob) -> None:
+        job.status = JobStatus.RUNNING
+        checkpoint_time = time.monotonic()
+        try:
+            async with aclosing(self._iter_delete_rounds(job)) as rounds:
+                async for _ in rounds:
+                    job.elapsed_seconds += time.monotonic() - checkpoint_time
+                    checkpoint_time = time.monotonic()
+                    if await to_thread.run_sync(self.job_store.is_cancel_requested, job.job_id):
+                        break
+                    await to_thread.run_sync(self.job_store.save, job)
+            cancelled = await to_thread.run_sync(self.job_store.is_cancel_requested, job.job_id)
+            job.status = JobStatus.CANCELLED if cancelled else JobStatus.COMPLETED
+        except Exception as err:  # pylint: disable=broad-except
+            job.status = JobStatus.FAILED
+            job.error = str(err)
+        job.elapsed_seconds += time.monotonic() - checkpoint_time
+        job.finished_at = datetime.now(timezone.utc)
+        await to_thread.run_sync(self.job_store.save, job)
+
+    async def _iter_delete_rounds(self, job: DeletePrefixJob) -> AsyncIterator[None]:
+        """Delete the keys under the job's directory, updating its counters and yielding after each batch."""
+        if await to_thread.run_sync(self.job_store.is_cancel_requested, job.job_id):
+            return
+
+        async def count_scanned_keys() -> AsyncIterator[str]:
+            async for object_key in iter_s3_object_keys_async(
+                bucket_name=self._bucket_name, prefix=job.directory, s3_client=self._s3_client
+            ):
+                job.keys_scanned += 1
+                yield object_key
+
+        async for batch_results in iter_delete_s3_objects_async(
+            bucket_name=self._bucket_name,
+            object_keys=count_scanned_keys(),
+            max_concurrency=self._max_concurrency,
+            s3_client=self._s3_client,
+        ):
+            await self._invalidate_deleted_files([result.object_key for result in batch_results if result.deleted])
+            for result in batch_results:
+                if result.deleted:
+                    job.keys_deleted += 1
+                    continue
+                job.keys_failed += 1
+                if len(job.failures) < MAX_RECORDED_FAILURES:
+                    job.failures.append(
+                        DeleteFailure(
+                            file_path=result.object_key,
+                            error_code=result.error_code,
+                            error_message=result.error_message,
+                        )
+                    )
+            yield
+
+    async def _invalidate_deleted_files(self, file_paths: List[str]) -> None:
+        """Drop the deleted files from the caches, and from the index in one write in a worker thread."""
+        for file_path in file_paths:
+            self._metadata_cache.invalidate(self._bucket_name, file_path)
+            if self._content_cache is not None:
+                self._content_cache.invalidate(self._bucket_name, file_path)
+        if self._metadata_index is not None and file_paths:
+            await to_thread.run_sync(self._metadata_index.delete, self._bucket_name, file_paths)
@@ -0,0 +1,73 @@
+"""FastAPI dependencies that hand app-lifetime resources and parsed request headers to the route handlers."""
+
+from typing import (
+    Annotated,
+    Optional,
+)
+
+from fastapi import (
+    Header,
+    Request,
+)
+
+from files_api.delete_jobs import DeleteJobRunner
+from files_api.http_caching import ReadConditions
+from files_api.s3.content_cache import ContentCache
+from files_api.s3.metadata_cache import MetadataCache
+from files_api.s3.metadata_index import MetadataIndex
+from files_api.s3.summaries import SummaryCache
+from files_api.upload_sessions import UploadSessionStore
+
+try:
+    from mypy_boto3_s3 import S3Client
+except ImportError:
+    ...
+
+
+def get_s3_client(request: Request) -> "S3Client":
+    """Return the S3 client shared by all requests to the app."""
+    return request.app.state.s3_client
+
+
+def get_metadata_cache(request: Request) -> MetadataCache:
+    """Return the cache of object metadata shared by all requests to the app."""
+    return request.app.state.metadata_cache
+
+
+def get_content_cache(request: Request) -> Optional[ContentCache]:
+    """Return the cache of small file contents shared by all requests to the app, or None if it is disabled."""
+    return request.app.state.content_cache
+
+
+def get_metadata_index(request: Request) -> Optional[MetadataIndex]:
+    """Return the index of the bucket's file metadata shared by all requests to the app, or None if it is disabled."""
+    return request.app.state.metadata_index
+
+
+def get_summary_cache(request: Request) -> SummaryCache:
+    """Return the cache of directory summaries shared by all requests to the app."""
+    return request.app.state.summary_cache
+
+
+def get_delete_job_runner(request: Request) -> DeleteJobRunner:
+    """Return the runner of the app's background delete jobs."""
+    return request.app.state.delete_job_runner
+
+
+def get_upload_session_store(request: Request) -> UploadSessionStore:
+    """Return the store of resumable upload sessions shared by all requests to the app."""
+    return request.app.state.upload_session_store
+
+
+def get_read_conditions(
+    if_none_match: Annotated[
+        Optional[str],
+        Header(description="ETag of a copy of the file the client already has. If it is current, 304 is returned."),
+    ] = None,
+    if_modified_since: Annotated[
+        Optional[str],
+        Header(description="Date of a copy of the file the client already has. If it is current, 304 is returned."),
+    ] = None,
+) -> ReadConditions:
+    """Return the conditions of a conditional read request."""
+    return ReadConditions.from_headers(if_none_match=if_none_match, if_modified_since=if_modified_since)
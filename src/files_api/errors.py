@@ -1,9 +1,29 @@
+from contextlib import contextmanager
+from typing import (
+    Iterator,
+    Optional,
+)
+
+from botocore.exceptions import ClientError
 from fastapi import (
+    HTTPException,
     Request,
     status,
 )
 from fastapi.responses import JSONResponse
 
+from files_api.s3.errors import (
+    is_invalid_part_error,
+    is_invalid_range_error,
+    is_no_such_upload_error,
+    is_not_modified_error,
+    is_object_not_found_error,
+    is_precondition_failed_error,
+)
+
+# lower-cased names of the headers in S3 responses that identify the version of an object
+_VALIDATOR_HEADERS = {"etag": "ETag", "last-modified": "Last-Modified"}
+
 
 # fastapi middleware URL docs:
 async def handle_broad_exceptions(request: Request, call_next):
@@ -16,3 +36,82 @@ async def handle_broad_exceptions(request: Request, call_next):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"detail": "Internal server error"},
         )
+
+
+@contextmanager
+def object_not_found_as_404() -> Iterator[None]:
+    """Translate an S3 error for a missing object raised inside the block into a 404 response."""
+    try:
+        yield
+    except ClientError as err:
+        if is_object_not_found_error(err):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+        raise
+
+
+@contextmanager
+def unsatisfiable_range_as_416() -> Iterator[None]:
+    """Translate an S3 error for a byte range beyond the end of an object into a 416 response."""
+    try:
+        yield
+    except ClientError as err:
+        if is_invalid_range_error(err):
+            object_size = err.response["Error"].get("ActualObjectSize")
+            raise HTTPException(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                detail="Requested range not satisfiable",
+                headers={"Content-Range": f"bytes */{object_size}"} if object_size is not None else None,
+            )
+        raise
+
+
+@contextmanager
+def changed_object_as_503() -> Iterator[None]:
+    """
+    Translate an S3 error for a read pinned to an ETag the object no longer has into a 503 response.
+
+    The object was replaced between two reads made to answer the same request. The client did not
+    send the condition that failed, so it is told to retry rather than that its request was wrong.
+    """
+    try:
+        yield
+    except ClientError as err:
+        if is_precondition_failed_error(err):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="File changed while being read, retry the request",
+                headers={"Retry-After": "0"},
+            )
+        raise
+
+
+@contextmanager
+def upload_errors_as_4xx() -> Iterator[None]:
+    """Translate S3 errors for a missing multipart upload, or for parts that cannot complete it, into 404 and 400."""
+    try:
+        yield
+    except ClientError as err:
+        if is_no_such_upload_error(err):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+        if is_invalid_part_error(err):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=err.response["Error"]["Message"])
+        raise
+
+
+@contextmanager
+def not_modified_as_304(cache_control: Optional[str] = None) -> Iterator[None]:
+    """
+    Translate an S3 error for a conditional read of an unchanged object into a 304 response.
+
+    The 304 repeats the validators S3 sent, so that caches can refresh their stored copy's headers.
+    """
+    try:
+        yield
+    except ClientError as err:
+        if is_not_modified_error(err):
+            s3_headers = err.response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+            headers = {name: s3_headers[key] for key, name in _VALIDATOR_HEADERS.items() if key in s3_headers}
+            if cache_control:
+                headers["Cache-Control"] = cache_control
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        raise
@@ -0,0 +1,70 @@
+"""
+Validators and conditional request headers that let HTTP clients and caches skip re-downloading unchanged files.
+
+Responses carry the file's `ETag` and `Last-Modified`. A client that sends them back in
+`If-None-Match` or `If-Modified-Since` gets a bodiless `304 Not Modified` if the file has not
+changed since. The conditions are evaluated by S3 itself, so no extra call is needed to check them.
+"""
+
+from datetime import (
+    datetime,
+    timezone,
+)
+from email.utils import (
+    format_datetime,
+    parsedate_to_datetime,
+)
+from typing import (
+    Dict,
+    NamedTuple,
+    Optional,
+)
+
+
+class ReadConditions(NamedTuple):
+    """Conditions under which a read should return the file, rather than a `304 Not Modified`."""
+
+    if_none_match: Optional[str] = None
+    if_modified_since: Optional[datetime] = None
+
+    @classmethod
+    def from_headers(cls, if_none_match: Optional[str], if_modified_since: Optional[str]) -> "ReadConditions":
+        """
+        Interpret the conditional headers of a request as RFC 9110 prescribes.
+
+        `If-Modified-Since` is ignored if `If-None-Match` is present, since an ETag identifies
+        a version more precisely than a timestamp with one second resolution, or if it is not a valid date.
+        """
+        if if_none_match:
+            return cls(if_none_match=if_none_match)
+        return cls(if_modified_since=parse_http_date(if_modified_since))
+
+
+def parse_http_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse a date header such as `Thu, 01 Jan 2024 00:00:00 GMT`; None if it is missing or malformed."""
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def format_http_date(value: datetime) -> str:
+    """Format a timestamp as an HTTP date, e.g. `Thu, 01 Jan 2024 00:00:00 GMT`."""
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def validator_headers(
+    etag: Optional[str], last_modified: Optional[datetime], cache_control: Optional[str]
+) -> Dict[str, str]:
+    """Headers that let clients and caches revalidate their copy of a file with a conditional request."""
+    headers: Dict[str, str] = {}
+    if etag:
+        headers["ETag"] = etag
+    if last_modified:
+        headers["Last-Modified"] = format_http_date(last_modified)
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    return headers
@@ -0,0 +1,151 @@
+"""
+Parsing of HTTP `Range` request headers and layout of `multipart/byteranges` responses.
+
+Only the `bytes` range unit is supported. As RFC 9110 allows, a `Range` header that cannot be
+parsed is ignored and the full content is served instead.
+"""
+
+import re
+import secrets
+from typing import (
+    List,
+    NamedTuple,
+    Optional,
+)
+
+# serving the full content is cheaper than fanning out to one S3 call per range for clients
+# that ask for many tiny ranges, so range sets larger than this are ignored
+MAX_BYTE_RANGES = 16
+
+_RANGE_SPEC_PATTERN = re.compile(r"^(\d*)-(\d*)$")
+
+
+class ByteRange(NamedTuple):
+    """An inclusive range of byte positions within content of known size."""
+
+    first: int
+    last: int
+
+    @property
+    def length(self) -> int:
+        """Number of bytes in the range."""
+        return self.last - self.first + 1
+
+    def to_range_header(self) -> str:
+        """Format as the value of a `Range` header, e.g. to request just this range from S3."""
+        return f"bytes={self.first}-{self.last}"
+
+    def to_content_range_header(self, complete_length: int) -> str:
+        """Format as the value of a `Content-Range` response header."""
+        return f"bytes {self.first}-{self.last}/{complete_length}"
+
+
+class ByteRangeSpec(NamedTuple):
+    """
+    One range of a `Range` header, as requested by the client before the content size is known.
+
+    `first-last` and `first-` ranges set `first` (and `last`). Suffix ranges such as `-500`,
+    meaning the last 500 bytes, set only `suffix_length`.
+    """
+
+    first: Optional[int] = None
+    last: Optional[int] = None
+    suffix_length: Optional[int] = None
+
+    def to_range_header(self) -> str:
+        """Format as the value of a `Range` header, e.g. to pass this range through to S3 unresolved."""
+        if self.suffix_length is not None:
+            return f"bytes=-{self.suffix_length}"
+        return f"bytes={self.first}-{'' if self.last is None else self.last}"
+
+    def resolve(self, complete_length: int) -> Optional[ByteRange]:
+        """Resolve against the size of the content; None if the range is not satisfiable."""
+        if self.suffix_length is not None:
+            if self.suffix_length == 0 or complete_length == 0:
+                return None
+            return ByteRange(first=max(complete_length - self.suffix_length, 0), last=complete_length - 1)
+
+        assert self.first is not None
+        if self.first >= complete_length:
+            return None
+        last = complete_length - 1 if self.last is None else min(self.last, complete_length - 1)
+        return ByteRange(first=self.first, last=last)
+
+
+def parse_range_header(range_header: Optional[str]) -> List[ByteRangeSpec]:
+    """
+    Parse the value of a `Range` request header, e.g. `bytes=0-99,200-299,-50`.
+
+    :param range_header: The raw header value, or None if the request has no `Range` header.
+
+    :return: The requested ranges in order. Empty if there is no header or it should be ignored
+        because it is malformed, uses a unit other than `bytes`, or has more than `MAX_BYTE_RANGES` ranges.
+    """
+    if not range_header:
+        return []
+
+    unit, _, range_set = range_header.partition("=")
+    if unit.strip().lower() != "bytes":
+        return []
+
+    specs = [_parse_range_spec(raw_spec) for raw_spec in range_set.split(",")]
+    if None in specs or len(specs) > MAX_BYTE_RANGES:
+        return []
+    return specs  # type: ignore[return-value]
+
+
+def _parse_range_spec(raw_spec: str) -> Optional[ByteRangeSpec]:
+    """Parse one range of a range set, e.g. `0-99`, `100-` or `-500`; None if it is malformed."""
+    match = _RANGE_SPEC_PATTERN.match(raw_spec.strip())
+    if match is None:
+        return None
+
+    first, last = match.groups()
+    if first:
+        if last and int(last) < int(first):
+            return None
+        return ByteRangeSpec(first=int(first), last=int(last) if last else None)
+    if last:
+        return ByteRangeSpec(suffix_length=int(last))
+    return None
+
+
+class MultipartByteranges:
+    """
+    Layout of a `multipart/byteranges` response body carrying several ranges of one file.
+
+    Each part is a small header naming its range, followed by the bytes of that range. Since every
+    range is resolved up front, the exact length of the whole body is known before streaming it.
+    """
+
+    def __init__(self, byte_ranges: List[ByteRange], content_type: str, complete_length: int):
+        self.byte_ranges = byte_ranges
+        self.boundary = secrets.token_hex(16)
+        self._content_type = content_type
+        self._complete_length = complete_length
+
+    @property
+    def media_type(self) -> str:
+        """Value of the `Content-Type` header of the response."""
+        return f"multipart/byteranges; boundary={self.boundary}"
+
+    @property
+    def content_length(self) -> int:
+        """Exact size in bytes of the whole body."""
+        return sum(len(self.part_header(byte_range)) + byte_range.length for byte_range in self.byte_ranges) + len(
+            self.closing_delimiter
+        )
+
+    @property
+    def closing_delimiter(self) -> bytes:
+        """Delimiter that ends the body after the last part."""
+        return f"\r\n--{self.boundary}--\r\n".encode("latin-1")
+
+    def part_header(self, byte_range: ByteRange) -> bytes:
+        """Delimiter and headers that precede the content of `byte_range` in the body."""
+        return (
+            f"\r\n--{self.boundary}\r\n"
+            f"Content-Type: {self._content_type}\r\n"
+            f"Content-Range: {byte_range.to_content_range_header(self._complete_length)}\r\n"
+            "\r\n"
+        ).encode("latin-1")
@@ -1,14 +1,40 @@
+import logging
+import threading
+from contextlib import asynccontextmanager
+from functools import partial
 from textwrap import dedent
+from typing import AsyncIterator
 
+import anyio
+from anyio import to_thread
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
 
+from files_api.delete_jobs import (
+    DeleteJobRunner,
+    FileJobStore,
+)
 from files_api.errors import handle_broad_exceptions
 from files_api.routes import (
+    ADMIN_ROUTER,
     FILES_ROUTER,
     GENERATED_FILES_ROUTER,
+    JOBS_ROUTER,
+    UPLOAD_SESSIONS_ROUTER,
+)
+from files_api.s3.client import create_s3_client
+from files_api.s3.content_cache import InMemoryContentCache
+from files_api.s3.metadata_cache import InMemoryMetadataCache
+from files_api.s3.metadata_index import (
+    MetadataIndex,
+    reconcile_metadata_index,
 )
+from files_api.s3.summaries import SummaryCache
 from files_api.settings import Settings
+from files_api.upload_sessions import (
+    FileUploadSessionStore,
+    UploadSessionSweeper,
+)
 
 
 def custom_generate_unique_id(route: APIRoute):
@@ -20,6 +46,69 @@ def custom_generate_unique_id(route: APIRoute):
     return f"{route.tags[0]}--{route.name}"
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Size the worker thread pool to the S3 connection pool and run background jobs while the app is up.
+
+    Background jobs are the deletes submitted to the app and the periodic sweep of idle uploads.
+    The S3 client and the metadata index are released on shutdown.
+    """
+    settings: Settings = app.state.settings
+
+    # blocking S3 calls run in anyio's default thread pool, so allow as many threads
+    # as the shared client has pooled connections to S3
+    to_thread.current_default_thread_limiter().total_tokens = settings.s3_max_pool_connections
+
+    async with (
+        app.state.delete_job_runner.running(),
+        app.state.upload_session_sweeper.running(),
+        _scanning_metadata_index(app),
+    ):
+        yield
+
+    app.state.s3_client.close()
+    if app.state.metadata_index is not None:
+        app.state.metadata_index.close()
+
+
+@asynccontextmanager
+async def _scanning_metadata_index(app: FastAPI) -> AsyncIterator[None]:
+    """Scan the bucket into the metadata index in the background, if it is enabled and was never scanned."""
+    settings: Settings = app.state.settings
+    metadata_index: MetadataIndex | None = app.state.metadata_index
+    if metadata_index is None or metadata_index.is_scanned(settings.s3_bucket_name):
+        yield
+        return
+
+    # the scan thread cannot be abandoned, since the index is closed after shutdown: it is asked to stop instead
+    stop_event = threading.Event()
+
+    async def scan() -> None:
+        try:
+            await to_thread.run_sync(
+                partial(
+                    reconcile_metadata_index,
+                    metadata_index,
+                    settings.s3_bucket_name,
+                    max_concurrency=settings.listing_max_concurrency,
+                    s3_client=app.state.s3_client,
+                    stop_event=stop_event,
+                )
+            )
+        except Exception:  # pylint: disable=broad-except
+            # listings are served from S3 until the bucket is scanned, e.g. by the reconcile endpoint
+            logging.getLogger(__name__).exception("Scanning the bucket into the metadata index failed")
+
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(scan)
+        try:
+            yield
+        finally:
+            stop_event.set()
+            task_group.cancel_scope.cancel()
+
+
 def create_app(settings: Settings | None = None) -> FastAPI:
     """Create a FastAPI application."""
     settings = settings or Settings()
@@ -38,12 +127,64 @@ def create_app(settings: Settings | None = None) -> FastAPI:
         ),
         docs_url="/",
         generate_unique_id_function=custom_generate_unique_id,
+        lifespan=lifespan,
     )
 
     app.state.settings = settings
+    app.state.s3_client = create_s3_client(
+        max_pool_connections=settings.s3_max_pool_connections,
+        connect_timeout_seconds=settings.s3_connect_timeout_seconds,
+        read_timeout_seconds=settings.s3_read_timeout_seconds,
+        tcp_keepalive=settings.s3_tcp_keepalive,
+        max_attempts=settings.s3_max_attempts,
+    )
+    app.state.metadata_cache = InMemoryMetadataCache(
+        max_entries=settings.metadata_cache_max_entries,
+        ttl_seconds=settings.metadata_cache_ttl_seconds,
+        negative_ttl_seconds=settings.metadata_cache_negative_ttl_seconds,
+    )
+    app.state.content_cache = (
+        InMemoryContentCache(
+            max_object_bytes=settings.content_cache_max_object_bytes,
+            max_total_bytes=settings.content_cache_max_total_bytes,
+        )
+        if settings.content_cache_max_total_bytes > 0
+        else None
+    )
+
+    app.state.metadata_index = (
+        MetadataIndex(path=settings.metadata_index_path) if settings.metadata_index_path is not None else None
+    )
+
+    app.state.summary_cache = SummaryCache(
+        ttl_seconds=settings.summary_cache_ttl_seconds,
+        max_entries=settings.summary_cache_max_entries,
+    )
+
+    app.state.delete_job_runner = DeleteJobRunner(
+        job_store=FileJobStore(directory=settings.jobs_dir),
+        bucket_name=settings.s3_bucket_name,
+        s3_client=app.state.s3_client,
+        metadata_cache=app.state.metadata_cache,
+        content_cache=app.state.content_cache,
+        metadata_index=app.state.metadata_index,
+        max_concurrency=settings.s3_delete_max_concurrency,
+    )
+
+    app.state.upload_session_store = FileUploadSessionStore(directory=settings.upload_sessions_dir)
+    app.state.upload_session_sweeper = UploadSessionSweeper(
+        session_store=app.state.upload_session_store,
+        bucket_name=settings.s3_bucket_name,
+        s3_client=app.state.s3_client,
+        max_idle_seconds=settings.upload_max_idle_seconds,
+        interval_seconds=settings.upload_sweep_interval_seconds,
+    )
 
     app.include_router(FILES_ROUTER)
+    app.include_router(UPLOAD_SESSIONS_ROUTER)
     app.include_router(GENERATED_FILES_ROUTER)
+    app.include_router(JOBS_ROUTER)
+    app.include_router(ADMIN_ROUTER)
 
     app.middleware("http")(handle_broad_exceptions)
 
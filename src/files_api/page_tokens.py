@@ -0,0 +1,109 @@
+"""
+Opaque page tokens of `GET /files`.
+
+A token records where the next page starts (the last key or subdirectory of the previous page, and
+its sort value for listings sorted by something else than path) along with the directory, page size,
+delimiter and order of the listing, so that every page of a listing is fetched with the same
+parameters whatever the client sends alongside the token. Tokens are plain
+base64-encoded JSON: they are opaque to clients by convention, not secret.
+"""
+
+import base64
+import binascii
+import json
+from dataclasses import (
+    asdict,
+    dataclass,
+    replace,
+)
+from typing import (
+    Optional,
+    Union,
+)
+
+from files_api.s3.metadata_index import IndexSortKey
+from files_api.schemas import (
+    DEFAULT_GET_FILES_MAX_PAGE_SIZE,
+    DEFAULT_GET_FILES_MIN_PAGE_SIZE,
+)
+
+# sorts after every character S3 keys can contain, so starting after `prefix + _MAX_KEY_CHARACTER`
+# skips every key under `prefix`
+_MAX_KEY_CHARACTER = "\U0010ffff"
+# type of the sort value a listing resumes after, for each order: the path of the file is used as is
+_START_AFTER_VALUE_TYPES = {
+    IndexSortKey.PATH: type(None),
+    IndexSortKey.SIZE: int,
+    IndexSortKey.LAST_MODIFIED: (int, float),
+}
+
+
+class InvalidPageTokenError(ValueError):
+    """The page token was not issued by `encode_page_token`."""
+
+
+@dataclass(frozen=True)
+class PageCursor:
+    """Where the next page of a listing starts, and the parameters of the listing."""
+
+    directory: str
+    page_size: int
+    start_after: str
+    delimiter: Optional[str] = None
+    sort_by: IndexSortKey = IndexSortKey.PATH
+    descending: bool = False
+    # sort value of the entry the page starts after, when sorting by something else than path
+    start_after_value: Union[int, float, None] = None
+
+    @classmethod
+    def after_entry(cls, directory: str, page_size: int, last_entry: str, delimiter: Optional[str]) -> "PageCursor":
+        """
+        Make the cursor of the page following the one that ended with `last_entry`.
+
+        :param last_entry: Key of the last file of the page, or the last subdirectory if it sorts after it.
+        """
+        # the keys under a subdirectory sort after the subdirectory itself, and would be grouped into it again
+        is_subdirectory = delimiter is not None and last_entry.endswith(delimiter)
+        start_after = last_entry + _MAX_KEY_CHARACTER if is_subdirectory else last_entry
+        return cls(directory=directory, page_size=page_size, start_after=start_after, delimiter=delimiter)
+
+
+def encode_page_token(cursor: PageCursor) -> str:
+    """Encode a cursor as an URL-safe page token."""
+    token_json = json.dumps(asdict(cursor), separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(token_json.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_page_token(page_token: str) -> PageCursor:
+    """
+    Decode a page token made by `encode_page_token`.
+
+    :raises InvalidPageTokenError: If the token is malformed, or its page size is out of the bounds of `page_size`.
+    """
+    try:
+        token_json = base64.urlsafe_b64decode(page_token + "=" * (-len(page_token) % 4))
+        cursor = PageCursor(**json.loads(token_json))
+        cursor = replace(cursor, sort_by=IndexSortKey(cursor.sort_by))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError) as err:
+        raise InvalidPageTokenError("Invalid page token") from err
+    if not (
+        _has_valid_types(cursor)
+        and DEFAULT_GET_FILES_MIN_PAGE_SIZE <= cursor.page_size <= DEFAULT_GET_FILES_MAX_PAGE_SIZE
+    ):
+        raise InvalidPageTokenError("Invalid page token")
+    return cursor
+
+
+def _has_valid_types(cursor: PageCursor) -> bool:
+    """Whether every field of a decoded cursor has the expected type, including a sort value fitting its order."""
+    return (
+        isinstance(cursor.directory, str)
+        # JSON booleans decode to bools, which are ints too
+        and isinstance(cursor.page_size, int)
+        and not isinstance(cursor.page_size, bool)
+        and isinstance(cursor.start_after, str)
+        and isinstance(cursor.delimiter, (str, type(None)))
+        and isinstance(cursor.descending, bool)
+        and isinstance(cursor.start_after_value, _START_AFTER_VALUE_TYPES[cursor.sort_by])
+        and not isinstance(cursor.start_after_value, bool)
+    )
@@ -1,41 +1,202 @@
 import mimetypes
-from typing import Annotated
+import uuid
+from contextlib import (
+    aclosing,
+    asynccontextmanager,
+)
+from dataclasses import replace
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
+from functools import partial
+from typing import (
+    Annotated,
+    Any,
+    AsyncContextManager,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+)
 
 import httpx
+from anyio import to_thread
+from botocore.exceptions import ClientError
 from fastapi import (
     APIRouter,
     Depends,
+    Header,
     HTTPException,
+    Path,
+    Query,
     Request,
     Response,
-    UploadFile,
     status,
 )
-from fastapi.responses import StreamingResponse
+from fastapi.responses import (
+    RedirectResponse,
+    StreamingResponse,
+)
+from starlette.background import BackgroundTask
+from starlette.types import Send
 
+from files_api.archives import (
+    ArchiveFormat,
+    open_archive_stream,
+)
+from files_api.bulk_uploads import upload_files_from_request
+from files_api.delete_jobs import (
+    DeleteJobRunner,
+    JobStore,
+)
+from files_api.dependencies import (
+    get_content_cache,
+    get_delete_job_runner,
+    get_metadata_cache,
+    get_metadata_index,
+    get_read_conditions,
+    get_s3_client,
+    get_summary_cache,
+    get_upload_session_store,
+)
+from files_api.errors import (
+    changed_object_as_503,
+    not_modified_as_304,
+    object_not_found_as_404,
+    unsatisfiable_range_as_416,
+    upload_errors_as_4xx,
+)
 from files_api.generate_files import (
     generate_image,
     generate_text_to_speech,
     get_text_chat_completion,
 )
-from files_api.s3.delete_objects import delete_s3_object
-from files_api.s3.read_objects import (
-    fetch_s3_object,
-    fetch_s3_objects_metadata,
-    fetch_s3_objects_using_page_token,
-    object_exists_in_s3,
+from files_api.http_caching import (
+    ReadConditions,
+    validator_headers,
+)
+from files_api.http_ranges import (
+    ByteRangeSpec,
+    MultipartByteranges,
+    parse_range_header,
+)
+from files_api.page_tokens import (
+    InvalidPageTokenError,
+    PageCursor,
+    decode_page_token,
+    encode_page_token,
+)
+from files_api.s3.async_objects import (
+    abort_multipart_upload_async,
+    complete_multipart_upload_async,
+    copy_s3_object_async,
+    create_multipart_upload_async,
+    delete_s3_object_async,
+    fetch_s3_object_async,
+    fetch_s3_object_metadata_async,
+    fetch_s3_object_through_content_cache_async,
+    fetch_s3_objects_after_async,
+    iter_copy_s3_objects_async,
+    iter_delete_s3_objects_async,
+    iter_s3_object_body_async,
+    iter_s3_object_keys_async,
+    iter_s3_object_pages_async,
+    iter_s3_object_pages_parallel_async,
+    list_uploaded_parts_async,
+    object_exists_in_s3_async,
+    upload_part_async,
+    upload_s3_object_async,
+    upload_s3_object_from_stream_async,
+)
+from files_api.s3.content_cache import (
+    CachedObject,
+    ContentCache,
+)
+from files_api.s3.copy_objects import (
+    MAX_MULTIPART_PARTS,
+    copy_part_ranges,
+)
+from files_api.s3.errors import is_no_such_upload_error
+from files_api.s3.metadata_cache import MetadataCache
+from files_api.s3.metadata_index import (
+    IndexSortKey,
+    MetadataIndex,
+    reconcile_metadata_index,
+    refresh_stale_files_async,
+)
+from files_api.s3.multipart_uploads import UploadedPart
+from files_api.s3.prefetch import prefetch_s3_object_pages_async
+from files_api.s3.presigned_urls import (
+    presign_get_object,
+    presign_put_object,
+    presign_upload_parts,
+)
+from files_api.s3.summaries import (
+    PrefixSummary,
+    SummaryCache,
+    group_subdirectories,
+    histogram_bucket_bounds,
+    merge_summaries,
+    roll_up_summaries,
+    summarize_objects,
 )
-from files_api.s3.write_objects import upload_s3_object
+from files_api.s3.write_objects import MIN_MULTIPART_PART_SIZE_BYTES
 from files_api.schemas import (
+    MAX_SUMMARY_DEPTH,
+    AbortPresignedMultipartUploadRequest,
+    BulkDeleteFilesRequest,
+    BulkDeleteResult,
+    BulkUploadResponse,
+    BulkUploadStatus,
+    CacheStatsModel,
+    CompletePresignedMultipartUploadRequest,
+    ContentCacheStatsModel,
+    CopyDirectoryRequest,
+    CopyFileRequest,
+    CopyFileResponse,
+    CopyFileResult,
+    CreatePresignedMultipartUploadRequest,
+    CreatePresignedMultipartUploadResponse,
+    CreateUploadSessionRequest,
+    DeleteJobResponse,
+    DirectorySummary,
     FileMetadata,
     GeneratedFileType,
     GenerateFilesQueryParams,
+    GetCacheStatsResponse,
+    GetDirectorySummaryResponse,
     GetFilesQueryParams,
     GetFilesResponse,
+    PresignDownloadRequest,
+    PresignedPartModel,
+    PresignedUrlResponse,
+    PresignUploadRequest,
     PutFileResponse,
     PutGeneratedFileResponse,
+    ReconcileMetadataIndexResponse,
+    SizeHistogramBucket,
+    SubmitDeleteJobRequest,
+    UploadedPartModel,
+    UploadSessionResponse,
 )
 from files_api.settings import Settings
+from files_api.streaming_forms import get_form_file
+from files_api.upload_sessions import (
+    UploadSession,
+    UploadSessionStore,
+)
+
+try:
+    from mypy_boto3_s3 import S3Client
+    from mypy_boto3_s3.type_defs import (
+        GetObjectOutputTypeDef,
+        ObjectTypeDef,
+    )
+except ImportError:
+    ...
 
 ##################
 # --- Routes --- #
@@ -43,6 +204,42 @@ from files_api.settings import Settings
 
 FILES_ROUTER = APIRouter(tags=["Files"])
 GENERATED_FILES_ROUTER = APIRouter(tags=["Generated Files"])
+JOBS_ROUTER = APIRouter(tags=["Jobs"])
+UPLOAD_SESSIONS_ROUTER = APIRouter(tags=["Upload Sessions"])
+# operational endpoints for the people running the API, left out of the public schema and SDK
+ADMIN_ROUTER = APIRouter(tags=["Admin"], include_in_schema=False)
+
+
+class NDJSONResponse(StreamingResponse):
+    """Streamed response of newline-delimited JSON, one JSON document per line."""
+
+    media_type = "application/x-ndjson"
+
+
+class ScopedStreamingResponse(StreamingResponse):
+    """
+    Streamed response whose content is produced inside an async context, entered when streaming starts.
+
+    The context outlives the route handler, so it can host tasks producing the content in the
+    background, e.g. prefetching from S3, and it is exited once the content has been sent or the
+    client has disconnected.
+    """
+
+    def __init__(
+        self,
+        open_content: Callable[[], AsyncContextManager[AsyncIterator[bytes]]],
+        status_code: int = status.HTTP_200_OK,
+        headers: Optional[Dict[str, str]] = None,
+        media_type: Optional[str] = None,
+    ):
+        super().__init__(content=(), status_code=status_code, headers=headers, media_type=media_type)
+        self._open_content = open_content
+
+    async def stream_response(self, send: Send) -> None:
+        """Enter the context, then stream the content it gives."""
+        async with self._open_content() as content, aclosing(content):
+            self.body_iterator = content
+            await super().stream_response(send)
 
 
 @FILES_ROUTER.put(
@@ -51,32 +248,61 @@ GENERATED_FILES_ROUTER = APIRouter(tags=["Generated Files"])
         status.HTTP_200_OK: {"model": PutFileResponse},
         status.HTTP_201_CREATED: {"model": PutFileResponse},
     },
+    # the body is parsed incrementally by the handler rather than by FastAPI, so it is documented by hand
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "title": "Body_Files--upload_file",
+                        "type": "object",
+                        "properties": {
+                            "file_content": {"type": "string", "format": "binary", "title": "File Content"},
+                        },
+                        "required": ["file_content"],
+                    },
+                },
+            },
+        },
+    },
 )
 async def upload_file(
     request: Request,
     file_path: str,
-    file_content: UploadFile,
     response: Response,
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+    metadata_cache: Annotated[MetadataCache, Depends(get_metadata_cache)],
+    content_cache: Annotated[Optional[ContentCache], Depends(get_content_cache)],
+    metadata_index: Annotated[Optional[MetadataIndex], Depends(get_metadata_index)],
 ) -> PutFileResponse:
-    """Upload a file."""
-    settings: Settings = request.app.state.settings
+    """
+    Upload a file.
 
-    file_bytes: bytes = await file_content.read()
+    The file is streamed to S3 while it is still being received. Files larger than one part are
+    sent as an S3 multipart upload, so memory use per upload is bounded by the part size times
+    the number of parts uploaded concurrently.
+    """
+    settings: Settings = request.app.state.settings
 
-    object_already_exists = object_exists_in_s3(bucket_name=settings.s3_bucket_name, object_key=file_path)
-    if object_already_exists:
-        message = f"Existing file updated at path: /{file_path}"
-        response.status_code = status.HTTP_200_OK
-    else:
-        message = f"New file uploaded at path: /{file_path}"
-        response.status_code = status.HTTP_201_CREATED
+    file_content = await get_form_file(request=request, field_name="file_content")
 
-    upload_s3_object(
+    object_created = await upload_s3_object_from_stream_async(
         bucket_name=settings.s3_bucket_name,
         object_key=file_path,
-        file_content=file_bytes,
+        chunks=file_content.iter_chunks(),
         content_type=file_content.content_type,
+        part_size_bytes=settings.s3_multipart_part_size_bytes,
+        max_concurrency=settings.s3_multipart_max_concurrency,
+        s3_client=s3_client,
     )
+    await _invalidate_cached_files(settings.s3_bucket_name, [file_path], metadata_cache, content_cache, metadata_index)
+    if object_created:
+        message = f"New file uploaded at path: /{file_path}"
+        response.status_code = status.HTTP_201_CREATED
+    else:
+        message = f"Existing file updated at path: /{file_path}"
+        response.status_code = status.HTTP_200_OK
 
     return PutFileResponse(
         file_path=file_path,
@@ -84,41 +310,450 @@ async def upload_file(
     )
 
 
-@FILES_ROUTER.get("/files")
+@FILES_ROUTER.post(
+    "/files/bulk-upload",
+    # the body is read incrementally by the handler rather than by FastAPI, so it is documented by hand
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "title": "Body_Files--bulk_upload_files",
+                        "type": "object",
+                        "properties": {
+                            "files": {
+                                "type": "array",
+                                "items": {"type": "string", "format": "binary"},
+                                "title": "Files",
+                                "description": "The files to upload, each named after its path.",
+                            },
+                        },
+                        "required": ["files"],
+                    },
+                },
+                "application/x-tar": {"schema": {"type": "string", "format": "binary"}},
+                "application/gzip": {"schema": {"type": "string", "format": "binary"}},
+                "application/x-bzip2": {"schema": {"type": "string", "format": "binary"}},
+                "application/x-xz": {"schema": {"type": "string", "format": "binary"}},
+                "application/zip": {"schema": {"type": "string", "format": "binary"}},
+            },
+        },
+    },
+)
+async def bulk_upload_files(
+    request: Request,
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+    metadata_cache: Annotated[MetadataCache, Depends(get_metadata_cache)],
+    content_cache: Annotated[Optional[ContentCache], Depends(get_content_cache)],
+    metadata_index: Annotated[Optional[MetadataIndex], Depends(get_metadata_index)],
+    directory: Annotated[str, Query(description="Directory prepended to the path of every file.")] = "",
+) -> BulkUploadResponse:
+    """
+    Upload many files at once, sent as a `multipart/form-data` form or as a tar or zip archive.
+
+    Tar archives may be compressed with gzip, bzip2 or xz. Each file of a form is stored at the
+    path given by its filename; each regular file of an archive at its path in the archive. Files
+    are written to S3 concurrently while the rest of the body is still being received. Uploading
+    some files may fail while the others succeed, so check the `status` of every result.
+    """
+    settings: Settings = request.app.state.settings
+
+    results = await upload_files_from_request(
+        request=request,
+        bucket_name=settings.s3_bucket_name,
+        directory=directory,
+        s3_client=s3_client,
+        max_concurrency=settings.bulk_upload_max_concurrency,
+        max_file_bytes=settings.bulk_upload_max_file_bytes,
+        # the memory caches are cleared as each file is uploaded, and the index once they all are, in one write
+        on_uploaded=partial(
+            _invalidate_memory_cached_file,
+            settings.s3_bucket_name,
+            metadata_cache=metadata_cache,
+            content_cache=content_cache,
+        ),
+    )
+    uploaded_file_paths = [result.file_path for result in results if result.status != BulkUploadStatus.FAILED]
+    await _invalidate_cached_files(
+        settings.s3_bucket_name, uploaded_file_paths, metadata_cache, content_cache, metadata_index
+    )
+    return BulkUploadResponse(results=results)
+
+
+@FILES_ROUTER.get(
+    "/files",
+    responses={
+        status.HTTP_400_BAD_REQUEST: {
+            "description": "Invalid page token, or an order other than by path while the metadata index is unavailable.",
+        },
+    },
+)
 async def list_files(
     request: Request,
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+    metadata_index: Annotated[Optional[MetadataIndex], Depends(get_metadata_index)],
     query_params: GetFilesQueryParams = Depends(),  # noqa: B008
 ) -> GetFilesResponse:
-    """List files with pagination."""
+    """
+    List files with pagination, in path order unless sorted otherwise.
+
+    Each page is one S3 listing request, so listing with the max page size of 1000 takes one request
+    per 1000 files. With a `delimiter`, the files under each subdirectory are not walked: the
+    subdirectory is listed once instead.
+
+    When the metadata index is enabled and has scanned the bucket, pages without a `delimiter` are
+    read from the index instead of S3, and can be sorted by size or modification time.
+    """
     settings: Settings = request.app.state.settings
-    if query_params.page_token:
-        files, next_page_token = fetch_s3_objects_using_page_token(
-            bucket_name=settings.s3_bucket_name,
-            continuation_token=query_params.page_token,
-            max_keys=query_params.page_size,
+    cursor = _get_page_cursor(query_params)
+    if cursor.delimiter is None:
+        ready_metadata_index = await _get_ready_metadata_index(settings, metadata_index, s3_client)
+        if ready_metadata_index is not None:
+            return await _list_files_from_index(settings, cursor, ready_metadata_index)
+    if cursor.sort_by != IndexSortKey.PATH or cursor.descending:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Files can only be sorted by ascending path unless listed from the metadata index without a delimiter",
         )
+
+    page = await fetch_s3_objects_after_async(
+        bucket_name=settings.s3_bucket_name,
+        prefix=cursor.directory,
+        max_keys=cursor.page_size,
+        start_after=cursor.start_after,
+        delimiter=cursor.delimiter,
+        s3_client=s3_client,
+    )
+    next_page_token = None
+    if page.is_truncated and page.last_key is not None:
+        next_page_token = encode_page_token(
+            PageCursor.after_entry(cursor.directory, cursor.page_size, page.last_key, cursor.delimiter)
+        )
+    return GetFilesResponse(
+        files=[
+            FileMetadata(file_path=item["Key"], last_modified=item["LastModified"], size_bytes=item["Size"])
+            for item in page.objects
+        ],
+        directories=page.common_prefixes,
+        next_page_token=next_page_token,
+    )
+
+
+def _get_page_cursor(query_params: GetFilesQueryParams) -> PageCursor:
+    """Decode the page token of a `GET /files` request, or make the cursor of the first page."""
+    if not query_params.page_token:
+        return PageCursor(
+            directory=query_params.directory or "",
+            page_size=query_params.page_size,
+            start_after="",
+            delimiter=query_params.delimiter,
+            sort_by=query_params.sort_by,
+            descending=query_params.descending,
+        )
+    try:
+        return decode_page_token(query_params.page_token)
+    except InvalidPageTokenError as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err)) from err
+
+
+async def _list_files_from_index(
+    settings: Settings, cursor: PageCursor, metadata_index: MetadataIndex
+) -> GetFilesResponse:
+    """Read a page of `GET /files` from the metadata index."""
+    start_after = None
+    if cursor.start_after:
+        start_after_value = cursor.start_after if cursor.sort_by == IndexSortKey.PATH else cursor.start_after_value
+        start_after = (start_after_value, cursor.start_after)
+    # one more file than the page size tells whether there is a next page
+    indexed_files = await to_thread.run_sync(
+        partial(
+            metadata_index.list_files,
+            settings.s3_bucket_name,
+            prefix=cursor.directory,
+            limit=cursor.page_size + 1,
+            sort_key=cursor.sort_by,
+            descending=cursor.descending,
+            start_after=start_after,
+        )
+    )
+    page = indexed_files[: cursor.page_size]
+    next_page_token = None
+    if len(indexed_files) > cursor.page_size:
+        last_file = page[-1]
+        next_page_token = encode_page_token(
+            replace(
+                cursor,
+                start_after=last_file.object_key,
+                start_after_value=(
+                    None if cursor.sort_by == IndexSortKey.PATH else last_file.sort_value(cursor.sort_by)
+                ),
+            )
+        )
+    return GetFilesResponse(
+        files=[
+            FileMetadata(file_path=file.object_key, last_modified=file.last_modified, size_bytes=file.size_bytes)
+            for file in page
+        ],
+        next_page_token=next_page_token,
+    )
+
+
+@FILES_ROUTER.get("/summary")
+async def get_directory_summary(
+    request: Request,
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+    metadata_index: Annotated[Optional[MetadataIndex], Depends(get_metadata_index)],
+    summary_cache: Annotated[SummaryCache, Depends(get_summary_cache)],
+    directory: Annotated[str, Query(description="Summarize the files whose path starts with this directory.")] = "",
+    depth: Annotated[
+        int,
+        Query(ge=0, le=MAX_SUMMARY_DEPTH, description="Also summarize the subdirectories down to this many levels."),
+    ] = 0,
+) -> GetDirectorySummaryResponse:
+    """
+    Summarize the files under a directory, at any depth: their count, total size, oldest and newest
+    modification times, and a histogram of their sizes.
+
+    When the metadata index is enabled and has scanned the bucket, this is one query of the index.
+    Otherwise every file under the directory is listed from S3, in parallel key ranges, taking one
+    request per 1000 files. Summaries are then cached for a while: `computed_at` tells how recent one is.
+    """
+    settings: Settings = request.app.state.settings
+    cached_summaries = summary_cache.get(settings.s3_bucket_name, directory, depth)
+    if cached_summaries is None:
+        computed_at = datetime.now(timezone.utc)
+        summaries = await _summarize_directory(settings, directory, depth, metadata_index, s3_client)
+        summary_cache.put(settings.s3_bucket_name, directory, depth, computed_at, summaries)
     else:
-        files, next_page_token = fetch_s3_objects_metadata(
+        computed_at, summaries = cached_summaries
+
+    subdirectories = group_subdirectories(summaries, directory)
+
+    def summary_fields(summarized_directory: str) -> Dict[str, Any]:
+        summary = summaries[summarized_directory]
+        return {
+            "directory": summarized_directory,
+            "file_count": summary.file_count,
+            "total_bytes": summary.total_bytes,
+            "oldest_modified": summary.oldest_modified,
+            "newest_modified": summary.newest_modified,
+            "size_histogram": [
+                SizeHistogramBucket(
+                    min_bytes=min_bytes, max_bytes=max_bytes, file_count=file_count, total_bytes=total_bytes
+                )
+                for (min_bytes, max_bytes), file_count, total_bytes in zip(
+                    histogram_bucket_bounds(), summary.histogram_counts, summary.histogram_bytes
+                )
+            ],
+            "subdirectories": [
+                DirectorySummary(**summary_fields(subdirectory))
+                for subdirectory in subdirectories.get(summarized_directory, [])
+            ],
+        }
+
+    return GetDirectorySummaryResponse(computed_at=computed_at, **summary_fields(directory))
+
+
+async def _summarize_directory(
+    settings: Settings,
+    directory: str,
+    depth: int,
+    metadata_index: Optional[MetadataIndex],
+    s3_client: "S3Client",
+) -> Dict[str, PrefixSummary]:
+    """Summarize the files under a directory and each of its subdirectories down to `depth`, from the index or S3."""
+    ready_metadata_index = await _get_ready_metadata_index(settings, metadata_index, s3_client)
+    if ready_metadata_index is not None:
+        summaries = await to_thread.run_sync(ready_metadata_index.summarize, settings.s3_bucket_name, directory, depth)
+        return roll_up_summaries(summaries, directory)
+
+    summaries = {}
+    pages = iter_s3_object_pages_parallel_async(
+        settings.s3_bucket_name,
+        prefix=directory,
+        max_concurrency=settings.listing_max_concurrency,
+        # summaries are added up, so pages can be summarized in the order they are listed in
+        ordered=False,
+        s3_client=s3_client,
+    )
+    async with aclosing(pages):
+        async for objects in pages:
+            merge_summaries(summaries, summarize_objects(objects, directory, depth))
+    return roll_up_summaries(summaries, directory)
+
+
+async def _get_ready_metadata_index(
+    settings: Settings, metadata_index: Optional[MetadataIndex], s3_client: "S3Client"
+) -> Optional[MetadataIndex]:
+    """
+    Return the metadata index if it is enabled and has scanned the bucket, or None.
+
+    The entries of the files written since the index was last queried are refreshed first, so that
+    the index reflects every write made through the API.
+    """
+    if metadata_index is None or not await to_thread.run_sync(metadata_index.is_scanned, settings.s3_bucket_name):
+        return None
+    await refresh_stale_files_async(
+        metadata_index,
+        settings.s3_bucket_name,
+        max_concurrency=settings.metadata_index_refresh_max_concurrency,
+        s3_client=s3_client,
+    )
+    return metadata_index
+
+
+@FILES_ROUTER.get(
+    "/listing",
+    response_class=ScopedStreamingResponse,
+    responses={
+        status.HTTP_200_OK: {
+            "content": {NDJSONResponse.media_type: {"schema": FileMetadata.model_json_schema()}},
+            "description": (
+                "One line of JSON per file, in path order unless `ordered` is false, streamed as the files are listed."
+            ),
+        },
+    },
+)
+async def stream_file_listing(
+    request: Request,
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+    directory: Annotated[str, Query(description="List every file whose path starts with this directory.")] = "",
+    parallel: Annotated[
+        bool, Query(description="List ranges of files at once, split at subdirectories. Faster for large directories.")
+    ] = False,
+    ordered: Annotated[
+        bool, Query(description="With `parallel`, whether files are sent in path order or as soon as they are listed.")
+    ] = True,
+) -> ScopedStreamingResponse:
+    """
+    List every file under a directory in one response, as newline-delimited JSON.
+
+    Unlike `GET /files`, there are no pages to request: files are sent as S3 lists them, 1000 at a
+    time, while the next 1000 are listed, so the server's memory use does not depend on the number
+    of files. If listing fails partway through, the response is cut short.
+
+    One listing is a chain of requests to S3, each waiting for the previous one. With `parallel`,
+    the directory is first split into ranges of files at its subdirectories, and several ranges
+    are listed at once. Directories without subdirectories are listed as one range.
+    """
+    settings: Settings = request.app.state.settings
+
+    if parallel:
+        open_content = partial(
+            _open_parallel_file_listing_lines,
             bucket_name=settings.s3_bucket_name,
-            prefix=query_params.directory,
-            max_keys=query_params.page_size,
+            directory=directory,
+            max_concurrency=settings.listing_max_concurrency,
+            ordered=ordered,
+            s3_client=s3_client,
         )
-    file_metadata_objs = [
-        FileMetadata(
-            file_path=f"{item['Key']}",
-            last_modified=item["LastModified"],
-            size_bytes=item["Size"],
+    else:
+        open_content = partial(
+            _open_file_listing_lines,
+            bucket_name=settings.s3_bucket_name,
+            directory=directory,
+            max_prefetch=settings.listing_prefetch_max_pages,
+            s3_client=s3_client,
         )
-        for item in files
-    ]
+    return ScopedStreamingResponse(open_content=open_content, media_type=NDJSONResponse.media_type)
+
+
+@asynccontextmanager
+async def _open_file_listing_lines(
+    bucket_name: str,
+    directory: str,
+    max_prefetch: int,
+    s3_client: "S3Client",
+) -> AsyncIterator[AsyncIterator[str]]:
+    """Start listing the files under `directory` and give an iterator over their lines of JSON."""
+    async with prefetch_s3_object_pages_async(
+        bucket_name=bucket_name, prefix=directory, max_prefetch=max_prefetch, s3_client=s3_client
+    ) as pages:
+        yield _iter_file_metadata_lines(pages)
+
+
+@asynccontextmanager
+async def _open_parallel_file_listing_lines(
+    bucket_name: str,
+    directory: str,
+    max_concurrency: int,
+    ordered: bool,
+    s3_client: "S3Client",
+) -> AsyncIterator[AsyncIterator[str]]:
+    """Start listing ranges of the files under `directory` at once and give an iterator over their lines of JSON."""
+    pages = iter_s3_object_pages_parallel_async(
+        bucket_name, prefix=directory, max_concurrency=max_concurrency, ordered=ordered, s3_client=s3_client
+    )
+    async with aclosing(pages):
+        yield _iter_file_metadata_lines(pages)
+
+
+async def _iter_file_metadata_lines(pages: AsyncIterator[List["ObjectTypeDef"]]) -> AsyncIterator[str]:
+    """Format each page of listed objects as lines of JSON, one per object."""
+    async for objects in pages:
+        if objects:
+            yield "".join(
+                FileMetadata(
+                    file_path=item["Key"], last_modified=item["LastModified"], size_bytes=item["Size"]
+                ).model_dump_json()
+                + "\n"
+                for item in objects
+            )
+
+
+@FILES_ROUTER.get(
+    "/archive",
+    response_class=ScopedStreamingResponse,
+    responses={
+        status.HTTP_200_OK: {
+            "content": {archive_format.media_type: {} for archive_format in ArchiveFormat},
+            "description": "The archive, streamed as it is built.",
+        },
+    },
+)
+async def download_archive(
+    request: Request,
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+    directory: Annotated[str, Query(description="Archive every file whose path starts with this directory.")] = "",
+    archive_format: Annotated[ArchiveFormat, Query(alias="format", description="The format of the archive.")] = (
+        ArchiveFormat.ZIP
+    ),
+) -> ScopedStreamingResponse:
+    """
+    Download every file under a directory as one zip, tar or gzipped tar archive.
+
+    The archive is built while it is being sent, from files fetched from S3 a few at a time ahead
+    of the one being written, so downloads start right away and the server's memory use does not
+    depend on the size of the directory. Paths in the archive are relative to the parent of
+    `directory`. If fetching a file fails partway through, the archive is cut short.
+    """
+    settings: Settings = request.app.state.settings
 
-    return GetFilesResponse(files=file_metadata_objs, next_page_token=next_page_token if next_page_token else None)
+    archive_name = directory.rstrip("/").rsplit("/", 1)[-1] or "files"
+    return ScopedStreamingResponse(
+        open_content=partial(
+            open_archive_stream,
+            bucket_name=settings.s3_bucket_name,
+            directory=directory,
+            archive_format=archive_format,
+            s3_client=s3_client,
+            max_prefetch=settings.archive_prefetch_max_files,
+            max_buffered_object_bytes=settings.archive_prefetch_max_file_bytes,
+            chunk_size_bytes=settings.download_chunk_size_bytes,
+        ),
+        media_type=archive_format.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{archive_name}.{archive_format.value}"'},
+    )
 
 
 @FILES_ROUTER.head(
     "/files/{file_path:path}",
     responses={
         status.HTTP_404_NOT_FOUND: {"description": "File not found for the given `file_path`."},
+        status.HTTP_304_NOT_MODIFIED: {
+            "description": "The copy of the file named by `If-None-Match` or `If-Modified-Since` is still current.",
+        },
         status.HTTP_200_OK: {
             "headers": {
                 "Content-Type": {
@@ -136,29 +771,58 @@ async def list_files(
                     "example": "Thu, 01 Jan2024 00:00:00 GMT",
                     "schema": {"type": "string", "format": "date-time"},
                 },
+                "Accept-Ranges": {
+                    "description": "Signals that `GET` accepts a `Range` header to fetch part of the file.",
+                    "example": "bytes",
+                    "schema": {"type": "string"},
+                },
+                "ETag": {
+                    "description": "Identifies the version of the file, for use in `If-None-Match`.",
+                    "example": '"d41d8cd98f00b204e9800998ecf8427e"',
+                    "schema": {"type": "string"},
+                },
+                "Cache-Control": {
+                    "description": "How clients and caches may store the file, if configured.",
+                    "example": "no-cache",
+                    "schema": {"type": "string"},
+                },
             },
         },
     },
 )
-async def get_file_metadata(request: Request, file_path: str, response: Response) -> Response:
+async def get_file_metadata(
+    request: Request,
+    file_path: str,
+    response: Response,
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+    metadata_cache: Annotated[MetadataCache, Depends(get_metadata_cache)],
+    conditions: Annotated[ReadConditions, Depends(get_read_conditions)],
+) -> Response:
     """Retrieve file metadata.
 
     Note: by convention, HEAD requests MUST NOT return a body in the response.
     """
     settings: Settings = request.app.state.settings
 
-    # before trying to retrieve object metadata, make sure object exists
-    object_exists = object_exists_in_s3(bucket_name=settings.s3_bucket_name, object_key=file_path)
-    if not object_exists:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
-
-    get_object_response = fetch_s3_object(
-        bucket_name=settings.s3_bucket_name,
-        object_key=file_path,
+    with object_not_found_as_404(), not_modified_as_304(cache_control=settings.cache_control):
+        object_metadata = await fetch_s3_object_metadata_async(
+            bucket_name=settings.s3_bucket_name,
+            object_key=file_path,
+            if_none_match=conditions.if_none_match,
+            if_modified_since=conditions.if_modified_since,
+            metadata_cache=metadata_cache,
+            s3_client=s3_client,
+        )
+    response.headers["Content-Type"] = object_metadata.content_type
+    response.headers["Content-Length"] = str(object_metadata.content_length)
+    response.headers.update(
+        validator_headers(
+            etag=object_metadata.etag,
+            last_modified=object_metadata.last_modified,
+            cache_control=settings.cache_control,
+        )
     )
-    response.headers["Content-Type"] = get_object_response["ContentType"]
-    response.headers["Content-Length"] = str(get_object_response["ContentLength"])
-    response.headers["Last-Modified"] = get_object_response["LastModified"].strftime("%a, %d %b %Y %H:%M:%S GMT")
+    response.headers["Accept-Ranges"] = "bytes"
     response.status_code = status.HTTP_200_OK
     return response
 
@@ -169,21 +833,113 @@ async def get_file_metadata(request: Request, file_path: str, response: Response
         status.HTTP_404_NOT_FOUND: {
             "description": "File not found for the given `file_path`.",
         },
+        status.HTTP_304_NOT_MODIFIED: {
+            "description": "The copy of the file named by `If-None-Match` or `If-Modified-Since` is still current.",
+        },
         status.HTTP_200_OK: {
             "description": "The file content.",
+            "headers": {
+                "ETag": {
+                    "description": "Identifies the version of the file, for use in `If-None-Match`.",
+                    "example": '"d41d8cd98f00b204e9800998ecf8427e"',
+                    "schema": {"type": "string"},
+                },
+                "Cache-Control": {
+                    "description": "How clients and caches may store the file, if configured.",
+                    "example": "no-cache",
+                    "schema": {"type": "string"},
+                },
+            },
             "content": {
                 "application/octet-stream": {
                     "schema": {"type": "string", "format": "binary"},
                 },
             },
         },
+        status.HTTP_206_PARTIAL_CONTENT: {
+            "description": (
+                "The requested byte range of the file content. If several ranges were requested, "
+                "they are sent as the parts of a `multipart/byteranges` body."
+            ),
+            "headers": {
+                "Content-Range": {
+                    "description": "The byte range sent and the size of the file, if a single range was requested.",
+                    "example": "bytes 0-99/1024",
+                    "schema": {"type": "string"},
+                },
+            },
+            "content": {
+                "application/octet-stream": {
+                    "schema": {"type": "string", "format": "binary"},
+                },
+                "multipart/byteranges": {
+                    "schema": {"type": "string", "format": "binary"},
+                },
+            },
+        },
+        status.HTTP_307_TEMPORARY_REDIRECT: {
+            "description": "The file is large enough to be downloaded straight from S3, at the URL in `Location`.",
+            "headers": {
+                "Location": {
+                    "description": "A presigned S3 URL of the file.",
+                    "schema": {"type": "string"},
+                },
+            },
+        },
+        status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE: {
+            "description": "None of the requested byte ranges overlap the file content.",
+            "headers": {
+                "Content-Range": {
+                    "description": "The size of the file.",
+                    "example": "bytes */1024",
+                    "schema": {"type": "string"},
+                },
+            },
+        },
+        status.HTTP_503_SERVICE_UNAVAILABLE: {
+            "description": "The file was replaced while a byte range of it was being read. Retrying is safe.",
+            "headers": {
+                "Retry-After": {
+                    "description": "Seconds to wait before retrying.",
+                    "example": "0",
+                    "schema": {"type": "string"},
+                },
+            },
+        },
     },
 )
 async def get_file(
     request: Request,
     file_path: str,
-) -> StreamingResponse:
-    """Retrieve a file."""
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+    metadata_cache: Annotated[MetadataCache, Depends(get_metadata_cache)],
+    content_cache: Annotated[Optional[ContentCache], Depends(get_content_cache)],
+    conditions: Annotated[ReadConditions, Depends(get_read_conditions)],
+    range: Annotated[  # pylint: disable=redefined-builtin
+        Optional[str],
+        Header(description="Byte ranges to fetch instead of the whole file, e.g. `bytes=0-99` or `bytes=-500`."),
+    ] = None,
+    allow_redirect: Annotated[
+        bool,
+        Query(description="Whether large files may be served by a redirect to S3, if the API is configured to."),
+    ] = True,
+) -> Response:
+    """
+    Retrieve a file.
+
+    If redirects are configured, files of at least `download_redirect_min_bytes` are not sent
+    through the API: the response is a `307` to a presigned S3 URL, which serves the `Range` and
+    conditional headers the client sends again with the redirected request.
+
+    A `Range` header with a single byte range is passed through to S3, so only the requested
+    bytes are transferred. Several ranges are sent back as a `multipart/byteranges` body.
+
+    `If-None-Match` and `If-Modified-Since` are evaluated by S3 as part of the same call, so
+    revalidating an unchanged file costs one S3 call and no transfer of its content.
+
+    If the content cache is enabled, small files requested without a `Range` or conditional
+    header are served from memory while their cached copy is known to be current.
+    """
 
     # 1 -Business logic: Error that the user can fix
     # error case: object does not exist in the bucket
@@ -195,15 +951,220 @@ async def get_file(
 
     settings: Settings = request.app.state.settings
 
-    object_exists = object_exists_in_s3(bucket_name=settings.s3_bucket_name, object_key=file_path)
-    if not object_exists:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    if settings.download_redirect_min_bytes is not None and allow_redirect:
+        redirect_response = await _redirect_large_file_to_s3(
+            settings=settings, file_path=file_path, metadata_cache=metadata_cache, s3_client=s3_client
+        )
+        if redirect_response is not None:
+            return redirect_response
+
+    byte_range_specs = parse_range_header(range)
+    if content_cache is not None and not byte_range_specs and conditions == ReadConditions():
+        return await _get_file_through_content_cache(
+            bucket_name=settings.s3_bucket_name,
+            file_path=file_path,
+            content_cache=content_cache,
+            metadata_cache=metadata_cache,
+            revalidate=settings.content_cache_revalidate,
+            cache_control=settings.cache_control,
+            chunk_size_bytes=settings.download_chunk_size_bytes,
+            s3_client=s3_client,
+        )
+    if len(byte_range_specs) > 1:
+        return await _get_file_byte_ranges(
+            bucket_name=settings.s3_bucket_name,
+            file_path=file_path,
+            byte_range_specs=byte_range_specs,
+            conditions=conditions,
+            cache_control=settings.cache_control,
+            chunk_size_bytes=settings.download_chunk_size_bytes,
+            s3_client=s3_client,
+        )
+
+    with object_not_found_as_404(), unsatisfiable_range_as_416(), not_modified_as_304(settings.cache_control):
+        get_object_response = await fetch_s3_object_async(
+            bucket_name=settings.s3_bucket_name,
+            object_key=file_path,
+            byte_range=byte_range_specs[0].to_range_header() if byte_range_specs else None,
+            if_none_match=conditions.if_none_match,
+            if_modified_since=conditions.if_modified_since,
+            s3_client=s3_client,
+        )
+    return _stream_get_object_response(
+        get_object_response,
+        cache_control=settings.cache_control,
+        chunk_size_bytes=settings.download_chunk_size_bytes,
+    )
+
+
+async def _redirect_large_file_to_s3(
+    settings: Settings, file_path: str, metadata_cache: MetadataCache, s3_client: "S3Client"
+) -> Optional[RedirectResponse]:
+    """Redirect to a presigned URL of the file if it is at least `download_redirect_min_bytes`, or else return None."""
+    with object_not_found_as_404():
+        object_metadata = await fetch_s3_object_metadata_async(
+            bucket_name=settings.s3_bucket_name,
+            object_key=file_path,
+            metadata_cache=metadata_cache,
+            s3_client=s3_client,
+        )
+    if object_metadata.content_length < (settings.download_redirect_min_bytes or 0):
+        return None
+    url = presign_get_object(
+        settings.s3_bucket_name,
+        file_path,
+        expires_in_seconds=settings.presigned_url_expires_in_seconds,
+        s3_client=s3_client,
+    )
+    # the URL expires, so neither it nor the redirect to it may be stored
+    return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT, headers={"Cache-Control": "no-store"})
 
-    get_object_response = fetch_s3_object(bucket_name=settings.s3_bucket_name, object_key=file_path)
 
+def _stream_get_object_response(
+    get_object_response: "GetObjectOutputTypeDef", cache_control: Optional[str], chunk_size_bytes: int
+) -> StreamingResponse:
+    """Stream the body of a `get_object` response to the client, with its size, range and validator headers."""
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Length": str(get_object_response["ContentLength"]),
+        **validator_headers(
+            etag=get_object_response.get("ETag"),
+            last_modified=get_object_response.get("LastModified"),
+            cache_control=cache_control,
+        ),
+    }
+    if "ContentRange" in get_object_response:
+        headers["Content-Range"] = get_object_response["ContentRange"]
     return StreamingResponse(
-        content=get_object_response["Body"],
+        content=iter_s3_object_body_async(get_object_response["Body"], chunk_size_bytes=chunk_size_bytes),
+        status_code=status.HTTP_206_PARTIAL_CONTENT if "Content-Range" in headers else status.HTTP_200_OK,
         media_type=get_object_response["ContentType"],
+        headers=headers,
+        # releases the connection to S3 even if the client disconnects before the body was iterated at all
+        background=BackgroundTask(get_object_response["Body"].close),
+    )
+
+
+async def _get_file_through_content_cache(
+    bucket_name: str,
+    file_path: str,
+    content_cache: ContentCache,
+    metadata_cache: MetadataCache,
+    revalidate: bool,
+    cache_control: Optional[str],
+    chunk_size_bytes: int,
+    s3_client: "S3Client",
+) -> Response:
+    """Respond with a copy of the file from the content cache if it is current, or else fetch it from S3."""
+    with object_not_found_as_404():
+        fetched = await fetch_s3_object_through_content_cache_async(
+            bucket_name=bucket_name,
+            object_key=file_path,
+            content_cache=content_cache,
+            metadata_cache=metadata_cache,
+            revalidate=revalidate,
+            s3_client=s3_client,
+        )
+    if not isinstance(fetched, CachedObject):
+        return _stream_get_object_response(fetched, cache_control=cache_control, chunk_size_bytes=chunk_size_bytes)
+
+    return Response(
+        content=fetched.content,
+        media_type=fetched.content_type,
+        headers={
+            "Accept-Ranges": "bytes",
+            **validator_headers(etag=fetched.etag, last_modified=fetched.last_modified, cache_control=cache_control),
+        },
+    )
+
+
+async def _get_file_byte_ranges(
+    bucket_name: str,
+    file_path: str,
+    byte_range_specs: List[ByteRangeSpec],
+    conditions: ReadConditions,
+    cache_control: Optional[str],
+    chunk_size_bytes: int,
+    s3_client: "S3Client",
+) -> StreamingResponse:
+    """Respond to a request for several byte ranges of a file with one ranged S3 read per satisfiable range."""
+    with object_not_found_as_404(), not_modified_as_304(cache_control):
+        object_metadata = await fetch_s3_object_metadata_async(
+            bucket_name=bucket_name,
+            object_key=file_path,
+            if_none_match=conditions.if_none_match,
+            if_modified_since=conditions.if_modified_since,
+            s3_client=s3_client,
+        )
+
+    complete_length = object_metadata.content_length
+    byte_ranges = [
+        byte_range
+        for byte_range in (spec.resolve(complete_length) for spec in byte_range_specs)
+        if byte_range is not None
+    ]
+    if not byte_ranges:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{complete_length}"},
+        )
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        **validator_headers(
+            etag=object_metadata.etag,
+            last_modified=object_metadata.last_modified,
+            cache_control=cache_control,
+        ),
+    }
+    # every range is read from the version of the file the headers describe. If the file is replaced
+    # mid-response, the parts of a multipart response can no longer be recalled, so the stream is cut short
+    if len(byte_ranges) == 1:
+        with object_not_found_as_404(), changed_object_as_503():
+            get_object_response = await fetch_s3_object_async(
+                bucket_name=bucket_name,
+                object_key=file_path,
+                byte_range=byte_ranges[0].to_range_header(),
+                if_match=object_metadata.etag,
+                s3_client=s3_client,
+            )
+        headers["Content-Range"] = byte_ranges[0].to_content_range_header(complete_length)
+        headers["Content-Length"] = str(byte_ranges[0].length)
+        return StreamingResponse(
+            content=iter_s3_object_body_async(get_object_response["Body"], chunk_size_bytes=chunk_size_bytes),
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type=object_metadata.content_type,
+            headers=headers,
+            background=BackgroundTask(get_object_response["Body"].close),
+        )
+
+    body_layout = MultipartByteranges(
+        byte_ranges=byte_ranges,
+        content_type=object_metadata.content_type,
+        complete_length=complete_length,
+    )
+
+    async def iter_body() -> AsyncIterator[bytes]:
+        for byte_range in byte_ranges:
+            yield body_layout.part_header(byte_range)
+            part_response = await fetch_s3_object_async(
+                bucket_name=bucket_name,
+                object_key=file_path,
+                byte_range=byte_range.to_range_header(),
+                if_match=object_metadata.etag,
+                s3_client=s3_client,
+            )
+            async for chunk in iter_s3_object_body_async(part_response["Body"], chunk_size_bytes=chunk_size_bytes):
+                yield chunk
+        yield body_layout.closing_delimiter
+
+    headers["Content-Length"] = str(body_layout.content_length)
+    return StreamingResponse(
+        content=iter_body(),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=body_layout.media_type,
+        headers=headers,
     )
 
 
@@ -222,6 +1183,10 @@ async def delete_file(
     request: Request,
     file_path: str,
     response: Response,
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+    metadata_cache: Annotated[MetadataCache, Depends(get_metadata_cache)],
+    content_cache: Annotated[Optional[ContentCache], Depends(get_content_cache)],
+    metadata_index: Annotated[Optional[MetadataIndex], Depends(get_metadata_index)],
 ) -> Response:
     """
     Delete a file.
@@ -230,17 +1195,709 @@ async def delete_file(
     """
     settings: Settings = request.app.state.settings
 
-    # before deleting object, make sure it exists
-    object_exists = object_exists_in_s3(bucket_name=settings.s3_bucket_name, object_key=file_path)
+    # before deleting object, make sure it exists. S3 deletes are idempotent and do not
+    # report whether the key existed, so this check cannot be folded into the delete itself.
+    object_exists = await object_exists_in_s3_async(
+        bucket_name=settings.s3_bucket_name,
+        object_key=file_path,
+        metadata_cache=metadata_cache,
+        s3_client=s3_client,
+    )
     if not object_exists:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
 
     # delete object, if it extists
-    delete_s3_object(bucket_name=settings.s3_bucket_name, object_key=file_path)
+    await delete_s3_object_async(bucket_name=settings.s3_bucket_name, object_key=file_path, s3_client=s3_client)
+    await _invalidate_cached_files(
+        settings.s3_bucket_name, [file_path], metadata_cache, content_cache, metadata_index, deleted=True
+    )
     response.status_code = status.HTTP_204_NO_CONTENT
     return response
 
 
+@FILES_ROUTER.post(
+    "/files/bulk-delete",
+    response_class=NDJSONResponse,
+    responses={
+        status.HTTP_200_OK: {
+            "model": BulkDeleteResult,
+            "description": "One line of JSON per file, streamed as the files are deleted in batches of 1000.",
+        },
+    },
+)
+async def bulk_delete_files(
+    request: Request,
+    body: BulkDeleteFilesRequest,
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+    metadata_cache: Annotated[MetadataCache, Depends(get_metadata_cache)],
+    content_cache: Annotated[Optional[ContentCache], Depends(get_content_cache)],
+    metadata_index: Annotated[Optional[MetadataIndex], Depends(get_metadata_index)],
+) -> NDJSONResponse:
+    """
+    Delete many files at once, either by path or every file under a directory.
+
+    Files are deleted in batches of up to 1000, several batches at a time, and the outcome for each
+    file is streamed back as one line of JSON as soon as its batch completes. Unlike
+    `DELETE /files/{file_path}`, no existence check is made, so deleting a file that does not exist
+    is reported as a success. Deleting some files may fail while the others succeed, so check the
+    `deleted` field of every line.
+    """
+    settings: Settings = request.app.state.settings
+
+    object_keys = (
+        body.file_paths
+        if body.file_paths is not None
+        else iter_s3_object_keys_async(bucket_name=settings.s3_bucket_name, prefix=body.directory, s3_client=s3_client)
+    )
+
+    async def iter_result_lines() -> AsyncIterator[str]:
+        async for batch_results in iter_delete_s3_objects_async(
+            bucket_name=settings.s3_bucket_name,
+            object_keys=object_keys,
+            max_concurrency=settings.s3_delete_max_concurrency,
+            s3_client=s3_client,
+        ):
+            await _invalidate_cached_files(
+                settings.s3_bucket_name,
+                [result.object_key for result in batch_results if result.deleted],
+                metadata_cache,
+                content_cache,
+                metadata_index,
+                deleted=True,
+            )
+            lines = []
+            for result in batch_results:
+                lines.append(
+                    BulkDeleteResult(
+                        file_path=result.object_key,
+                        deleted=result.deleted,
+                        error_code=result.error_code,
+                        error_message=result.error_message,
+                    ).model_dump_json()
+                    + "\n"
+                )
+            yield "".join(lines)
+
+    return NDJSONResponse(content=iter_result_lines())
+
+
+@FILES_ROUTER.post("/files/copy")
+async def copy_file(
+    request: Request,
+    body: CopyFileRequest,
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+    metadata_cache: Annotated[MetadataCache, Depends(get_metadata_cache)],
+    content_cache: Annotated[Optional[ContentCache], Depends(get_content_cache)],
+    metadata_index: Annotated[Optional[MetadataIndex], Depends(get_metadata_index)],
+) -> CopyFileResponse:
+    """
+    Copy a file to another path, replacing any file already there.
+
+    The copy is made by S3 itself, so the content of the file is never downloaded. Files larger
+    than 5 GiB are copied in parts, several at a time.
+    """
+    settings: Settings = request.app.state.settings
+
+    await _copy_file(settings, body, s3_client)
+    await _invalidate_cached_files(
+        settings.s3_bucket_name, [body.destination_path], metadata_cache, content_cache, metadata_index
+    )
+    return CopyFileResponse(
+        source_path=body.source_path,
+        destination_path=body.destination_path,
+        message=f"File copied from /{body.source_path} to /{body.destination_path}",
+    )
+
+
+@FILES_ROUTER.post("/files/move")
+async def move_file(
+    request: Request,
+    body: CopyFileRequest,
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+    metadata_cache: Annotated[MetadataCache, Depends(get_metadata_cache)],
+    content_cache: Annotated[Optional[ContentCache], Depends(get_content_cache)],
+    metadata_index: Annotated[Optional[MetadataIndex], Depends(get_metadata_index)],
+) -> CopyFileResponse:
+    """
+    Move, i.e. rename, a file to another path, replacing any file already there.
+
+    The file is copied by S3 itself, so its content is never downloaded, then deleted from its
+    original path.
+    """
+    settings: Settings = request.app.state.settings
+
+    await _copy_file(settings, body, s3_client)
+    await delete_s3_object_async(settings.s3_bucket_name, body.source_path, s3_client=s3_client)
+    await _invalidate_cached_files(
+        settings.s3_bucket_name, [body.source_path], metadata_cache, content_cache, metadata_index, deleted=True
+    )
+    await _invalidate_cached_files(
+        settings.s3_bucket_name, [body.destination_path], metadata_cache, content_cache, metadata_index
+    )
+    return CopyFileResponse(
+        source_path=body.source_path,
+        destination_path=body.destination_path,
+        message=f"File moved from /{body.source_path} to /{body.destination_path}",
+    )
+
+
+async def _copy_file(settings: Settings, body: CopyFileRequest, s3_client: "S3Client") -> None:
+    with object_not_found_as_404():
+        await copy_s3_object_async(
+            bucket_name=settings.s3_bucket_name,
+            source_key=body.source_path,
+            destination_key=body.destination_path,
+            part_size_bytes=settings.s3_copy_part_size_bytes,
+            max_concurrency=settings.s3_copy_max_concurrency,
+            s3_client=s3_client,
+        )
+
+
+@FILES_ROUTER.post(
+    "/files/copy-directory",
+    response_class=NDJSONResponse,
+    responses={
+        status.HTTP_200_OK: {
+            "model": CopyFileResult,
+            "description": "One line of JSON per file, streamed as the files are copied in batches of 1000.",
+        },
+    },
+)
+async def copy_directory(
+    request: Request,
+    body: CopyDirectoryRequest,
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+    metadata_cache: Annotated[MetadataCache, Depends(get_metadata_cache)],
+    content_cache: Annotated[Optional[ContentCache], Depends(get_content_cache)],
+    metadata_index: Annotated[Optional[MetadataIndex], Depends(get_metadata_index)],
+) -> NDJSONResponse:
+    """
+    Copy every file under a directory to the same path under another directory.
+
+    Files are copied by S3 itself, several at a time, and the outcome for each file is streamed
+    back as one line of JSON as soon as its batch completes. Copying some files may fail while
+    the others succeed, so check the `succeeded` field of every line.
+    """
+    return _stream_directory_copy(
+        request, body, s3_client, metadata_cache, content_cache, metadata_index, delete_source=False
+    )
+
+
+@FILES_ROUTER.post(
+    "/files/move-directory",
+    response_class=NDJSONResponse,
+    responses={
+        status.HTTP_200_OK: {
+            "model": CopyFileResult,
+            "description": "One line of JSON per file, streamed as the files are moved in batches of 1000.",
+        },
+    },
+)
+async def move_directory(
+    request: Request,
+    body: CopyDirectoryRequest,
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+    metadata_cache: Annotated[MetadataCache, Depends(get_metadata_cache)],
+    content_cache: Annotated[Optional[ContentCache], Depends(get_content_cache)],
+    metadata_index: Annotated[Optional[MetadataIndex], Depends(get_metadata_index)],
+) -> NDJSONResponse:
+    """
+    Move every file under a directory to the same path under another directory.
+
+    Files are copied by S3 itself, several at a time, and then deleted from the source directory
+    in batches. The outcome for each file is streamed back as one line of JSON as soon as its
+    batch completes. A file whose copy failed is left in place; check the `succeeded` field of
+    every line.
+    """
+    return _stream_directory_copy(
+        request, body, s3_client, metadata_cache, content_cache, metadata_index, delete_source=True
+    )
+
+
+def _stream_directory_copy(
+    request: Request,
+    body: CopyDirectoryRequest,
+    s3_client: "S3Client",
+    metadata_cache: MetadataCache,
+    content_cache: Optional[ContentCache],
+    metadata_index: Optional[MetadataIndex],
+    delete_source: bool,
+) -> NDJSONResponse:
+    """Copy or move a directory, streaming the outcome for each file as one line of JSON."""
+    settings: Settings = request.app.state.settings
+
+    async def iter_result_lines() -> AsyncIterator[str]:
+        async for round_results in iter_copy_s3_objects_async(
+            bucket_name=settings.s3_bucket_name,
+            source_prefix=body.source_directory,
+            destination_prefix=body.destination_directory,
+            delete_source=delete_source,
+            max_concurrency=settings.s3_copy_max_concurrency,
+            part_size_bytes=settings.s3_copy_part_size_bytes,
+            s3_client=s3_client,
+        ):
+            deleted_keys = [result.source_key for result in round_results if delete_source and result.succeeded]
+            written_keys = [result.destination_key for result in round_results] + [
+                result.source_key for result in round_results if not (delete_source and result.succeeded)
+            ]
+            await _invalidate_cached_files(
+                settings.s3_bucket_name, deleted_keys, metadata_cache, content_cache, metadata_index, deleted=True
+            )
+            await _invalidate_cached_files(
+                settings.s3_bucket_name, written_keys, metadata_cache, content_cache, metadata_index
+            )
+            lines = []
+            for result in round_results:
+                lines.append(
+                    CopyFileResult(
+                        source_path=result.source_key,
+                        destination_path=result.destination_key,
+                        succeeded=result.succeeded,
+                        error_code=result.error_code,
+                        error_message=result.error_message,
+                    ).model_dump_json()
+                    + "\n"
+                )
+            yield "".join(lines)
+
+    return NDJSONResponse(content=iter_result_lines())
+
+
+@FILES_ROUTER.post("/presigned-urls/download")
+async def presign_file_download(
+    request: Request,
+    body: PresignDownloadRequest,
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+) -> PresignedUrlResponse:
+    """
+    Issue a presigned S3 URL to download a file from, so that its content does not go through the API.
+
+    Signing makes no S3 call, so the file is not checked to exist: the URL answers 404 if it does not.
+    """
+    settings: Settings = request.app.state.settings
+
+    expires_in_seconds = body.expires_in_seconds or settings.presigned_url_expires_in_seconds
+    url = presign_get_object(
+        settings.s3_bucket_name, body.file_path, expires_in_seconds=expires_in_seconds, s3_client=s3_client
+    )
+    return PresignedUrlResponse(
+        file_path=body.file_path, method="GET", url=url, headers={}, expires_at=_expires_at(expires_in_seconds)
+    )
+
+
+@FILES_ROUTER.post("/presigned-urls/upload")
+async def presign_file_upload(
+    request: Request,
+    body: PresignUploadRequest,
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+) -> PresignedUrlResponse:
+    """
+    Issue a presigned S3 URL to upload a file to in one `PUT` of up to 5 GiB, replacing any file already there.
+
+    The API does not see the upload happen, so cached metadata of a file already at the path is
+    served until it expires, and the metadata index only learns of the file when it is reconciled.
+    Use `POST /presigned-urls/multipart-uploads` for larger files, or to upload in parallel.
+    """
+    settings: Settings = request.app.state.settings
+
+    expires_in_seconds = body.expires_in_seconds or settings.presigned_url_expires_in_seconds
+    content_type = body.content_type or "application/octet-stream"
+    url = presign_put_object(
+        settings.s3_bucket_name,
+        body.file_path,
+        expires_in_seconds=expires_in_seconds,
+        content_type=content_type,
+        s3_client=s3_client,
+    )
+    return PresignedUrlResponse(
+        file_path=body.file_path,
+        method="PUT",
+        url=url,
+        headers={"Content-Type": content_type},
+        expires_at=_expires_at(expires_in_seconds),
+    )
+
+
+@FILES_ROUTER.post("/presigned-urls/multipart-uploads")
+async def create_presigned_multipart_upload(
+    request: Request,
+    body: CreatePresignedMultipartUploadRequest,
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+) -> CreatePresignedMultipartUploadResponse:
+    """
+    Start an S3 multipart upload of a file, and issue a presigned URL for each of its parts.
+
+    The parts are uploaded straight to S3, in any order and in parallel, then assembled with
+    `POST /presigned-urls/multipart-uploads/complete`. Starting the upload is the only S3 call.
+    """
+    settings: Settings = request.app.state.settings
+
+    expires_in_seconds = body.expires_in_seconds or settings.presigned_url_expires_in_seconds
+    # split the same way as multipart copies, which also stay within S3's limit on the number of parts
+    part_ranges = copy_part_ranges(body.size_bytes, body.part_size_bytes or settings.s3_multipart_part_size_bytes)
+    upload_id = await create_multipart_upload_async(
+        settings.s3_bucket_name, body.file_path, content_type=body.content_type, s3_client=s3_client
+    )
+    # signing thousands of parts takes long enough to be kept off the event loop
+    part_urls = await to_thread.run_sync(
+        partial(
+            presign_upload_parts,
+            settings.s3_bucket_name,
+            body.file_path,
+            upload_id,
+            part_numbers=list(range(1, len(part_ranges) + 1)),
+            expires_in_seconds=expires_in_seconds,
+            s3_client=s3_client,
+        )
+    )
+    first_part_first_byte, first_part_last_byte = part_ranges[0]
+    return CreatePresignedMultipartUploadResponse(
+        file_path=body.file_path,
+        upload_id=upload_id,
+        part_size_bytes=first_part_last_byte - first_part_first_byte + 1,
+        parts=[
+            PresignedPartModel(part_number=part_number, first_byte=first_byte, last_byte=last_byte, url=url)
+            for (part_number, url), (first_byte, last_byte) in zip(part_urls.items(), part_ranges)
+        ],
+        expires_at=_expires_at(expires_in_seconds),
+    )
+
+
+@FILES_ROUTER.post(
+    "/presigned-urls/multipart-uploads/complete",
+    responses={
+        status.HTTP_400_BAD_REQUEST: {
+            "description": "A part was not uploaded, or is too small to be followed by others."
+        },
+        status.HTTP_404_NOT_FOUND: {"description": "The upload does not exist, or was completed or aborted."},
+    },
+)
+async def complete_presigned_multipart_upload(
+    request: Request,
+    body: CompletePresignedMultipartUploadRequest,
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+    metadata_cache: Annotated[MetadataCache, Depends(get_metadata_cache)],
+    content_cache: Annotated[Optional[ContentCache], Depends(get_content_cache)],
+    metadata_index: Annotated[Optional[MetadataIndex], Depends(get_metadata_index)],
+) -> PutFileResponse:
+    """Assemble the uploaded parts of a multipart upload into the file, replacing any file already there."""
+    settings: Settings = request.app.state.settings
+
+    with upload_errors_as_4xx():
+        await complete_multipart_upload_async(
+            settings.s3_bucket_name,
+            body.file_path,
+            body.upload_id,
+            parts=[{"PartNumber": part.part_number, "ETag": part.etag} for part in body.parts],
+            s3_client=s3_client,
+        )
+    await _invalidate_cached_files(
+        settings.s3_bucket_name, [body.file_path], metadata_cache, content_cache, metadata_index
+    )
+    return PutFileResponse(file_path=body.file_path, message=f"File uploaded at path: /{body.file_path}")
+
+
+@FILES_ROUTER.post(
+    "/presigned-urls/multipart-uploads/abort",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={status.HTTP_404_NOT_FOUND: {"description": "The upload does not exist, or was completed or aborted."}},
+)
+async def abort_presigned_multipart_upload(
+    request: Request,
+    body: AbortPresignedMultipartUploadRequest,
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+) -> None:
+    """Abort a multipart upload, deleting its uploaded parts. Parts still being uploaded may need another abort."""
+    settings: Settings = request.app.state.settings
+
+    with upload_errors_as_4xx():
+        await abort_multipart_upload_async(
+            settings.s3_bucket_name, body.file_path, body.upload_id, s3_client=s3_client
+        )
+
+
+def _expires_at(expires_in_seconds: int) -> datetime:
+    """Return when a URL presigned now to be valid for `expires_in_seconds` expires."""
+    return datetime.now(timezone.utc) + timedelta(seconds=expires_in_seconds)
+
+
+@UPLOAD_SESSIONS_ROUTER.post("/upload-sessions", status_code=status.HTTP_201_CREATED)
+async def create_upload_session(
+    request: Request,
+    body: CreateUploadSessionRequest,
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+    session_store: Annotated[UploadSessionStore, Depends(get_upload_session_store)],
+) -> UploadSessionResponse:
+    """
+    Start a resumable upload of a file.
+
+    Send the file as numbered parts with `PUT /upload-sessions/{session_id}/parts/{part_number}`,
+    in any order and several at once. A part whose upload failed is sent again: a part received
+    twice is kept as last sent. After a dropped connection, `GET /upload-sessions/{session_id}`
+    tells which parts were received. Sessions are stored as files in the configured sessions
+    directory, so any worker sharing that directory, i.e. any worker on the same host by default,
+    can serve any request of a session. Workers on several hosts need it on a shared volume.
+
+    Sessions idle for longer than the configured idle time are aborted, deleting their parts.
+    """
+    settings: Settings = request.app.state.settings
+
+    content_type = body.content_type or "application/octet-stream"
+    upload_id = await create_multipart_upload_async(
+        settings.s3_bucket_name, body.file_path, content_type=content_type, s3_client=s3_client
+    )
+    session = UploadSession(
+        session_id=uuid.uuid4().hex,
+        file_path=body.file_path,
+        upload_id=upload_id,
+        content_type=content_type,
+        size_bytes=body.size_bytes,
+        created_at=datetime.now(timezone.utc),
+    )
+    await to_thread.run_sync(session_store.save, session)
+    return _upload_session_response(settings, session, parts=[])
+
+
+@UPLOAD_SESSIONS_ROUTER.get(
+    "/upload-sessions/{session_id}",
+    responses={status.HTTP_404_NOT_FOUND: {"description": "No session with the given `session_id`, or it ended."}},
+)
+async def get_upload_session(
+    request: Request,
+    session_id: str,
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+    session_store: Annotated[UploadSessionStore, Depends(get_upload_session_store)],
+) -> UploadSessionResponse:
+    """Report which parts of a resumable upload were received, e.g. to resume it after a dropped connection."""
+    settings: Settings = request.app.state.settings
+
+    session = await _get_upload_session(session_store, session_id)
+    async with _ended_upload_session_as_404(session_store, session):
+        parts = await list_uploaded_parts_async(
+            settings.s3_bucket_name, session.file_path, session.upload_id, s3_client=s3_client
+        )
+    return _upload_session_response(settings, session, parts=parts)
+
+
+@UPLOAD_SESSIONS_ROUTER.put(
+    "/upload-sessions/{session_id}/parts/{part_number}",
+    responses={
+        status.HTTP_404_NOT_FOUND: {"description": "No session with the given `session_id`, or it ended."},
+        status.HTTP_413_REQUEST_ENTITY_TOO_LARGE: {"description": "The part is larger than the configured maximum."},
+    },
+    # the body is read by the handler rather than by FastAPI, so it is documented by hand
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/octet-stream": {"schema": {"type": "string", "format": "binary"}}},
+        },
+    },
+)
+async def upload_session_part(
+    request: Request,
+    session_id: str,
+    part_number: Annotated[int, Path(ge=1, le=MAX_MULTIPART_PARTS, description="Position of the part.")],
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+    session_store: Annotated[UploadSessionStore, Depends(get_upload_session_store)],
+) -> UploadedPartModel:
+    """
+    Upload one part of a resumable upload, sent as the raw request body.
+
+    Every part but the one with the highest number must be at least 5 MiB. Parts are buffered
+    in memory until sent to S3, so they are limited to the configured maximum part size.
+    """
+    settings: Settings = request.app.state.settings
+
+    session = await _get_upload_session(session_store, session_id)
+    part_content = await _read_request_body(request, max_bytes=settings.upload_session_max_part_bytes)
+    async with _ended_upload_session_as_404(session_store, session):
+        uploaded_part = await upload_part_async(
+            settings.s3_bucket_name,
+            session.file_path,
+            session.upload_id,
+            part_number=part_number,
+            part_content=part_content,
+            s3_client=s3_client,
+        )
+    return UploadedPartModel(part_number=part_number, size_bytes=len(part_content), etag=uploaded_part["ETag"])
+
+
+@UPLOAD_SESSIONS_ROUTER.post(
+    "/upload-sessions/{session_id}/complete",
+    responses={
+        status.HTTP_400_BAD_REQUEST: {
+            "description": "Parts are missing, do not add up to the announced size, or are too small."
+        },
+        status.HTTP_404_NOT_FOUND: {"description": "No session with the given `session_id`, or it ended."},
+    },
+)
+async def complete_upload_session(
+    request: Request,
+    session_id: str,
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+    session_store: Annotated[UploadSessionStore, Depends(get_upload_session_store)],
+    metadata_cache: Annotated[MetadataCache, Depends(get_metadata_cache)],
+    content_cache: Annotated[Optional[ContentCache], Depends(get_content_cache)],
+    metadata_index: Annotated[Optional[MetadataIndex], Depends(get_metadata_index)],
+) -> PutFileResponse:
+    """
+    Assemble the parts of a resumable upload into the file, replacing any file already there, and end the session.
+
+    The parts must be numbered from 1 without gaps. If completing fails, e.g. because a part is
+    missing, the session is left open so that the problem can be fixed and completing retried.
+    """
+    settings: Settings = request.app.state.settings
+
+    session = await _get_upload_session(session_store, session_id)
+    async with _ended_upload_session_as_404(session_store, session):
+        with upload_errors_as_4xx():
+            parts = await list_uploaded_parts_async(
+                settings.s3_bucket_name, session.file_path, session.upload_id, s3_client=s3_client
+            )
+            _check_upload_session_parts(session, parts)
+            await complete_multipart_upload_async(
+                settings.s3_bucket_name,
+                session.file_path,
+                session.upload_id,
+                parts=[{"PartNumber": part.part_number, "ETag": part.etag} for part in parts],
+                s3_client=s3_client,
+            )
+    await to_thread.run_sync(session_store.delete, session_id)
+    await _invalidate_cached_files(
+        settings.s3_bucket_name, [session.file_path], metadata_cache, content_cache, metadata_index
+    )
+    return PutFileResponse(file_path=session.file_path, message=f"File uploaded at path: /{session.file_path}")
+
+
+@UPLOAD_SESSIONS_ROUTER.delete(
+    "/upload-sessions/{session_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={status.HTTP_404_NOT_FOUND: {"description": "No session with the given `session_id`, or it ended."}},
+)
+async def abort_upload_session(
+    request: Request,
+    session_id: str,
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+    session_store: Annotated[UploadSessionStore, Depends(get_upload_session_store)],
+) -> None:
+    """Abort a resumable upload, deleting the parts received so far."""
+    settings: Settings = request.app.state.settings
+
+    session = await _get_upload_session(session_store, session_id)
+    async with _ended_upload_session_as_404(session_store, session):
+        await abort_multipart_upload_async(
+            settings.s3_bucket_name, session.file_path, session.upload_id, s3_client=s3_client
+        )
+    await to_thread.run_sync(session_store.delete, session_id)
+
+
+async def _get_upload_session(session_store: UploadSessionStore, session_id: str) -> UploadSession:
+    session = await to_thread.run_sync(session_store.get, session_id)
+    if session is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+    return session
+
+
+@asynccontextmanager
+async def _ended_upload_session_as_404(
+    session_store: UploadSessionStore, session: UploadSession
+) -> AsyncIterator[None]:
+    """Forget a session whose multipart upload no longer exists, e.g. because it was swept, and respond with 404."""
+    try:
+        yield
+    except ClientError as err:
+        if not is_no_such_upload_error(err):
+            raise
+        await to_thread.run_sync(session_store.delete, session.session_id)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+
+
+def _check_upload_session_parts(session: UploadSession, parts: List[UploadedPart]) -> None:
+    """Reject completing a session whose parts have gaps or do not add up to its announced size."""
+    if not parts:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No parts were uploaded")
+    missing_part_numbers = sorted(set(range(1, parts[-1].part_number + 1)) - {part.part_number for part in parts})
+    if missing_part_numbers:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Missing parts: {missing_part_numbers[:100]}"
+        )
+    size_bytes = sum(part.size_bytes for part in parts)
+    if session.size_bytes is not None and size_bytes != session.size_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"The parts add up to {size_bytes} bytes rather than {session.size_bytes}",
+        )
+
+
+async def _read_request_body(request: Request, max_bytes: int) -> bytes:
+    """Read the raw body of a request, responding with 413 as soon as it is known to exceed `max_bytes`."""
+    content_length = request.headers.get("Content-Length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > max_bytes:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Part too large")
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Part too large")
+    return bytes(body)
+
+
+def _upload_session_response(
+    settings: Settings, session: UploadSession, parts: List[UploadedPart]
+) -> UploadSessionResponse:
+    return UploadSessionResponse(
+        session_id=session.session_id,
+        file_path=session.file_path,
+        content_type=session.content_type,
+        size_bytes=session.size_bytes,
+        min_part_size_bytes=MIN_MULTIPART_PART_SIZE_BYTES,
+        max_part_size_bytes=settings.upload_session_max_part_bytes,
+        max_parts=MAX_MULTIPART_PARTS,
+        parts=[
+            UploadedPartModel(part_number=part.part_number, size_bytes=part.size_bytes, etag=part.etag)
+            for part in parts
+        ],
+        bytes_received=sum(part.size_bytes for part in parts),
+        created_at=session.created_at,
+    )
+
+
+async def _invalidate_cached_files(
+    bucket_name: str,
+    file_paths: List[str],
+    metadata_cache: MetadataCache,
+    content_cache: Optional[ContentCache],
+    metadata_index: Optional[MetadataIndex] = None,
+    deleted: bool = False,
+) -> None:
+    """
+    Drop everything cached about files that were just written or deleted, and update their index entries.
+
+    The index entries are updated in one transaction, in a worker thread: a write waits for any
+    query of the index in progress, e.g. a summary, which must not block the event loop.
+
+    :param deleted: Whether the files are known to be deleted, in which case their index entries are
+        removed rather than refreshed from S3 before the next query.
+    """
+    for file_path in file_paths:
+        _invalidate_memory_cached_file(bucket_name, file_path, metadata_cache, content_cache)
+    if metadata_index is None or not file_paths:
+        return
+    if deleted:
+        await to_thread.run_sync(metadata_index.delete, bucket_name, file_paths)
+    else:
+        await to_thread.run_sync(metadata_index.mark_stale, bucket_name, file_paths)
+
+
+def _invalidate_memory_cached_file(
+    bucket_name: str, file_path: str, metadata_cache: MetadataCache, content_cache: Optional[ContentCache]
+) -> None:
+    """Drop what the in-memory caches hold about a file that was just written or deleted."""
+    metadata_cache.invalidate(bucket_name, file_path)
+    if content_cache is not None:
+        content_cache.invalidate(bucket_name, file_path)
+
+
 @GENERATED_FILES_ROUTER.post(
     "/files/generated/{file_path:path}",
     status_code=status.HTTP_201_CREATED,
@@ -262,7 +1919,13 @@ async def delete_file(
     },
 )
 async def generate_file_using_openai(
-    request: Request, response: Response, query_params: Annotated[GenerateFilesQueryParams, Depends()]
+    request: Request,
+    response: Response,
+    query_params: Annotated[GenerateFilesQueryParams, Depends()],
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+    metadata_cache: Annotated[MetadataCache, Depends(get_metadata_cache)],
+    content_cache: Annotated[Optional[ContentCache], Depends(get_content_cache)],
+    metadata_index: Annotated[Optional[MetadataIndex], Depends(get_metadata_index)],
 ) -> PutGeneratedFileResponse:
     """
     Generate a file using AI.
@@ -296,11 +1959,15 @@ async def generate_file_using_openai(
     content_type: str | None = content_type or mimetypes.guess_type(query_params.file_path)[0]
 
     # upload to s3 the generated file
-    upload_s3_object(
+    await upload_s3_object_async(
         bucket_name=s3_bucket_name,
         object_key=query_params.file_path,
         file_content=file_content_bytes,
         content_type=content_type,
+        s3_client=s3_client,
+    )
+    await _invalidate_cached_files(
+        s3_bucket_name, [query_params.file_path], metadata_cache, content_cache, metadata_index
     )
 
     # return response
@@ -309,3 +1976,135 @@ async def generate_file_using_openai(
         file_path=query_params.file_path,
         message=f"New {query_params.file_type.value} file generated and uploaded at path {query_params.file_path}",
     )
+
+
+@JOBS_ROUTER.post("/delete-jobs", status_code=status.HTTP_202_ACCEPTED)
+async def submit_delete_job(
+    body: SubmitDeleteJobRequest,
+    delete_job_runner: Annotated[DeleteJobRunner, Depends(get_delete_job_runner)],
+) -> DeleteJobResponse:
+    """
+    Start deleting every file under a directory in the background.
+
+    The job is started immediately and its id returned without waiting for it to finish. Poll
+    `GET /delete-jobs/{job_id}` for its progress. Jobs interrupted by a restart of the API resume
+    where they left off.
+    """
+    job = await delete_job_runner.submit(directory=body.directory)
+    return DeleteJobResponse.from_job(job)
+
+
+@JOBS_ROUTER.get(
+    "/delete-jobs/{job_id}",
+    responses={status.HTTP_404_NOT_FOUND: {"description": "No job with the given `job_id`."}},
+)
+async def get_delete_job(
+    job_id: str,
+    delete_job_runner: Annotated[DeleteJobRunner, Depends(get_delete_job_runner)],
+) -> DeleteJobResponse:
+    """Report the progress of a delete job."""
+    response = await to_thread.run_sync(_describe_delete_job, delete_job_runner.job_store, job_id)
+    if response is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return response
+
+
+@JOBS_ROUTER.post(
+    "/delete-jobs/{job_id}/cancel",
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={
+        status.HTTP_404_NOT_FOUND: {"description": "No job with the given `job_id`."},
+        status.HTTP_409_CONFLICT: {"description": "The job has already finished."},
+    },
+)
+async def cancel_delete_job(
+    job_id: str,
+    delete_job_runner: Annotated[DeleteJobRunner, Depends(get_delete_job_runner)],
+) -> DeleteJobResponse:
+    """
+    Ask a delete job to stop.
+
+    The job stops after the batch of deletes in flight, so a few more files may be deleted
+    after this returns. Files already deleted are not restored.
+    """
+    job = await to_thread.run_sync(delete_job_runner.job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    if job.finished:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job already {job.status.value}")
+    await to_thread.run_sync(delete_job_runner.job_store.request_cancel, job_id)
+    # read again, so that the response shows the cancel request and any progress made since
+    response = await to_thread.run_sync(_describe_delete_job, delete_job_runner.job_store, job_id)
+    assert response is not None, "jobs are never removed from the store"
+    return response
+
+
+def _describe_delete_job(job_store: JobStore, job_id: str) -> Optional[DeleteJobResponse]:
+    """Read a job and whether it was asked to stop, or return None if there is no such job."""
+    job = job_store.get(job_id)
+    if job is None:
+        return None
+    return DeleteJobResponse.from_job(job, cancel_requested=job_store.is_cancel_requested(job_id))
+
+
+@ADMIN_ROUTER.post(
+    "/admin/metadata-index/reconcile",
+    responses={status.HTTP_404_NOT_FOUND: {"description": "The metadata index is disabled."}},
+)
+async def reconcile_metadata_index_with_bucket(
+    request: Request,
+    s3_client: Annotated["S3Client", Depends(get_s3_client)],
+    metadata_index: Annotated[Optional[MetadataIndex], Depends(get_metadata_index)],
+    directory: Annotated[str, Query(description="Only reconcile the files under this directory.")] = "",
+) -> ReconcileMetadataIndexResponse:
+    """
+    Compare the metadata index with a listing of the bucket, and repair any difference.
+
+    Run this after files were written to the bucket other than through the API, which the index
+    cannot otherwise know about. Reconciling the whole bucket also completes the initial scan.
+    """
+    settings: Settings = request.app.state.settings
+    if metadata_index is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Metadata index is disabled")
+    report = await to_thread.run_sync(
+        partial(
+            reconcile_metadata_index,
+            metadata_index,
+            settings.s3_bucket_name,
+            prefix=directory,
+            max_concurrency=settings.listing_max_concurrency,
+            s3_client=s3_client,
+        )
+    )
+    return ReconcileMetadataIndexResponse(
+        files_added=report.files_added, files_updated=report.files_updated, files_removed=report.files_removed
+    )
+
+
+@ADMIN_ROUTER.get("/admin/cache-stats")
+async def get_cache_stats(
+    metadata_cache: Annotated[MetadataCache, Depends(get_metadata_cache)],
+    content_cache: Annotated[Optional[ContentCache], Depends(get_content_cache)],
+) -> GetCacheStatsResponse:
+    """Report the hit, miss and eviction counters of the app's caches."""
+    metadata_cache_stats = metadata_cache.stats()
+    content_cache_stats = content_cache.stats() if content_cache is not None else None
+    return GetCacheStatsResponse(
+        metadata_cache=CacheStatsModel(
+            hits=metadata_cache_stats.hits,
+            misses=metadata_cache_stats.misses,
+            evictions=metadata_cache_stats.evictions,
+            size=metadata_cache_stats.size,
+        ),
+        content_cache=(
+            ContentCacheStatsModel(
+                hits=content_cache_stats.hits,
+                misses=content_cache_stats.misses,
+                evictions=content_cache_stats.evictions,
+                size=content_cache_stats.size,
+                size_bytes=content_cache_stats.size_bytes,
+            )
+            if content_cache_stats is not None
+            else None
+        ),
+    )
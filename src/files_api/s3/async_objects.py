@@ -0,0 +1,1065 @@
+"""
+Async counterparts of the functions in `read_objects`, `write_objects` and `delete_objects`.
+
+boto3 is a blocking library, so awaiting one of these functions dispatches the underlying
+call to a worker thread. The event loop stays free to serve other requests while the call
+to S3 is in flight, so concurrent requests on one worker overlap their I/O instead of
+queueing behind each other.
+"""
+
+from datetime import datetime
+from functools import partial
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+import anyio
+import boto3
+from anyio import to_thread
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
+
+from files_api.s3.content_cache import (
+    CachedObject,
+    ContentCache,
+)
+from files_api.s3.copy_objects import (
+    DEFAULT_COPY_MAX_CONCURRENCY,
+    DEFAULT_COPY_PART_SIZE_BYTES,
+    MAX_COPY_OBJECT_BYTES,
+    CopyResult,
+    copy_part_ranges,
+    copy_s3_object,
+    upload_part_copy,
+)
+from files_api.s3.delete_objects import (
+    MAX_KEYS_PER_DELETE_REQUEST,
+    DeleteResult,
+    delete_s3_object,
+    delete_s3_objects,
+)
+from files_api.s3.errors import (
+    is_not_modified_error,
+    is_object_not_found_error,
+    is_precondition_failed_error,
+)
+from files_api.s3.metadata_cache import MetadataCache
+from files_api.s3.multipart_uploads import (
+    UploadedPart,
+    list_uploaded_parts,
+)
+from files_api.s3.read_objects import (
+    DEFAULT_LISTING_MAX_CONCURRENCY,
+    DEFAULT_MAX_KEYS,
+    S3ListingPage,
+    S3ObjectMetadata,
+    fetch_s3_object,
+    fetch_s3_object_keys,
+    fetch_s3_object_metadata,
+    fetch_s3_objects_after,
+    fetch_s3_objects_metadata,
+    fetch_s3_objects_page,
+    fetch_s3_objects_using_page_token,
+    iter_s3_object_pages_parallel,
+    object_exists_in_s3,
+)
+from files_api.s3.write_objects import (
+    DEFAULT_MULTIPART_MAX_CONCURRENCY,
+    DEFAULT_MULTIPART_PART_SIZE_BYTES,
+    abort_multipart_upload,
+    complete_multipart_upload,
+    create_multipart_upload,
+    upload_part,
+    upload_s3_object,
+)
+
+try:
+    from mypy_boto3_s3 import S3Client
+    from mypy_boto3_s3.type_defs import (
+        CompletedPartTypeDef,
+        GetObjectOutputTypeDef,
+        ObjectTypeDef,
+    )
+except ImportError:
+    ...
+
+DEFAULT_STREAM_CHUNK_SIZE_BYTES = 256 * 1024
+DEFAULT_DELETE_MAX_CONCURRENCY = 10
+# above this size, sending the content of a replaced object a second time is assumed to take longer
+# than the `head_object` round trip that avoids it: ~10 ms either way on a same-region connection
+CONDITIONAL_PUT_MAX_BYTES = 1024 * 1024
+
+T = TypeVar("T")
+
+
+async def run_s3_call(func: Callable[..., T], s3_client: Optional["S3Client"] = None, **kwargs: Any) -> T:
+    """
+    Run a blocking S3 function in a worker thread and await its result.
+
+    :param func: One of the synchronous S3 functions, called as `func(**kwargs, s3_client=...)`.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    """
+    # clients are thread-safe once created, but creating one from the default session is not,
+    # so the client is created here on the event loop thread rather than in the worker thread
+    s3_client = s3_client or boto3.client("s3")
+
+    def _call() -> T:
+        return func(**kwargs, s3_client=s3_client)
+
+    return await to_thread.run_sync(_call)
+
+
+async def object_exists_in_s3_async(
+    bucket_name: str,
+    object_key: str,
+    metadata_cache: Optional[MetadataCache] = None,
+    s3_client: Optional["S3Client"] = None,
+) -> bool:
+    """Async version of `object_exists_in_s3`."""
+    return await run_s3_call(
+        object_exists_in_s3,
+        s3_client,
+        bucket_name=bucket_name,
+        object_key=object_key,
+        metadata_cache=metadata_cache,
+    )
+
+
+async def fetch_s3_object_metadata_async(
+    bucket_name: str,
+    object_key: str,
+    if_none_match: Optional[str] = None,
+    if_modified_since: Optional[datetime] = None,
+    metadata_cache: Optional[MetadataCache] = None,
+    s3_client: Optional["S3Client"] = None,
+) -> S3ObjectMetadata:
+    """Async version of `fetch_s3_object_metadata`."""
+    return await run_s3_call(
+        fetch_s3_object_metadata,
+        s3_client,
+        bucket_name=bucket_name,
+        object_key=object_key,
+        if_none_match=if_none_match,
+        if_modified_since=if_modified_since,
+        metadata_cache=metadata_cache,
+    )
+
+
+async def fetch_s3_object_async(
+    bucket_name: str,
+    object_key: str,
+    byte_range: Optional[str] = None,
+    if_none_match: Optional[str] = None,
+    if_modified_since: Optional[datetime] = None,
+    if_match: Optional[str] = None,
+    s3_client: Optional["S3Client"] = None,
+) -> "GetObjectOutputTypeDef":
+    """Async version of `fetch_s3_object`."""
+    return await run_s3_call(
+        fetch_s3_object,
+        s3_client,
+        bucket_name=bucket_name,
+        object_key=object_key,
+        byte_range=byte_range,
+        if_none_match=if_none_match,
+        if_modified_since=if_modified_since,
+        if_match=if_match,
+    )
+
+
+async def iter_s3_object_body_async(
+    body: StreamingBody,
+    chunk_size_bytes: int = DEFAULT_STREAM_CHUNK_SIZE_BYTES,
+) -> AsyncIterator[bytes]:
+    """
+    Read the body of a `get_object` response in chunks of up to `chunk_size_bytes`, without blocking the event loop.
+
+    Each chunk is read in a worker thread, and the next one is only read once the consumer asks for it,
+    so a slow client slows down the reads from S3 instead of piling up chunks in memory, and no worker
+    thread is held while a chunk is being sent. The body is closed when it has been read to the end,
+    and also if iteration stops early, e.g. because the client disconnected.
+
+    :param body: The `Body` of a `get_object` response.
+    :param chunk_size_bytes: Max size of each chunk. Larger chunks mean fewer hops to a worker thread
+        per download, at the cost of more memory per download in flight.
+    """
+    try:
+        while chunk := await to_thread.run_sync(body.read, chunk_size_bytes):
+            yield chunk
+    finally:
+        body.close()
+
+
+async def fetch_s3_object_through_content_cache_async(
+    bucket_name: str,
+    object_key: str,
+    content_cache: ContentCache,
+    metadata_cache: Optional[MetadataCache] = None,
+    revalidate: bool = False,
+    s3_client: Optional["S3Client"] = None,
+) -> Union[CachedObject, "GetObjectOutputTypeDef"]:
+    """
+    Fetch a whole object, serving it from `content_cache` when the cached copy is known to be current.
+
+    A cached copy is served without calling S3 if its ETag matches a fresh entry of `metadata_cache`.
+    Otherwise, or always if `revalidate` is true, it is revalidated with a conditional `get_object`,
+    which costs a round trip but no transfer of the content if it has not changed. Objects that are
+    downloaded and no larger than the cache's `max_object_bytes` are read into memory and cached.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param object_key: path to the object in the S3 bucket.
+    :param content_cache: Cache of the content of small objects.
+    :param metadata_cache: Optional cache of object metadata, used to confirm cached copies are current.
+    :param revalidate: Whether to check with S3 that a cached copy is current on every read.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+
+    :return: The cached copy of the object, or the `get_object` response of an object too large to cache.
+    """
+    cached_object = content_cache.get(bucket_name, object_key)
+    if (
+        cached_object is not None
+        and not revalidate
+        and _matches_cached_metadata(bucket_name, object_key, cached_object, metadata_cache)
+    ):
+        return cached_object
+
+    # taken before calling S3, so that a copy overtaken by a write is not cached
+    generations = _CacheGenerations(
+        content=content_cache.generation(),
+        metadata=metadata_cache.generation() if metadata_cache is not None else None,
+    )
+    try:
+        response = await fetch_s3_object_async(
+            bucket_name=bucket_name,
+            object_key=object_key,
+            if_none_match=cached_object.etag if cached_object is not None else None,
+            s3_client=s3_client,
+        )
+    except ClientError as err:
+        if cached_object is not None and is_not_modified_error(err):
+            return cached_object
+        if is_object_not_found_error(err):
+            content_cache.invalidate(bucket_name, object_key)
+        raise
+
+    return await _cache_fetched_object(bucket_name, object_key, response, content_cache, metadata_cache, generations)
+
+
+async def fetch_s3_objects_using_page_token_async(
+    bucket_name: str,
+    continuation_token: str,
+    max_keys: int | None = None,
+    s3_client: Optional["S3Client"] = None,
+) -> tuple[list["ObjectTypeDef"], Optional[str]]:
+    """Async version of `fetch_s3_objects_using_page_token`."""
+    return await run_s3_call(
+        fetch_s3_objects_using_page_token,
+        s3_client,
+        bucket_name=bucket_name,
+        continuation_token=continuation_token,
+        max_keys=max_keys,
+    )
+
+
+async def fetch_s3_objects_after_async(
+    bucket_name: str,
+    prefix: str,
+    max_keys: int = DEFAULT_MAX_KEYS,
+    start_after: Optional[str] = None,
+    delimiter: Optional[str] = None,
+    s3_client: Optional["S3Client"] = None,
+) -> S3ListingPage:
+    """Async version of `fetch_s3_objects_after`."""
+    return await run_s3_call(
+        fetch_s3_objects_after,
+        s3_client,
+        bucket_name=bucket_name,
+        prefix=prefix,
+        max_keys=max_keys,
+        start_after=start_after,
+        delimiter=delimiter,
+    )
+
+
+async def fetch_s3_objects_metadata_async(
+    bucket_name: str,
+    prefix: Optional[str] = None,
+    max_keys: Optional[int] = DEFAULT_MAX_KEYS,
+    s3_client: Optional["S3Client"] = None,
+) -> tuple[list["ObjectTypeDef"], Optional[str]]:
+    """Async version of `fetch_s3_objects_metadata`."""
+    return await run_s3_call(
+        fetch_s3_objects_metadata,
+        s3_client,
+        bucket_name=bucket_name,
+        prefix=prefix,
+        max_keys=max_keys,
+    )
+
+
+async def upload_s3_object_async(
+    bucket_name: str,
+    object_key: str,
+    file_content: bytes,
+    content_type: Optional[str] = None,
+    only_if_absent: bool = False,
+    s3_client: Optional["S3Client"] = None,
+) -> None:
+    """Async version of `upload_s3_object`."""
+    await run_s3_call(
+        upload_s3_object,
+        s3_client,
+        bucket_name=bucket_name,
+        object_key=object_key,
+        file_content=file_content,
+        content_type=content_type,
+        only_if_absent=only_if_absent,
+    )
+
+
+async def create_multipart_upload_async(
+    bucket_name: str,
+    object_key: str,
+    content_type: Optional[str] = None,
+    s3_client: Optional["S3Client"] = None,
+) -> str:
+    """Async version of `create_multipart_upload`."""
+    return await run_s3_call(
+        create_multipart_upload,
+        s3_client,
+        bucket_name=bucket_name,
+        object_key=object_key,
+        content_type=content_type,
+    )
+
+
+async def upload_part_async(
+    bucket_name: str,
+    object_key: str,
+    upload_id: str,
+    part_number: int,
+    part_content: bytes,
+    s3_client: Optional["S3Client"] = None,
+) -> "CompletedPartTypeDef":
+    """Async version of `upload_part`."""
+    return await run_s3_call(
+        upload_part,
+        s3_client,
+        bucket_name=bucket_name,
+        object_key=object_key,
+        upload_id=upload_id,
+        part_number=part_number,
+        part_content=part_content,
+    )
+
+
+async def list_uploaded_parts_async(
+    bucket_name: str,
+    object_key: str,
+    upload_id: str,
+    s3_client: Optional["S3Client"] = None,
+) -> List[UploadedPart]:
+    """Async version of `list_uploaded_parts`."""
+    return await run_s3_call(
+        list_uploaded_parts, s3_client, bucket_name=bucket_name, object_key=object_key, upload_id=upload_id
+    )
+
+
+async def complete_multipart_upload_async(
+    bucket_name: str,
+    object_key: str,
+    upload_id: str,
+    parts: List["CompletedPartTypeDef"],
+    s3_client: Optional["S3Client"] = None,
+) -> None:
+    """Async version of `complete_multipart_upload`."""
+    await run_s3_call(
+        complete_multipart_upload,
+        s3_client,
+        bucket_name=bucket_name,
+        object_key=object_key,
+        upload_id=upload_id,
+        parts=parts,
+    )
+
+
+async def abort_multipart_upload_async(
+    bucket_name: str,
+    object_key: str,
+    upload_id: str,
+    s3_client: Optional["S3Client"] = None,
+) -> None:
+    """Async version of `abort_multipart_upload`."""
+    await run_s3_call(
+        abort_multipart_upload, s3_client, bucket_name=bucket_name, object_key=object_key, upload_id=upload_id
+    )
+
+
+async def delete_s3_object_async(
+    bucket_name: str,
+    object_key: str,
+    s3_client: Optional["S3Client"] = None,
+) -> None:
+    """Async version of `delete_s3_object`."""
+    await run_s3_call(delete_s3_object, s3_client, bucket_name=bucket_name, object_key=object_key)
+
+
+async def delete_s3_objects_async(
+    bucket_name: str,
+    object_keys: List[str],
+    s3_client: Optional["S3Client"] = None,
+) -> List[DeleteResult]:
+    """Async version of `delete_s3_objects`."""
+    return await run_s3_call(delete_s3_objects, s3_client, bucket_name=bucket_name, object_keys=object_keys)
+
+
+async def iter_s3_object_keys_async(
+    bucket_name: str,
+    prefix: str,
+    s3_client: Optional["S3Client"] = None,
+) -> AsyncIterator[str]:
+    """Iterate over the keys of all objects under a prefix, listing one page of keys at a time."""
+    continuation_token: Optional[str] = None
+    while True:
+        object_keys, continuation_token = await run_s3_call(
+            fetch_s3_object_keys,
+            s3_client,
+            bucket_name=bucket_name,
+            prefix=prefix,
+            continuation_token=continuation_token,
+        )
+        for object_key in object_keys:
+            yield object_key
+        if continuation_token is None:
+            return
+
+
+async def iter_s3_objects_async(
+    bucket_name: str,
+    prefix: str,
+    s3_client: Optional["S3Client"] = None,
+) -> AsyncIterator["ObjectTypeDef"]:
+    """Iterate over all objects under a prefix, with their size and modification time, one page at a time."""
+    async for objects in iter_s3_object_pages_async(bucket_name=bucket_name, prefix=prefix, s3_client=s3_client):
+        for s3_object in objects:
+            yield s3_object
+
+
+async def iter_s3_object_pages_async(
+    bucket_name: str,
+    prefix: str,
+    s3_client: Optional["S3Client"] = None,
+) -> AsyncIterator[List["ObjectTypeDef"]]:
+    """Iterate over the pages of up to `DEFAULT_MAX_KEYS` objects listed under a prefix."""
+    continuation_token: Optional[str] = None
+    while True:
+        objects, continuation_token = await run_s3_call(
+            fetch_s3_objects_page,
+            s3_client,
+            bucket_name=bucket_name,
+            prefix=prefix,
+            continuation_token=continuation_token,
+        )
+        yield objects
+        if continuation_token is None:
+            return
+
+
+async def iter_s3_object_pages_parallel_async(
+    bucket_name: str,
+    prefix: str,
+    max_concurrency: int = DEFAULT_LISTING_MAX_CONCURRENCY,
+    ordered: bool = True,
+    s3_client: Optional["S3Client"] = None,
+) -> AsyncIterator[List["ObjectTypeDef"]]:
+    """
+    Async version of `iter_s3_object_pages_parallel`.
+
+    The ranges are listed by the threads of `iter_s3_object_pages_parallel`; each page is waited for
+    in a worker thread. Close the iterator, e.g. with `contextlib.aclosing`, to stop the listing early.
+    """
+    pages = iter_s3_object_pages_parallel(
+        bucket_name, prefix=prefix, max_concurrency=max_concurrency, ordered=ordered, s3_client=s3_client
+    )
+    try:
+        while (objects := await to_thread.run_sync(next, pages, None)) is not None:
+            yield objects
+    finally:
+        pages.close()
+
+
+async def iter_delete_s3_objects_async(
+    bucket_name: str,
+    object_keys: Union[Iterable[str], AsyncIterable[str]],
+    max_concurrency: int = DEFAULT_DELETE_MAX_CONCURRENCY,
+    s3_client: Optional["S3Client"] = None,
+) -> AsyncIterator[List[DeleteResult]]:
+    """
+    Delete any number of objects with `delete_objects` calls of up to `MAX_KEYS_PER_DELETE_REQUEST` keys each.
+
+    Up to `max_concurrency` batches are deleted at once. The results of each round of batches are yielded
+    as soon as the round completes, so callers can report progress on deletes of many thousands of objects.
+    Keys are consumed from `object_keys` lazily, so it can be e.g. a listing that is still in progress.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param object_keys: Keys of the objects to delete.
+    :param max_concurrency: Max number of `delete_objects` calls in flight at once.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+
+    :return: The outcome of deleting each key, one list per batch, in the order of `object_keys`.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    batches = _iter_batches(object_keys, batch_size=MAX_KEYS_PER_DELETE_REQUEST).__aiter__()
+
+    while round_of_batches := [batch async for batch in _take(batches, max_concurrency)]:
+        results: List[List[DeleteResult]] = [[] for _ in round_of_batches]
+
+        async def _delete(batch_index: int, batch: List[str]) -> None:
+            try:
+                results[batch_index] = await delete_s3_objects_async(bucket_name, batch, s3_client=s3_client)
+            except ClientError as err:
+                # report a batch that failed as a whole as failures of its keys, rather than failing the other batches
+                error = err.response.get("Error", {})
+                results[batch_index] = [
+                    DeleteResult(
+                        object_key=object_key, error_code=error.get("Code"), error_message=error.get("Message")
+                    )
+                    for object_key in batch
+                ]
+
+        # the task group is exited before yielding, so that a consumer that stops early cannot leave it open
+        async with anyio.create_task_group() as task_group:
+            for batch_index, batch in enumerate(round_of_batches):
+                task_group.start_soon(_delete, batch_index, batch)
+
+        for batch_results in results:
+            yield batch_results
+
+
+async def copy_s3_object_async(
+    bucket_name: str,
+    source_key: str,
+    destination_key: str,
+    source_size_bytes: Optional[int] = None,
+    multipart_threshold_bytes: int = MAX_COPY_OBJECT_BYTES,
+    part_size_bytes: int = DEFAULT_COPY_PART_SIZE_BYTES,
+    max_concurrency: int = DEFAULT_COPY_MAX_CONCURRENCY,
+    s3_client: Optional["S3Client"] = None,
+) -> None:
+    """
+    Copy an object to another key with server-side copies, so that its content never leaves S3.
+
+    Objects up to `multipart_threshold_bytes` are copied with one `copy_object` call. Larger ones are
+    copied as a multipart upload whose parts are copied from byte ranges of the source with
+    `upload_part_copy`, up to `max_concurrency` at once. Every part is made conditional on the ETag
+    of the source, so that a concurrent overwrite of the source fails the copy instead of mixing
+    two versions. If anything fails, the multipart upload is aborted.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param source_key: Key of the object to copy.
+    :param destination_key: Key to copy the object to. Any object already there is replaced.
+    :param source_size_bytes: Size of the source, if known, e.g. from a listing. If it is not known,
+        or the source is copied in parts, the source is checked with `head_object` first.
+    :param multipart_threshold_bytes: Size above which objects are copied in parts. Must be at most
+        `MAX_COPY_OBJECT_BYTES`, the largest object `copy_object` accepts.
+    :param part_size_bytes: Size of each part of a multipart copy.
+    :param max_concurrency: Max number of parts being copied at once.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+
+    :raises ClientError: `NoSuchKey` or `404` if there is no object at `source_key`.
+    """
+    s3_client = s3_client or boto3.client("s3")
+
+    source: Optional[S3ObjectMetadata] = None
+    if source_size_bytes is None or source_size_bytes > multipart_threshold_bytes:
+        source = await fetch_s3_object_metadata_async(bucket_name, source_key, s3_client=s3_client)
+        source_size_bytes = source.content_length
+
+    if source is None or source_size_bytes <= multipart_threshold_bytes:
+        await run_s3_call(
+            copy_s3_object,
+            s3_client,
+            bucket_name=bucket_name,
+            source_key=source_key,
+            destination_key=destination_key,
+        )
+        return
+
+    upload_id = await run_s3_call(
+        create_multipart_upload,
+        s3_client,
+        bucket_name=bucket_name,
+        object_key=destination_key,
+        content_type=source.content_type,
+        user_metadata=source.user_metadata,
+    )
+    try:
+        completed_parts = await _copy_parts_concurrently(
+            bucket_name=bucket_name,
+            source=source,
+            destination_key=destination_key,
+            upload_id=upload_id,
+            part_size_bytes=part_size_bytes,
+            max_concurrency=max_concurrency,
+            s3_client=s3_client,
+        )
+        await run_s3_call(
+            complete_multipart_upload,
+            s3_client,
+            bucket_name=bucket_name,
+            object_key=destination_key,
+            upload_id=upload_id,
+            parts=completed_parts,
+        )
+    except BaseException:
+        # shielded so that the abort still happens when the copy is failing because it was cancelled
+        with anyio.CancelScope(shield=True):
+            await run_s3_call(
+                abort_multipart_upload,
+                s3_client,
+                bucket_name=bucket_name,
+                object_key=destination_key,
+                upload_id=upload_id,
+            )
+        raise
+
+
+async def iter_copy_s3_objects_async(
+    bucket_name: str,
+    source_prefix: str,
+    destination_prefix: str,
+    delete_source: bool = False,
+    max_concurrency: int = DEFAULT_COPY_MAX_CONCURRENCY,
+    part_size_bytes: int = DEFAULT_COPY_PART_SIZE_BYTES,
+    s3_client: Optional["S3Client"] = None,
+) -> AsyncIterator[List[CopyResult]]:
+    """
+    Copy, or move, every object under a prefix to the same path under another prefix, with server-side copies.
+
+    Objects are listed and copied in rounds of up to `MAX_KEYS_PER_DELETE_REQUEST`, with up to
+    `max_concurrency` copies in flight at once. For a move, the sources copied in a round are then
+    deleted with a single `delete_objects` call. The results of each round are yielded as soon as
+    it completes, so callers can report progress on copies of many thousands of objects.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param source_prefix: Prefix of the keys of the objects to copy, e.g. "path/to/dir/".
+    :param destination_prefix: Prefix replacing `source_prefix` in the keys of the copies.
+    :param delete_source: Delete each object once it has been copied, i.e. move it.
+    :param max_concurrency: Max number of objects being copied at once. Objects large enough to be
+        copied in parts are each copied with up to this many parts in flight too.
+    :param part_size_bytes: Size of each part of objects copied in parts.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+
+    :raises ValueError: If one prefix starts with the other, since the copies would then be
+        listed, and copied again, along with the sources.
+
+    :return: The outcome of copying each object, one list per round, in key order.
+    """
+    if source_prefix.startswith(destination_prefix) or destination_prefix.startswith(source_prefix):
+        raise ValueError("The source and destination prefixes must not contain each other.")
+    s3_client = s3_client or boto3.client("s3")
+    s3_objects = iter_s3_objects_async(bucket_name=bucket_name, prefix=source_prefix, s3_client=s3_client).__aiter__()
+
+    while round_of_objects := [s3_object async for s3_object in _take(s3_objects, MAX_KEYS_PER_DELETE_REQUEST)]:
+        copy_slots = anyio.Semaphore(max_concurrency)
+        results: List[CopyResult] = []
+
+        async def _copy(result_index: int, source: "ObjectTypeDef") -> None:
+            async with copy_slots:
+                try:
+                    await copy_s3_object_async(
+                        bucket_name=bucket_name,
+                        source_key=source["Key"],
+                        destination_key=results[result_index].destination_key,
+                        source_size_bytes=source["Size"],
+                        part_size_bytes=part_size_bytes,
+                        max_concurrency=max_concurrency,
+                        s3_client=s3_client,
+                    )
+                except ClientError as err:
+                    results[result_index] = _copy_failure(results[result_index], err)
+
+        # the task group is exited before yielding, so that a consumer that stops early cannot leave it open
+        async with anyio.create_task_group() as task_group:
+            for source in round_of_objects:
+                results.append(
+                    CopyResult(source["Key"], destination_prefix + source["Key"].removeprefix(source_prefix))
+                )
+                task_group.start_soon(_copy, len(results) - 1, source)
+
+        if delete_source:
+            results = await _delete_copied_sources(bucket_name, results, s3_client)
+        yield results
+
+
+async def upload_s3_object_from_stream_async(
+    bucket_name: str,
+    object_key: str,
+    chunks: AsyncIterable[bytes],
+    content_type: Optional[str] = None,
+    part_size_bytes: int = DEFAULT_MULTIPART_PART_SIZE_BYTES,
+    max_concurrency: int = DEFAULT_MULTIPART_MAX_CONCURRENCY,
+    s3_client: Optional["S3Client"] = None,
+) -> bool:
+    """
+    Upload a file to an S3 bucket while its content is still being produced.
+
+    Content that fits in a single part is uploaded with one `put_object`. Anything larger is
+    sent as a multipart upload whose parts are uploaded concurrently as soon as each one has
+    been filled, so at most `max_concurrency` parts are held in memory regardless of file size.
+    If anything fails, including the `chunks` iterable raising because the client disconnected,
+    the multipart upload is aborted so that no orphaned parts are left behind.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param object_key: path to the object in the S3 bucket.
+    :param chunks: The content of the file to upload, in chunks of any size.
+    :param content_type: The MIME type of the file, e.g. "text/plain" for a text file.
+    :param part_size_bytes: Size of each part of a multipart upload. Must be at least 5 MiB.
+    :param max_concurrency: Max number of parts being uploaded at once.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+
+    :return: True if a new object was created, False if an existing object was replaced.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    parts = _iter_parts(chunks, part_size_bytes=part_size_bytes).__aiter__()
+
+    first_part, is_last_part = await anext(parts, (b"", True))
+    if is_last_part:
+        return await create_or_replace_s3_object_async(
+            bucket_name=bucket_name,
+            object_key=object_key,
+            file_content=first_part,
+            content_type=content_type,
+            s3_client=s3_client,
+        )
+
+    upload_id = await run_s3_call(
+        create_multipart_upload,
+        s3_client,
+        bucket_name=bucket_name,
+        object_key=object_key,
+        content_type=content_type,
+    )
+    try:
+        completed_parts = await _upload_parts_concurrently(
+            bucket_name=bucket_name,
+            object_key=object_key,
+            upload_id=upload_id,
+            first_part=first_part,
+            remaining_parts=parts,
+            max_concurrency=max_concurrency,
+            s3_client=s3_client,
+        )
+        return await create_or_replace(
+            partial(
+                run_s3_call,
+                complete_multipart_upload,
+                s3_client,
+                bucket_name=bucket_name,
+                object_key=object_key,
+                upload_id=upload_id,
+                parts=completed_parts,
+            )
+        )
+    except BaseException:
+        # shielded so that the abort still happens when the upload is failing because it was cancelled
+        with anyio.CancelScope(shield=True):
+            await run_s3_call(
+                abort_multipart_upload,
+                s3_client,
+                bucket_name=bucket_name,
+                object_key=object_key,
+                upload_id=upload_id,
+            )
+        raise
+
+
+async def create_or_replace_s3_object_async(
+    bucket_name: str,
+    object_key: str,
+    file_content: bytes,
+    content_type: Optional[str] = None,
+    s3_client: Optional["S3Client"] = None,
+) -> bool:
+    """
+    Upload a file with one `put_object`, reporting whether a new object was created or an existing one replaced.
+
+    Files of up to `CONDITIONAL_PUT_MAX_BYTES` are written with `create_or_replace`: one call for a
+    new file, but two for a replaced one, each sending the whole content. Larger files are first
+    looked up with `head_object`, so their content is only sent once, in two calls whether the file
+    is new or not. Only an object created between the two calls has its content sent twice.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param object_key: path to the object in the S3 bucket.
+    :param file_content: The content of the file.
+    :param content_type: The MIME type of the file, e.g. "text/plain" for a text file.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+
+    :return: True if a new object was created, False if an existing object was replaced.
+    """
+    write = partial(
+        upload_s3_object_async,
+        bucket_name=bucket_name,
+        object_key=object_key,
+        file_content=file_content,
+        content_type=content_type,
+        s3_client=s3_client,
+    )
+    if len(file_content) > CONDITIONAL_PUT_MAX_BYTES and await object_exists_in_s3_async(
+        bucket_name, object_key, s3_client=s3_client
+    ):
+        await write(only_if_absent=False)
+        return False
+    return await create_or_replace(write)
+
+
+async def create_or_replace(write: Callable[..., Awaitable[None]]) -> bool:
+    """
+    Perform a write that creates or replaces an object, reporting which of the two happened.
+
+    The write is first attempted with `only_if_absent=True`, so creating a new object costs
+    a single call to S3 with no prior existence check. Only if an object already exists is
+    the write repeated unconditionally. That repeats the whole request: cheap for the completion
+    of a multipart upload, but a second transfer of the content for a `put_object`, which is why
+    `create_or_replace_s3_object_async` only uses it for small files.
+
+    :param write: Awaitable write function accepting an `only_if_absent` keyword argument.
+
+    :return: True if a new object was created, False if an existing object was replaced.
+    """
+    try:
+        await write(only_if_absent=True)
+        return True
+    except ClientError as err:
+        if not is_precondition_failed_error(err):
+            raise
+
+    await write(only_if_absent=False)
+    return False
+
+
+async def _upload_parts_concurrently(
+    bucket_name: str,
+    object_key: str,
+    upload_id: str,
+    first_part: bytes,
+    remaining_parts: AsyncIterator[Tuple[bytes, bool]],
+    max_concurrency: int,
+    s3_client: "S3Client",
+) -> list["CompletedPartTypeDef"]:
+    """Upload the parts of a multipart upload with at most `max_concurrency` parts in memory at once."""
+    completed_parts: list["CompletedPartTypeDef"] = []
+    part_slots = anyio.Semaphore(max_concurrency)
+
+    async def _upload(part_number: int, part_content: bytes) -> None:
+        try:
+            completed_part = await run_s3_call(
+                upload_part,
+                s3_client,
+                bucket_name=bucket_name,
+                object_key=object_key,
+                upload_id=upload_id,
+                part_number=part_number,
+                part_content=part_content,
+            )
+            completed_parts.append(completed_part)
+        finally:
+            part_slots.release()
+
+    async with anyio.create_task_group() as task_group:
+        await part_slots.acquire()
+        task_group.start_soon(_upload, 1, first_part)
+        part_number = 1
+        while True:
+            # wait for a free slot *before* buffering the next part to bound memory use
+            await part_slots.acquire()
+            next_part = await anext(remaining_parts, None)
+            if next_part is None:
+                part_slots.release()
+                break
+            part_number += 1
+            task_group.start_soon(_upload, part_number, next_part[0])
+
+    return completed_parts
+
+
+async def _copy_parts_concurrently(
+    bucket_name: str,
+    source: S3ObjectMetadata,
+    destination_key: str,
+    upload_id: str,
+    part_size_bytes: int,
+    max_concurrency: int,
+    s3_client: "S3Client",
+) -> list["CompletedPartTypeDef"]:
+    """Copy the parts of a multipart copy, at most `max_concurrency` at once, stopping at the first failure."""
+    completed_parts: list["CompletedPartTypeDef"] = []
+    errors: List[ClientError] = []
+    part_slots = anyio.Semaphore(max_concurrency)
+
+    async def _copy(part_number: int, byte_range: Tuple[int, int]) -> None:
+        async with part_slots:
+            try:
+                completed_part = await run_s3_call(
+                    upload_part_copy,
+                    s3_client,
+                    bucket_name=bucket_name,
+                    source_key=source.object_key,
+                    destination_key=destination_key,
+                    upload_id=upload_id,
+                    part_number=part_number,
+                    byte_range=byte_range,
+                    source_etag=source.etag,
+                )
+                completed_parts.append(completed_part)
+            except ClientError as err:
+                errors.append(err)
+                task_group.cancel_scope.cancel()
+
+    async with anyio.create_task_group() as task_group:
+        for part_number, byte_range in enumerate(copy_part_ranges(source.content_length, part_size_bytes), start=1):
+            task_group.start_soon(_copy, part_number, byte_range)
+
+    # raised here rather than in the task group, which would wrap it in an exception group
+    if errors:
+        raise errors[0]
+    return completed_parts
+
+
+async def _delete_copied_sources(
+    bucket_name: str, results: List[CopyResult], s3_client: "S3Client"
+) -> List[CopyResult]:
+    """Delete the sources of the successful copies of a move, turning the failed deletes into failed results."""
+    copied_keys = [result.source_key for result in results if result.succeeded]
+    if not copied_keys:
+        return results
+    try:
+        delete_errors = {
+            delete_result.object_key: (delete_result.error_code, delete_result.error_message)
+            for delete_result in await delete_s3_objects_async(bucket_name, copied_keys, s3_client=s3_client)
+            if not delete_result.deleted
+        }
+    except ClientError as err:
+        error = err.response.get("Error", {})
+        delete_errors = {object_key: (error.get("Code"), error.get("Message")) for object_key in copied_keys}
+    return [
+        (
+            result._replace(
+                error_code=delete_errors[result.source_key][0], error_message=delete_errors[result.source_key][1]
+            )
+            if result.source_key in delete_errors
+            else result
+        )
+        for result in results
+    ]
+
+
+def _copy_failure(result: CopyResult, err: ClientError) -> CopyResult:
+    """Record the error a copy failed with in its result."""
+    error = err.response.get("Error", {})
+    return result._replace(error_code=error.get("Code"), error_message=error.get("Message"))
+
+
+async def _iter_parts(chunks: AsyncIterable[bytes], part_size_bytes: int) -> AsyncIterator[Tuple[bytes, bool]]:
+    """
+    Regroup a stream of arbitrarily sized chunks into parts of exactly `part_size_bytes`.
+
+    Yields `(part, is_last_part)` tuples. Only the last part may be smaller than `part_size_bytes`.
+    A part is only yielded once it is known whether more content follows it.
+    """
+    buffer = bytearray()
+    async for chunk in chunks:
+        buffer += chunk
+        while len(buffer) > part_size_bytes:
+            yield bytes(buffer[:part_size_bytes]), False
+            del buffer[:part_size_bytes]
+    yield bytes(buffer), True
+
+
+class _CacheGenerations(NamedTuple):
+    """The generations of the content and metadata caches, read before fetching an object to cache."""
+
+    content: int
+    metadata: Optional[int]
+
+
+async def _cache_fetched_object(
+    bucket_name: str,
+    object_key: str,
+    response: "GetObjectOutputTypeDef",
+    content_cache: ContentCache,
+    metadata_cache: Optional[MetadataCache],
+    generations: _CacheGenerations,
+) -> Union[CachedObject, "GetObjectOutputTypeDef"]:
+    """Record a freshly fetched object in the caches, reading its content into memory if it is small enough."""
+    if metadata_cache is not None:
+        metadata_cache.put(
+            bucket_name,
+            object_key,
+            S3ObjectMetadata.from_response(object_key, response),
+            generation=generations.metadata,
+        )
+    if response["ContentLength"] > content_cache.max_object_bytes:
+        content_cache.invalidate(bucket_name, object_key)
+        return response
+
+    cached_object = CachedObject(
+        content=await to_thread.run_sync(response["Body"].read),
+        etag=response["ETag"],
+        content_type=response.get("ContentType", "application/octet-stream"),
+        last_modified=response["LastModified"],
+    )
+    content_cache.put(bucket_name, object_key, cached_object, generation=generations.content)
+    return cached_object
+
+
+def _matches_cached_metadata(
+    bucket_name: str, object_key: str, cached_object: CachedObject, metadata_cache: Optional[MetadataCache]
+) -> bool:
+    """Whether a fresh metadata cache entry confirms that the cached copy of an object is its current version."""
+    if metadata_cache is None:
+        return False
+    known = metadata_cache.get(bucket_name, object_key)
+    return known is not None and known.metadata is not None and known.metadata.etag == cached_object.etag
+
+
+async def _iter_batches(items: Union[Iterable[str], AsyncIterable[str]], batch_size: int) -> AsyncIterator[List[str]]:
+    """Group items into lists of `batch_size` items; only the last list may be shorter."""
+    batch: List[str] = []
+    async for item in _aiter(items):
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def _aiter(items: Union[Iterable[str], AsyncIterable[str]]) -> AsyncIterator[str]:
+    """Iterate over a sync or async iterable alike."""
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def _take(items: AsyncIterator[T], count: int) -> AsyncIterator[T]:
+    """Yield the next `count` items of an iterator, or fewer if it runs out."""
+    for _ in range(count):
+        item = await anext(items, None)
+        if item is None:
+            return
+        yield item
@@ -0,0 +1,46 @@
+"""Construction of the S3 client shared by every request the API serves."""
+
+import boto3
+from botocore.config import Config
+
+try:
+    from mypy_boto3_s3 import S3Client
+except ImportError:
+    ...
+
+
+def create_s3_client(
+    max_pool_connections: int = 10,
+    connect_timeout_seconds: float = 60,
+    read_timeout_seconds: float = 60,
+    tcp_keepalive: bool = False,
+    max_attempts: int = 3,
+) -> "S3Client":
+    """
+    Create an S3 client meant to be created once and reused for the lifetime of the app.
+
+    boto3 clients are thread-safe, so one client can serve concurrent requests. Reusing it
+    skips credential and endpoint resolution on every call, and lets its connection pool
+    keep TCP+TLS connections to S3 open between requests.
+
+    URLs are presigned with signature version 4, which every region accepts, rather than the
+    legacy version 2 that boto3 still presigns with in some regions.
+
+    :param max_pool_connections: Maximum number of connections kept open in the client's connection pool.
+        This caps the number of S3 calls that can be in flight at once.
+    :param connect_timeout_seconds: Seconds to wait when establishing a connection to S3.
+    :param read_timeout_seconds: Seconds to wait for S3 to send data on an open connection.
+    :param tcp_keepalive: Whether to enable TCP keep-alive probes on pooled connections.
+    :param max_attempts: Maximum number of attempts (including the first) for a retryable S3 call.
+
+    :return: A configured S3 client.
+    """
+    config = Config(
+        max_pool_connections=max_pool_connections,
+        connect_timeout=connect_timeout_seconds,
+        read_timeout=read_timeout_seconds,
+        tcp_keepalive=tcp_keepalive,
+        retries={"total_max_attempts": max_attempts, "mode": "standard"},
+        signature_version="s3v4",
+    )
+    return boto3.client("s3", config=config)
@@ -0,0 +1,180 @@
+"""
+Caching of the content of small objects, so that hot files do not cost a full `get_object` every time they are read.
+
+`ContentCache` is the interface the read functions depend on. `InMemoryContentCache` keeps
+entries in the memory of the current process, bounded by a total byte budget.
+
+Every entry records the ETag of the version of the object it holds. A cached copy is only served
+once that ETag has been confirmed to still be current, either because it matches the ETag in a
+fresh entry of the metadata cache or because S3 answered a conditional `get_object` with
+`304 Not Modified`. Writes and deletes made through this process invalidate both caches, so a
+stale copy is never served after them. Like the metadata cache, `put` takes the generation read
+before the copy was fetched, so that a copy overtaken by a write is not cached.
+"""
+
+import threading
+from abc import (
+    ABC,
+    abstractmethod,
+)
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import (
+    Optional,
+    Tuple,
+)
+
+from files_api.s3.metadata_cache import (
+    CacheStats,
+    InvalidationLog,
+)
+
+DEFAULT_CONTENT_CACHE_MAX_OBJECT_BYTES = 256 * 1024
+DEFAULT_CONTENT_CACHE_MAX_TOTAL_BYTES = 64 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class CachedObject:
+    """The full content of one version of an object, with the headers needed to serve it."""
+
+    content: bytes
+    etag: str
+    content_type: str
+    last_modified: datetime
+
+
+@dataclass(frozen=True)
+class ContentCacheStats(CacheStats):
+    """Cache counters, plus the total size in bytes of the cached content."""
+
+    size_bytes: int
+
+
+class ContentCache(ABC):
+    """Interface of a cache of S3 object content, keyed by bucket name and object key."""
+
+    @property
+    @abstractmethod
+    def max_object_bytes(self) -> int:
+        """Size above which objects are not cached."""
+
+    @abstractmethod
+    def get(self, bucket_name: str, object_key: str) -> Optional[CachedObject]:
+        """Return the cached copy of an object, whose ETag must still be checked against the current one."""
+
+    @abstractmethod
+    def generation(self) -> int:
+        """Return the current generation, to pass to `put` along with a copy fetched from S3 after."""
+
+    @abstractmethod
+    def put(
+        self, bucket_name: str, object_key: str, cached_object: CachedObject, generation: Optional[int] = None
+    ) -> None:
+        """
+        Cache a copy of an object, replacing any copy of a previous version.
+
+        If `generation` is given, nothing is cached if the object was invalidated since `generation()`
+        returned it, as the copy may then be of a version that has been replaced.
+        """
+
+    @abstractmethod
+    def invalidate(self, bucket_name: str, object_key: str) -> None:
+        """Drop the copy of an object, e.g. because it was just written or deleted."""
+
+    @abstractmethod
+    def stats(self) -> ContentCacheStats:
+        """Return the hit, miss and eviction counters of the cache."""
+
+
+class InMemoryContentCache(ContentCache):
+    """
+    Content cache bounded by the total size of the cached content, local to the current process.
+
+    Objects larger than `max_object_bytes` are never cached. Once the cached content would exceed
+    `max_total_bytes`, least recently used entries are evicted to make room.
+
+    The cache is safe to use from several threads at once.
+    """
+
+    def __init__(
+        self,
+        max_object_bytes: int = DEFAULT_CONTENT_CACHE_MAX_OBJECT_BYTES,
+        max_total_bytes: int = DEFAULT_CONTENT_CACHE_MAX_TOTAL_BYTES,
+    ):
+        self._max_object_bytes = min(max_object_bytes, max_total_bytes)
+        self._max_total_bytes = max_total_bytes
+
+        # (bucket name, object key) -> cached copy, least recently used first
+        self._entries: "OrderedDict[Tuple[str, str], CachedObject]" = OrderedDict()
+        self._total_bytes = 0
+        self._invalidations = InvalidationLog()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def max_object_bytes(self) -> int:
+        """Size above which objects are not cached."""
+        return self._max_object_bytes
+
+    def get(self, bucket_name: str, object_key: str) -> Optional[CachedObject]:
+        """Return the copy of an object and mark it as most recently used."""
+        key = (bucket_name, object_key)
+        with self._lock:
+            cached_object = self._entries.get(key)
+            if cached_object is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return cached_object
+
+    def generation(self) -> int:
+        """Return the generation of the last invalidation."""
+        with self._lock:
+            return self._invalidations.generation
+
+    def put(
+        self, bucket_name: str, object_key: str, cached_object: CachedObject, generation: Optional[int] = None
+    ) -> None:
+        """Add or replace the copy of an object, evicting least recently used entries to stay within budget."""
+        if len(cached_object.content) > self._max_object_bytes:
+            return
+
+        key = (bucket_name, object_key)
+        with self._lock:
+            if generation is not None and self._invalidations.invalidated_since(key, generation):
+                return
+            self._discard(key)
+            self._entries[key] = cached_object
+            self._total_bytes += len(cached_object.content)
+            while self._total_bytes > self._max_total_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= len(evicted.content)
+                self._evictions += 1
+
+    def invalidate(self, bucket_name: str, object_key: str) -> None:
+        """Drop the copy of an object, if there is one."""
+        key = (bucket_name, object_key)
+        with self._lock:
+            self._discard(key)
+            self._invalidations.record(key)
+
+    def stats(self) -> ContentCacheStats:
+        """Return the counters accumulated since the cache was created."""
+        with self._lock:
+            return ContentCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                size=len(self._entries),
+                size_bytes=self._total_bytes,
+            )
+
+    def _discard(self, key: Tuple[str, str]) -> None:
+        """Remove an entry and release its bytes from the budget; the lock must be held."""
+        cached_object = self._entries.pop(key, None)
+        if cached_object is not None:
+            self._total_bytes -= len(cached_object.content)
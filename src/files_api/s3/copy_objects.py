@@ -0,0 +1,116 @@
+"""Functions for copying objects within an S3 bucket, without their content leaving S3."""
+
+from typing import (
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+import boto3
+
+try:
+    from mypy_boto3_s3 import S3Client
+    from mypy_boto3_s3.type_defs import CompletedPartTypeDef
+except ImportError:
+    ...
+
+# S3 rejects `copy_object` calls for objects larger than this, which must be copied in parts instead
+MAX_COPY_OBJECT_BYTES = 5 * 1024 * 1024 * 1024
+# S3 rejects multipart uploads of more parts than this
+MAX_MULTIPART_PARTS = 10_000
+DEFAULT_COPY_PART_SIZE_BYTES = 512 * 1024 * 1024
+DEFAULT_COPY_MAX_CONCURRENCY = 10
+
+
+class CopyResult(NamedTuple):
+    """Outcome of copying or moving one object as part of a batch."""
+
+    source_key: str
+    destination_key: str
+    error_code: Optional[str] = None
+    error_message: Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        """Whether the object was copied, and deleted from its source for a move."""
+        return self.error_code is None
+
+
+def copy_s3_object(
+    bucket_name: str,
+    source_key: str,
+    destination_key: str,
+    s3_client: Optional["S3Client"] = None,
+) -> None:
+    """
+    Copy an object of up to `MAX_COPY_OBJECT_BYTES` to another key, keeping its content type and metadata.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param source_key: Key of the object to copy.
+    :param destination_key: Key to copy the object to. Any object already there is replaced.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+
+    :raises ClientError: `NoSuchKey` if there is no object at `source_key`.
+    """
+    s3_client = s3_client or boto3.client("s3")
+
+    s3_client.copy_object(
+        Bucket=bucket_name,
+        Key=destination_key,
+        CopySource={"Bucket": bucket_name, "Key": source_key},
+    )
+
+
+def upload_part_copy(
+    bucket_name: str,
+    source_key: str,
+    destination_key: str,
+    upload_id: str,
+    part_number: int,
+    byte_range: Tuple[int, int],
+    source_etag: Optional[str] = None,
+    s3_client: Optional["S3Client"] = None,
+) -> "CompletedPartTypeDef":
+    """
+    Copy a byte range of an object as one part of a multipart upload.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param source_key: Key of the object to copy from.
+    :param destination_key: Key of the object being assembled by the multipart upload.
+    :param upload_id: The ID of the multipart upload.
+    :param part_number: Number of the part, from 1 to 10,000.
+    :param byte_range: First and last byte of the range to copy, both included.
+    :param source_etag: If set, the copy fails with `PreconditionFailed` if the source no longer has
+        this ETag, so that the parts of one copy cannot come from different versions of the source.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+
+    :return: The part number and ETag of the copied part, to complete the multipart upload with.
+    """
+    s3_client = s3_client or boto3.client("s3")
+
+    response = s3_client.upload_part_copy(
+        Bucket=bucket_name,
+        Key=destination_key,
+        UploadId=upload_id,
+        PartNumber=part_number,
+        CopySource={"Bucket": bucket_name, "Key": source_key},
+        CopySourceRange=f"bytes={byte_range[0]}-{byte_range[1]}",
+        **({"CopySourceIfMatch": source_etag} if source_etag else {}),
+    )
+    return {"ETag": response["CopyPartResult"]["ETag"], "PartNumber": part_number}
+
+
+def copy_part_ranges(size_bytes: int, part_size_bytes: int = DEFAULT_COPY_PART_SIZE_BYTES) -> List[Tuple[int, int]]:
+    """
+    Split an object into the byte ranges of the parts of a multipart copy.
+
+    Parts are `part_size_bytes` long, or longer if needed to stay within `MAX_MULTIPART_PARTS` parts.
+
+    :return: The first and last byte, both included, of each part in order.
+    """
+    part_size_bytes = max(part_size_bytes, -(-size_bytes // MAX_MULTIPART_PARTS))
+    return [
+        (first_byte, min(first_byte + part_size_bytes, size_bytes) - 1)
+        for first_byte in range(0, size_bytes, part_size_bytes)
+    ]
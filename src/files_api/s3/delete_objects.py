@@ -1,6 +1,11 @@
 """Functions for deleting objects from an S3 bucket--the "D" in CRUD."""
 
-from typing import Optional
+from typing import (
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+)
 
 import boto3
 
@@ -9,6 +14,22 @@ try:
 except ImportError:
     ...
 
+# S3 rejects `delete_objects` calls naming more keys than this
+MAX_KEYS_PER_DELETE_REQUEST = 1000
+
+
+class DeleteResult(NamedTuple):
+    """Outcome of deleting one object as part of a batch."""
+
+    object_key: str
+    error_code: Optional[str] = None
+    error_message: Optional[str] = None
+
+    @property
+    def deleted(self) -> bool:
+        """Whether the object is gone. S3 reports deleting an object that did not exist as a success."""
+        return self.error_code is None
+
 
 def delete_s3_object(bucket_name: str, object_key: str, s3_client: Optional["S3Client"] = None) -> None:
     """
@@ -20,3 +41,47 @@ def delete_s3_object(bucket_name: str, object_key: str, s3_client: Optional["S3C
     """
     s3_client = s3_client or boto3.client("s3")
     s3_client.delete_object(Bucket=bucket_name, Key=object_key)
+
+
+def delete_s3_objects(
+    bucket_name: str,
+    object_keys: Sequence[str],
+    s3_client: Optional["S3Client"] = None,
+) -> List[DeleteResult]:
+    """
+    Delete up to `MAX_KEYS_PER_DELETE_REQUEST` objects from the S3 bucket with a single call.
+
+    Deleting some of the objects can fail while the rest succeed, so the outcome is reported per object.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param object_keys: Keys of the objects to delete.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+
+    :raises ValueError: If more than `MAX_KEYS_PER_DELETE_REQUEST` keys are given.
+
+    :return: The outcome for each key, in the order of `object_keys`.
+    """
+    if len(object_keys) > MAX_KEYS_PER_DELETE_REQUEST:
+        raise ValueError(f"At most {MAX_KEYS_PER_DELETE_REQUEST} objects can be deleted at once.")
+    if not object_keys:
+        return []
+
+    s3_client = s3_client or boto3.client("s3")
+    response = s3_client.delete_objects(
+        Bucket=bucket_name,
+        # quiet mode only lists the failures, keeping the response small for large batches
+        Delete={"Objects": [{"Key": object_key} for object_key in object_keys], "Quiet": True},
+    )
+    errors = {error["Key"]: error for error in response.get("Errors", [])}
+    return [
+        (
+            DeleteResult(
+                object_key=object_key,
+                error_code=errors[object_key].get("Code", "InternalError"),
+                error_message=errors[object_key].get("Message"),
+            )
+            if object_key in errors
+            else DeleteResult(object_key=object_key)
+        )
+        for object_key in object_keys
+    ]
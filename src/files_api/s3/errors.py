@@ -0,0 +1,47 @@
+"""Helpers to classify the `ClientError`s raised by boto3 for S3 calls."""
+
+from botocore.exceptions import ClientError
+
+
+def is_object_not_found_error(err: ClientError) -> bool:
+    """Whether the error means the requested object does not exist.
+
+    `get_object` reports a missing object as `NoSuchKey`, but `head_object` responses have
+    no body, so boto3 can only report the bare HTTP status code `404`.
+    """
+    return err.response["Error"]["Code"] in ("NoSuchKey", "404")
+
+
+def is_precondition_failed_error(err: ClientError) -> bool:
+    """Whether the error means a conditional request was rejected, e.g. `IfNoneMatch="*"` on an existing object."""
+    return err.response["Error"]["Code"] in ("PreconditionFailed", "412")
+
+
+def is_invalid_range_error(err: ClientError) -> bool:
+    """Whether the error means a ranged read started beyond the end of the object.
+
+    S3 includes the size of the object as `ActualObjectSize` in the details of the error.
+    """
+    return err.response["Error"]["Code"] in ("InvalidRange", "416")
+
+
+def is_not_modified_error(err: ClientError) -> bool:
+    """Whether the error means a conditional read was skipped because the object has not changed.
+
+    S3 answers such reads with a bodiless `304`, which boto3 raises as an error with that code.
+    """
+    return err.response["Error"]["Code"] in ("NotModified", "304")
+
+
+def is_no_such_upload_error(err: ClientError) -> bool:
+    """Whether the error means a multipart upload does not exist, e.g. because it was completed or aborted."""
+    return err.response["Error"]["Code"] == "NoSuchUpload"
+
+
+def is_invalid_part_error(err: ClientError) -> bool:
+    """Whether the error means the parts named to complete a multipart upload cannot form an object.
+
+    That is a part that was not uploaded or whose ETag does not match (`InvalidPart`), or a part
+    other than the last smaller than 5 MiB (`EntityTooSmall`).
+    """
+    return err.response["Error"]["Code"] in ("InvalidPart", "InvalidPartOrder", "EntityTooSmall")
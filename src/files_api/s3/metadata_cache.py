@@ -0,0 +1,212 @@
+"""
+Caching of object metadata, so that hot keys do not cost a `head_object` call every time they are checked.
+
+`MetadataCache` is the interface the read functions depend on. `InMemoryMetadataCache` keeps
+entries in the memory of the current process; a cache shared between processes can be plugged
+in by implementing the same interface on top of a shared store.
+
+Entries are invalidated by this process's own writes, but not by writes made through other
+processes or directly to S3. The TTLs bound how stale a cached answer can be in that case.
+
+A write can also invalidate an object while a read of it is still waiting for S3, in which case
+the read's answer may describe the version the write replaced. Reads therefore take a generation
+from the cache before calling S3 and pass it back to `put`, which drops the answer if the object
+was invalidated in between.
+"""
+
+import threading
+import time
+from abc import (
+    ABC,
+    abstractmethod,
+)
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import (
+    Callable,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from files_api.s3.read_objects import S3ObjectMetadata
+
+DEFAULT_METADATA_CACHE_MAX_ENTRIES = 10_000
+DEFAULT_METADATA_CACHE_TTL_SECONDS = 5.0
+DEFAULT_METADATA_CACHE_NEGATIVE_TTL_SECONDS = 1.0
+DEFAULT_INVALIDATION_LOG_MAX_KEYS = 10_000
+
+
+class CachedMetadata(NamedTuple):
+    """A cache entry: the metadata of an object, or None if the object is known not to exist."""
+
+    metadata: Optional[S3ObjectMetadata]
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """Counters describing how effective a cache has been since it was created."""
+
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+
+
+class InvalidationLog:
+    """
+    The keys invalidated most recently in a cache, numbered by a generation counter.
+
+    Only the last `max_keys` invalidations are remembered. A generation older than all of them is
+    treated as invalidated for every key, so that forgetting an invalidation never lets a stale
+    answer into the cache.
+
+    The log is not thread-safe: the cache holding it must serialize the calls under its own lock.
+    """
+
+    def __init__(self, max_keys: int = DEFAULT_INVALIDATION_LOG_MAX_KEYS):
+        self._max_keys = max_keys
+        self._generation = 0
+        self._forgotten_generation = 0
+
+        # (bucket name, object key) -> generation of its last invalidation, least recent first
+        self._invalidations: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+
+    @property
+    def generation(self) -> int:
+        """The generation of the last invalidation."""
+        return self._generation
+
+    def record(self, key: Tuple[str, str]) -> None:
+        """Record that the entry for `key` was invalidated, starting a new generation."""
+        self._generation += 1
+        self._invalidations[key] = self._generation
+        self._invalidations.move_to_end(key)
+        while len(self._invalidations) > self._max_keys:
+            _, self._forgotten_generation = self._invalidations.popitem(last=False)
+
+    def invalidated_since(self, key: Tuple[str, str], generation: int) -> bool:
+        """Whether the entry for `key` may have been invalidated after `generation`."""
+        return generation < self._forgotten_generation or self._invalidations.get(key, 0) > generation
+
+
+class MetadataCache(ABC):
+    """Interface of a cache of S3 object metadata, keyed by bucket name and object key."""
+
+    @abstractmethod
+    def get(self, bucket_name: str, object_key: str) -> Optional[CachedMetadata]:
+        """Return the cached entry for an object, or None if there is no fresh entry for it."""
+
+    @abstractmethod
+    def generation(self) -> int:
+        """Return the current generation, to pass to `put` along with the answer of a call to S3 made after."""
+
+    @abstractmethod
+    def put(
+        self,
+        bucket_name: str,
+        object_key: str,
+        metadata: Optional[S3ObjectMetadata],
+        generation: Optional[int] = None,
+    ) -> None:
+        """
+        Cache the metadata of an object, or the fact that it does not exist if `metadata` is None.
+
+        If `generation` is given, nothing is cached if the object was invalidated since `generation()`
+        returned it, as the metadata may then describe a version that has been replaced.
+        """
+
+    @abstractmethod
+    def invalidate(self, bucket_name: str, object_key: str) -> None:
+        """Drop the entry for an object, e.g. because it was just written or deleted."""
+
+    @abstractmethod
+    def stats(self) -> CacheStats:
+        """Return the hit, miss and eviction counters of the cache."""
+
+
+class InMemoryMetadataCache(MetadataCache):
+    """
+    Metadata cache bounded both in size and in age, local to the current process.
+
+    Once `max_entries` is reached, the least recently used entry is evicted to make room.
+    Entries for existing objects expire after `ttl_seconds`; entries recording that an object
+    does not exist expire after `negative_ttl_seconds`, usually shorter since a missing object
+    is often about to be uploaded.
+
+    The cache is safe to use from several threads at once, as the S3 read functions are
+    run in worker threads.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_METADATA_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_METADATA_CACHE_TTL_SECONDS,
+        negative_ttl_seconds: float = DEFAULT_METADATA_CACHE_NEGATIVE_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._negative_ttl_seconds = negative_ttl_seconds
+        self._clock = clock
+
+        # (bucket name, object key) -> (entry, expiry time), least recently used first
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[CachedMetadata, float]]" = OrderedDict()
+        self._invalidations = InvalidationLog()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, bucket_name: str, object_key: str) -> Optional[CachedMetadata]:
+        """Return the entry for an object and mark it as most recently used; drop it if it has expired."""
+        key = (bucket_name, object_key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= self._clock():
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def generation(self) -> int:
+        """Return the generation of the last invalidation."""
+        with self._lock:
+            return self._invalidations.generation
+
+    def put(
+        self,
+        bucket_name: str,
+        object_key: str,
+        metadata: Optional[S3ObjectMetadata],
+        generation: Optional[int] = None,
+    ) -> None:
+        """Add or refresh the entry for an object, evicting least recently used entries if the cache is full."""
+        ttl_seconds = self._ttl_seconds if metadata is not None else self._negative_ttl_seconds
+        if self._max_entries <= 0 or ttl_seconds <= 0:
+            return
+
+        key = (bucket_name, object_key)
+        with self._lock:
+            if generation is not None and self._invalidations.invalidated_since(key, generation):
+                return
+            self._entries[key] = (CachedMetadata(metadata), self._clock() + ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, bucket_name: str, object_key: str) -> None:
+        """Drop the entry for an object, if there is one."""
+        key = (bucket_name, object_key)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._invalidations.record(key)
+
+    def stats(self) -> CacheStats:
+        """Return the counters accumulated since the cache was created."""
+        with self._lock:
+            return CacheStats(hits=self._hits, misses=self._misses, evictions=self._evictions, size=len(self._entries))
@@ -0,0 +1,506 @@
+"""
+A local index of the metadata of every object in a bucket, so that listings, counts and size totals
+are answered by a SQLite query instead of by walking the bucket with `list_objects_v2`.
+
+The index is filled by a scan of the bucket (`reconcile_metadata_index` on an empty index), then kept
+current by this API's own writes: every write marks the key as stale, and stale keys are refreshed
+with a `head_object` call each just before the index is next queried, while deletes remove the entry
+outright. A process therefore always reads its own writes, and several processes sharing one index
+file see each other's writes. Changes made to the bucket by anything other than this API, or by the
+API while a reconcile is listing the same keys, are only picked up by the next
+`reconcile_metadata_index`, which compares the index with a listing of the bucket and repairs it.
+
+Objects indexed by a scan have no content type, since listings do not return it. Objects written
+through the API, or refreshed after being written, have one.
+"""
+
+import sqlite3
+import threading
+import time
+from datetime import (
+    datetime,
+    timezone,
+)
+from enum import Enum
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import anyio
+import boto3
+from anyio import to_thread
+from botocore.exceptions import ClientError
+
+from files_api.s3.async_objects import fetch_s3_object_metadata_async
+from files_api.s3.errors import is_object_not_found_error
+from files_api.s3.read_objects import (
+    DEFAULT_LISTING_MAX_CONCURRENCY,
+    S3ObjectMetadata,
+    iter_s3_object_pages_parallel,
+)
+from files_api.s3.summaries import (
+    SIZE_HISTOGRAM_BOUNDS_BYTES,
+    PrefixSummary,
+    directory_at_depth,
+    merge_summaries,
+)
+
+try:
+    from mypy_boto3_s3 import S3Client
+    from mypy_boto3_s3.type_defs import ObjectTypeDef
+except ImportError:
+    ...
+
+DEFAULT_INDEX_REFRESH_MAX_CONCURRENCY = 16
+
+# sorts after every character S3 keys can contain, so keys under a prefix sort before `prefix + _MAX_KEY_CHARACTER`
+_MAX_KEY_CHARACTER = "\U0010ffff"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS indexed_files (
+    bucket_name TEXT NOT NULL,
+    object_key TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    last_modified REAL NOT NULL,
+    etag TEXT NOT NULL,
+    content_type TEXT,
+    PRIMARY KEY (bucket_name, object_key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS indexed_files_by_size ON indexed_files (bucket_name, size_bytes, object_key);
+CREATE INDEX IF NOT EXISTS indexed_files_by_last_modified ON indexed_files (bucket_name, last_modified, object_key);
+-- every mark gets a new version, never reused, so that a refresh only clears the mark it read
+CREATE TABLE IF NOT EXISTS stale_files (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    bucket_name TEXT NOT NULL,
+    object_key TEXT NOT NULL,
+    UNIQUE (bucket_name, object_key)
+);
+CREATE TABLE IF NOT EXISTS scanned_buckets (
+    bucket_name TEXT PRIMARY KEY,
+    scanned_at REAL NOT NULL
+);
+"""
+
+
+class IndexSortKey(str, Enum):
+    """Orders the files of the index can be listed in. Ties are broken by path."""
+
+    PATH = "path"
+    SIZE = "size"
+    LAST_MODIFIED = "last_modified"
+
+    @property
+    def column(self) -> str:
+        """The column of `indexed_files` holding the sort key."""
+        return {
+            IndexSortKey.PATH: "object_key",
+            IndexSortKey.SIZE: "size_bytes",
+            IndexSortKey.LAST_MODIFIED: "last_modified",
+        }[self]
+
+
+class IndexedFile(NamedTuple):
+    """The metadata of one object, as recorded in the index."""
+
+    object_key: str
+    size_bytes: int
+    last_modified: datetime
+    etag: str
+    content_type: Optional[str] = None
+
+    @classmethod
+    def from_listed_object(cls, listed_object: "ObjectTypeDef") -> "IndexedFile":
+        """Make the entry of an object returned by `list_objects_v2`, which has no content type."""
+        return cls(
+            object_key=listed_object["Key"],
+            size_bytes=listed_object["Size"],
+            last_modified=listed_object["LastModified"],
+            etag=listed_object["ETag"],
+        )
+
+    @classmethod
+    def from_metadata(cls, metadata: S3ObjectMetadata) -> "IndexedFile":
+        """Make the entry of an object from its `head_object` metadata."""
+        return cls(
+            object_key=metadata.object_key,
+            size_bytes=metadata.content_length,
+            last_modified=metadata.last_modified,
+            etag=metadata.etag,
+            content_type=metadata.content_type,
+        )
+
+    def sort_value(self, sort_key: IndexSortKey) -> Union[str, int, float]:
+        """Return the value of the entry's `sort_key` column, e.g. to resume a sorted listing after this entry."""
+        return {
+            IndexSortKey.PATH: self.object_key,
+            IndexSortKey.SIZE: self.size_bytes,
+            IndexSortKey.LAST_MODIFIED: self.last_modified.timestamp(),
+        }[sort_key]
+
+
+class ReconcileReport(NamedTuple):
+    """The drift `reconcile_metadata_index` found and repaired."""
+
+    files_added: int
+    files_updated: int
+    files_removed: int
+
+
+class MetadataIndex:
+    """
+    Index of object metadata stored in a SQLite database file, shared by any number of buckets and processes.
+
+    The index is safe to use from several threads at once, as it is queried from worker threads.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # write-ahead logging lets other processes read while one writes, and makes commits cheap
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+        self._connection.create_function("directory_at_depth", 3, directory_at_depth, deterministic=True)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
+
+    def is_scanned(self, bucket_name: str) -> bool:
+        """Whether the bucket was scanned into the index, i.e. whether the index can answer queries about it."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM scanned_buckets WHERE bucket_name = ?", (bucket_name,)
+            ).fetchone()
+        return row is not None
+
+    def mark_scanned(self, bucket_name: str) -> None:
+        """Record that the whole bucket was scanned into the index."""
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO scanned_buckets (bucket_name, scanned_at) VALUES (?, ?)",
+                (bucket_name, time.time()),
+            )
+
+    def mark_stale(self, bucket_name: str, object_keys: Iterable[str]) -> None:
+        """Record that objects were just written or deleted, so that their entries are refreshed before the next query."""
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO stale_files (bucket_name, object_key) VALUES (?, ?)",
+                [(bucket_name, object_key) for object_key in object_keys],
+            )
+
+    def stale_keys(self, bucket_name: str) -> List[Tuple[str, int]]:
+        """
+        Return the keys marked stale, each with the version of its mark.
+
+        Pass the versions back to `apply_refresh`, so that a key marked stale again while it was being
+        refreshed stays stale.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT object_key, version FROM stale_files WHERE bucket_name = ?", (bucket_name,)
+            ).fetchall()
+        return [(object_key, version) for object_key, version in rows]
+
+    def apply_refresh(
+        self,
+        bucket_name: str,
+        refreshed_files: Dict[Tuple[str, int], Optional[IndexedFile]],
+    ) -> None:
+        """
+        Record the current metadata of stale keys, and clear their stale marks.
+
+        :param refreshed_files: The new entry of each key and mark version from `stale_keys`, or None
+            if the object no longer exists.
+        """
+        with self._lock, self._connection:
+            self._connection.execute("BEGIN")
+            for (object_key, version), indexed_file in refreshed_files.items():
+                if indexed_file is None:
+                    self._delete(bucket_name, [object_key])
+                else:
+                    self._upsert(bucket_name, [indexed_file])
+                self._connection.execute(
+                    "DELETE FROM stale_files WHERE bucket_name = ? AND object_key = ? AND version = ?",
+                    (bucket_name, object_key, version),
+                )
+
+    def upsert(self, bucket_name: str, indexed_files: Iterable[IndexedFile]) -> None:
+        """Add or replace the entries of objects."""
+        with self._lock, self._connection:
+            self._connection.execute("BEGIN")
+            self._upsert(bucket_name, indexed_files)
+
+    def delete(self, bucket_name: str, object_keys: Iterable[str]) -> None:
+        """Remove the entries of objects."""
+        with self._lock, self._connection:
+            self._connection.execute("BEGIN")
+            self._delete(bucket_name, object_keys)
+
+    def get_files(
+        self,
+        bucket_name: str,
+        prefix: str,
+        after_key: Optional[str],
+        up_to_key: Optional[str],
+    ) -> List[IndexedFile]:
+        """Return the entries under a prefix with keys after `after_key` and up to `up_to_key`, in key order."""
+        lower_bound, upper_bound = _prefix_bounds(prefix)
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT object_key, size_bytes, last_modified, etag, content_type FROM indexed_files"
+                " WHERE bucket_name = ? AND object_key >= ? AND object_key < ? AND object_key > ? AND object_key <= ?"
+                " ORDER BY object_key",
+                (bucket_name, lower_bound, upper_bound, after_key or "", up_to_key or upper_bound),
+            ).fetchall()
+        return [_indexed_file_from_row(row) for row in rows]
+
+    def list_files(
+        self,
+        bucket_name: str,
+        prefix: str,
+        limit: int,
+        sort_key: IndexSortKey = IndexSortKey.PATH,
+        descending: bool = False,
+        start_after: Optional[Tuple[Union[str, int, float], str]] = None,
+    ) -> List[IndexedFile]:
+        """
+        Return a page of the entries under a prefix, sorted by `sort_key` and then by key.
+
+        :param start_after: Sort value and key of the last entry of the previous page, which the page
+            starts after; None for the first page.
+        """
+        lower_bound, upper_bound = _prefix_bounds(prefix)
+        column, direction, comparison = sort_key.column, "DESC" if descending else "ASC", "<" if descending else ">"
+        cursor_condition = f" AND ({column}, object_key) {comparison} (?, ?)" if start_after is not None else ""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT object_key, size_bytes, last_modified, etag, content_type FROM indexed_files"
+                f" WHERE bucket_name = ? AND object_key >= ? AND object_key < ?{cursor_condition}"
+                f" ORDER BY {column} {direction}, object_key {direction} LIMIT ?",
+                (bucket_name, lower_bound, upper_bound, *(start_after or ()), limit),
+            ).fetchall()
+        return [_indexed_file_from_row(row) for row in rows]
+
+    def summarize(self, bucket_name: str, prefix: str, depth: int = 0) -> Dict[str, PrefixSummary]:
+        """
+        Summarize the files under a prefix for each directory at most `depth` levels down, like `summarize_objects`.
+
+        The files are aggregated by SQLite, which returns one row per directory and histogram bucket.
+        """
+        lower_bound, upper_bound = _prefix_bounds(prefix)
+        directory, directory_params = (
+            ("directory_at_depth(object_key, ?, ?)", (prefix, depth)) if depth else ("?", (prefix,))
+        )
+        # booleans are 0 or 1 in SQLite, so this counts the bucket bounds the size is past
+        size_bucket = " + ".join(f"(size_bytes >= {bound})" for bound in SIZE_HISTOGRAM_BOUNDS_BYTES)
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT {directory} AS directory, {size_bucket} AS size_bucket,"
+                " COUNT(*), SUM(size_bytes), MIN(last_modified), MAX(last_modified) FROM indexed_files"
+                " WHERE bucket_name = ? AND object_key >= ? AND object_key < ? GROUP BY directory, size_bucket",
+                (*directory_params, bucket_name, lower_bound, upper_bound),
+            ).fetchall()
+
+        summaries: Dict[str, PrefixSummary] = {}
+        for row in rows:
+            merge_summaries(summaries, dict([_summary_from_row(row)]))
+        return summaries
+
+    def _upsert(self, bucket_name: str, indexed_files: Iterable[IndexedFile]) -> None:
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO indexed_files"
+            " (bucket_name, object_key, size_bytes, last_modified, etag, content_type) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    bucket_name,
+                    indexed_file.object_key,
+                    indexed_file.size_bytes,
+                    indexed_file.last_modified.timestamp(),
+                    indexed_file.etag,
+                    indexed_file.content_type,
+                )
+                for indexed_file in indexed_files
+            ],
+        )
+
+    def _delete(self, bucket_name: str, object_keys: Iterable[str]) -> None:
+        self._connection.executemany(
+            "DELETE FROM indexed_files WHERE bucket_name = ? AND object_key = ?",
+            [(bucket_name, object_key) for object_key in object_keys],
+        )
+
+
+def _prefix_bounds(prefix: str) -> Tuple[str, str]:
+    """Return the range of keys under a prefix, which lets SQLite use its key index where `LIKE` would not."""
+    return prefix, prefix + _MAX_KEY_CHARACTER
+
+
+def _indexed_file_from_row(row: Tuple[str, int, float, str, Optional[str]]) -> IndexedFile:
+    object_key, size_bytes, last_modified, etag, content_type = row
+    return IndexedFile(
+        object_key=object_key,
+        size_bytes=size_bytes,
+        last_modified=datetime.fromtimestamp(last_modified, tz=timezone.utc),
+        etag=etag,
+        content_type=content_type,
+    )
+
+
+def _summary_from_row(row: Tuple[str, int, int, int, float, float]) -> Tuple[str, PrefixSummary]:
+    directory, size_bucket, file_count, total_bytes, oldest_modified, newest_modified = row
+    histogram_counts, histogram_bytes = [0] * (len(SIZE_HISTOGRAM_BOUNDS_BYTES) + 1), [0] * (
+        len(SIZE_HISTOGRAM_BOUNDS_BYTES) + 1
+    )
+    histogram_counts[size_bucket], histogram_bytes[size_bucket] = file_count, total_bytes
+    return directory, PrefixSummary(
+        file_count=file_count,
+        total_bytes=total_bytes,
+        oldest_modified=datetime.fromtimestamp(oldest_modified, tz=timezone.utc),
+        newest_modified=datetime.fromtimestamp(newest_modified, tz=timezone.utc),
+        histogram_counts=tuple(histogram_counts),
+        histogram_bytes=tuple(histogram_bytes),
+    )
+
+
+async def refresh_stale_files_async(
+    metadata_index: MetadataIndex,
+    bucket_name: str,
+    max_concurrency: int = DEFAULT_INDEX_REFRESH_MAX_CONCURRENCY,
+    s3_client: Optional["S3Client"] = None,
+) -> None:
+    """
+    Bring the entries of the keys marked stale up to date with a `head_object` call each.
+
+    :param metadata_index: The index to refresh.
+    :param bucket_name: The name of the S3 bucket.
+    :param max_concurrency: Max number of `head_object` calls in flight at once.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+
+    :raises ClientError: If fetching the metadata of a key fails for any other reason than it not existing.
+        The other keys are still refreshed.
+    """
+    stale_keys = await to_thread.run_sync(metadata_index.stale_keys, bucket_name)
+    if not stale_keys:
+        return
+
+    s3_client = s3_client or boto3.client("s3")
+    refreshed_files: Dict[Tuple[str, int], Optional[IndexedFile]] = {}
+    # raised after the task group exits, which would otherwise wrap it in an exception group
+    errors: List[ClientError] = []
+    semaphore = anyio.Semaphore(max_concurrency)
+
+    async def _refresh(object_key: str, version: int) -> None:
+        async with semaphore:
+            try:
+                metadata = await fetch_s3_object_metadata_async(bucket_name, object_key, s3_client=s3_client)
+                refreshed_files[object_key, version] = IndexedFile.from_metadata(metadata)
+            except ClientError as err:
+                if is_object_not_found_error(err):
+                    refreshed_files[object_key, version] = None
+                else:
+                    errors.append(err)
+
+    async with anyio.create_task_group() as task_group:
+        for object_key, version in stale_keys:
+            task_group.start_soon(_refresh, object_key, version)
+
+    await to_thread.run_sync(metadata_index.apply_refresh, bucket_name, refreshed_files)
+    if errors:
+        raise errors[0]
+
+
+def reconcile_metadata_index(
+    metadata_index: MetadataIndex,
+    bucket_name: str,
+    prefix: str = "",
+    max_concurrency: int = DEFAULT_LISTING_MAX_CONCURRENCY,
+    s3_client: Optional["S3Client"] = None,
+    stop_event: Optional[threading.Event] = None,
+) -> ReconcileReport:
+    """
+    Compare the index with a listing of the bucket under `prefix`, and repair any difference.
+
+    The listing is compared with the index one page at a time, in key order, so memory use does not
+    depend on the number of objects. Entries whose ETag is unchanged keep their content type. Run on
+    an empty index, this is the initial scan; the bucket is then marked as scanned if `prefix` is empty.
+
+    :param metadata_index: The index to repair.
+    :param bucket_name: The name of the S3 bucket.
+    :param prefix: Only reconcile the keys under this prefix.
+    :param max_concurrency: Max number of ranges of keys listed at once.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+    :param stop_event: An optional event checked between pages. Once set, the reconcile stops
+        without touching the index again, leaving the keys not yet listed unreconciled.
+
+    :return: The number of entries added, updated and removed.
+    """
+    report = ReconcileReport(files_added=0, files_updated=0, files_removed=0)
+    last_key: Optional[str] = None
+    for objects in iter_s3_object_pages_parallel(
+        bucket_name, prefix=prefix, max_concurrency=max_concurrency, s3_client=s3_client
+    ):
+        if stop_event is not None and stop_event.is_set():
+            return report
+        listed_files = [IndexedFile.from_listed_object(listed_object) for listed_object in objects]
+        indexed_files = metadata_index.get_files(
+            bucket_name, prefix=prefix, after_key=last_key, up_to_key=listed_files[-1].object_key
+        )
+        report = _add_reports(report, _reconcile_page(metadata_index, bucket_name, listed_files, indexed_files))
+        last_key = listed_files[-1].object_key
+
+    # entries after the last listed key are for objects that no longer exist
+    removed_files = metadata_index.get_files(bucket_name, prefix=prefix, after_key=last_key, up_to_key=None)
+    metadata_index.delete(bucket_name, [indexed_file.object_key for indexed_file in removed_files])
+    report = report._replace(files_removed=report.files_removed + len(removed_files))
+
+    if not prefix:
+        metadata_index.mark_scanned(bucket_name)
+    return report
+
+
+def _reconcile_page(
+    metadata_index: MetadataIndex,
+    bucket_name: str,
+    listed_files: List[IndexedFile],
+    indexed_files: List[IndexedFile],
+) -> ReconcileReport:
+    """Repair the entries of one page of listed objects, given the entries of the same range of keys."""
+    indexed_files_by_key = {indexed_file.object_key: indexed_file for indexed_file in indexed_files}
+    added_files, updated_files = [], []
+    for listed_file in listed_files:
+        indexed_file = indexed_files_by_key.pop(listed_file.object_key, None)
+        if indexed_file is None:
+            added_files.append(listed_file)
+        elif not _is_same_version(indexed_file, listed_file):
+            same_content = indexed_file.etag == listed_file.etag
+            updated_files.append(
+                listed_file._replace(content_type=indexed_file.content_type if same_content else None)
+            )
+
+    metadata_index.upsert(bucket_name, added_files + updated_files)
+    metadata_index.delete(bucket_name, indexed_files_by_key)
+    return ReconcileReport(
+        files_added=len(added_files), files_updated=len(updated_files), files_removed=len(indexed_files_by_key)
+    )
+
+
+def _is_same_version(indexed_file: IndexedFile, listed_file: IndexedFile) -> bool:
+    """Whether two entries describe the same version of an object, allowing for the rounding of stored timestamps."""
+    return (
+        indexed_file.etag == listed_file.etag
+        and indexed_file.size_bytes == listed_file.size_bytes
+        and abs(indexed_file.last_modified.timestamp() - listed_file.last_modified.timestamp()) < 0.001
+    )
+
+
+def _add_reports(report: ReconcileReport, other_report: ReconcileReport) -> ReconcileReport:
+    return ReconcileReport(*(count + other_count for count, other_count in zip(report, other_report)))
@@ -0,0 +1,149 @@
+"""
+Inspection and cleanup of the multipart uploads in progress in an S3 bucket.
+
+The parts of a multipart upload that is never completed nor aborted are stored, and billed,
+until it is aborted: S3 does not expire them by itself unless the bucket has a lifecycle rule
+to. `abort_stale_multipart_uploads` aborts the uploads nothing was uploaded to for a while,
+whichever way they were started: resumable upload sessions, presigned multipart uploads or
+streamed uploads interrupted by a crash.
+"""
+
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
+from typing import (
+    Collection,
+    List,
+    NamedTuple,
+    Optional,
+)
+
+import boto3
+from botocore.exceptions import ClientError
+
+from files_api.s3.errors import is_no_such_upload_error
+from files_api.s3.write_objects import abort_multipart_upload
+
+try:
+    from mypy_boto3_s3 import S3Client
+except ImportError:
+    ...
+
+
+class UploadedPart(NamedTuple):
+    """A part uploaded to a multipart upload in progress."""
+
+    part_number: int
+    size_bytes: int
+    etag: str
+    last_modified: datetime
+
+
+class MultipartUpload(NamedTuple):
+    """A multipart upload in progress."""
+
+    object_key: str
+    upload_id: str
+    initiated: datetime
+
+
+def list_uploaded_parts(
+    bucket_name: str,
+    object_key: str,
+    upload_id: str,
+    s3_client: Optional["S3Client"] = None,
+) -> List[UploadedPart]:
+    """
+    List the parts uploaded to a multipart upload so far.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param object_key: path to the object in the S3 bucket.
+    :param upload_id: The ID of the multipart upload.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+
+    :return: The parts in order of part number. A part uploaded again is listed once, as its last upload.
+
+    :raises ClientError: `NoSuchUpload` if the upload does not exist, e.g. because it was completed or aborted.
+    """
+    s3_client = s3_client or boto3.client("s3")
+
+    paginator = s3_client.get_paginator("list_parts")
+    return [
+        UploadedPart(
+            part_number=part["PartNumber"],
+            size_bytes=part["Size"],
+            etag=part["ETag"],
+            last_modified=part["LastModified"],
+        )
+        for page in paginator.paginate(Bucket=bucket_name, Key=object_key, UploadId=upload_id)
+        for part in page.get("Parts", [])
+    ]
+
+
+def list_multipart_uploads(
+    bucket_name: str,
+    prefix: str = "",
+    s3_client: Optional["S3Client"] = None,
+) -> List[MultipartUpload]:
+    """
+    List the multipart uploads in progress in an S3 bucket.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param prefix: Only list the uploads of objects whose key starts with this prefix.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+
+    :return: The uploads in progress, by key and then by initiation time.
+    """
+    s3_client = s3_client or boto3.client("s3")
+
+    paginator = s3_client.get_paginator("list_multipart_uploads")
+    return [
+        MultipartUpload(object_key=upload["Key"], upload_id=upload["UploadId"], initiated=upload["Initiated"])
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix)
+        for upload in page.get("Uploads", [])
+    ]
+
+
+def abort_stale_multipart_uploads(
+    bucket_name: str,
+    max_idle_seconds: float,
+    keep_upload_ids: Collection[str] = (),
+    now: Optional[datetime] = None,
+    s3_client: Optional["S3Client"] = None,
+) -> List[MultipartUpload]:
+    """
+    Abort the multipart uploads to which nothing was uploaded for `max_idle_seconds`.
+
+    An upload is idle since it was initiated or since its last part was uploaded. The parts of
+    uploads initiated within `max_idle_seconds` are not listed, so the sweep costs one call per
+    page of uploads, plus one per old upload.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param max_idle_seconds: Age of the last activity from which an upload is aborted.
+    :param keep_upload_ids: IDs of uploads known to be active, which are never aborted.
+    :param now: The current time, for tests.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+
+    :return: The uploads that were aborted. Uploads completed or aborted concurrently, e.g. by
+        another worker's sweep, are skipped.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    idle_since = (now or datetime.now(timezone.utc)) - timedelta(seconds=max_idle_seconds)
+
+    aborted_uploads: List[MultipartUpload] = []
+    for upload in list_multipart_uploads(bucket_name, s3_client=s3_client):
+        if upload.upload_id in keep_upload_ids or upload.initiated > idle_since:
+            continue
+        try:
+            parts = list_uploaded_parts(bucket_name, upload.object_key, upload.upload_id, s3_client=s3_client)
+            if any(part.last_modified > idle_since for part in parts):
+                continue
+            abort_multipart_upload(bucket_name, upload.object_key, upload.upload_id, s3_client=s3_client)
+        except ClientError as err:
+            if is_no_such_upload_error(err):
+                continue
+            raise
+        aborted_uploads.append(upload)
+    return aborted_uploads
@@ -0,0 +1,223 @@
+"""
+Fetching of many objects, or pages of a listing, one after the other, with the next ones fetched ahead
+while the current one is consumed.
+
+`prefetch_s3_objects_async` keeps up to `max_prefetch` `get_object` calls ahead of the consumer. Small
+objects are read in full ahead of time; larger ones only have their `get_object` call made ahead,
+and their body is streamed when the consumer gets to them. Memory use is therefore bounded by
+`max_prefetch` times `max_buffered_object_bytes`, whatever the number and size of the objects.
+
+`prefetch_s3_object_pages_async` likewise lists the next page of a prefix while the consumer
+handles the current one, so that sending a listing to a client overlaps with fetching it from S3.
+
+The fetches run in a task group that must outlive any single `yield` of the consumer, so the
+prefetchers are async context managers: the consumer iterates over the results inside them.
+"""
+
+from contextlib import asynccontextmanager
+from dataclasses import (
+    dataclass,
+    field,
+)
+from datetime import datetime
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    List,
+    Optional,
+)
+
+import anyio
+import boto3
+from anyio import to_thread
+from anyio.streams.memory import MemoryObjectReceiveStream
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
+
+from files_api.s3.async_objects import (
+    DEFAULT_STREAM_CHUNK_SIZE_BYTES,
+    fetch_s3_object_async,
+    iter_s3_object_body_async,
+    iter_s3_object_pages_async,
+)
+from files_api.s3.errors import is_object_not_found_error
+
+try:
+    from mypy_boto3_s3 import S3Client
+    from mypy_boto3_s3.type_defs import ObjectTypeDef
+except ImportError:
+    ...
+
+DEFAULT_PREFETCH_MAX_OBJECTS = 16
+DEFAULT_PREFETCH_MAX_BUFFERED_OBJECT_BYTES = 1024 * 1024
+DEFAULT_PREFETCH_MAX_PAGES = 1
+
+
+@dataclass
+class PrefetchedObject:
+    """An object whose `get_object` call was made ahead of time, and whose content may already be in memory."""
+
+    object_key: str
+    size_bytes: int = 0
+    last_modified: Optional[datetime] = None
+    # the whole content if the object was small enough to be read ahead, else None and `body` is set
+    content: Optional[bytes] = None
+    body: Optional[StreamingBody] = None
+    # set once the fields above are filled in, or the fetch failed with `error`
+    ready: anyio.Event = field(default_factory=anyio.Event)
+    error: Optional[ClientError] = None
+
+    async def iter_chunks(self, chunk_size_bytes: int = DEFAULT_STREAM_CHUNK_SIZE_BYTES) -> AsyncIterator[bytes]:
+        """Yield the content of the object, from memory or by streaming its body."""
+        if self.content is not None:
+            if self.content:
+                yield self.content
+            return
+        assert self.body is not None, "objects that are not read ahead keep their body open"
+        async for chunk in iter_s3_object_body_async(self.body, chunk_size_bytes=chunk_size_bytes):
+            yield chunk
+
+    def close(self) -> None:
+        """Release the connection held by an unread body."""
+        if self.body is not None:
+            self.body.close()
+
+
+@asynccontextmanager
+async def prefetch_s3_objects_async(
+    bucket_name: str,
+    object_keys: AsyncIterable[str],
+    max_prefetch: int = DEFAULT_PREFETCH_MAX_OBJECTS,
+    max_buffered_object_bytes: int = DEFAULT_PREFETCH_MAX_BUFFERED_OBJECT_BYTES,
+    s3_client: Optional["S3Client"] = None,
+) -> AsyncIterator[AsyncIterator[PrefetchedObject]]:
+    """
+    Fetch objects in the order of `object_keys`, keeping up to `max_prefetch` fetches ahead of the consumer.
+
+    Objects that no longer exist by the time they are fetched, e.g. because they were deleted after
+    being listed, are skipped. Other errors are raised to the consumer when it gets to the object.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param object_keys: Keys of the objects to fetch, consumed lazily, e.g. a listing in progress.
+    :param max_prefetch: Max number of objects fetched ahead of the one being consumed.
+    :param max_buffered_object_bytes: Size up to which objects are read in full ahead of time.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+
+    :return: A context manager giving an iterator over the fetched objects. Each object must be consumed
+        before the next one is taken; bodies left unread when the context exits are closed.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    # objects wait in the stream, in order, while they are being fetched
+    send_objects, receive_objects = anyio.create_memory_object_stream[PrefetchedObject](max_prefetch)
+
+    async def _fetch(prefetched_object: PrefetchedObject) -> None:
+        try:
+            response = await fetch_s3_object_async(
+                bucket_name=bucket_name, object_key=prefetched_object.object_key, s3_client=s3_client
+            )
+            prefetched_object.size_bytes = response["ContentLength"]
+            prefetched_object.last_modified = response["LastModified"]
+            if prefetched_object.size_bytes <= max_buffered_object_bytes:
+                prefetched_object.content = await to_thread.run_sync(response["Body"].read)
+                response["Body"].close()
+            else:
+                prefetched_object.body = response["Body"]
+        except ClientError as err:
+            prefetched_object.error = err
+        finally:
+            prefetched_object.ready.set()
+
+    async def _fetch_ahead() -> None:
+        async with send_objects:
+            async for object_key in object_keys:
+                prefetched_object = PrefetchedObject(object_key=object_key)
+                task_group.start_soon(_fetch, prefetched_object)
+                # blocks while `max_prefetch` objects are waiting, which bounds the fetches ahead
+                await send_objects.send(prefetched_object)
+
+    # raised after the task group exits, which would otherwise wrap it in an exception group
+    consumer_errors: List[Exception] = []
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(_fetch_ahead)
+        try:
+            yield _iter_fetched_objects(receive_objects)
+        except Exception as err:  # pylint: disable=broad-except
+            consumer_errors.append(err)
+        finally:
+            task_group.cancel_scope.cancel()
+            with receive_objects:
+                while True:
+                    try:
+                        receive_objects.receive_nowait().close()
+                    except (anyio.WouldBlock, anyio.EndOfStream):
+                        break
+    if consumer_errors:
+        raise consumer_errors[0]
+
+
+async def _iter_fetched_objects(
+    receive_objects: MemoryObjectReceiveStream[PrefetchedObject],
+) -> AsyncIterator[PrefetchedObject]:
+    """Wait for each object in turn to be fetched, skipping objects found to be deleted."""
+    async for prefetched_object in receive_objects:
+        await prefetched_object.ready.wait()
+        if prefetched_object.error is not None:
+            if is_object_not_found_error(prefetched_object.error):
+                continue
+            raise prefetched_object.error
+        yield prefetched_object
+
+
+@asynccontextmanager
+async def prefetch_s3_object_pages_async(
+    bucket_name: str,
+    prefix: str,
+    max_prefetch: int = DEFAULT_PREFETCH_MAX_PAGES,
+    s3_client: Optional["S3Client"] = None,
+) -> AsyncIterator[AsyncIterator[List["ObjectTypeDef"]]]:
+    """
+    List the objects under a prefix page by page, keeping up to `max_prefetch` pages ahead of the consumer.
+
+    At most `max_prefetch` pages wait to be consumed, plus one being listed, so memory use does not
+    depend on the number of objects under the prefix.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param prefix: Prefix of the keys to list, e.g. "path/to/dir/".
+    :param max_prefetch: Max number of pages listed ahead of the one being consumed.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+
+    :return: A context manager giving an iterator over the pages, in key order. A listing error is
+        raised to the consumer after the pages listed before it.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    send_pages, receive_pages = anyio.create_memory_object_stream[List["ObjectTypeDef"]](max_prefetch)
+    # handed over to the consumer after the pages listed before it
+    listing_errors: List[ClientError] = []
+
+    async def _list_ahead() -> None:
+        async with send_pages:
+            try:
+                async for objects in iter_s3_object_pages_async(bucket_name, prefix=prefix, s3_client=s3_client):
+                    await send_pages.send(objects)
+            except ClientError as err:
+                listing_errors.append(err)
+
+    async def _iter_listed_pages() -> AsyncIterator[List["ObjectTypeDef"]]:
+        async for objects in receive_pages:
+            yield objects
+        if listing_errors:
+            raise listing_errors[0]
+
+    # raised after the task group exits, which would otherwise wrap it in an exception group
+    consumer_errors: List[Exception] = []
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(_list_ahead)
+        try:
+            with receive_pages:
+                yield _iter_listed_pages()
+        except Exception as err:  # pylint: disable=broad-except
+            consumer_errors.append(err)
+        finally:
+            task_group.cancel_scope.cancel()
+    if consumer_errors:
+        raise consumer_errors[0]
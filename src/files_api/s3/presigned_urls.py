@@ -0,0 +1,109 @@
+"""
+Presigned URLs, with which clients transfer object content directly to and from S3 rather than through the API.
+
+A presigned URL carries a signature of one request made with the API's credentials, so anyone holding
+it can make that request, and only that request, until it expires. Signing is a local computation
+of the S3 client: no call is made to S3, so issuing URLs costs no S3 request and no round trip.
+"""
+
+from typing import (
+    Dict,
+    List,
+    Optional,
+)
+
+import boto3
+
+try:
+    from mypy_boto3_s3 import S3Client
+except ImportError:
+    ...
+
+DEFAULT_PRESIGNED_URL_EXPIRES_IN_SECONDS = 3600
+# S3 rejects requests presigned with signature version 4 for longer than a week
+MAX_PRESIGNED_URL_EXPIRES_IN_SECONDS = 7 * 24 * 3600
+
+
+def presign_get_object(
+    bucket_name: str,
+    object_key: str,
+    expires_in_seconds: int = DEFAULT_PRESIGNED_URL_EXPIRES_IN_SECONDS,
+    s3_client: Optional["S3Client"] = None,
+) -> str:
+    """
+    Presign a download of an object from an S3 bucket.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param object_key: path to the object in the S3 bucket.
+    :param expires_in_seconds: Seconds the URL can be used for.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+
+    :return: A URL to `GET`. The object does not need to exist: S3 answers 404 if it does not.
+    """
+    s3_client = s3_client or boto3.client("s3")
+
+    return s3_client.generate_presigned_url(
+        "get_object", Params={"Bucket": bucket_name, "Key": object_key}, ExpiresIn=expires_in_seconds
+    )
+
+
+def presign_put_object(
+    bucket_name: str,
+    object_key: str,
+    expires_in_seconds: int = DEFAULT_PRESIGNED_URL_EXPIRES_IN_SECONDS,
+    content_type: Optional[str] = None,
+    s3_client: Optional["S3Client"] = None,
+) -> str:
+    """
+    Presign an upload of an object to an S3 bucket in one request.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param object_key: path to the object in the S3 bucket.
+    :param expires_in_seconds: Seconds the URL can be used for.
+    :param content_type: The MIME type of the file, e.g. "text/plain" for a text file. It is part of
+        the signature, so the upload must send it as its `Content-Type` header.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+
+    :return: A URL to `PUT` the content of the object to. Any object already at `object_key` is replaced.
+    """
+    content_type = content_type or "application/octet-stream"
+    s3_client = s3_client or boto3.client("s3")
+
+    return s3_client.generate_presigned_url(
+        "put_object",
+        Params={"Bucket": bucket_name, "Key": object_key, "ContentType": content_type},
+        ExpiresIn=expires_in_seconds,
+    )
+
+
+def presign_upload_parts(
+    bucket_name: str,
+    object_key: str,
+    upload_id: str,
+    part_numbers: List[int],
+    expires_in_seconds: int = DEFAULT_PRESIGNED_URL_EXPIRES_IN_SECONDS,
+    s3_client: Optional["S3Client"] = None,
+) -> Dict[int, str]:
+    """
+    Presign uploads of parts of a multipart upload.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param object_key: path to the object in the S3 bucket.
+    :param upload_id: The ID of the multipart upload.
+    :param part_numbers: Positions of the parts within the object, from 1 to 10,000.
+    :param expires_in_seconds: Seconds the URLs can be used for.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+
+    :return: The URL to `PUT` the content of each part to, by part number. S3 returns the ETag
+        needed to complete the upload in the `ETag` header of each response.
+    """
+    s3_client = s3_client or boto3.client("s3")
+
+    return {
+        part_number: s3_client.generate_presigned_url(
+            "upload_part",
+            Params={"Bucket": bucket_name, "Key": object_key, "UploadId": upload_id, "PartNumber": part_number},
+            ExpiresIn=expires_in_seconds,
+        )
+        for part_number in part_numbers
+    }
@@ -1,67 +1,244 @@
 """Functions for reading objects from an S3 bucket--the "R" in CRUD."""
 
-from typing import Optional
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import (
+    dataclass,
+    field,
+)
+from datetime import datetime
+from functools import partial
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Union,
+)
 
 import boto3
 from botocore.exceptions import ClientError
 
+from files_api.s3.errors import is_object_not_found_error
+
 try:
     from mypy_boto3_s3 import S3Client
     from mypy_boto3_s3.type_defs import (
         GetObjectOutputTypeDef,
+        HeadObjectOutputTypeDef,
         ObjectTypeDef,
     )
 except ImportError:
     ...
 
+if TYPE_CHECKING:
+    # imported for type checking only, as the cache module itself depends on this one
+    from files_api.s3.metadata_cache import MetadataCache
+
 DEFAULT_MAX_KEYS = 1_000
+DEFAULT_LISTING_MAX_CONCURRENCY = 8
+DEFAULT_LISTING_MAX_RANGES = 64
+# pages each key range of a parallel listing may list ahead of the consumer
+_MAX_QUEUED_PAGES_PER_RANGE = 2
+# how often a listing thread blocked on a full queue checks whether the consumer stopped
+_QUEUE_POLL_SECONDS = 0.1
+
+
+@dataclass(frozen=True)
+class S3ObjectMetadata:
+    """Metadata of an object in an S3 bucket."""
+
+    object_key: str
+    content_type: str
+    content_length: int
+    last_modified: datetime
+    etag: str
+    storage_class: str = "STANDARD"
+    user_metadata: Dict[str, str] = field(default_factory=dict)
 
+    @classmethod
+    def from_response(
+        cls,
+        object_key: str,
+        response: Union["HeadObjectOutputTypeDef", "GetObjectOutputTypeDef"],
+    ) -> "S3ObjectMetadata":
+        """Read the metadata of an object from a `head_object` or an unranged `get_object` response."""
+        return cls(
+            object_key=object_key,
+            content_type=response.get("ContentType", "application/octet-stream"),
+            content_length=response["ContentLength"],
+            last_modified=response["LastModified"],
+            etag=response["ETag"],
+            # S3 omits the storage class from the response for objects in the STANDARD class
+            storage_class=response.get("StorageClass", "STANDARD"),
+            user_metadata=response.get("Metadata", {}),
+        )
 
-def object_exists_in_s3(bucket_name: str, object_key: str, s3_client: Optional["S3Client"] = None) -> bool:
+
+def object_exists_in_s3(
+    bucket_name: str,
+    object_key: str,
+    metadata_cache: Optional["MetadataCache"] = None,
+    s3_client: Optional["S3Client"] = None,
+) -> bool:
     """
     Check if an object exists in the S3 bucket using head_object.
 
     :param bucket_name: Name of the S3 bucket.
     :param object_key: Key of the object to check.
+    :param metadata_cache: Optional cache to answer from, and to record the answer in, instead of always calling S3.
     :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
 
     :return: True if the object exists, False otherwise.
     """
-    s3_client = s3_client or boto3.client("s3")
-
     try:
-        s3_client.head_object(Bucket=bucket_name, Key=object_key)
+        fetch_s3_object_metadata(
+            bucket_name=bucket_name,
+            object_key=object_key,
+            metadata_cache=metadata_cache,
+            s3_client=s3_client,
+        )
         return True
     except ClientError as err:
-        error_code = err.response["Error"]["Code"]
-        if error_code == "404":
+        if is_object_not_found_error(err):
             return False
         raise
 
 
+def fetch_s3_object_metadata(
+    bucket_name: str,
+    object_key: str,
+    if_none_match: Optional[str] = None,
+    if_modified_since: Optional[datetime] = None,
+    metadata_cache: Optional["MetadataCache"] = None,
+    s3_client: Optional["S3Client"] = None,
+) -> S3ObjectMetadata:
+    """
+    Fetch metadata of an object in the S3 bucket using head_object, without transferring its content.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param object_key: Key of the object to fetch metadata of.
+    :param if_none_match: Optional ETag(s). Only fetch the metadata if the object's ETag is different.
+    :param if_modified_since: Optional timestamp. Only fetch the metadata if the object was modified after it.
+    :param metadata_cache: Optional cache to answer from, and to record the answer in, instead of always calling S3.
+        Conditional fetches always go to S3, since their answer depends on the exact current version of the object.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+
+    :raises ClientError: `404` if the object does not exist, `304` if a condition did not hold.
+
+    :return: Metadata of the object.
+    """
+    head_s3_object = partial(
+        _head_s3_object,
+        bucket_name=bucket_name,
+        object_key=object_key,
+        if_none_match=if_none_match,
+        if_modified_since=if_modified_since,
+        s3_client=s3_client or boto3.client("s3"),
+    )
+    if metadata_cache is None:
+        return head_s3_object()
+
+    is_conditional = bool(if_none_match or if_modified_since)
+    if not is_conditional:
+        cached_metadata = _fetch_cached_metadata(metadata_cache, bucket_name=bucket_name, object_key=object_key)
+        if cached_metadata is not None:
+            return cached_metadata
+
+    # taken before calling S3, so that an answer overtaken by a write is not cached
+    generation = metadata_cache.generation()
+    try:
+        metadata = head_s3_object()
+    except ClientError as err:
+        if is_object_not_found_error(err):
+            metadata_cache.put(bucket_name, object_key, None, generation=generation)
+        raise
+
+    metadata_cache.put(bucket_name, object_key, metadata, generation=generation)
+    return metadata
+
+
+def _fetch_cached_metadata(
+    metadata_cache: "MetadataCache",
+    bucket_name: str,
+    object_key: str,
+) -> Optional[S3ObjectMetadata]:
+    """Return the cached metadata of an object, None on a cache miss, or raise like `head_object` if it is cached as missing."""
+    cached = metadata_cache.get(bucket_name, object_key)
+    if cached is not None and cached.metadata is None:
+        raise ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject")
+    return cached.metadata if cached is not None else None
+
+
+def _head_s3_object(
+    bucket_name: str,
+    object_key: str,
+    if_none_match: Optional[str],
+    if_modified_since: Optional[datetime],
+    s3_client: "S3Client",
+) -> S3ObjectMetadata:
+    response = s3_client.head_object(
+        Bucket=bucket_name,
+        Key=object_key,
+        **_read_conditions(if_none_match=if_none_match, if_modified_since=if_modified_since),
+    )
+    return S3ObjectMetadata.from_response(object_key=object_key, response=response)
+
+
 def fetch_s3_object(
     bucket_name: str,
     object_key: str,
+    byte_range: Optional[str] = None,
+    if_none_match: Optional[str] = None,
+    if_modified_since: Optional[datetime] = None,
+    if_match: Optional[str] = None,
     s3_client: Optional["S3Client"] = None,
 ) -> "GetObjectOutputTypeDef":
     """
-    Fetch metadata of an object in the S3 bucket.
+    Fetch an object in the S3 bucket: its metadata and a stream of its content.
 
     :param bucket_name: Name of the S3 bucket.
     :param object_key: Key of the object to fetch.
+    :param byte_range: Optional single HTTP byte range to fetch instead of the whole object, e.g. "bytes=0-99".
+        When given, the response also has a `ContentRange` naming the range that was actually returned.
+    :param if_none_match: Optional ETag(s). Only fetch the object if its ETag is different.
+    :param if_modified_since: Optional timestamp. Only fetch the object if it was modified after it.
+    :param if_match: Optional ETag. Only fetch the object if it still has this ETag, e.g. to read
+        several ranges of the same version of an object.
     :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
 
-    :return: Metadata of the object.
+    :raises ClientError: `NoSuchKey` if the object does not exist, `InvalidRange` if `byte_range`
+        starts beyond the end of the object, `304` if a condition did not hold, `PreconditionFailed`
+        if the object no longer has the ETag `if_match`.
+
+    :return: Metadata of the object, plus its content as a stream in `Body`.
     """
     s3_client = s3_client or boto3.client("s3")
 
     response = s3_client.get_object(
         Bucket=bucket_name,
         Key=object_key,
+        **({"Range": byte_range} if byte_range else {}),
+        **_read_conditions(if_none_match=if_none_match, if_modified_since=if_modified_since),
+        **({"IfMatch": if_match} if if_match else {}),
     )
     return response
 
 
+def _read_conditions(if_none_match: Optional[str], if_modified_since: Optional[datetime]) -> Dict[str, Any]:
+    """Keyword arguments for `get_object` and `head_object` that make the read conditional."""
+    conditions: Dict[str, Any] = {}
+    if if_none_match:
+        conditions["IfNoneMatch"] = if_none_match
+    if if_modified_since:
+        conditions["IfModifiedSince"] = if_modified_since
+    return conditions
+
+
 def fetch_s3_objects_using_page_token(
     bucket_name: str,
     continuation_token: str,
@@ -119,3 +296,286 @@ def fetch_s3_objects_metadata(
     next_page_token = response.get("NextContinuationToken")
 
     return files, next_page_token
+
+
+def fetch_s3_object_keys(
+    bucket_name: str,
+    prefix: str,
+    continuation_token: Optional[str] = None,
+    s3_client: Optional["S3Client"] = None,
+) -> tuple[list[str], Optional[str]]:
+    """
+    Fetch one page of up to `DEFAULT_MAX_KEYS` keys of the objects under a prefix.
+
+    :param bucket_name: Name of the S3 bucket to list objects from.
+    :param prefix: Prefix of the keys to list, e.g. "path/to/dir/".
+    :param continuation_token: Token returned with the previous page, or None for the first page.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+
+    :return: Tuple of the keys in the page and the continuation token of the next page, or None if it is the last.
+    """
+    objects, next_continuation_token = fetch_s3_objects_page(
+        bucket_name=bucket_name, prefix=prefix, continuation_token=continuation_token, s3_client=s3_client
+    )
+    return [item["Key"] for item in objects], next_continuation_token
+
+
+def fetch_s3_objects_page(
+    bucket_name: str,
+    prefix: str,
+    continuation_token: Optional[str] = None,
+    s3_client: Optional["S3Client"] = None,
+) -> tuple[list["ObjectTypeDef"], Optional[str]]:
+    """
+    Fetch one page of up to `DEFAULT_MAX_KEYS` objects under a prefix, with their size and modification time.
+
+    Unlike `fetch_s3_objects_using_page_token`, the prefix is sent with every page, so that pages
+    after the first stay within it.
+
+    :param bucket_name: Name of the S3 bucket to list objects from.
+    :param prefix: Prefix of the keys to list, e.g. "path/to/dir/".
+    :param continuation_token: Token returned with the previous page, or None for the first page.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+
+    :return: Tuple of the objects in the page and the continuation token of the next page, or None if it is the last.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    response = s3_client.list_objects_v2(
+        Bucket=bucket_name,
+        Prefix=prefix,
+        MaxKeys=DEFAULT_MAX_KEYS,
+        **({"ContinuationToken": continuation_token} if continuation_token else {}),
+    )
+    return response.get("Contents", []), response.get("NextContinuationToken")
+
+
+class S3ListingPage(NamedTuple):
+    """One page of a listing of the objects under a prefix."""
+
+    objects: List["ObjectTypeDef"]
+    common_prefixes: List[str]
+    is_truncated: bool
+
+    @property
+    def last_key(self) -> Optional[str]:
+        """The key or common prefix listed last, which is the greatest of both since S3 lists them in key order."""
+        last_object_key = self.objects[-1]["Key"] if self.objects else ""
+        last_common_prefix = self.common_prefixes[-1] if self.common_prefixes else ""
+        return max(last_object_key, last_common_prefix) or None
+
+
+def fetch_s3_objects_after(
+    bucket_name: str,
+    prefix: str,
+    max_keys: int = DEFAULT_MAX_KEYS,
+    start_after: Optional[str] = None,
+    delimiter: Optional[str] = None,
+    s3_client: Optional["S3Client"] = None,
+) -> S3ListingPage:
+    """
+    Fetch one page of the objects under a prefix whose keys come after `start_after`.
+
+    Resuming from the last key of the previous page, rather than from a continuation token, lets a
+    listing be resumed from any key, and lets each page have a different size.
+
+    :param bucket_name: Name of the S3 bucket to list objects from.
+    :param prefix: Prefix of the keys to list, e.g. "path/to/dir/".
+    :param max_keys: Max number of objects plus common prefixes in the page, up to `DEFAULT_MAX_KEYS`.
+    :param start_after: Only list keys greater than this one, or None to start from the first key.
+    :param delimiter: If set, keys with this character after the prefix are not listed; the part of
+        their key up to and including the first such character is listed once as a common prefix instead.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+
+    :return: The objects and common prefixes of the page, and whether more come after them.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    response = s3_client.list_objects_v2(
+        Bucket=bucket_name,
+        Prefix=prefix,
+        MaxKeys=max_keys,
+        **({"StartAfter": start_after} if start_after else {}),
+        **({"Delimiter": delimiter} if delimiter else {}),
+    )
+    return S3ListingPage(
+        objects=response.get("Contents", []),
+        common_prefixes=[item["Prefix"] for item in response.get("CommonPrefixes", [])],
+        is_truncated=response.get("IsTruncated", False),
+    )
+
+
+class S3KeyRange(NamedTuple):
+    """The keys after `start_after` up to and including `end_at`. None leaves that end of the range open."""
+
+    start_after: Optional[str] = None
+    end_at: Optional[str] = None
+
+
+def discover_s3_key_ranges(
+    bucket_name: str,
+    prefix: str,
+    max_ranges: int = DEFAULT_LISTING_MAX_RANGES,
+    delimiter: str = "/",
+    max_concurrency: int = DEFAULT_LISTING_MAX_CONCURRENCY,
+    s3_client: Optional["S3Client"] = None,
+) -> List[S3KeyRange]:
+    """
+    Split the keys under a prefix into up to `max_ranges` consecutive ranges that can be listed in parallel.
+
+    The split points are subdirectories found by delimiter probes: one listing of the prefix, then of its
+    subdirectories, level by level until there are enough split points or no more subdirectories. Each
+    probe reads only the first page of subdirectories. The ranges cover every key under the prefix
+    whatever split points are found, so a prefix with no subdirectories is one range.
+
+    :param bucket_name: Name of the S3 bucket to list objects from.
+    :param prefix: Prefix of the keys to split, e.g. "path/to/dir/".
+    :param max_ranges: Max number of ranges to return.
+    :param delimiter: Character separating the levels of subdirectories in keys.
+    :param max_concurrency: Max number of probes in flight at once.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+
+    :return: The ranges, in key order.
+    """
+    s3_client = s3_client or boto3.client("s3")
+
+    def probe(probed_prefix: str) -> List[str]:
+        page = fetch_s3_objects_after(bucket_name, prefix=probed_prefix, delimiter=delimiter, s3_client=s3_client)
+        return page.common_prefixes
+
+    split_points: List[str] = []
+    prefixes_to_probe = [prefix]
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        while prefixes_to_probe and len(split_points) + 1 < max_ranges:
+            found_prefixes = [
+                common_prefix
+                for common_prefixes in executor.map(probe, prefixes_to_probe[:max_ranges])
+                for common_prefix in common_prefixes
+            ]
+            split_points += found_prefixes
+            prefixes_to_probe = found_prefixes
+
+    split_points.sort()
+    if len(split_points) >= max_ranges:
+        # keep evenly spaced split points, which keeps ranges of similar numbers of subdirectories
+        split_points = [
+            split_points[range_num * len(split_points) // max_ranges] for range_num in range(1, max_ranges)
+        ]
+    boundaries: List[Optional[str]] = [None, *split_points, None]
+    return [
+        S3KeyRange(start_after=start_after, end_at=end_at) for start_after, end_at in zip(boundaries, boundaries[1:])
+    ]
+
+
+def iter_s3_object_pages_in_range(
+    bucket_name: str,
+    prefix: str,
+    key_range: S3KeyRange,
+    s3_client: Optional["S3Client"] = None,
+) -> Iterator[List["ObjectTypeDef"]]:
+    """
+    Iterate over the pages of objects under a prefix whose keys are in `key_range`, in key order.
+
+    :param bucket_name: Name of the S3 bucket to list objects from.
+    :param prefix: Prefix of the keys to list, e.g. "path/to/dir/".
+    :param key_range: Range of the keys to list.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    start_after = key_range.start_after
+    while True:
+        page = fetch_s3_objects_after(bucket_name, prefix=prefix, start_after=start_after, s3_client=s3_client)
+        objects = [item for item in page.objects if key_range.end_at is None or item["Key"] <= key_range.end_at]
+        if objects:
+            yield objects
+        # the page reached into the next range, or the end of the prefix
+        if len(objects) < len(page.objects) or not page.is_truncated:
+            return
+        start_after = objects[-1]["Key"]
+
+
+def iter_s3_object_pages_parallel(
+    bucket_name: str,
+    prefix: str,
+    max_concurrency: int = DEFAULT_LISTING_MAX_CONCURRENCY,
+    ordered: bool = True,
+    key_ranges: Optional[List[S3KeyRange]] = None,
+    s3_client: Optional["S3Client"] = None,
+) -> Iterator[List["ObjectTypeDef"]]:
+    """
+    List the objects under a prefix by listing up to `max_concurrency` ranges of keys at once.
+
+    A single listing is a chain of requests each waiting for the previous one's last key, so its
+    speed is bounded by the latency of S3. Listing ranges of keys at once multiplies it by up to
+    `max_concurrency`, provided the keys are spread over enough subdirectories to split them.
+
+    Each range lists at most a couple of pages ahead of the consumer, so memory use stays bounded
+    by the number of ranges being listed. Closing the iterator early stops the listing.
+
+    :param bucket_name: Name of the S3 bucket to list objects from.
+    :param prefix: Prefix of the keys to list, e.g. "path/to/dir/".
+    :param max_concurrency: Max number of ranges being listed at once.
+    :param ordered: If true, pages are yielded in key order. If false, pages are yielded as soon as
+        they are listed, which keeps every range busy rather than waiting for the earliest one.
+    :param key_ranges: Ranges to list, e.g. from a previous `discover_s3_key_ranges`. If not given,
+        they are discovered first with `discover_s3_key_ranges`.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+
+    :raises ClientError: If listing any range fails. Other errors of a range, e.g. connection errors, are raised too.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    if key_ranges is None:
+        key_ranges = discover_s3_key_ranges(
+            bucket_name, prefix=prefix, max_concurrency=max_concurrency, s3_client=s3_client
+        )
+    if ordered:
+        page_queues = [queue.Queue(maxsize=_MAX_QUEUED_PAGES_PER_RANGE) for _ in key_ranges]
+    else:
+        page_queues = [queue.Queue(maxsize=_MAX_QUEUED_PAGES_PER_RANGE * max_concurrency)] * len(key_ranges)
+    stopped = threading.Event()
+
+    def list_range(key_range: S3KeyRange, page_queue: "queue.Queue[Any]") -> None:
+        try:
+            for objects in iter_s3_object_pages_in_range(bucket_name, prefix, key_range, s3_client=s3_client):
+                if not _put_unless_stopped(page_queue, objects, stopped):
+                    return
+            _put_unless_stopped(page_queue, None, stopped)
+        except Exception as err:  # pylint: disable=broad-except
+            # any error, not only S3's, is handed to the consumer, which would otherwise wait for the range forever
+            _put_unless_stopped(page_queue, err, stopped)
+
+    # ranges are started in order, so the range the ordered consumer waits for is always being listed
+    executor = ThreadPoolExecutor(max_workers=max_concurrency)
+    try:
+        for key_range, page_queue in zip(key_ranges, page_queues):
+            executor.submit(list_range, key_range, page_queue)
+        if ordered:
+            for page_queue in page_queues:
+                yield from _iter_queued_pages(page_queue, num_ranges=1)
+        elif key_ranges:
+            yield from _iter_queued_pages(page_queues[0], num_ranges=len(key_ranges))
+    finally:
+        stopped.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _put_unless_stopped(page_queue: "queue.Queue[Any]", item: Any, stopped: threading.Event) -> bool:
+    """Wait for room in the queue to put `item`, giving up if the consumer stopped. Return whether it was put."""
+    while not stopped.is_set():
+        try:
+            page_queue.put(item, timeout=_QUEUE_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _iter_queued_pages(page_queue: "queue.Queue[Any]", num_ranges: int) -> Iterator[List["ObjectTypeDef"]]:
+    """Yield the pages put in the queue until `num_ranges` ranges have put None to mark their end."""
+    finished_ranges = 0
+    while finished_ranges < num_ranges:
+        item = page_queue.get()
+        if item is None:
+            finished_ranges += 1
+        elif isinstance(item, BaseException):
+            raise item
+        else:
+            yield item
@@ -0,0 +1,223 @@
+"""
+Aggregate statistics of the files under a prefix: count, total size, oldest and newest modification
+times and a histogram of sizes, optionally broken down by subdirectory down to a given depth.
+
+Summaries are computed incrementally, one page of a listing at a time, and merged, so memory use
+does not depend on the number of files. Within a page, the keys of one directory are contiguous
+since listings are sorted, so each directory's run of keys is found with a binary search and
+aggregated in one go with builtins (`sorted`, `sum`, `min`, `max`, `bisect`) rather than file by
+file. The metadata index computes the same summaries with one `GROUP BY` query instead.
+"""
+
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import datetime
+from itertools import (
+    accumulate,
+    pairwise,
+)
+from operator import itemgetter
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+try:
+    from mypy_boto3_s3.type_defs import ObjectTypeDef
+except ImportError:
+    ...
+
+# upper bounds (exclusive) of the size histogram's buckets, each 16 times the previous one; the last
+# bucket, of files of 16 GiB and more, has no upper bound
+SIZE_HISTOGRAM_BOUNDS_BYTES = (
+    1024,
+    16 * 1024,
+    256 * 1024,
+    4 * 1024**2,
+    64 * 1024**2,
+    1024**3,
+    16 * 1024**3,
+)
+DEFAULT_SUMMARY_CACHE_TTL_SECONDS = 60.0
+DEFAULT_SUMMARY_CACHE_MAX_ENTRIES = 1_000
+
+# sorts after every character S3 keys can contain, so keys under a prefix sort before `prefix + _MAX_KEY_CHARACTER`
+_MAX_KEY_CHARACTER = "\U0010ffff"
+_EMPTY_HISTOGRAM = (0,) * (len(SIZE_HISTOGRAM_BOUNDS_BYTES) + 1)
+_get_key, _get_size, _get_last_modified = itemgetter("Key"), itemgetter("Size"), itemgetter("LastModified")
+
+
+class PrefixSummary(NamedTuple):
+    """Statistics of a set of files. Summaries of disjoint sets of files are combined with `merge`."""
+
+    file_count: int = 0
+    total_bytes: int = 0
+    oldest_modified: Optional[datetime] = None
+    newest_modified: Optional[datetime] = None
+    # number and total size of the files in each bucket of `SIZE_HISTOGRAM_BOUNDS_BYTES`
+    histogram_counts: Tuple[int, ...] = _EMPTY_HISTOGRAM
+    histogram_bytes: Tuple[int, ...] = _EMPTY_HISTOGRAM
+
+    @classmethod
+    def of_files(cls, sizes: List[int], last_modified_times: List[datetime]) -> "PrefixSummary":
+        """Summarize the files with the given sizes and modification times, in any order."""
+        if not sizes:
+            return cls()
+        sorted_sizes = sorted(sizes)
+        # running totals of the sorted sizes give the bytes of every bucket from the positions of its bounds
+        cumulative_bytes = list(accumulate(sorted_sizes, initial=0))
+        edges = [0, *(bisect_left(sorted_sizes, bound) for bound in SIZE_HISTOGRAM_BOUNDS_BYTES), len(sorted_sizes)]
+        return cls(
+            file_count=len(sorted_sizes),
+            total_bytes=cumulative_bytes[-1],
+            oldest_modified=min(last_modified_times),
+            newest_modified=max(last_modified_times),
+            histogram_counts=tuple(end - start for start, end in pairwise(edges)),
+            histogram_bytes=tuple(cumulative_bytes[end] - cumulative_bytes[start] for start, end in pairwise(edges)),
+        )
+
+    def merge(self, other: "PrefixSummary") -> "PrefixSummary":
+        """Return the summary of the files of both summaries."""
+        return PrefixSummary(
+            file_count=self.file_count + other.file_count,
+            total_bytes=self.total_bytes + other.total_bytes,
+            oldest_modified=min(filter(None, (self.oldest_modified, other.oldest_modified)), default=None),
+            newest_modified=max(filter(None, (self.newest_modified, other.newest_modified)), default=None),
+            histogram_counts=tuple(map(sum, zip(self.histogram_counts, other.histogram_counts))),
+            histogram_bytes=tuple(map(sum, zip(self.histogram_bytes, other.histogram_bytes))),
+        )
+
+
+def directory_at_depth(object_key: str, prefix: str, depth: int) -> str:
+    """
+    Return the directory under `prefix` that an object is summarized in when breaking down by `depth`.
+
+    That is the object's deepest parent directory at most `depth` levels below `prefix`, e.g. with
+    the prefix "a/" and a depth of 1, "a/b/c/d.txt" is in "a/b/", and "a/e.txt" is in "a/".
+    """
+    return prefix + "".join(segment + "/" for segment in object_key.removeprefix(prefix).split("/", depth)[:-1])
+
+
+def summarize_objects(objects: List["ObjectTypeDef"], prefix: str, depth: int) -> Dict[str, PrefixSummary]:
+    """
+    Summarize a page of listed objects under `prefix`, sorted by key, for each directory at most `depth` levels down.
+
+    Only the files directly in each directory, and in directories deeper than `depth` under it, are
+    counted in its summary: pass the result through `roll_up_summaries` to count subdirectories too.
+    """
+    keys = list(map(_get_key, objects))
+    sizes = list(map(_get_size, objects))
+    last_modified_times = list(map(_get_last_modified, objects))
+    summaries: Dict[str, PrefixSummary] = {}
+    for directory, start, end in _iter_directory_runs(keys, prefix, depth):
+        run_summary = PrefixSummary.of_files(sizes[start:end], last_modified_times[start:end])
+        summaries[directory] = summaries.get(directory, PrefixSummary()).merge(run_summary)
+    return summaries
+
+
+def _iter_directory_runs(keys: List[str], prefix: str, depth: int) -> Iterable[Tuple[str, int, int]]:
+    """Split sorted keys into runs of keys summarized in the same directory, as (directory, start, end)."""
+    start = 0
+    while start < len(keys):
+        directory = directory_at_depth(keys[start], prefix, depth)
+        if directory.removeprefix(prefix).count("/") == depth:
+            # every key under a directory at the max depth is summarized in it, so the run ends after the last of them
+            end = bisect_left(keys, directory + _MAX_KEY_CHARACTER, start)
+        else:
+            # a file directly in a shallower directory, which may be followed by subdirectories of its own
+            end = start + 1
+            while end < len(keys) and keys[end].startswith(directory) and keys[end].find("/", len(directory)) == -1:
+                end += 1
+        yield directory, start, end
+        start = end
+
+
+def merge_summaries(summaries: Dict[str, PrefixSummary], other_summaries: Dict[str, PrefixSummary]) -> None:
+    """Merge summaries by directory into `summaries`, e.g. those of another page of the same listing."""
+    for directory, summary in other_summaries.items():
+        summaries[directory] = summaries[directory].merge(summary) if directory in summaries else summary
+
+
+def roll_up_summaries(summaries: Dict[str, PrefixSummary], prefix: str) -> Dict[str, PrefixSummary]:
+    """
+    Add the summary of every directory to those of its parent directories, up to `prefix`.
+
+    :param summaries: Summaries of the files directly in each directory, e.g. from `summarize_objects`.
+
+    :return: Summaries of all the files under each directory, including `prefix` itself.
+    """
+    rolled_up: Dict[str, PrefixSummary] = {prefix: PrefixSummary()}
+    for directory, summary in summaries.items():
+        relative_directory = directory.removeprefix(prefix)
+        parents = [
+            prefix + relative_directory[: index + 1] for index, char in enumerate(relative_directory) if char == "/"
+        ]
+        merge_summaries(rolled_up, {parent: summary for parent in [prefix, *parents]})
+    return rolled_up
+
+
+def group_subdirectories(summaries: Dict[str, PrefixSummary], prefix: str) -> Dict[str, List[str]]:
+    """Return the immediate subdirectories of each directory of rolled-up summaries, in path order."""
+    subdirectories: Dict[str, List[str]] = {}
+    for directory in sorted(summaries):
+        if directory == prefix:
+            continue
+        relative_directory = directory.removeprefix(prefix)
+        parent = prefix + relative_directory[: relative_directory[:-1].rfind("/") + 1]
+        subdirectories.setdefault(parent, []).append(directory)
+    return subdirectories
+
+
+class SummaryCache:
+    """
+    Cache of the rolled-up summaries of directories, bounded both in size and in age.
+
+    Entries are not invalidated by writes: `ttl_seconds` bounds how stale a cached summary can be.
+    The cache is only used from the event loop, so it needs no lock.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = DEFAULT_SUMMARY_CACHE_TTL_SECONDS,
+        max_entries: int = DEFAULT_SUMMARY_CACHE_MAX_ENTRIES,
+    ):
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._entries: OrderedDict[Tuple[str, str, int], Tuple[float, datetime, Dict[str, PrefixSummary]]] = (
+            OrderedDict()
+        )
+
+    def get(self, bucket_name: str, directory: str, depth: int) -> Optional[Tuple[datetime, Dict[str, PrefixSummary]]]:
+        """Return when the summaries of a directory were computed and the summaries, or None if not cached."""
+        entry = self._entries.get((bucket_name, directory, depth))
+        if entry is None:
+            return None
+        expires_at, computed_at, summaries = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[bucket_name, directory, depth]
+            return None
+        self._entries.move_to_end((bucket_name, directory, depth))
+        return computed_at, summaries
+
+    def put(
+        self, bucket_name: str, directory: str, depth: int, computed_at: datetime, summaries: Dict[str, PrefixSummary]
+    ) -> None:
+        """Cache the summaries of a directory, evicting the least recently used entry if the cache is full."""
+        if self._ttl_seconds <= 0 or self._max_entries <= 0:
+            return
+        self._entries[bucket_name, directory, depth] = (time.monotonic() + self._ttl_seconds, computed_at, summaries)
+        self._entries.move_to_end((bucket_name, directory, depth))
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+
+def histogram_bucket_bounds() -> List[Tuple[int, Optional[int]]]:
+    """Return the lower (inclusive) and upper (exclusive, None for unbounded) bounds of every histogram bucket."""
+    lower_bounds = [0, *SIZE_HISTOGRAM_BOUNDS_BYTES]
+    upper_bounds: List[Optional[int]] = [*SIZE_HISTOGRAM_BOUNDS_BYTES, None]
+    return list(zip(lower_bounds, upper_bounds))
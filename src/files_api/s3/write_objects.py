@@ -1,20 +1,30 @@
 """Functions for writing objects from an S3 bucket--the "C" and "U" in CRUD."""
 
-from typing import Optional
+from typing import (
+    Dict,
+    Optional,
+)
 
 import boto3
 
 try:
     from mypy_boto3_s3 import S3Client
+    from mypy_boto3_s3.type_defs import CompletedPartTypeDef
 except ImportError:
     ...
 
+# S3 rejects multipart uploads in which any part but the last is smaller than this
+MIN_MULTIPART_PART_SIZE_BYTES = 5 * 1024 * 1024
+DEFAULT_MULTIPART_PART_SIZE_BYTES = 8 * 1024 * 1024
+DEFAULT_MULTIPART_MAX_CONCURRENCY = 4
+
 
 def upload_s3_object(
     bucket_name: str,
     object_key: str,
     file_content: bytes,
     content_type: Optional[str] = None,
+    only_if_absent: bool = False,
     s3_client: Optional["S3Client"] = None,
 ) -> None:
     """
@@ -24,7 +34,10 @@ def upload_s3_object(
     :param object_key: path to the object in the S3 bucket.
     :param file_content: The content of the file to upload.
     :param content_type: The MIME type of the file, e.g. "text/plain" for a text file.
+    :param only_if_absent: Only create the object if no object exists at `object_key` yet.
     :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+
+    :raises ClientError: `PreconditionFailed` if `only_if_absent` is set and the object already exists.
     """
     content_type = content_type or "application/octet-stream"
     s3_client = s3_client or boto3.client("s3")
@@ -34,4 +47,120 @@ def upload_s3_object(
         Key=object_key,
         Body=file_content,
         ContentType=content_type,
+        **_if_absent_condition(only_if_absent),
+    )
+
+
+def create_multipart_upload(
+    bucket_name: str,
+    object_key: str,
+    content_type: Optional[str] = None,
+    user_metadata: Optional[Dict[str, str]] = None,
+    s3_client: Optional["S3Client"] = None,
+) -> str:
+    """
+    Start a multipart upload of an object to an S3 bucket.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param object_key: path to the object in the S3 bucket.
+    :param content_type: The MIME type of the file, e.g. "text/plain" for a text file.
+    :param user_metadata: The `x-amz-meta-*` metadata of the object, e.g. to carry it over in a copy.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+
+    :return: The ID of the multipart upload, needed to upload, complete or abort its parts.
+    """
+    content_type = content_type or "application/octet-stream"
+    s3_client = s3_client or boto3.client("s3")
+
+    response = s3_client.create_multipart_upload(
+        Bucket=bucket_name, Key=object_key, ContentType=content_type, Metadata=user_metadata or {}
     )
+    return response["UploadId"]
+
+
+def upload_part(
+    bucket_name: str,
+    object_key: str,
+    upload_id: str,
+    part_number: int,
+    part_content: bytes,
+    s3_client: Optional["S3Client"] = None,
+) -> "CompletedPartTypeDef":
+    """
+    Upload one part of a multipart upload.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param object_key: path to the object in the S3 bucket.
+    :param upload_id: The ID of the multipart upload.
+    :param part_number: Position of the part within the object, from 1 to 10,000.
+    :param part_content: The content of the part. Every part but the last must be at least 5 MiB.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+
+    :return: The part number and ETag of the uploaded part, as expected by `complete_multipart_upload`.
+    """
+    s3_client = s3_client or boto3.client("s3")
+
+    response = s3_client.upload_part(
+        Bucket=bucket_name,
+        Key=object_key,
+        UploadId=upload_id,
+        PartNumber=part_number,
+        Body=part_content,
+    )
+    return {"ETag": response["ETag"], "PartNumber": part_number}
+
+
+def complete_multipart_upload(
+    bucket_name: str,
+    object_key: str,
+    upload_id: str,
+    parts: list["CompletedPartTypeDef"],
+    only_if_absent: bool = False,
+    s3_client: Optional["S3Client"] = None,
+) -> None:
+    """
+    Assemble the uploaded parts of a multipart upload into the final object.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param object_key: path to the object in the S3 bucket.
+    :param upload_id: The ID of the multipart upload.
+    :param parts: The part numbers and ETags of every uploaded part, in any order.
+    :param only_if_absent: Only create the object if no object exists at `object_key` yet.
+        If the condition fails, the multipart upload is left open and can be completed again.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+
+    :raises ClientError: `PreconditionFailed` if `only_if_absent` is set and the object already exists.
+    """
+    s3_client = s3_client or boto3.client("s3")
+
+    s3_client.complete_multipart_upload(
+        Bucket=bucket_name,
+        Key=object_key,
+        UploadId=upload_id,
+        MultipartUpload={"Parts": sorted(parts, key=lambda part: part["PartNumber"])},
+        **_if_absent_condition(only_if_absent),
+    )
+
+
+def abort_multipart_upload(
+    bucket_name: str,
+    object_key: str,
+    upload_id: str,
+    s3_client: Optional["S3Client"] = None,
+) -> None:
+    """
+    Abort a multipart upload and free the storage used by its already uploaded parts.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param object_key: path to the object in the S3 bucket.
+    :param upload_id: The ID of the multipart upload.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+    """
+    s3_client = s3_client or boto3.client("s3")
+
+    s3_client.abort_multipart_upload(Bucket=bucket_name, Key=object_key, UploadId=upload_id)
+
+
+def _if_absent_condition(only_if_absent: bool) -> dict[str, str]:
+    """Extra request parameters making a write fail with `PreconditionFailed` if the object already exists."""
+    return {"IfNoneMatch": "*"} if only_if_absent else {}
@@ -1,6 +1,7 @@
 from datetime import datetime
 from enum import Enum
 from typing import (
+    Dict,
     List,
     Optional,
 )
@@ -9,12 +10,31 @@ from pydantic import (
     BaseModel,
     ConfigDict,
     Field,
+    model_validator,
 )
 
+from files_api.delete_jobs import (
+    DeletePrefixJob,
+    JobStatus,
+)
+from files_api.s3.copy_objects import (
+    MAX_COPY_OBJECT_BYTES,
+    MAX_MULTIPART_PARTS,
+)
+from files_api.s3.metadata_index import IndexSortKey
+from files_api.s3.presigned_urls import MAX_PRESIGNED_URL_EXPIRES_IN_SECONDS
+from files_api.s3.write_objects import MIN_MULTIPART_PART_SIZE_BYTES
+
 DEFAULT_GET_FILES_PAGE_SIZE = 10
 DEFAULT_GET_FILES_MIN_PAGE_SIZE = 10
-DEFAULT_GET_FILES_MAX_PAGE_SIZE = 100
+# one `list_objects_v2` call returns at most this many keys
+DEFAULT_GET_FILES_MAX_PAGE_SIZE = 1_000
 DEFAULT_GET_FILES_DIRECTORY = ""
+MAX_SUMMARY_DEPTH = 10
+MAX_BULK_DELETE_FILE_PATHS = 100_000
+# S3 stores objects of up to 5 TiB, uploaded in parts of up to 5 GiB
+MAX_OBJECT_BYTES = 5 * 1024**4
+MAX_PART_BYTES = MAX_COPY_OBJECT_BYTES
 
 
 ####################################
@@ -33,6 +53,42 @@ class PutFileResponse(BaseModel):
     message: str = Field(description="A message about the operation.")
 
 
+# create/update
+class BulkUploadStatus(str, Enum):
+    """Outcome of uploading one file in a bulk upload."""
+
+    CREATED = "created"
+    UPDATED = "updated"
+    FAILED = "failed"
+
+
+# create/update
+class BulkUploadResult(BaseModel):
+    """Outcome of uploading one file in `POST /files/bulk-upload`."""
+
+    file_path: str = Field(description="The path of the file.")
+    status: BulkUploadStatus = Field(description="Whether the file was created, replaced, or could not be uploaded.")
+    error: Optional[str] = Field(None, description="Why the file could not be uploaded, if it failed.")
+
+
+# create/update
+class BulkUploadResponse(BaseModel):
+    """Response model for `POST /files/bulk-upload`."""
+
+    results: List[BulkUploadResult] = Field(description="The outcome for each file, in the order they were sent.")
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "results": [
+                    {"file_path": "path/to/file_example.txt", "status": "created", "error": None},
+                    {"file_path": "path/to/other_file_example.txt", "status": "updated", "error": None},
+                ]
+            }
+        }
+    )
+
+
 # read
 class FileMetadata(BaseModel):
     """Metadata of a file."""
@@ -49,6 +105,10 @@ class GetFilesResponse(BaseModel):
     """Response model for `GET /files`."""
 
     files: List[FileMetadata]
+    directories: List[str] = Field(
+        default_factory=list,
+        description="The immediate subdirectories of the directory, when listing with a `delimiter`.",
+    )
     next_page_token: Optional[str]
 
     model_config = ConfigDict(
@@ -61,6 +121,7 @@ class GetFilesResponse(BaseModel):
                         "size_bytes": 125,
                     }
                 ],
+                "directories": [],
                 "next_page_token": "next_page_token_example",
             }
         }
@@ -75,9 +136,72 @@ class GetFilesQueryParams(BaseModel):
         DEFAULT_GET_FILES_PAGE_SIZE,
         ge=DEFAULT_GET_FILES_MIN_PAGE_SIZE,
         le=DEFAULT_GET_FILES_MAX_PAGE_SIZE,
+        description="Max number of files plus subdirectories in the page.",
     )
     directory: Optional[str] = Field(DEFAULT_GET_FILES_DIRECTORY, description="The directory to list files from.")
-    page_token: Optional[str] = Field(None, description="The token for the next page.")
+    delimiter: Optional[str] = Field(
+        None,
+        min_length=1,
+        max_length=1,
+        description=(
+            "If set, e.g. to '/', only the files directly in `directory` are listed, and each subdirectory "
+            "is listed once in `directories` instead of walking all the files under it."
+        ),
+    )
+    sort_by: IndexSortKey = Field(
+        IndexSortKey.PATH,
+        description=(
+            "Order of the files, ties being broken by path. Sorting by anything but path needs the metadata "
+            "index to be enabled, and cannot be combined with a `delimiter`."
+        ),
+    )
+    descending: bool = Field(False, description="List the files in descending order. Needs the metadata index.")
+    page_token: Optional[str] = Field(
+        None,
+        description=(
+            "The token for the next page. It records the directory, page size, delimiter and order of the first "
+            "page, which are used instead of the other query parameters."
+        ),
+    )
+
+
+# read
+class SizeHistogramBucket(BaseModel):
+    """The files of a directory whose size is in a range."""
+
+    min_bytes: int = Field(description="The smallest size of the files in the bucket.")
+    max_bytes: Optional[int] = Field(
+        description="The size the files in the bucket are smaller than. None if unbounded."
+    )
+    file_count: int = Field(description="The number of files in the bucket.")
+    total_bytes: int = Field(description="The total size in bytes of the files in the bucket.")
+
+
+# read
+class DirectorySummary(BaseModel):
+    """Statistics of the files under a directory, at any depth."""
+
+    directory: str = Field(description="The directory summarized.")
+    file_count: int = Field(description="The number of files under the directory.")
+    total_bytes: int = Field(description="The total size in bytes of the files under the directory.")
+    oldest_modified: Optional[datetime] = Field(description="The oldest modification time of the files, if any.")
+    newest_modified: Optional[datetime] = Field(description="The newest modification time of the files, if any.")
+    size_histogram: List[SizeHistogramBucket] = Field(
+        description="The number and total size of the files in each size range, each 16 times larger than the previous one."
+    )
+    subdirectories: List["DirectorySummary"] = Field(
+        default_factory=list,
+        description="The summaries of the immediate subdirectories, down to the `depth` requested.",
+    )
+
+
+# read
+class GetDirectorySummaryResponse(DirectorySummary):
+    """Response model for `GET /summary`."""
+
+    computed_at: datetime = Field(
+        description="When the summary was computed. Summaries are cached, so it may not include the latest writes."
+    )
 
 
 # delete
@@ -87,6 +211,356 @@ class DeleteFileResponse(BaseModel):
     message: str = Field(description="A message about the operation.")
 
 
+# delete
+class BulkDeleteFilesRequest(BaseModel):
+    """Request model for `POST /files/bulk-delete`. Exactly one of `file_paths` and `directory` must be given."""
+
+    file_paths: Optional[List[str]] = Field(
+        None,
+        max_length=MAX_BULK_DELETE_FILE_PATHS,
+        description="The paths of the files to delete.",
+        json_schema_extra={"example": ["path/to/file_example.txt", "path/to/other_file_example.txt"]},
+    )
+    directory: Optional[str] = Field(
+        None,
+        min_length=1,
+        description="Delete every file whose path starts with this directory.",
+        json_schema_extra={"example": "path/to/"},
+    )
+
+    @model_validator(mode="after")
+    def check_exactly_one_target(self) -> "BulkDeleteFilesRequest":
+        """Reject requests naming both or neither of the file paths and the directory."""
+        if (self.file_paths is None) == (self.directory is None):
+            raise ValueError("Exactly one of `file_paths` and `directory` must be given.")
+        return self
+
+
+# delete
+class BulkDeleteResult(BaseModel):
+    """Outcome of deleting one file, sent as one line of the `POST /files/bulk-delete` response."""
+
+    file_path: str = Field(description="The path of the file.")
+    deleted: bool = Field(description="Whether the file is gone. Deleting a file that did not exist succeeds.")
+    error_code: Optional[str] = Field(None, description="The S3 error code, if the file could not be deleted.")
+    error_message: Optional[str] = Field(None, description="The S3 error message, if the file could not be deleted.")
+
+
+# copy/move
+class CopyFileRequest(BaseModel):
+    """Request model for `POST /files/copy` and `POST /files/move`."""
+
+    source_path: str = Field(
+        min_length=1, description="The path of the file to copy.", json_schema_extra={"example": "path/to/file.txt"}
+    )
+    destination_path: str = Field(
+        min_length=1,
+        description="The path to copy the file to. Any file already there is replaced.",
+        json_schema_extra={"example": "path/to/copy.txt"},
+    )
+
+    @model_validator(mode="after")
+    def check_distinct_paths(self) -> "CopyFileRequest":
+        """Reject copies of a file onto itself, which S3 rejects and which would delete the file if it were a move."""
+        if self.source_path == self.destination_path:
+            raise ValueError("`source_path` and `destination_path` must be different.")
+        return self
+
+
+# copy/move
+class CopyFileResponse(BaseModel):
+    """Response model for `POST /files/copy` and `POST /files/move`."""
+
+    source_path: str = Field(description="The path of the file that was copied.")
+    destination_path: str = Field(description="The path of the copy.")
+    message: str = Field(description="A message about the operation.")
+
+
+# copy/move
+class CopyDirectoryRequest(BaseModel):
+    """Request model for `POST /files/copy-directory` and `POST /files/move-directory`."""
+
+    source_directory: str = Field(
+        min_length=1,
+        description="Copy every file whose path starts with this directory.",
+        json_schema_extra={"example": "path/to/"},
+    )
+    destination_directory: str = Field(
+        description="Directory replacing `source_directory` in the paths of the copies.",
+        json_schema_extra={"example": "other/path/to/"},
+    )
+
+    @model_validator(mode="after")
+    def check_disjoint_directories(self) -> "CopyDirectoryRequest":
+        """Reject directories containing each other, whose copies would be copied again."""
+        if self.source_directory.startswith(self.destination_directory) or self.destination_directory.startswith(
+            self.source_directory
+        ):
+            raise ValueError("`source_directory` and `destination_directory` must not contain each other.")
+        return self
+
+
+# copy/move
+class CopyFileResult(BaseModel):
+    """Outcome of copying or moving one file, sent as one line of the directory copy and move responses."""
+
+    source_path: str = Field(description="The path of the file.")
+    destination_path: str = Field(description="The path of the copy.")
+    succeeded: bool = Field(description="Whether the file was copied, and for a move deleted from its source.")
+    error_code: Optional[str] = Field(None, description="The S3 error code, if the file could not be copied or moved.")
+    error_message: Optional[str] = Field(
+        None, description="The S3 error message, if the file could not be copied or moved."
+    )
+
+
+# presigned URLs
+class PresignDownloadRequest(BaseModel):
+    """Request model for `POST /presigned-urls/download`."""
+
+    file_path: str = Field(
+        min_length=1,
+        description="The path of the file to download.",
+        json_schema_extra={"example": "path/to/file.txt"},
+    )
+    expires_in_seconds: Optional[int] = Field(
+        None,
+        ge=1,
+        le=MAX_PRESIGNED_URL_EXPIRES_IN_SECONDS,
+        description="Seconds the URL can be used for. Defaults to the expiry configured for the API.",
+    )
+
+
+# presigned URLs
+class PresignUploadRequest(PresignDownloadRequest):
+    """Request model for `POST /presigned-urls/upload`."""
+
+    file_path: str = Field(
+        min_length=1,
+        description="The path to upload the file to. Any file already there is replaced.",
+        json_schema_extra={"example": "path/to/file.txt"},
+    )
+    content_type: Optional[str] = Field(
+        None,
+        description="The MIME type of the file. Defaults to `application/octet-stream`.",
+        json_schema_extra={"example": "text/plain"},
+    )
+
+
+# presigned URLs
+class PresignedUrlResponse(BaseModel):
+    """Response model for `POST /presigned-urls/download` and `POST /presigned-urls/upload`."""
+
+    file_path: str = Field(description="The path of the file.")
+    method: str = Field(description="The HTTP method to send to the URL.", json_schema_extra={"example": "PUT"})
+    url: str = Field(description="The presigned S3 URL. Anyone holding it can make the request until it expires.")
+    headers: Dict[str, str] = Field(
+        description="Headers that were signed along with the URL, which the request must send with these values."
+    )
+    expires_at: datetime = Field(description="When the URL stops being accepted.")
+
+
+# presigned URLs
+class CreatePresignedMultipartUploadRequest(PresignUploadRequest):
+    """Request model for `POST /presigned-urls/multipart-uploads`."""
+
+    size_bytes: int = Field(
+        ge=1, le=MAX_OBJECT_BYTES, description="The size of the file.", json_schema_extra={"example": 1024**3}
+    )
+    part_size_bytes: Optional[int] = Field(
+        None,
+        ge=MIN_MULTIPART_PART_SIZE_BYTES,
+        le=MAX_PART_BYTES,
+        description=(
+            "Size of every part but the last. Defaults to the part size of uploads through the API. "
+            f"Raised if needed so that the file fits in {MAX_MULTIPART_PARTS:,} parts."
+        ),
+    )
+
+
+# presigned URLs
+class PresignedPartModel(BaseModel):
+    """The presigned URL of one part of a multipart upload."""
+
+    part_number: int = Field(description="Position of the part within the file, from 1.")
+    first_byte: int = Field(description="Offset in the file of the first byte of the part.")
+    last_byte: int = Field(description="Offset in the file of the last byte of the part, included.")
+    url: str = Field(description="The presigned S3 URL to `PUT` the part to. S3 returns its ETag in `ETag`.")
+
+
+# presigned URLs
+class CreatePresignedMultipartUploadResponse(BaseModel):
+    """Response model for `POST /presigned-urls/multipart-uploads`."""
+
+    file_path: str = Field(description="The path the file will be uploaded to.")
+    upload_id: str = Field(description="The ID of the S3 multipart upload, needed to complete or abort it.")
+    part_size_bytes: int = Field(description="Size of every part but the last.")
+    parts: List[PresignedPartModel] = Field(description="The parts to upload, in any order and in parallel.")
+    expires_at: datetime = Field(description="When the part URLs stop being accepted.")
+
+
+# presigned URLs
+class CompletedPartModel(BaseModel):
+    """An uploaded part of a multipart upload."""
+
+    part_number: int = Field(ge=1, le=MAX_MULTIPART_PARTS, description="Position of the part within the file.")
+    etag: str = Field(
+        min_length=1, description="The `ETag` S3 returned for the part.", json_schema_extra={"example": '"abc123"'}
+    )
+
+
+# presigned URLs
+class CompletePresignedMultipartUploadRequest(BaseModel):
+    """Request model for `POST /presigned-urls/multipart-uploads/complete`."""
+
+    file_path: str = Field(min_length=1, description="The path the file is uploaded to.")
+    upload_id: str = Field(min_length=1, description="The ID of the S3 multipart upload.")
+    parts: List[CompletedPartModel] = Field(
+        min_length=1, max_length=MAX_MULTIPART_PARTS, description="Every uploaded part, in any order."
+    )
+
+
+# presigned URLs
+class AbortPresignedMultipartUploadRequest(BaseModel):
+    """Request model for `POST /presigned-urls/multipart-uploads/abort`."""
+
+    file_path: str = Field(min_length=1, description="The path the file was being uploaded to.")
+    upload_id: str = Field(min_length=1, description="The ID of the S3 multipart upload.")
+
+
+# resumable uploads
+class CreateUploadSessionRequest(BaseModel):
+    """Request model for `POST /upload-sessions`."""
+
+    file_path: str = Field(
+        min_length=1,
+        description="The path to upload the file to. Any file already there is replaced when the session completes.",
+        json_schema_extra={"example": "path/to/file.bin"},
+    )
+    content_type: Optional[str] = Field(
+        None,
+        description="The MIME type of the file. Defaults to `application/octet-stream`.",
+        json_schema_extra={"example": "video/mp4"},
+    )
+    size_bytes: Optional[int] = Field(
+        None,
+        ge=0,
+        le=MAX_OBJECT_BYTES,
+        description="The size of the file, if known. Completing the session fails unless the parts add up to it.",
+    )
+
+
+# resumable uploads
+class UploadedPartModel(BaseModel):
+    """A part received by an upload session."""
+
+    part_number: int = Field(description="Position of the part within the file.")
+    size_bytes: int = Field(description="Size of the part.")
+    etag: str = Field(description="The MD5 of the part, as returned by S3.")
+
+
+# resumable uploads
+class UploadSessionResponse(BaseModel):
+    """Response model for `POST /upload-sessions` and `GET /upload-sessions/:session_id`."""
+
+    session_id: str = Field(description="The id of the session.")
+    file_path: str = Field(description="The path the file is uploaded to.")
+    content_type: str = Field(description="The MIME type of the file.")
+    size_bytes: Optional[int] = Field(description="The size of the file announced when the session was created.")
+    min_part_size_bytes: int = Field(description="Size under which only the part with the highest number may be.")
+    max_part_size_bytes: int = Field(description="Size above which parts are rejected.")
+    max_parts: int = Field(description="Highest part number.")
+    parts: List[UploadedPartModel] = Field(description="The parts received so far, by part number.")
+    bytes_received: int = Field(description="Total size of the parts received so far.")
+    created_at: datetime = Field(description="When the session was created.")
+
+
+# jobs
+class SubmitDeleteJobRequest(BaseModel):
+    """Request model for `POST /delete-jobs`."""
+
+    directory: str = Field(
+        min_length=1,
+        description="Delete every file whose path starts with this directory.",
+        json_schema_extra={"example": "path/to/"},
+    )
+
+
+# jobs
+class DeleteFailureModel(BaseModel):
+    """A file that a delete job could not delete."""
+
+    file_path: str = Field(description="The path of the file.")
+    error_code: Optional[str] = Field(None, description="The S3 error code.")
+    error_message: Optional[str] = Field(None, description="The S3 error message.")
+
+
+# jobs
+class DeleteJobResponse(BaseModel):
+    """Response model for `/delete-jobs` requests: the progress of a job deleting a directory."""
+
+    job_id: str = Field(description="The id of the job.")
+    directory: str = Field(description="The directory whose files are being deleted.")
+    status: JobStatus = Field(description="The status of the job.")
+    keys_scanned: int = Field(description="Number of files listed so far.")
+    keys_deleted: int = Field(description="Number of files deleted so far.")
+    keys_failed: int = Field(description="Number of files that could not be deleted so far.")
+    keys_per_second: float = Field(description="Average number of files deleted per second while the job ran.")
+    failures: List[DeleteFailureModel] = Field(description="The first files that could not be deleted.")
+    created_at: datetime = Field(description="When the job was submitted.")
+    finished_at: Optional[datetime] = Field(description="When the job completed, failed or was cancelled.")
+    error: Optional[str] = Field(description="Why the job failed, if it did.")
+    cancel_requested: bool = Field(description="Whether the job was asked to stop. It stops at its next checkpoint.")
+
+    @classmethod
+    def from_job(cls, job: DeletePrefixJob, cancel_requested: bool = False) -> "DeleteJobResponse":
+        """Describe the checkpointed state of a job."""
+        return cls(
+            job_id=job.job_id,
+            directory=job.directory,
+            status=job.status,
+            keys_scanned=job.keys_scanned,
+            keys_deleted=job.keys_deleted,
+            keys_failed=job.keys_failed,
+            keys_per_second=job.keys_per_second,
+            failures=[DeleteFailureModel(**failure.model_dump()) for failure in job.failures],
+            created_at=job.created_at,
+            finished_at=job.finished_at,
+            error=job.error,
+            cancel_requested=cancel_requested,
+        )
+
+
+# admin
+class CacheStatsModel(BaseModel):
+    """Counters of one cache."""
+
+    hits: int = Field(description="Number of lookups answered from the cache.")
+    misses: int = Field(description="Number of lookups that had to go to S3.")
+    evictions: int = Field(description="Number of entries dropped to make room for newer ones.")
+    size: int = Field(description="Number of entries currently in the cache.")
+
+
+class ContentCacheStatsModel(CacheStatsModel):
+    """Counters of the content cache."""
+
+    size_bytes: int = Field(description="Total size in bytes of the cached content.")
+
+
+class GetCacheStatsResponse(BaseModel):
+    """Response model for `GET /admin/cache-stats`."""
+
+    metadata_cache: CacheStatsModel
+    content_cache: Optional[ContentCacheStatsModel] = Field(None, description="None if the cache is disabled.")
+
+
+class ReconcileMetadataIndexResponse(BaseModel):
+    """Response model for `POST /admin/metadata-index/reconcile`."""
+
+    files_added: int = Field(description="Number of files missing from the index.")
+    files_updated: int = Field(description="Number of files whose index entry was out of date.")
+    files_removed: int = Field(description="Number of index entries of files no longer in the bucket.")
+
+
 class GeneratedFileType(str, Enum):
     """The type of file generated by OpenAI."""
 
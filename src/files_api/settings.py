@@ -1,9 +1,56 @@
+from typing import Optional
+
 from pydantic import Field
 from pydantic_settings import (
     BaseSettings,
     SettingsConfigDict,
 )
 
+from files_api.bulk_uploads import (
+    DEFAULT_BULK_UPLOAD_MAX_CONCURRENCY,
+    DEFAULT_BULK_UPLOAD_MAX_FILE_BYTES,
+)
+from files_api.s3.async_objects import (
+    DEFAULT_DELETE_MAX_CONCURRENCY,
+    DEFAULT_STREAM_CHUNK_SIZE_BYTES,
+)
+from files_api.s3.content_cache import DEFAULT_CONTENT_CACHE_MAX_OBJECT_BYTES
+from files_api.s3.copy_objects import (
+    DEFAULT_COPY_MAX_CONCURRENCY,
+    DEFAULT_COPY_PART_SIZE_BYTES,
+    MAX_COPY_OBJECT_BYTES,
+)
+from files_api.s3.metadata_cache import (
+    DEFAULT_METADATA_CACHE_MAX_ENTRIES,
+    DEFAULT_METADATA_CACHE_NEGATIVE_TTL_SECONDS,
+    DEFAULT_METADATA_CACHE_TTL_SECONDS,
+)
+from files_api.s3.metadata_index import DEFAULT_INDEX_REFRESH_MAX_CONCURRENCY
+from files_api.s3.prefetch import (
+    DEFAULT_PREFETCH_MAX_BUFFERED_OBJECT_BYTES,
+    DEFAULT_PREFETCH_MAX_OBJECTS,
+    DEFAULT_PREFETCH_MAX_PAGES,
+)
+from files_api.s3.presigned_urls import (
+    DEFAULT_PRESIGNED_URL_EXPIRES_IN_SECONDS,
+    MAX_PRESIGNED_URL_EXPIRES_IN_SECONDS,
+)
+from files_api.s3.read_objects import DEFAULT_LISTING_MAX_CONCURRENCY
+from files_api.s3.summaries import (
+    DEFAULT_SUMMARY_CACHE_MAX_ENTRIES,
+    DEFAULT_SUMMARY_CACHE_TTL_SECONDS,
+)
+from files_api.s3.write_objects import (
+    DEFAULT_MULTIPART_MAX_CONCURRENCY,
+    DEFAULT_MULTIPART_PART_SIZE_BYTES,
+    MIN_MULTIPART_PART_SIZE_BYTES,
+)
+from files_api.upload_sessions import (
+    DEFAULT_UPLOAD_MAX_IDLE_SECONDS,
+    DEFAULT_UPLOAD_SESSION_MAX_PART_BYTES,
+    DEFAULT_UPLOAD_SWEEP_INTERVAL_SECONDS,
+)
+
 
 class Settings(BaseSettings):
     """Settings for the files API.
@@ -13,6 +60,218 @@ class Settings(BaseSettings):
 
     s3_bucket_name: str = Field(...)
 
+    # shared S3 client
+    s3_max_pool_connections: int = Field(
+        50,
+        ge=1,
+        description="Size of the S3 client's connection pool, i.e. the max number of S3 calls in flight at once.",
+    )
+    s3_connect_timeout_seconds: float = Field(5, gt=0, description="Seconds to wait when connecting to S3.")
+    s3_read_timeout_seconds: float = Field(60, gt=0, description="Seconds to wait for S3 to send data.")
+    s3_tcp_keepalive: bool = Field(True, description="Enable TCP keep-alive on pooled connections to S3.")
+    s3_max_attempts: int = Field(3, ge=1, description="Max attempts, including the first, for retryable S3 calls.")
+
+    # uploads
+    s3_multipart_part_size_bytes: int = Field(
+        DEFAULT_MULTIPART_PART_SIZE_BYTES,
+        ge=MIN_MULTIPART_PART_SIZE_BYTES,
+        description="Part size of multipart uploads. Files no larger than this are uploaded with one request.",
+    )
+    s3_multipart_max_concurrency: int = Field(
+        DEFAULT_MULTIPART_MAX_CONCURRENCY,
+        ge=1,
+        description="Max number of parts of one multipart upload being sent to S3 (and held in memory) at once.",
+    )
+
+    # resumable uploads
+    upload_sessions_dir: str = Field(
+        ".upload-sessions",
+        description=(
+            "Directory where resumable upload sessions are kept. Workers sharing the directory can continue each "
+            "other's sessions."
+        ),
+    )
+    upload_session_max_part_bytes: int = Field(
+        DEFAULT_UPLOAD_SESSION_MAX_PART_BYTES,
+        ge=MIN_MULTIPART_PART_SIZE_BYTES,
+        le=MAX_COPY_OBJECT_BYTES,
+        description="Size above which a part sent to an upload session is rejected rather than buffered.",
+    )
+    upload_max_idle_seconds: float = Field(
+        DEFAULT_UPLOAD_MAX_IDLE_SECONDS,
+        gt=0,
+        description=(
+            "Seconds after which a multipart upload to which no part was sent is aborted by the sweeper, freeing "
+            "its parts. This applies to every multipart upload in the bucket, including presigned ones."
+        ),
+    )
+    upload_sweep_interval_seconds: float = Field(
+        DEFAULT_UPLOAD_SWEEP_INTERVAL_SECONDS,
+        ge=0,
+        description="Seconds between two sweeps of idle multipart uploads. 0 disables the sweeper.",
+    )
+
+    # bulk uploads
+    bulk_upload_max_concurrency: int = Field(
+        DEFAULT_BULK_UPLOAD_MAX_CONCURRENCY,
+        ge=1,
+        description="Max number of files of one bulk upload being written to S3 (and held in memory) at once.",
+    )
+    bulk_upload_max_file_bytes: int = Field(
+        DEFAULT_BULK_UPLOAD_MAX_FILE_BYTES,
+        ge=1,
+        description="Size above which a file sent in a bulk upload is rejected rather than buffered.",
+    )
+
+    # copies and moves
+    s3_copy_part_size_bytes: int = Field(
+        DEFAULT_COPY_PART_SIZE_BYTES,
+        ge=MIN_MULTIPART_PART_SIZE_BYTES,
+        le=MAX_COPY_OBJECT_BYTES,
+        description="Part size of the multipart copies of files larger than 5 GiB, which S3 cannot copy in one request.",
+    )
+    s3_copy_max_concurrency: int = Field(
+        DEFAULT_COPY_MAX_CONCURRENCY,
+        ge=1,
+        description="Max number of files of one directory copy, and of parts of one multipart copy, in flight at once.",
+    )
+
+    # listings
+    listing_prefetch_max_pages: int = Field(
+        DEFAULT_PREFETCH_MAX_PAGES,
+        ge=1,
+        description="Max number of pages of 1000 files listed from S3 ahead of the one being sent by `GET /listing`.",
+    )
+    listing_max_concurrency: int = Field(
+        DEFAULT_LISTING_MAX_CONCURRENCY,
+        ge=1,
+        description="Max number of ranges of keys listed at once by `GET /listing?parallel=true`.",
+    )
+
+    # bulk deletes
+    s3_delete_max_concurrency: int = Field(
+        DEFAULT_DELETE_MAX_CONCURRENCY,
+        ge=1,
+        description="Max number of `delete_objects` calls, of up to 1000 keys each, in flight for one bulk delete.",
+    )
+
+    # background jobs
+    jobs_dir: str = Field(
+        ".jobs",
+        description=(
+            "Directory where the state of background jobs is kept, so that they can be monitored from any worker "
+            "and resumed after a restart. Unfinished jobs are resumed by every app started with this directory, "
+            "so run background jobs on one worker per directory."
+        ),
+    )
+
+    # metadata index
+    metadata_index_path: Optional[str] = Field(
+        None,
+        description=(
+            "Path of the SQLite file indexing the metadata of every file in the bucket, so that listings, counts "
+            "and size totals are answered without listing S3. The bucket is scanned into a new index in the "
+            "background at startup. None (the default) disables the index."
+        ),
+    )
+    metadata_index_refresh_max_concurrency: int = Field(
+        DEFAULT_INDEX_REFRESH_MAX_CONCURRENCY,
+        ge=1,
+        description="Max number of `head_object` calls in flight when refreshing the index entries of written files.",
+    )
+
+    # directory summaries
+    summary_cache_ttl_seconds: float = Field(
+        DEFAULT_SUMMARY_CACHE_TTL_SECONDS,
+        ge=0,
+        description="Seconds a directory summary is reused for, i.e. how stale `GET /summary` can be. 0 disables the cache.",
+    )
+    summary_cache_max_entries: int = Field(
+        DEFAULT_SUMMARY_CACHE_MAX_ENTRIES,
+        ge=0,
+        description="Max number of directory summaries, per directory and depth, cached in memory.",
+    )
+
+    # metadata cache
+    metadata_cache_max_entries: int = Field(
+        DEFAULT_METADATA_CACHE_MAX_ENTRIES,
+        ge=0,
+        description="Max number of objects whose metadata is cached in memory. 0 disables the cache.",
+    )
+    metadata_cache_ttl_seconds: float = Field(
+        DEFAULT_METADATA_CACHE_TTL_SECONDS,
+        ge=0,
+        description="Seconds the cached metadata of an object is used for, i.e. the max staleness of HEAD responses.",
+    )
+    metadata_cache_negative_ttl_seconds: float = Field(
+        DEFAULT_METADATA_CACHE_NEGATIVE_TTL_SECONDS,
+        ge=0,
+        description="Seconds a cached 'object does not exist' answer is used for.",
+    )
+
+    # content cache
+    content_cache_max_total_bytes: int = Field(
+        0,
+        ge=0,
+        description="Total size of the small files whose content is cached in memory. 0 (the default) disables the cache.",
+    )
+    content_cache_max_object_bytes: int = Field(
+        DEFAULT_CONTENT_CACHE_MAX_OBJECT_BYTES,
+        ge=0,
+        description="Size above which files are not cached.",
+    )
+    content_cache_revalidate: bool = Field(
+        False,
+        description=(
+            "Check with a conditional S3 read that a cached file is current on every download. If false, a cached "
+            "file is served without calling S3 while its ETag matches the metadata cache."
+        ),
+    )
+
+    # downloads
+    download_chunk_size_bytes: int = Field(
+        DEFAULT_STREAM_CHUNK_SIZE_BYTES,
+        ge=1,
+        description="Size of the chunks file downloads are read from S3 and sent to the client in.",
+    )
+    archive_prefetch_max_files: int = Field(
+        DEFAULT_PREFETCH_MAX_OBJECTS,
+        ge=1,
+        description="Max number of files fetched from S3 ahead of the one being written to a directory archive.",
+    )
+    archive_prefetch_max_file_bytes: int = Field(
+        DEFAULT_PREFETCH_MAX_BUFFERED_OBJECT_BYTES,
+        ge=0,
+        description=(
+            "Size up to which files are read in full while prefetched for a directory archive. Larger files are "
+            "streamed when their turn comes, so each archive download holds at most this many bytes per prefetched file."
+        ),
+    )
+    cache_control: Optional[str] = Field(
+        "no-cache",
+        description=(
+            "Value of the `Cache-Control` header on file downloads. The default lets clients keep a copy of a file "
+            "but makes them revalidate it with a cheap conditional request before every use. None omits the header."
+        ),
+    )
+
+    # presigned URLs
+    presigned_url_expires_in_seconds: int = Field(
+        DEFAULT_PRESIGNED_URL_EXPIRES_IN_SECONDS,
+        ge=1,
+        le=MAX_PRESIGNED_URL_EXPIRES_IN_SECONDS,
+        description="Seconds presigned URLs can be used for, unless a shorter expiry is requested.",
+    )
+    download_redirect_min_bytes: Optional[int] = Field(
+        None,
+        ge=0,
+        description=(
+            "Size from which `GET /files/{file_path}` redirects to a presigned S3 URL instead of sending the file "
+            "through the API. Finding the size costs a `head_object` call, cached in the metadata cache, per "
+            "download. None (the default) disables redirects."
+        ),
+    )
+
     model_config = SettingsConfigDict(
         case_sensitive=False,
     )
@@ -0,0 +1,176 @@
+"""
+Incremental parsing of `multipart/form-data` request bodies.
+
+FastAPI's `UploadFile` parameters only reach a route handler after the whole request body
+has been received and spooled, so a large upload cannot start flowing to S3 until the client
+has finished sending it. The functions here parse the body as it arrives, so each form part's
+content can be consumed chunk by chunk while the client is still sending it.
+"""
+
+from collections import deque
+from typing import (
+    Any,
+    AsyncIterator,
+    Deque,
+    Dict,
+    Optional,
+    Tuple,
+)
+
+from fastapi import (
+    Request,
+    status,
+)
+from fastapi.exceptions import (
+    HTTPException,
+    RequestValidationError,
+)
+from python_multipart.multipart import (
+    MultipartParser,
+    parse_options_header,
+)
+
+# kinds of events emitted by the parser callbacks, consumed in order by `FormPart`
+_HEADERS = "headers"
+_DATA = "data"
+_PART_END = "part_end"
+
+
+class _FormEventStream:
+    """Feed the request body to a `MultipartParser` on demand and queue up the events it emits."""
+
+    def __init__(self, request: Request):
+        content_type, params = parse_options_header(request.headers.get("Content-Type", ""))
+        boundary = params.get(b"boundary")
+        if content_type != b"multipart/form-data" or not boundary:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Request body must be multipart/form-data",
+            )
+
+        self._body_chunks = request.stream().__aiter__()
+        self._events: Deque[Tuple[str, Any]] = deque()
+        self._finalized = False
+
+        self._header_field = b""
+        self._header_value = b""
+        self._headers: Dict[str, str] = {}
+
+        self._parser = MultipartParser(
+            boundary,
+            callbacks={
+                "on_part_begin": self._on_part_begin,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+            },
+        )
+
+    async def next_event(self) -> Optional[Tuple[str, Any]]:
+        """Return the next parser event, reading more of the request body as needed; None once the body is consumed."""
+        while not self._events:
+            if self._finalized:
+                return None
+            chunk = await anext(self._body_chunks, b"")
+            if chunk:
+                self._parser.write(chunk)
+            else:
+                # starlette signals the end of the body with an empty chunk
+                self._parser.finalize()
+                self._finalized = True
+        return self._events.popleft()
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        self._events.append((_DATA, data[start:end]))
+
+    def _on_part_end(self) -> None:
+        self._events.append((_PART_END, None))
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.decode("latin-1").lower()] = self._header_value.decode("latin-1")
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        self._events.append((_HEADERS, self._headers))
+
+
+class FormPart:
+    """A single part of a `multipart/form-data` body whose content is read lazily from the request."""
+
+    def __init__(self, headers: Dict[str, str], events: _FormEventStream):
+        _, disposition_params = parse_options_header(headers.get("content-disposition", ""))
+        self.name: str = disposition_params.get(b"name", b"").decode()
+        filename = disposition_params.get(b"filename")
+        self.filename: Optional[str] = filename.decode() if filename is not None else None
+        self.content_type: Optional[str] = headers.get("content-type")
+
+        self._events = events
+        self._exhausted = False
+
+    async def iter_chunks(self) -> AsyncIterator[bytes]:
+        """Yield the content of this part as it arrives from the client."""
+        while not self._exhausted:
+            event = await self._events.next_event()
+            if event is None or event[0] == _PART_END:
+                self._exhausted = True
+            elif event[0] == _DATA and event[1]:
+                yield event[1]
+
+    async def drain(self) -> None:
+        """Discard whatever content of this part has not been consumed yet."""
+        async for _ in self.iter_chunks():
+            pass
+
+
+async def iter_form_parts(request: Request) -> AsyncIterator[FormPart]:
+    """
+    Yield the parts of a `multipart/form-data` request body in order, as they start to arrive.
+
+    Each part must be consumed, or drained, before asking for the next one: any content
+    left unread when iteration resumes is discarded.
+
+    :raises HTTPException: 415 if the request body is not `multipart/form-data`.
+    """
+    events = _FormEventStream(request)
+    while (event := await events.next_event()) is not None:
+        if event[0] == _HEADERS:
+            part = FormPart(headers=event[1], events=events)
+            yield part
+            await part.drain()
+
+
+async def get_form_file(request: Request, field_name: str) -> FormPart:
+    """
+    Read the request body up to the start of the file sent in the form field `field_name`.
+
+    The file content itself is left unread so the caller can stream it with `FormPart.iter_chunks`.
+
+    :raises RequestValidationError: if the form has no file in the field `field_name`.
+    """
+    async for part in iter_form_parts(request):
+        if part.name == field_name and part.filename is not None:
+            return part
+
+    raise RequestValidationError(
+        [
+            {
+                "type": "missing",
+                "loc": ("body", field_name),
+                "msg": "Field required",
+                "input": None,
+            }
+        ]
+    )
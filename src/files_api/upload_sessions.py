@@ -0,0 +1,206 @@
+"""
+Resumable upload sessions, for clients uploading large files over unreliable connections.
+
+A session wraps an S3 multipart upload. The client sends the file as numbered parts, in any
+order and several at once, and a part lost to a dropped connection is simply sent again. After
+reconnecting, the client asks which parts were received and sends the others. Once every part
+is in, completing the session assembles them into the file.
+
+Sessions are kept in an `UploadSessionStore`, so that any worker sharing the store can serve
+any request of a session. The `FileUploadSessionStore` used by the app keeps them in a local
+directory, which only the workers of one host share unless it is on a shared volume. Only the
+session itself is stored: the parts received are listed from S3, which records them anyway, so
+parts sent in parallel through different workers never contend for the stored state.
+
+The parts of abandoned sessions stay billed in S3 until their upload is aborted, so an
+`UploadSessionSweeper` periodically aborts the multipart uploads idle for too long.
+"""
+
+import logging
+import os
+from abc import (
+    ABC,
+    abstractmethod,
+)
+from contextlib import asynccontextmanager
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
+from functools import partial
+from pathlib import Path
+from typing import (
+    AsyncIterator,
+    List,
+    Optional,
+)
+
+import anyio
+from anyio import to_thread
+from pydantic import BaseModel
+
+from files_api.s3.multipart_uploads import (
+    MultipartUpload,
+    abort_stale_multipart_uploads,
+)
+
+try:
+    from mypy_boto3_s3 import S3Client
+except ImportError:
+    ...
+
+DEFAULT_UPLOAD_SESSION_MAX_PART_BYTES = 64 * 1024 * 1024
+DEFAULT_UPLOAD_MAX_IDLE_SECONDS = 24 * 3600
+DEFAULT_UPLOAD_SWEEP_INTERVAL_SECONDS = 3600
+
+
+class UploadSession(BaseModel):
+    """State of a resumable upload session, as kept in the session store."""
+
+    session_id: str
+    file_path: str
+    upload_id: str
+    content_type: str
+    # size announced by the client, checked against the parts received when the session is completed
+    size_bytes: Optional[int] = None
+    created_at: datetime
+
+
+class UploadSessionStore(ABC):
+    """Interface of the durable storage of upload sessions."""
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[UploadSession]:
+        """Return a session, or None if there is no such session."""
+
+    @abstractmethod
+    def save(self, session: UploadSession) -> None:
+        """Store a session."""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        """Forget a session, if it exists."""
+
+    @abstractmethod
+    def list_all(self) -> List[UploadSession]:
+        """Return every stored session."""
+
+
+class FileUploadSessionStore(UploadSessionStore):
+    """
+    Session store keeping each session as a JSON file in a local directory, created on first use.
+
+    Sessions are shared only between the workers that see the same directory, i.e. the workers
+    of one host, unless the directory is on a volume shared between hosts.
+    """
+
+    def __init__(self, directory: str):
+        self._directory = Path(directory)
+
+    def get(self, session_id: str) -> Optional[UploadSession]:
+        """Read a session from its file."""
+        # session ids come from request paths, so anything but the ids generated by the API is rejected
+        if not session_id.isalnum():
+            return None
+        try:
+            return UploadSession.model_validate_json(self._session_path(session_id).read_text())
+        except FileNotFoundError:
+            return None
+
+    def save(self, session: UploadSession) -> None:
+        """Write a session to its file, atomically so that readers never see a partial file."""
+        self._directory.mkdir(parents=True, exist_ok=True)
+        session_path = self._session_path(session.session_id)
+        tmp_path = session_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(session.model_dump_json())
+        os.replace(tmp_path, session_path)
+
+    def delete(self, session_id: str) -> None:
+        """Remove the file of a session."""
+        if session_id.isalnum():
+            self._session_path(session_id).unlink(missing_ok=True)
+
+    def list_all(self) -> List[UploadSession]:
+        """Read every session file."""
+        if not self._directory.exists():
+            return []
+        return [UploadSession.model_validate_json(path.read_text()) for path in self._directory.glob("*.json")]
+
+    def _session_path(self, session_id: str) -> Path:
+        return self._directory / f"{session_id}.json"
+
+
+class UploadSessionSweeper:
+    """
+    Periodically aborts the multipart uploads of the bucket that are idle, and forgets their sessions.
+
+    Every multipart upload is swept, not only those of sessions, so that the parts left by
+    interrupted streamed uploads and abandoned presigned multipart uploads are freed too. Each
+    worker sharing the bucket may run a sweeper: aborting an upload twice is harmless.
+    """
+
+    def __init__(
+        self,
+        session_store: UploadSessionStore,
+        bucket_name: str,
+        s3_client: "S3Client",
+        max_idle_seconds: float = DEFAULT_UPLOAD_MAX_IDLE_SECONDS,
+        interval_seconds: float = DEFAULT_UPLOAD_SWEEP_INTERVAL_SECONDS,
+    ):
+        self._session_store = session_store
+        self._bucket_name = bucket_name
+        self._s3_client = s3_client
+        self._max_idle_seconds = max_idle_seconds
+        self._interval_seconds = interval_seconds
+
+    @asynccontextmanager
+    async def running(self) -> AsyncIterator[None]:
+        """Sweep every `interval_seconds` while the block runs, starting one interval in. 0 disables sweeps."""
+        if self._interval_seconds <= 0:
+            yield
+            return
+
+        async with anyio.create_task_group() as task_group:
+            task_group.start_soon(self._sweep_periodically)
+            try:
+                yield
+            finally:
+                task_group.cancel_scope.cancel()
+
+    async def sweep(self) -> List[MultipartUpload]:
+        """Abort the idle multipart uploads, and forget the sessions they belonged to."""
+        sessions = await to_thread.run_sync(self._session_store.list_all)
+        now = datetime.now(timezone.utc)
+        # a session started recently is active even if S3 reports no part yet
+        recent_upload_ids = {
+            session.upload_id
+            for session in sessions
+            if session.created_at > now - timedelta(seconds=self._max_idle_seconds)
+        }
+        aborted_uploads = await to_thread.run_sync(
+            partial(
+                abort_stale_multipart_uploads,
+                self._bucket_name,
+                max_idle_seconds=self._max_idle_seconds,
+                keep_upload_ids=recent_upload_ids,
+                now=now,
+                s3_client=self._s3_client,
+            )
+        )
+        aborted_upload_ids = {upload.upload_id for upload in aborted_uploads}
+        for session in sessions:
+            if session.upload_id in aborted_upload_ids:
+                await to_thread.run_sync(self._session_store.delete, session.session_id)
+        return aborted_uploads
+
+    async def _sweep_periodically(self) -> None:
+        while True:
+            await anyio.sleep(self._interval_seconds)
+            try:
+                aborted_uploads = await self.sweep()
+            except Exception:  # pylint: disable=broad-except
+                logging.getLogger(__name__).exception("Sweeping idle multipart uploads failed")
+                continue
+            if aborted_uploads:
+                logging.getLogger(__name__).info("Aborted %d idle multipart uploads", len(aborted_uploads))
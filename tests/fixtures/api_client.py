@@ -1,15 +1,31 @@
+from pathlib import Path
+
 import pytest
 from fastapi.testclient import TestClient
 
 from files_api.main import create_app
 from files_api.settings import Settings
 from tests.consts import TEST_BUCKET_NAME
+from tests.utils import wait_for_metadata_index_scan
+
+
+# Settings of the app under test, keeping its files under `tmp_path`. Tests can override some of them
+# with `@pytest.mark.parametrize("settings", [{"setting_name": value}, ...], indirect=True)`
+@pytest.fixture
+def settings(request: pytest.FixtureRequest, tmp_path: Path) -> Settings:
+    return Settings(
+        s3_bucket_name=TEST_BUCKET_NAME,
+        jobs_dir=str(tmp_path / "jobs"),
+        upload_sessions_dir=str(tmp_path / "upload-sessions"),
+        **getattr(request, "param", {}),
+    )
 
 
 # Fixture for FastAPI test client
 @pytest.fixture
-def client(mocked_aws, mocked_openai) -> TestClient:  # pylint: disable=unused-argument
-    settings = Settings(s3_bucket_name=TEST_BUCKET_NAME)
+def client(mocked_aws, mocked_openai, settings: Settings) -> TestClient:  # pylint: disable=unused-argument
     app = create_app(settings=settings)
     with TestClient(app) as client:
+        if app.state.metadata_index is not None:
+            wait_for_metadata_index_scan(app)
         yield client
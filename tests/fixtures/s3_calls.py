@@ -0,0 +1,27 @@
+"""Pytest fixture to record the S3 calls made by the app under test."""
+
+from typing import (
+    Generator,
+    List,
+)
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def s3_calls(client: TestClient) -> Generator[List[str], None, None]:
+    """
+    Names of the S3 operations (e.g. `"GetObject"`) called through the app's shared S3 client, in order.
+
+    Tests can `.clear()` the list after their setup steps to only assert on the calls of one request.
+    """
+    calls: List[str] = []
+
+    def record_call(model, **kwargs) -> None:
+        calls.append(model.name)
+
+    s3_client = client.app.state.s3_client
+    s3_client.meta.events.register("before-call.s3", record_call)
+    yield calls
+    s3_client.meta.events.unregister("before-call.s3", record_call)
@@ -0,0 +1,290 @@
+"""Test cases for `s3.async_objects`."""
+
+import asyncio
+import os
+from typing import AsyncIterator
+
+import boto3
+import pytest
+
+from files_api.s3.async_objects import (
+    copy_s3_object_async,
+    delete_s3_object_async,
+    fetch_s3_object_async,
+    fetch_s3_object_through_content_cache_async,
+    fetch_s3_objects_metadata_async,
+    iter_copy_s3_objects_async,
+    iter_delete_s3_objects_async,
+    iter_s3_object_body_async,
+    iter_s3_object_keys_async,
+    object_exists_in_s3_async,
+    upload_s3_object_async,
+    upload_s3_object_from_stream_async,
+)
+from files_api.s3.content_cache import InMemoryContentCache
+from files_api.s3.metadata_cache import InMemoryMetadataCache
+from files_api.s3.write_objects import MIN_MULTIPART_PART_SIZE_BYTES
+from tests.consts import TEST_BUCKET_NAME
+
+
+# pylint: disable=unused-argument
+def test_async_crud_round_trip(mocked_aws: None):
+    """Assert that an object can be written, read, listed and deleted through the async functions."""
+
+    async def round_trip() -> None:
+        await upload_s3_object_async(
+            bucket_name=TEST_BUCKET_NAME,
+            object_key="dir/testfile.txt",
+            file_content=b"test content",
+            content_type="text/plain",
+        )
+        assert await object_exists_in_s3_async(TEST_BUCKET_NAME, "dir/testfile.txt") is True
+
+        get_object_response = await fetch_s3_object_async(TEST_BUCKET_NAME, "dir/testfile.txt")
+        assert get_object_response["ContentType"] == "text/plain"
+        assert get_object_response["Body"].read() == b"test content"
+
+        files, next_page_token = await fetch_s3_objects_metadata_async(TEST_BUCKET_NAME, prefix="dir/")
+        assert [file["Key"] for file in files] == ["dir/testfile.txt"]
+        assert next_page_token is None
+
+        await delete_s3_object_async(TEST_BUCKET_NAME, "dir/testfile.txt")
+        assert await object_exists_in_s3_async(TEST_BUCKET_NAME, "dir/testfile.txt") is False
+
+    asyncio.run(round_trip())
+
+
+# pylint: disable=unused-argument
+def test_concurrent_async_reads(mocked_aws: None):
+    """Assert that many reads can be in flight at once and each gets its own object back."""
+    s3_client = boto3.client("s3")
+    for object_num in range(20):
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=f"file_{object_num}.txt", Body=f"content {object_num}")
+
+    async def read_all() -> list[bytes]:
+        responses = await asyncio.gather(
+            *(
+                fetch_s3_object_async(TEST_BUCKET_NAME, f"file_{object_num}.txt", s3_client=s3_client)
+                for object_num in range(20)
+            )
+        )
+        return [response["Body"].read() for response in responses]
+
+    assert asyncio.run(read_all()) == [f"content {object_num}".encode() for object_num in range(20)]
+
+
+# pylint: disable=unused-argument
+def test_iter_s3_object_body_in_chunks(mocked_aws: None):
+    content = os.urandom(10_000)
+    boto3.client("s3").put_object(Bucket=TEST_BUCKET_NAME, Key="file.bin", Body=content)
+
+    async def read_chunks() -> list[bytes]:
+        get_object_response = await fetch_s3_object_async(TEST_BUCKET_NAME, "file.bin")
+        return [chunk async for chunk in iter_s3_object_body_async(get_object_response["Body"], chunk_size_bytes=4096)]
+
+    chunks = asyncio.run(read_chunks())
+    assert [len(chunk) for chunk in chunks] == [4096, 4096, 1808]
+    assert b"".join(chunks) == content
+
+
+# pylint: disable=unused-argument
+def test_iter_s3_object_body_closes_body_when_stopped_early(mocked_aws: None):
+    boto3.client("s3").put_object(Bucket=TEST_BUCKET_NAME, Key="file.bin", Body=os.urandom(10_000))
+
+    async def read_first_chunk():
+        get_object_response = await fetch_s3_object_async(TEST_BUCKET_NAME, "file.bin")
+        chunks = iter_s3_object_body_async(get_object_response["Body"], chunk_size_bytes=4096)
+        await anext(chunks)
+        # e.g. what happens to the body of a response when the client disconnects
+        await chunks.aclose()
+        return get_object_response["Body"]
+
+    body = asyncio.run(read_first_chunk())
+    assert body._raw_stream.closed  # pylint: disable=protected-access
+
+
+# pylint: disable=unused-argument
+def test_fetch_through_content_cache_overtaken_by_write(mocked_aws: None):
+    """Assert that an object fetched while a write invalidates it is served, but cached in neither cache."""
+    s3_client = boto3.client("s3")
+    content_cache = InMemoryContentCache()
+    metadata_cache = InMemoryMetadataCache()
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="file.txt", Body=b"old content")
+
+    # the write completes, and invalidates the caches, while the `get_object` response is on its way
+    def write_during_get_object(**kwargs) -> None:
+        boto3.client("s3").put_object(Bucket=TEST_BUCKET_NAME, Key="file.txt", Body=b"new content")
+        content_cache.invalidate(TEST_BUCKET_NAME, "file.txt")
+        metadata_cache.invalidate(TEST_BUCKET_NAME, "file.txt")
+
+    s3_client.meta.events.register("after-call.s3.GetObject", write_during_get_object)
+    cached_object = asyncio.run(
+        fetch_s3_object_through_content_cache_async(
+            TEST_BUCKET_NAME, "file.txt", content_cache, metadata_cache, s3_client=s3_client
+        )
+    )
+
+    assert cached_object.content == b"old content"
+    assert content_cache.get(TEST_BUCKET_NAME, "file.txt") is None
+    assert metadata_cache.get(TEST_BUCKET_NAME, "file.txt") is None
+
+
+# pylint: disable=unused-argument
+def test_iter_delete_s3_objects_under_prefix_in_batches(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    object_keys = [f"dir/file_{object_num:04}.txt" for object_num in range(2100)]
+    for object_key in object_keys:
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=object_key, Body=b"")
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="other/file.txt", Body=b"")
+
+    async def delete_prefix() -> list[list[str]]:
+        listed_keys = iter_s3_object_keys_async(TEST_BUCKET_NAME, prefix="dir/", s3_client=s3_client)
+        return [
+            [result.object_key for result in batch_results if result.deleted]
+            async for batch_results in iter_delete_s3_objects_async(
+                TEST_BUCKET_NAME, listed_keys, max_concurrency=2, s3_client=s3_client
+            )
+        ]
+
+    deleted_batches = asyncio.run(delete_prefix())
+    assert [len(batch) for batch in deleted_batches] == [1000, 1000, 100]
+    assert sum(deleted_batches, []) == object_keys
+    assert [item["Key"] for item in s3_client.list_objects_v2(Bucket=TEST_BUCKET_NAME)["Contents"]] == [
+        "other/file.txt"
+    ]
+
+
+async def _iter_chunks(content: bytes, chunk_size: int, fail_after_bytes: int | None = None) -> AsyncIterator[bytes]:
+    for start in range(0, len(content), chunk_size):
+        if fail_after_bytes is not None and start >= fail_after_bytes:
+            raise ConnectionResetError("client disconnected")
+        end = start + chunk_size
+        yield content[start:end]
+
+
+# pylint: disable=unused-argument
+def test_upload_small_stream_uses_single_put(mocked_aws: None):
+    content = b"small file content"
+    object_created = asyncio.run(
+        upload_s3_object_from_stream_async(
+            bucket_name=TEST_BUCKET_NAME,
+            object_key="small.txt",
+            chunks=_iter_chunks(content, chunk_size=4),
+            content_type="text/plain",
+            part_size_bytes=MIN_MULTIPART_PART_SIZE_BYTES,
+        )
+    )
+    assert object_created is True
+
+    get_object_response = boto3.client("s3").get_object(Bucket=TEST_BUCKET_NAME, Key="small.txt")
+    assert get_object_response["Body"].read() == content
+    assert get_object_response["ContentType"] == "text/plain"
+    # objects created by multipart uploads have an ETag ending in "-<number of parts>"
+    assert "-" not in get_object_response["ETag"]
+
+
+# pylint: disable=unused-argument
+def test_upload_large_stream_uses_multipart_upload(mocked_aws: None):
+    content = os.urandom(2 * MIN_MULTIPART_PART_SIZE_BYTES + 1024)
+
+    def upload(object_key: str) -> bool:
+        return asyncio.run(
+            upload_s3_object_from_stream_async(
+                bucket_name=TEST_BUCKET_NAME,
+                object_key=object_key,
+                chunks=_iter_chunks(content, chunk_size=64 * 1024),
+                part_size_bytes=MIN_MULTIPART_PART_SIZE_BYTES,
+                max_concurrency=2,
+            )
+        )
+
+    s3_client = boto3.client("s3")
+    assert upload("large.bin") is True
+
+    get_object_response = s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key="large.bin")
+    assert get_object_response["Body"].read() == content
+    assert get_object_response["ContentType"] == "application/octet-stream"
+    assert get_object_response["ETag"].endswith('-3"')
+
+    # replacing an existing object is reported as such
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="existing.bin", Body=b"old content")
+    assert upload("existing.bin") is False
+    assert s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key="existing.bin")["Body"].read() == content
+
+
+# pylint: disable=unused-argument
+def test_failed_stream_aborts_multipart_upload(mocked_aws: None):
+    content = os.urandom(3 * MIN_MULTIPART_PART_SIZE_BYTES)
+    with pytest.raises(Exception):
+        asyncio.run(
+            upload_s3_object_from_stream_async(
+                bucket_name=TEST_BUCKET_NAME,
+                object_key="interrupted.bin",
+                chunks=_iter_chunks(content, chunk_size=64 * 1024, fail_after_bytes=2 * MIN_MULTIPART_PART_SIZE_BYTES),
+                part_size_bytes=MIN_MULTIPART_PART_SIZE_BYTES,
+            )
+        )
+
+    s3_client = boto3.client("s3")
+    assert "Uploads" not in s3_client.list_multipart_uploads(Bucket=TEST_BUCKET_NAME)
+    assert "Contents" not in s3_client.list_objects_v2(Bucket=TEST_BUCKET_NAME)
+
+
+# pylint: disable=unused-argument
+def test_copy_large_s3_object_in_parts(mocked_aws: None):
+    """Assert that objects above the multipart threshold are copied in parts, keeping their content and headers."""
+    s3_client = boto3.client("s3")
+    file_content = os.urandom(2 * MIN_MULTIPART_PART_SIZE_BYTES + 1)
+    s3_client.put_object(
+        Bucket=TEST_BUCKET_NAME, Key="large.bin", Body=file_content, ContentType="image/png", Metadata={"a": "b"}
+    )
+
+    asyncio.run(
+        copy_s3_object_async(
+            TEST_BUCKET_NAME,
+            source_key="large.bin",
+            destination_key="copy.bin",
+            multipart_threshold_bytes=MIN_MULTIPART_PART_SIZE_BYTES,
+            part_size_bytes=MIN_MULTIPART_PART_SIZE_BYTES,
+        )
+    )
+
+    response = s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key="copy.bin")
+    assert response["Body"].read() == file_content
+    assert response["ContentType"] == "image/png"
+    assert response["Metadata"] == {"a": "b"}
+    # the ETag of a multipart object records its number of parts
+    assert response["ETag"].endswith('-3"')
+
+
+# pylint: disable=unused-argument
+def test_move_s3_objects_under_prefix(mocked_aws: None):
+    """Assert that every object under a prefix is copied to the other prefix, then deleted."""
+    s3_client = boto3.client("s3")
+    for object_num in range(30):
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=f"src/file_{object_num:02}.txt", Body=str(object_num))
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="other.txt", Body=b"other")
+
+    async def move_all() -> list:
+        return [
+            result
+            async for round_results in iter_copy_s3_objects_async(
+                TEST_BUCKET_NAME, source_prefix="src/", destination_prefix="dst/", delete_source=True
+            )
+            for result in round_results
+        ]
+
+    results = asyncio.run(move_all())
+    assert [(result.source_key, result.destination_key) for result in results] == [
+        (f"src/file_{object_num:02}.txt", f"dst/file_{object_num:02}.txt") for object_num in range(30)
+    ]
+    assert all(result.succeeded for result in results)
+    remaining_keys = [item["Key"] for item in s3_client.list_objects_v2(Bucket=TEST_BUCKET_NAME)["Contents"]]
+    assert remaining_keys == [f"dst/file_{object_num:02}.txt" for object_num in range(30)] + ["other.txt"]
+    assert s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key="dst/file_07.txt")["Body"].read() == b"7"
+
+
+def test_copy_s3_objects_rejects_nested_prefixes():
+    """Assert that copying a prefix into itself is refused, since the copies would be listed again."""
+    with pytest.raises(ValueError):
+        asyncio.run(anext(iter_copy_s3_objects_async(TEST_BUCKET_NAME, source_prefix="a/", destination_prefix="a/b/")))
@@ -0,0 +1,31 @@
+"""Test cases for `s3.client`."""
+
+from files_api.main import create_app
+from files_api.s3.client import create_s3_client
+from files_api.settings import Settings
+from tests.consts import TEST_BUCKET_NAME
+
+
+# pylint: disable=unused-argument
+def test_create_s3_client_applies_connection_settings(mocked_aws: None):
+    s3_client = create_s3_client(
+        max_pool_connections=25,
+        connect_timeout_seconds=2,
+        read_timeout_seconds=30,
+        tcp_keepalive=True,
+        max_attempts=5,
+    )
+    config = s3_client.meta.config
+    assert config.max_pool_connections == 25
+    assert config.connect_timeout == 2
+    assert config.read_timeout == 30
+    assert config.tcp_keepalive is True
+    assert config.retries["total_max_attempts"] == 5
+    assert config.signature_version == "s3v4"
+
+
+# pylint: disable=unused-argument
+def test_app_creates_one_s3_client_from_settings(mocked_aws: None):
+    settings = Settings(s3_bucket_name=TEST_BUCKET_NAME, s3_max_pool_connections=7)
+    app = create_app(settings=settings)
+    assert app.state.s3_client.meta.config.max_pool_connections == 7
@@ -0,0 +1,81 @@
+"""Test cases for `s3.content_cache`."""
+
+from datetime import (
+    datetime,
+    timezone,
+)
+
+from files_api.s3.content_cache import (
+    CachedObject,
+    ContentCacheStats,
+    InMemoryContentCache,
+)
+from tests.consts import TEST_BUCKET_NAME
+
+
+def make_cached_object(content: bytes, etag: str = '"etag"') -> CachedObject:
+    return CachedObject(
+        content=content,
+        etag=etag,
+        content_type="text/plain",
+        last_modified=datetime(2024, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+def test_cache_hits_misses_and_invalidation():
+    content_cache = InMemoryContentCache(max_object_bytes=10, max_total_bytes=100)
+    cached_object = make_cached_object(b"hello")
+
+    assert content_cache.get(TEST_BUCKET_NAME, "a.txt") is None
+    content_cache.put(TEST_BUCKET_NAME, "a.txt", cached_object)
+    assert content_cache.get(TEST_BUCKET_NAME, "a.txt") == cached_object
+    # entries are per bucket
+    assert content_cache.get("other-bucket", "a.txt") is None
+
+    # a new version replaces the old one without counting it twice against the budget
+    new_version = make_cached_object(b"hi", etag='"new-etag"')
+    content_cache.put(TEST_BUCKET_NAME, "a.txt", new_version)
+    assert content_cache.get(TEST_BUCKET_NAME, "a.txt") == new_version
+    assert content_cache.stats() == ContentCacheStats(hits=2, misses=2, evictions=0, size=1, size_bytes=2)
+
+    content_cache.invalidate(TEST_BUCKET_NAME, "a.txt")
+    assert content_cache.get(TEST_BUCKET_NAME, "a.txt") is None
+    assert content_cache.stats().size_bytes == 0
+
+
+def test_cache_skips_copy_fetched_before_invalidation():
+    content_cache = InMemoryContentCache(max_object_bytes=10, max_total_bytes=100)
+    generation = content_cache.generation()
+
+    # a write invalidates `a.txt` while its content is being fetched
+    content_cache.invalidate(TEST_BUCKET_NAME, "a.txt")
+    content_cache.put(TEST_BUCKET_NAME, "a.txt", make_cached_object(b"old"), generation=generation)
+    content_cache.put(TEST_BUCKET_NAME, "b.txt", make_cached_object(b"b"), generation=generation)
+    assert content_cache.get(TEST_BUCKET_NAME, "a.txt") is None
+    assert content_cache.get(TEST_BUCKET_NAME, "b.txt") is not None
+
+    new_version = make_cached_object(b"new", etag='"new-etag"')
+    content_cache.put(TEST_BUCKET_NAME, "a.txt", new_version, generation=content_cache.generation())
+    assert content_cache.get(TEST_BUCKET_NAME, "a.txt") == new_version
+
+
+def test_cache_skips_large_objects():
+    content_cache = InMemoryContentCache(max_object_bytes=4, max_total_bytes=100)
+    content_cache.put(TEST_BUCKET_NAME, "large.txt", make_cached_object(b"too large"))
+    assert content_cache.get(TEST_BUCKET_NAME, "large.txt") is None
+    assert content_cache.stats().size == 0
+
+
+def test_cache_evicts_least_recently_used_to_stay_within_budget():
+    content_cache = InMemoryContentCache(max_object_bytes=10, max_total_bytes=10)
+    content_cache.put(TEST_BUCKET_NAME, "a.txt", make_cached_object(b"aaaa"))
+    content_cache.put(TEST_BUCKET_NAME, "b.txt", make_cached_object(b"bbbb"))
+    # reading `a.txt` makes `b.txt` the least recently used entry
+    content_cache.get(TEST_BUCKET_NAME, "a.txt")
+
+    content_cache.put(TEST_BUCKET_NAME, "c.txt", make_cached_object(b"cccc"))
+    assert content_cache.get(TEST_BUCKET_NAME, "b.txt") is None
+    assert content_cache.get(TEST_BUCKET_NAME, "a.txt") is not None
+    assert content_cache.get(TEST_BUCKET_NAME, "c.txt") is not None
+    assert content_cache.stats().evictions == 1
+    assert content_cache.stats().size_bytes == 8
@@ -0,0 +1,37 @@
+"""Test cases for `s3.copy_objects`."""
+
+import boto3
+
+from files_api.s3.copy_objects import (
+    MAX_MULTIPART_PARTS,
+    copy_part_ranges,
+    copy_s3_object,
+)
+from tests.consts import TEST_BUCKET_NAME
+
+
+# pylint: disable=unused-argument
+def test_copy_s3_object(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    s3_client.put_object(
+        Bucket=TEST_BUCKET_NAME, Key="source.txt", Body=b"content", ContentType="text/plain", Metadata={"a": "b"}
+    )
+
+    copy_s3_object(TEST_BUCKET_NAME, source_key="source.txt", destination_key="dir/copy.txt")
+
+    response = s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key="dir/copy.txt")
+    assert response["Body"].read() == b"content"
+    assert response["ContentType"] == "text/plain"
+    assert response["Metadata"] == {"a": "b"}
+    assert s3_client.head_object(Bucket=TEST_BUCKET_NAME, Key="source.txt")
+
+
+def test_copy_part_ranges():
+    assert copy_part_ranges(size_bytes=10, part_size_bytes=4) == [(0, 3), (4, 7), (8, 9)]
+    assert copy_part_ranges(size_bytes=8, part_size_bytes=4) == [(0, 3), (4, 7)]
+
+    # parts grow beyond the requested size rather than exceeding the max number of parts
+    ranges = copy_part_ranges(size_bytes=MAX_MULTIPART_PARTS * 10 + 1, part_size_bytes=1)
+    assert len(ranges) <= MAX_MULTIPART_PARTS
+    assert ranges[0] == (0, 10)
+    assert ranges[-1][1] == MAX_MULTIPART_PARTS * 10
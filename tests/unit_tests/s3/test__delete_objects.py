@@ -1,9 +1,15 @@
 """Test cases for `s3.delete_objects`"""
 
 import boto3
+import pytest
 from moto import mock_aws
 
-from files_api.s3.delete_objects import delete_s3_object
+from files_api.s3.delete_objects import (
+    MAX_KEYS_PER_DELETE_REQUEST,
+    DeleteResult,
+    delete_s3_object,
+    delete_s3_objects,
+)
 from files_api.s3.read_objects import object_exists_in_s3
 from files_api.s3.write_objects import upload_s3_object
 from tests.consts import TEST_BUCKET_NAME
@@ -29,3 +35,26 @@ def test_delete_nonexistent_s3_object(mocked_aws: None):
     delete_s3_object(bucket_name=TEST_BUCKET_NAME, object_key="testfile.txt")
     # test whether the file is found
     assert object_exists_in_s3(TEST_BUCKET_NAME, "testfile.txt") is False
+
+
+# pylint: disable=unused-argument
+def test_delete_s3_objects_in_one_call(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    for object_num in range(3):
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=f"file_{object_num}.txt", Body="test content")
+
+    results = delete_s3_objects(TEST_BUCKET_NAME, ["file_0.txt", "file_1.txt", "missing.txt"])
+
+    # deleting an object that does not exist is not an error in S3
+    assert results == [
+        DeleteResult("file_0.txt"),
+        DeleteResult("file_1.txt"),
+        DeleteResult("missing.txt"),
+    ]
+    assert all(result.deleted for result in results)
+    assert [item["Key"] for item in s3_client.list_objects_v2(Bucket=TEST_BUCKET_NAME)["Contents"]] == ["file_2.txt"]
+
+
+def test_delete_s3_objects_rejects_oversized_batch():
+    with pytest.raises(ValueError):
+        delete_s3_objects(TEST_BUCKET_NAME, [f"file_{num}.txt" for num in range(MAX_KEYS_PER_DELETE_REQUEST + 1)])
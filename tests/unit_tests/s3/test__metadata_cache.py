@@ -0,0 +1,124 @@
+"""Test cases for `s3.metadata_cache`."""
+
+from datetime import (
+    datetime,
+    timezone,
+)
+
+from files_api.s3.metadata_cache import (
+    CachedMetadata,
+    CacheStats,
+    InMemoryMetadataCache,
+    InvalidationLog,
+)
+from files_api.s3.read_objects import S3ObjectMetadata
+from tests.consts import TEST_BUCKET_NAME
+
+
+class FakeClock:
+    """Clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Return the current fake time in seconds."""
+        return self.now
+
+
+def make_metadata(object_key: str) -> S3ObjectMetadata:
+    return S3ObjectMetadata(
+        object_key=object_key,
+        content_type="text/plain",
+        content_length=12,
+        last_modified=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        etag='"etag"',
+    )
+
+
+def test_cache_hits_misses_and_invalidation():
+    metadata_cache = InMemoryMetadataCache()
+    metadata = make_metadata("a.txt")
+
+    assert metadata_cache.get(TEST_BUCKET_NAME, "a.txt") is None
+    metadata_cache.put(TEST_BUCKET_NAME, "a.txt", metadata)
+    metadata_cache.put(TEST_BUCKET_NAME, "missing.txt", None)
+    assert metadata_cache.get(TEST_BUCKET_NAME, "a.txt") == CachedMetadata(metadata)
+    assert metadata_cache.get(TEST_BUCKET_NAME, "missing.txt") == CachedMetadata(None)
+    # entries are per bucket
+    assert metadata_cache.get("other-bucket", "a.txt") is None
+
+    metadata_cache.invalidate(TEST_BUCKET_NAME, "a.txt")
+    assert metadata_cache.get(TEST_BUCKET_NAME, "a.txt") is None
+    assert metadata_cache.stats() == CacheStats(hits=2, misses=3, evictions=0, size=1)
+
+
+def test_cache_skips_answer_fetched_before_invalidation():
+    metadata_cache = InMemoryMetadataCache()
+    generation = metadata_cache.generation()
+
+    # a write invalidates "a.txt" while its metadata is being fetched
+    metadata_cache.invalidate(TEST_BUCKET_NAME, "a.txt")
+    metadata_cache.put(TEST_BUCKET_NAME, "a.txt", make_metadata("a.txt"), generation=generation)
+    metadata_cache.put(TEST_BUCKET_NAME, "b.txt", make_metadata("b.txt"), generation=generation)
+
+    assert metadata_cache.get(TEST_BUCKET_NAME, "a.txt") is None
+    assert metadata_cache.get(TEST_BUCKET_NAME, "b.txt") is not None
+
+    # an answer fetched after the invalidation is cached
+    metadata_cache.put(TEST_BUCKET_NAME, "a.txt", None, generation=metadata_cache.generation())
+    assert metadata_cache.get(TEST_BUCKET_NAME, "a.txt") == CachedMetadata(None)
+
+
+def test_invalidation_log_treats_forgotten_invalidations_as_recent():
+    invalidation_log = InvalidationLog(max_keys=2)
+    generation = invalidation_log.generation
+    invalidation_log.record((TEST_BUCKET_NAME, "a.txt"))
+    assert not invalidation_log.invalidated_since((TEST_BUCKET_NAME, "b.txt"), generation)
+
+    # "a.txt" is forgotten, so every key may have been invalidated since `generation`
+    invalidation_log.record((TEST_BUCKET_NAME, "c.txt"))
+    invalidation_log.record((TEST_BUCKET_NAME, "d.txt"))
+    assert invalidation_log.invalidated_since((TEST_BUCKET_NAME, "b.txt"), generation)
+    assert not invalidation_log.invalidated_since((TEST_BUCKET_NAME, "b.txt"), invalidation_log.generation)
+
+
+def test_cache_entries_expire():
+    clock = FakeClock()
+    metadata_cache = InMemoryMetadataCache(ttl_seconds=10, negative_ttl_seconds=2, clock=clock)
+    metadata_cache.put(TEST_BUCKET_NAME, "a.txt", make_metadata("a.txt"))
+    metadata_cache.put(TEST_BUCKET_NAME, "missing.txt", None)
+
+    clock.now = 1
+    assert metadata_cache.get(TEST_BUCKET_NAME, "a.txt") is not None
+    assert metadata_cache.get(TEST_BUCKET_NAME, "missing.txt") is not None
+
+    # negative entries have their own, shorter TTL
+    clock.now = 2
+    assert metadata_cache.get(TEST_BUCKET_NAME, "a.txt") is not None
+    assert metadata_cache.get(TEST_BUCKET_NAME, "missing.txt") is None
+
+    clock.now = 10
+    assert metadata_cache.get(TEST_BUCKET_NAME, "a.txt") is None
+    assert metadata_cache.stats().size == 0
+
+
+def test_cache_evicts_least_recently_used_entry():
+    metadata_cache = InMemoryMetadataCache(max_entries=2)
+    metadata_cache.put(TEST_BUCKET_NAME, "a.txt", make_metadata("a.txt"))
+    metadata_cache.put(TEST_BUCKET_NAME, "b.txt", make_metadata("b.txt"))
+
+    # reading "a.txt" makes "b.txt" the least recently used entry
+    metadata_cache.get(TEST_BUCKET_NAME, "a.txt")
+    metadata_cache.put(TEST_BUCKET_NAME, "c.txt", make_metadata("c.txt"))
+
+    assert metadata_cache.get(TEST_BUCKET_NAME, "b.txt") is None
+    assert metadata_cache.get(TEST_BUCKET_NAME, "a.txt") is not None
+    assert metadata_cache.get(TEST_BUCKET_NAME, "c.txt") is not None
+    assert metadata_cache.stats().evictions == 1
+
+
+def test_disabled_cache_stores_nothing():
+    metadata_cache = InMemoryMetadataCache(max_entries=0)
+    metadata_cache.put(TEST_BUCKET_NAME, "a.txt", make_metadata("a.txt"))
+    assert metadata_cache.get(TEST_BUCKET_NAME, "a.txt") is None
@@ -0,0 +1,177 @@
+"""Test cases for `s3.metadata_index`."""
+
+import asyncio
+import threading
+from datetime import (
+    datetime,
+    timezone,
+)
+from pathlib import Path
+from typing import Iterator
+
+import boto3
+import pytest
+
+from files_api.s3.metadata_index import (
+    IndexedFile,
+    IndexSortKey,
+    MetadataIndex,
+    ReconcileReport,
+    reconcile_metadata_index,
+    refresh_stale_files_async,
+)
+from files_api.s3.summaries import summarize_objects
+from tests.consts import TEST_BUCKET_NAME
+
+
+@pytest.fixture
+def metadata_index(tmp_path: Path) -> Iterator[MetadataIndex]:
+    metadata_index = MetadataIndex(path=str(tmp_path / "index.sqlite3"))
+    yield metadata_index
+    metadata_index.close()
+
+
+def indexed_keys(metadata_index: MetadataIndex, prefix: str = "") -> list[str]:
+    return [indexed_file.object_key for indexed_file in metadata_index.get_files(TEST_BUCKET_NAME, prefix, None, None)]
+
+
+# pylint: disable=unused-argument
+def test_reconcile_scans_bucket_into_empty_index(mocked_aws: None, metadata_index: MetadataIndex):
+    s3_client = boto3.client("s3")
+    object_keys = sorted([f"dir/file_{file_num}.txt" for file_num in range(1001)] + ["other.txt"])
+    for object_key in object_keys:
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=object_key, Body=b"abc")
+
+    assert not metadata_index.is_scanned(TEST_BUCKET_NAME)
+    report = reconcile_metadata_index(metadata_index, TEST_BUCKET_NAME, s3_client=s3_client)
+
+    assert report == ReconcileReport(files_added=1002, files_updated=0, files_removed=0)
+    assert metadata_index.is_scanned(TEST_BUCKET_NAME)
+    assert indexed_keys(metadata_index) == object_keys
+    (summary,) = metadata_index.summarize(TEST_BUCKET_NAME, "dir/").values()
+    assert (summary.file_count, summary.total_bytes) == (1001, 3003)
+    assert metadata_index.summarize(TEST_BUCKET_NAME, "missing/") == {}
+
+
+# pylint: disable=unused-argument
+def test_reconcile_repairs_drift(mocked_aws: None, metadata_index: MetadataIndex):
+    s3_client = boto3.client("s3")
+    for object_key in ["a.txt", "b.txt", "c.txt", "dir/d.txt"]:
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=object_key, Body=b"abc")
+    reconcile_metadata_index(metadata_index, TEST_BUCKET_NAME, s3_client=s3_client)
+    # the content type of files written through the API is kept while their content is unchanged
+    (indexed_a,) = metadata_index.get_files(TEST_BUCKET_NAME, "a.txt", None, None)
+    metadata_index.upsert(TEST_BUCKET_NAME, [indexed_a._replace(content_type="text/plain")])
+
+    # changes made behind the index's back
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="b.txt", Body=b"changed")
+    s3_client.delete_object(Bucket=TEST_BUCKET_NAME, Key="c.txt")
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="e.txt", Body=b"new")
+    s3_client.delete_object(Bucket=TEST_BUCKET_NAME, Key="dir/d.txt")
+
+    # only the keys under the prefix are reconciled
+    report = reconcile_metadata_index(metadata_index, TEST_BUCKET_NAME, prefix="dir/", s3_client=s3_client)
+    assert report == ReconcileReport(files_added=0, files_updated=0, files_removed=1)
+    assert indexed_keys(metadata_index) == ["a.txt", "b.txt", "c.txt"]
+
+    report = reconcile_metadata_index(metadata_index, TEST_BUCKET_NAME, s3_client=s3_client)
+    assert report == ReconcileReport(files_added=1, files_updated=1, files_removed=1)
+    assert metadata_index.get_files(TEST_BUCKET_NAME, "", None, None) == [
+        indexed_a._replace(content_type="text/plain"),
+        IndexedFile.from_listed_object(
+            s3_client.list_objects_v2(Bucket=TEST_BUCKET_NAME, Prefix="b.txt")["Contents"][0]
+        ),
+        IndexedFile.from_listed_object(
+            s3_client.list_objects_v2(Bucket=TEST_BUCKET_NAME, Prefix="e.txt")["Contents"][0]
+        ),
+    ]
+
+    report = reconcile_metadata_index(metadata_index, TEST_BUCKET_NAME, s3_client=s3_client)
+    assert report == ReconcileReport(files_added=0, files_updated=0, files_removed=0)
+
+
+# pylint: disable=unused-argument
+def test_reconcile_stops_when_asked(mocked_aws: None, metadata_index: MetadataIndex):
+    s3_client = boto3.client("s3")
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="a.txt", Body=b"abc")
+    stop_event = threading.Event()
+    stop_event.set()
+
+    report = reconcile_metadata_index(metadata_index, TEST_BUCKET_NAME, s3_client=s3_client, stop_event=stop_event)
+
+    assert report == ReconcileReport(files_added=0, files_updated=0, files_removed=0)
+    assert not metadata_index.is_scanned(TEST_BUCKET_NAME)
+    assert indexed_keys(metadata_index) == []
+
+
+def test_list_files_sorted(metadata_index: MetadataIndex):
+    metadata_index.upsert(
+        TEST_BUCKET_NAME,
+        [
+            IndexedFile(
+                object_key=f"dir/file_{file_num}.txt",
+                # sizes repeat, so that ties are broken by key
+                size_bytes=file_num % 4,
+                last_modified=datetime.fromtimestamp(1_700_000_000 - file_num, tz=timezone.utc),
+                etag=f'"{file_num}"',
+            )
+            for file_num in range(10)
+        ]
+        + [IndexedFile("other.txt", 100, datetime.now(timezone.utc), '"other"')],
+    )
+
+    def list_all(sort_key: IndexSortKey, descending: bool) -> list[str]:
+        object_keys, start_after = [], None
+        while page := metadata_index.list_files(
+            TEST_BUCKET_NAME, "dir/", limit=3, sort_key=sort_key, descending=descending, start_after=start_after
+        ):
+            object_keys += [indexed_file.object_key for indexed_file in page]
+            start_after = (page[-1].sort_value(sort_key), page[-1].object_key)
+        return object_keys
+
+    object_keys = sorted(f"dir/file_{file_num}.txt" for file_num in range(10))
+    assert list_all(IndexSortKey.PATH, descending=False) == object_keys
+    assert list_all(IndexSortKey.PATH, descending=True) == object_keys[::-1]
+    assert list_all(IndexSortKey.LAST_MODIFIED, descending=False) == object_keys[::-1]
+    assert list_all(IndexSortKey.SIZE, descending=True) == [
+        f"dir/file_{file_num}.txt" for file_num in [7, 3, 6, 2, 9, 5, 1, 8, 4, 0]
+    ]
+
+
+# pylint: disable=unused-argument
+def test_summarize_like_listing(mocked_aws: None, metadata_index: MetadataIndex):
+    s3_client = boto3.client("s3")
+    for object_key, size in [("dir/a.txt", 10), ("dir/b/c.txt", 2000), ("dir/b/d/e.txt", 30), ("other.txt", 40)]:
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=object_key, Body=b"x" * size)
+    reconcile_metadata_index(metadata_index, TEST_BUCKET_NAME, s3_client=s3_client)
+
+    objects = s3_client.list_objects_v2(Bucket=TEST_BUCKET_NAME, Prefix="dir/")["Contents"]
+    for depth in [0, 1, 2]:
+        assert metadata_index.summarize(TEST_BUCKET_NAME, "dir/", depth) == summarize_objects(objects, "dir/", depth)
+
+
+# pylint: disable=unused-argument
+def test_refresh_stale_files(mocked_aws: None, metadata_index: MetadataIndex):
+    s3_client = boto3.client("s3")
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="deleted.txt", Body=b"abc")
+    reconcile_metadata_index(metadata_index, TEST_BUCKET_NAME, s3_client=s3_client)
+
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="written.txt", Body=b"abcd", ContentType="text/plain")
+    s3_client.delete_object(Bucket=TEST_BUCKET_NAME, Key="deleted.txt")
+    metadata_index.mark_stale(TEST_BUCKET_NAME, ["written.txt", "deleted.txt", "never_written.txt"])
+
+    asyncio.run(refresh_stale_files_async(metadata_index, TEST_BUCKET_NAME, s3_client=s3_client))
+
+    assert metadata_index.stale_keys(TEST_BUCKET_NAME) == []
+    (written,) = metadata_index.get_files(TEST_BUCKET_NAME, "", None, None)
+    assert (written.object_key, written.size_bytes, written.content_type) == ("written.txt", 4, "text/plain")
+
+
+def test_key_marked_stale_during_refresh_stays_stale(metadata_index: MetadataIndex):
+    metadata_index.mark_stale(TEST_BUCKET_NAME, ["file.txt"])
+    ((object_key, version),) = metadata_index.stale_keys(TEST_BUCKET_NAME)
+    # written again while its previous version was being fetched
+    metadata_index.mark_stale(TEST_BUCKET_NAME, ["file.txt"])
+
+    metadata_index.apply_refresh(TEST_BUCKET_NAME, {(object_key, version): None})
+    assert [object_key for object_key, _ in metadata_index.stale_keys(TEST_BUCKET_NAME)] == ["file.txt"]
@@ -0,0 +1,64 @@
+"""Test cases for `s3.multipart_uploads`."""
+
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
+
+import boto3
+
+from files_api.s3.multipart_uploads import (
+    abort_stale_multipart_uploads,
+    list_multipart_uploads,
+    list_uploaded_parts,
+)
+from files_api.s3.write_objects import (
+    create_multipart_upload,
+    upload_part,
+)
+from tests.consts import TEST_BUCKET_NAME
+
+
+# pylint: disable=unused-argument
+def test_list_uploaded_parts(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    upload_id = create_multipart_upload(TEST_BUCKET_NAME, "file.bin", s3_client=s3_client)
+    for part_number, part_content in [(3, b"c"), (1, b"a"), (1, b"aa")]:
+        upload_part(TEST_BUCKET_NAME, "file.bin", upload_id, part_number, part_content, s3_client=s3_client)
+
+    parts = list_uploaded_parts(TEST_BUCKET_NAME, "file.bin", upload_id, s3_client=s3_client)
+    # a part uploaded again replaces the previous upload
+    assert [(part.part_number, part.size_bytes) for part in parts] == [(1, 2), (3, 1)]
+    assert [(upload.object_key, upload.upload_id) for upload in list_multipart_uploads(TEST_BUCKET_NAME)] == [
+        ("file.bin", upload_id)
+    ]
+
+
+# pylint: disable=unused-argument
+def test_abort_stale_multipart_uploads(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    idle_upload_id = create_multipart_upload(TEST_BUCKET_NAME, "idle.bin", s3_client=s3_client)
+    active_upload_id = create_multipart_upload(TEST_BUCKET_NAME, "active.bin", s3_client=s3_client)
+    upload_part(TEST_BUCKET_NAME, "active.bin", active_upload_id, 1, b"a", s3_client=s3_client)
+    kept_upload_id = create_multipart_upload(TEST_BUCKET_NAME, "kept.bin", s3_client=s3_client)
+    # moto reports every upload as initiated years ago, so only their parts and `keep_upload_ids` keep them
+
+    aborted_uploads = abort_stale_multipart_uploads(
+        TEST_BUCKET_NAME, max_idle_seconds=3600, keep_upload_ids={kept_upload_id}, s3_client=s3_client
+    )
+
+    # the upload with a part uploaded within the hour is kept
+    assert [upload.upload_id for upload in aborted_uploads] == [idle_upload_id]
+    remaining_upload_ids = {upload.upload_id for upload in list_multipart_uploads(TEST_BUCKET_NAME)}
+    assert remaining_upload_ids == {active_upload_id, kept_upload_id}
+
+    # an hour later, it is idle too
+    aborted_uploads = abort_stale_multipart_uploads(
+        TEST_BUCKET_NAME,
+        max_idle_seconds=3600,
+        keep_upload_ids={kept_upload_id},
+        now=datetime.now(timezone.utc) + timedelta(hours=2),
+        s3_client=s3_client,
+    )
+    assert [upload.upload_id for upload in aborted_uploads] == [active_upload_id]
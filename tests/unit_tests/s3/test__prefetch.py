@@ -0,0 +1,128 @@
+"""Test cases for `s3.prefetch`."""
+
+import asyncio
+from typing import (
+    AsyncIterator,
+    List,
+    Tuple,
+)
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+
+from files_api.s3.prefetch import (
+    prefetch_s3_object_pages_async,
+    prefetch_s3_objects_async,
+)
+from tests.consts import TEST_BUCKET_NAME
+
+
+async def _aiter(items: List[str]) -> AsyncIterator[str]:
+    for item in items:
+        yield item
+
+
+# pylint: disable=unused-argument
+def test_prefetch_s3_objects_in_order(mocked_aws: None):
+    """Assert that objects come back in order, small ones read ahead and large ones streamed."""
+    s3_client = boto3.client("s3")
+    object_keys = [f"file_{object_num}.txt" for object_num in range(20)]
+    for object_num, object_key in enumerate(object_keys):
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=object_key, Body=b"x" * object_num)
+
+    async def read_all() -> List[Tuple[str, bool, bytes]]:
+        async with prefetch_s3_objects_async(
+            bucket_name=TEST_BUCKET_NAME,
+            object_keys=_aiter(object_keys),
+            max_prefetch=4,
+            max_buffered_object_bytes=10,
+        ) as prefetched_objects:
+            return [
+                (
+                    prefetched_object.object_key,
+                    prefetched_object.content is not None,
+                    b"".join([chunk async for chunk in prefetched_object.iter_chunks(chunk_size_bytes=3)]),
+                )
+                async for prefetched_object in prefetched_objects
+            ]
+
+    assert asyncio.run(read_all()) == [
+        (object_key, object_num <= 10, b"x" * object_num) for object_num, object_key in enumerate(object_keys)
+    ]
+
+
+# pylint: disable=unused-argument
+def test_prefetch_s3_objects_skips_deleted_objects(mocked_aws: None):
+    """Assert that objects listed but deleted before being fetched are skipped."""
+    s3_client = boto3.client("s3")
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="a.txt", Body=b"a")
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="c.txt", Body=b"c")
+
+    async def read_keys() -> List[str]:
+        async with prefetch_s3_objects_async(
+            bucket_name=TEST_BUCKET_NAME, object_keys=_aiter(["a.txt", "b.txt", "c.txt"])
+        ) as prefetched_objects:
+            return [prefetched_object.object_key async for prefetched_object in prefetched_objects]
+
+    assert asyncio.run(read_keys()) == ["a.txt", "c.txt"]
+
+
+# pylint: disable=unused-argument
+def test_prefetch_s3_objects_stops_early(mocked_aws: None):
+    """Assert that leaving the context before the end cancels the fetches still in flight."""
+    s3_client = boto3.client("s3")
+    object_keys = [f"file_{object_num}.txt" for object_num in range(50)]
+    for object_key in object_keys:
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=object_key, Body=b"x" * 100)
+
+    async def read_first() -> str:
+        async with prefetch_s3_objects_async(
+            bucket_name=TEST_BUCKET_NAME, object_keys=_aiter(object_keys), max_prefetch=4, max_buffered_object_bytes=10
+        ) as prefetched_objects:
+            async for prefetched_object in prefetched_objects:
+                return prefetched_object.object_key
+        raise AssertionError("no object was fetched")
+
+    assert asyncio.run(read_first()) == "file_0.txt"
+
+
+# pylint: disable=unused-argument
+def test_prefetch_s3_object_pages(mocked_aws: None):
+    """Assert that every object under the prefix is listed, a page of up to 1000 at a time."""
+    s3_client = boto3.client("s3")
+    object_keys = [f"dir/file_{object_num:04}.txt" for object_num in range(1001)]
+    for object_key in object_keys + ["other.txt"]:
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=object_key, Body=b"")
+
+    async def list_pages() -> List[List[str]]:
+        async with prefetch_s3_object_pages_async(bucket_name=TEST_BUCKET_NAME, prefix="dir/") as pages:
+            return [[item["Key"] for item in objects] async for objects in pages]
+
+    assert asyncio.run(list_pages()) == [object_keys[:1000], object_keys[1000:]]
+
+
+# pylint: disable=unused-argument
+def test_prefetch_s3_object_pages_raises_listing_errors(mocked_aws: None):
+    """Assert that an error listing the objects is raised to the consumer, not wrapped in an exception group."""
+
+    async def list_pages() -> None:
+        async with prefetch_s3_object_pages_async(bucket_name="missing-bucket", prefix="") as pages:
+            async for _ in pages:
+                pass
+
+    with pytest.raises(ClientError):
+        asyncio.run(list_pages())
+
+
+# pylint: disable=unused-argument
+def test_prefetch_s3_objects_raises_fetch_errors(mocked_aws: None):
+    """Assert that an error fetching an object is raised to the consumer, not wrapped in an exception group."""
+
+    async def read_keys() -> None:
+        async with prefetch_s3_objects_async(bucket_name="missing-bucket", object_keys=_aiter(["a.txt"])) as objects:
+            async for _ in objects:
+                pass
+
+    with pytest.raises(ClientError):
+        asyncio.run(read_keys())
@@ -0,0 +1,54 @@
+"""Test cases for `s3.presigned_urls`."""
+
+import boto3
+import requests
+
+from files_api.s3.client import create_s3_client
+from files_api.s3.presigned_urls import (
+    presign_get_object,
+    presign_put_object,
+    presign_upload_parts,
+)
+from files_api.s3.write_objects import (
+    MIN_MULTIPART_PART_SIZE_BYTES,
+    complete_multipart_upload,
+    create_multipart_upload,
+)
+from tests.consts import TEST_BUCKET_NAME
+
+
+# pylint: disable=unused-argument
+def test_presigned_put_and_get(mocked_aws: None):
+    s3_client = create_s3_client()
+    put_url = presign_put_object(TEST_BUCKET_NAME, "dir/a file.txt", content_type="text/plain", s3_client=s3_client)
+    assert "X-Amz-Signature=" in put_url
+
+    response = requests.put(put_url, data=b"Hello, world!", headers={"Content-Type": "text/plain"}, timeout=5)
+    assert response.status_code == 200
+
+    get_url = presign_get_object(TEST_BUCKET_NAME, "dir/a file.txt", expires_in_seconds=60, s3_client=s3_client)
+    response = requests.get(get_url, timeout=5)
+    assert (response.content, response.headers["Content-Type"]) == (b"Hello, world!", "text/plain")
+    assert "X-Amz-Expires=60" in get_url
+
+
+# pylint: disable=unused-argument
+def test_presigned_upload_parts(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    upload_id = create_multipart_upload(TEST_BUCKET_NAME, "large.bin", s3_client=s3_client)
+    part_urls = presign_upload_parts(TEST_BUCKET_NAME, "large.bin", upload_id, [1, 2], s3_client=s3_client)
+    assert list(part_urls) == [1, 2]
+
+    part_contents = {1: b"a" * MIN_MULTIPART_PART_SIZE_BYTES, 2: b"b"}
+    # parts can be uploaded in any order
+    parts = [
+        {
+            "PartNumber": part_number,
+            "ETag": requests.put(part_urls[part_number], data=part_contents[part_number], timeout=5).headers["ETag"],
+        }
+        for part_number in [2, 1]
+    ]
+    complete_multipart_upload(TEST_BUCKET_NAME, "large.bin", upload_id, parts, s3_client=s3_client)
+
+    body = s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key="large.bin")["Body"].read()
+    assert body == part_contents[1] + part_contents[2]
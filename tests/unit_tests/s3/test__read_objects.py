@@ -1,11 +1,24 @@
 """Test cases for `s3.read_objects`."""
 
 import boto3
+import pytest
+from botocore.config import Config
+from botocore.exceptions import (
+    ClientError,
+    EndpointConnectionError,
+)
 from moto import mock_aws
 
+from files_api.s3.metadata_cache import InMemoryMetadataCache
 from files_api.s3.read_objects import (
+    S3KeyRange,
+    discover_s3_key_ranges,
+    fetch_s3_object,
+    fetch_s3_object_metadata,
+    fetch_s3_objects_after,
     fetch_s3_objects_metadata,
     fetch_s3_objects_using_page_token,
+    iter_s3_object_pages_parallel,
     object_exists_in_s3,
 )
 from tests.consts import TEST_BUCKET_NAME
@@ -21,6 +34,90 @@ def test_object_exists_in_s3(mocked_aws):
     assert object_exists_in_s3(TEST_BUCKET_NAME, "nonexistent.txt") is False
 
 
+@mock_aws
+# pylint: disable=unused-argument
+def test_fetch_s3_object_metadata(mocked_aws):
+    """Assert that `fetch_s3_object_metadata` returns the metadata of an object, and raises if it is missing."""
+    s3_client = boto3.client("s3")
+    s3_client.put_object(
+        Bucket=TEST_BUCKET_NAME,
+        Key="testfile.txt",
+        Body="test content",
+        ContentType="text/plain",
+        Metadata={"owner": "tests"},
+    )
+    object_metadata = fetch_s3_object_metadata(TEST_BUCKET_NAME, "testfile.txt")
+    assert object_metadata.object_key == "testfile.txt"
+    assert object_metadata.content_type == "text/plain"
+    assert object_metadata.content_length == len("test content")
+    assert object_metadata.etag == s3_client.head_object(Bucket=TEST_BUCKET_NAME, Key="testfile.txt")["ETag"]
+    assert object_metadata.storage_class == "STANDARD"
+    assert object_metadata.user_metadata == {"owner": "tests"}
+
+    with pytest.raises(ClientError):
+        fetch_s3_object_metadata(TEST_BUCKET_NAME, "nonexistent.txt")
+
+
+# pylint: disable=unused-argument
+def test_fetch_s3_object_if_match(mocked_aws: None):
+    """Assert that a read pinned to an ETag fails with `PreconditionFailed` once the object has another one."""
+    s3_client = boto3.client("s3")
+    etag = s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="testfile.txt", Body="test content")["ETag"]
+
+    response = fetch_s3_object(TEST_BUCKET_NAME, "testfile.txt", byte_range="bytes=0-3", if_match=etag)
+    assert response["Body"].read() == b"test"
+
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="testfile.txt", Body="new content")
+    with pytest.raises(ClientError) as exc_info:
+        fetch_s3_object(TEST_BUCKET_NAME, "testfile.txt", byte_range="bytes=0-3", if_match=etag)
+    assert exc_info.value.response["Error"]["Code"] == "PreconditionFailed"
+
+
+# pylint: disable=unused-argument
+def test_fetch_s3_object_metadata_with_cache(mocked_aws: None):
+    """Assert that cached metadata, and cached absence of an object, are used instead of calling S3."""
+    s3_client = boto3.client("s3")
+    metadata_cache = InMemoryMetadataCache()
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="testfile.txt", Body="test content")
+
+    object_metadata = fetch_s3_object_metadata(TEST_BUCKET_NAME, "testfile.txt", metadata_cache=metadata_cache)
+    assert object_exists_in_s3(TEST_BUCKET_NAME, "nonexistent.txt", metadata_cache=metadata_cache) is False
+
+    # changes made behind the cache's back are not seen until the entries are invalidated or expire
+    s3_client.delete_object(Bucket=TEST_BUCKET_NAME, Key="testfile.txt")
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="nonexistent.txt", Body="test content")
+    assert fetch_s3_object_metadata(TEST_BUCKET_NAME, "testfile.txt", metadata_cache=metadata_cache) == object_metadata
+    assert object_exists_in_s3(TEST_BUCKET_NAME, "nonexistent.txt", metadata_cache=metadata_cache) is False
+    assert metadata_cache.stats().hits == 2
+
+    metadata_cache.invalidate(TEST_BUCKET_NAME, "testfile.txt")
+    metadata_cache.invalidate(TEST_BUCKET_NAME, "nonexistent.txt")
+    assert object_exists_in_s3(TEST_BUCKET_NAME, "testfile.txt", metadata_cache=metadata_cache) is False
+    assert object_exists_in_s3(TEST_BUCKET_NAME, "nonexistent.txt", metadata_cache=metadata_cache) is True
+
+
+# pylint: disable=unused-argument
+def test_fetch_s3_object_metadata_overtaken_by_write(mocked_aws: None):
+    """Assert that metadata fetched while a write invalidates the object is not cached."""
+    s3_client = boto3.client("s3")
+    metadata_cache = InMemoryMetadataCache()
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="testfile.txt", Body="test content")
+
+    # the write completes, and invalidates the cache, while the `head_object` response is on its way
+    def write_during_head_object(**kwargs) -> None:
+        boto3.client("s3").put_object(Bucket=TEST_BUCKET_NAME, Key="testfile.txt", Body="new content")
+        metadata_cache.invalidate(TEST_BUCKET_NAME, "testfile.txt")
+
+    s3_client.meta.events.register("after-call.s3.HeadObject", write_during_head_object)
+    stale_metadata = fetch_s3_object_metadata(
+        TEST_BUCKET_NAME, "testfile.txt", metadata_cache=metadata_cache, s3_client=s3_client
+    )
+    s3_client.meta.events.unregister("after-call.s3.HeadObject", write_during_head_object)
+
+    object_metadata = fetch_s3_object_metadata(TEST_BUCKET_NAME, "testfile.txt", metadata_cache=metadata_cache)
+    assert object_metadata.content_length == len("new content") != stale_metadata.content_length
+
+
 @mock_aws
 # pylint: disable=unused-argument
 def test_pagination(mocked_aws):  # noqa: R701
@@ -115,3 +212,111 @@ def test_directory_queries(mocked_aws: None):  # noqa: R701 - too complex
     assert files[3]["Key"] == "dir2/subdir1/file4.txt"
     assert files[4]["Key"] == "file5.txt"
     assert next_page_token is None
+
+
+# pylint: disable=unused-argument
+def test_fetch_s3_objects_after(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    for object_key in ["dir/a/1.txt", "dir/a/2.txt", "dir/b.txt", "dir/c/1.txt", "dir/d.txt", "other.txt"]:
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=object_key, Body=b"content")
+
+    page = fetch_s3_objects_after(TEST_BUCKET_NAME, prefix="dir/", max_keys=3, start_after="dir/a/1.txt")
+    assert [item["Key"] for item in page.objects] == ["dir/a/2.txt", "dir/b.txt", "dir/c/1.txt"]
+    assert page.common_prefixes == []
+    assert page.is_truncated
+    assert page.last_key == "dir/c/1.txt"
+
+    # subdirectories are listed once, in key order with the files
+    page = fetch_s3_objects_after(TEST_BUCKET_NAME, prefix="dir/", delimiter="/")
+    assert [item["Key"] for item in page.objects] == ["dir/b.txt", "dir/d.txt"]
+    assert page.common_prefixes == ["dir/a/", "dir/c/"]
+    assert not page.is_truncated
+    assert page.last_key == "dir/d.txt"
+
+
+TREE_OBJECT_KEYS = sorted(
+    ["root/a.txt", "root/m.txt", "root/z.txt", "other/x.txt"]
+    + [f"root/{top}/{sub}/file_{file_num}.txt" for top in "bcd" for sub in "xy" for file_num in range(3)]
+    + [f"root/{top}/direct.txt" for top in "bcd"]
+)
+
+
+def put_tree(s3_client) -> None:
+    for object_key in TREE_OBJECT_KEYS:
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=object_key, Body=b"")
+
+
+# pylint: disable=unused-argument
+def test_discover_s3_key_ranges(mocked_aws: None):
+    put_tree(boto3.client("s3"))
+
+    # two levels of subdirectories were probed
+    assert discover_s3_key_ranges(TEST_BUCKET_NAME, prefix="root/") == [
+        S3KeyRange(None, "root/b/"),
+        S3KeyRange("root/b/", "root/b/x/"),
+        S3KeyRange("root/b/x/", "root/b/y/"),
+        S3KeyRange("root/b/y/", "root/c/"),
+        S3KeyRange("root/c/", "root/c/x/"),
+        S3KeyRange("root/c/x/", "root/c/y/"),
+        S3KeyRange("root/c/y/", "root/d/"),
+        S3KeyRange("root/d/", "root/d/x/"),
+        S3KeyRange("root/d/x/", "root/d/y/"),
+        S3KeyRange("root/d/y/", None),
+    ]
+    assert discover_s3_key_ranges(TEST_BUCKET_NAME, prefix="root/", max_ranges=3) == [
+        S3KeyRange(None, "root/c/"),
+        S3KeyRange("root/c/", "root/d/"),
+        S3KeyRange("root/d/", None),
+    ]
+    # a directory without subdirectories cannot be split
+    assert discover_s3_key_ranges(TEST_BUCKET_NAME, prefix="root/b/x/") == [S3KeyRange(None, None)]
+
+
+# pylint: disable=unused-argument
+def test_iter_s3_object_pages_parallel(mocked_aws: None):
+    s3_client = boto3.client("s3")
+    put_tree(s3_client)
+    # enough files in one range to list it in several pages
+    large_range_keys = [f"root/c/x/many_{file_num:04}.txt" for file_num in range(1001)]
+    for object_key in large_range_keys:
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=object_key, Body=b"")
+    expected_keys = sorted(key for key in TREE_OBJECT_KEYS + large_range_keys if key.startswith("root/"))
+
+    pages = iter_s3_object_pages_parallel(TEST_BUCKET_NAME, prefix="root/", max_concurrency=3)
+    assert [item["Key"] for objects in pages for item in objects] == expected_keys
+
+    pages = iter_s3_object_pages_parallel(TEST_BUCKET_NAME, prefix="root/", max_concurrency=3, ordered=False)
+    assert sorted(item["Key"] for objects in pages for item in objects) == expected_keys
+
+
+# pylint: disable=unused-argument
+def test_iter_s3_object_pages_parallel_stops_early(mocked_aws: None):
+    put_tree(boto3.client("s3"))
+
+    pages = iter_s3_object_pages_parallel(TEST_BUCKET_NAME, prefix="root/", max_concurrency=2)
+    assert [item["Key"] for item in next(pages)] == ["root/a.txt"]
+    pages.close()
+
+
+# pylint: disable=unused-argument
+def test_iter_s3_object_pages_parallel_raises_listing_errors(mocked_aws: None):
+    with pytest.raises(ClientError):
+        list(iter_s3_object_pages_parallel("missing-bucket", prefix=""))
+
+
+def test_iter_s3_object_pages_parallel_raises_connection_errors():
+    """Assert that errors other than S3's are raised too, rather than leaving the consumer waiting for the range."""
+    unreachable_s3_client = boto3.client(
+        "s3",
+        endpoint_url="http://127.0.0.1:9",
+        region_name="us-east-1",
+        aws_access_key_id="test",
+        aws_secret_access_key="test",
+        config=Config(connect_timeout=1, retries={"max_attempts": 0}),
+    )
+    key_ranges = [S3KeyRange(None, "b/"), S3KeyRange("b/", None)]
+    pages = iter_s3_object_pages_parallel(
+        TEST_BUCKET_NAME, prefix="", key_ranges=key_ranges, s3_client=unreachable_s3_client
+    )
+    with pytest.raises(EndpointConnectionError):
+        list(pages)
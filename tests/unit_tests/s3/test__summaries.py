@@ -0,0 +1,119 @@
+"""Test cases for `s3.summaries`."""
+
+import time
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
+from typing import (
+    Dict,
+    List,
+)
+
+import pytest
+
+from files_api.s3.summaries import (
+    SIZE_HISTOGRAM_BOUNDS_BYTES,
+    PrefixSummary,
+    SummaryCache,
+    directory_at_depth,
+    group_subdirectories,
+    histogram_bucket_bounds,
+    merge_summaries,
+    roll_up_summaries,
+    summarize_objects,
+)
+
+START_TIME = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def make_objects(sizes_by_key: Dict[str, int]) -> List[dict]:
+    return [
+        {"Key": key, "Size": size, "LastModified": START_TIME + timedelta(seconds=num), "ETag": '""'}
+        for num, (key, size) in enumerate(sorted(sizes_by_key.items()))
+    ]
+
+
+@pytest.mark.parametrize(
+    "object_key, depth, expected_directory",
+    [
+        ("dir/a.txt", 0, "dir/"),
+        ("dir/b/c/d.txt", 0, "dir/"),
+        ("dir/b/c/d.txt", 1, "dir/b/"),
+        ("dir/b/c/d.txt", 2, "dir/b/c/"),
+        ("dir/b/c/d.txt", 5, "dir/b/c/"),
+        ("dir/b/", 1, "dir/b/"),
+        ("dir//a.txt", 1, "dir//"),
+    ],
+)
+def test_directory_at_depth(object_key: str, depth: int, expected_directory: str):
+    assert directory_at_depth(object_key, "dir/", depth) == expected_directory
+
+
+def test_summary_of_files():
+    sizes = [0, 1023, 1024, 5000, 16 * 1024**3]
+    summary = PrefixSummary.of_files(sizes, [START_TIME + timedelta(days=day) for day in [3, 1, 2, 5, 4]])
+
+    assert (summary.file_count, summary.total_bytes) == (5, sum(sizes))
+    assert (summary.oldest_modified, summary.newest_modified) == (
+        START_TIME + timedelta(days=1),
+        START_TIME + timedelta(days=5),
+    )
+    assert summary.histogram_counts == (2, 2, 0, 0, 0, 0, 0, 1)
+    assert summary.histogram_bytes == (1023, 6024, 0, 0, 0, 0, 0, 16 * 1024**3)
+    assert len(histogram_bucket_bounds()) == len(SIZE_HISTOGRAM_BOUNDS_BYTES) + 1
+
+    assert PrefixSummary().merge(summary) == summary
+    assert summary.merge(summary).histogram_counts == (4, 4, 0, 0, 0, 0, 0, 2)
+
+
+def test_summarize_pages_by_directory():
+    sizes_by_key = {
+        "dir/a.txt": 1,
+        "dir/b/1.txt": 2,
+        "dir/b/c/1.txt": 4,
+        "dir/b/c/2.txt": 8,
+        "dir/b0.txt": 16,
+        "dir/d/e/f/1.txt": 32,
+        "dir/z.txt": 64,
+    }
+    objects = make_objects(sizes_by_key)
+
+    # summarizing page by page gives the same summaries as summarizing all the files at once
+    summaries: Dict[str, PrefixSummary] = {}
+    for page in [objects[:3], objects[3:6], objects[6:]]:
+        merge_summaries(summaries, summarize_objects(page, "dir/", depth=2))
+    assert summaries == summarize_objects(objects, "dir/", depth=2)
+
+    rolled_up = roll_up_summaries(summaries, "dir/")
+    expected_total_bytes = {"dir/": 127, "dir/b/": 14, "dir/b/c/": 12, "dir/d/": 32, "dir/d/e/": 32}
+    assert {directory: summary.total_bytes for directory, summary in rolled_up.items()} == expected_total_bytes
+    assert rolled_up["dir/b/"].oldest_modified == objects[1]["LastModified"]
+    assert rolled_up["dir/b/"].newest_modified == objects[3]["LastModified"]
+    assert group_subdirectories(rolled_up, "dir/") == {
+        "dir/": ["dir/b/", "dir/d/"],
+        "dir/b/": ["dir/b/c/"],
+        "dir/d/": ["dir/d/e/"],
+    }
+
+    assert roll_up_summaries(summarize_objects(objects, "dir/", depth=0), "dir/") == {"dir/": rolled_up["dir/"]}
+
+
+def test_summary_cache_expires_and_evicts_entries():
+    summary_cache = SummaryCache(ttl_seconds=0.05, max_entries=2)
+    summaries = {"dir/": PrefixSummary(file_count=1)}
+    for directory in ["a/", "b/", "c/"]:
+        summary_cache.put("bucket", directory, 0, START_TIME, summaries)
+
+    # the least recently used entry was evicted
+    assert summary_cache.get("bucket", "a/", 0) is None
+    assert summary_cache.get("bucket", "b/", 0) == (START_TIME, summaries)
+    assert summary_cache.get("bucket", "b/", 1) is None
+
+    time.sleep(0.05)
+    assert summary_cache.get("bucket", "c/", 0) is None
+
+    disabled_cache = SummaryCache(ttl_seconds=0)
+    disabled_cache.put("bucket", "a/", 0, START_TIME, summaries)
+    assert disabled_cache.get("bucket", "a/", 0) is None
@@ -1,4 +1,6 @@
 import boto3
+import pytest
+from botocore.exceptions import ClientError
 from moto import mock_aws
 
 from files_api.s3.write_objects import upload_s3_object
@@ -24,3 +26,16 @@ def test__upload_s3_object(mocked_aws):
     response = s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key=object_key)
     assert response["ContentType"] == content_type
     assert response["Body"].read() == file_content
+
+
+@mock_aws
+def test__upload_s3_object_only_if_absent(mocked_aws):
+    upload_s3_object(bucket_name=TEST_BUCKET_NAME, object_key="test.txt", file_content=b"v1", only_if_absent=True)
+
+    # the existing object must not be replaced
+    with pytest.raises(ClientError) as exc_info:
+        upload_s3_object(bucket_name=TEST_BUCKET_NAME, object_key="test.txt", file_content=b"v2", only_if_absent=True)
+    assert exc_info.value.response["Error"]["Code"] == "PreconditionFailed"
+
+    s3_client = boto3.client("s3")
+    assert s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key="test.txt")["Body"].read() == b"v1"
@@ -0,0 +1,140 @@
+"""Test cases for `delete_jobs`."""
+
+import asyncio
+from datetime import (
+    datetime,
+    timezone,
+)
+from pathlib import Path
+
+import boto3
+
+from files_api.delete_jobs import (
+    DeleteJobRunner,
+    DeletePrefixJob,
+    FileJobStore,
+    JobStatus,
+)
+from files_api.s3.metadata_cache import InMemoryMetadataCache
+from tests.consts import TEST_BUCKET_NAME
+
+
+def make_job(job_id: str = "job1", status: JobStatus = JobStatus.PENDING) -> DeletePrefixJob:
+    return DeletePrefixJob(
+        job_id=job_id,
+        directory="dir/",
+        status=status,
+        created_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+def make_runner(job_store: FileJobStore) -> DeleteJobRunner:
+    return DeleteJobRunner(
+        job_store=job_store,
+        bucket_name=TEST_BUCKET_NAME,
+        s3_client=boto3.client("s3"),
+        metadata_cache=InMemoryMetadataCache(),
+    )
+
+
+def test_file_job_store(tmp_path: Path):
+    job_store = FileJobStore(directory=str(tmp_path / "jobs"))
+    assert job_store.get("job1") is None
+    assert job_store.list_unfinished() == []
+
+    job_store.save(make_job("job1", status=JobStatus.RUNNING))
+    job_store.save(make_job("job2", status=JobStatus.COMPLETED))
+    assert job_store.get("job1") == make_job("job1", status=JobStatus.RUNNING)
+    assert job_store.list_unfinished() == [make_job("job1", status=JobStatus.RUNNING)]
+    # ids that could escape the store's directory are never looked up
+    assert job_store.get("../job1") is None
+
+    assert not job_store.is_cancel_requested("job1")
+    job_store.request_cancel("job1")
+    assert job_store.is_cancel_requested("job1")
+
+
+def test_file_job_store_claims(tmp_path: Path):
+    job_store = FileJobStore(directory=str(tmp_path / "jobs"))
+    # e.g. the store of another worker process sharing the directory
+    other_job_store = FileJobStore(directory=str(tmp_path / "jobs"))
+
+    assert job_store.claim("job1")
+    assert not other_job_store.claim("job1")
+    assert not job_store.claim("job1")
+    assert other_job_store.claim("job2")
+
+    job_store.release("job1")
+    assert other_job_store.claim("job1")
+
+
+# pylint: disable=unused-argument
+def test_delete_job_owned_by_another_runner_is_skipped(mocked_aws: None, tmp_path: Path):
+    s3_client = boto3.client("s3")
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="dir/file.txt", Body=b"")
+    job_store = FileJobStore(directory=str(tmp_path / "jobs"))
+    job_store.save(make_job(status=JobStatus.RUNNING))
+    # the lock is held as long as the other store holds the lock file open
+    other_job_store = FileJobStore(directory=str(tmp_path / "jobs"))
+    assert other_job_store.claim("job1")
+
+    asyncio.run(make_runner(job_store).run(make_job(status=JobStatus.RUNNING)))
+
+    assert job_store.get("job1") == make_job(status=JobStatus.RUNNING)
+    assert s3_client.list_objects_v2(Bucket=TEST_BUCKET_NAME)["KeyCount"] == 1
+
+
+# pylint: disable=unused-argument
+def test_run_delete_job(mocked_aws: None, tmp_path: Path):
+    s3_client = boto3.client("s3")
+    for file_num in range(5):
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=f"dir/file_{file_num}.txt", Body=b"")
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="other/file.txt", Body=b"")
+    job_store = FileJobStore(directory=str(tmp_path / "jobs"))
+
+    asyncio.run(make_runner(job_store).run(make_job()))
+
+    job = job_store.get("job1")
+    assert job.status == JobStatus.COMPLETED
+    assert (job.keys_scanned, job.keys_deleted, job.keys_failed) == (5, 5, 0)
+    assert job.finished_at is not None
+    assert [item["Key"] for item in s3_client.list_objects_v2(Bucket=TEST_BUCKET_NAME)["Contents"]] == [
+        "other/file.txt"
+    ]
+
+
+# pylint: disable=unused-argument
+def test_cancelled_delete_job_deletes_nothing_more(mocked_aws: None, tmp_path: Path):
+    s3_client = boto3.client("s3")
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="dir/file.txt", Body=b"")
+    job_store = FileJobStore(directory=str(tmp_path / "jobs"))
+    job_store.save(make_job())
+    job_store.request_cancel("job1")
+
+    asyncio.run(make_runner(job_store).run(make_job()))
+
+    assert job_store.get("job1").status == JobStatus.CANCELLED
+    assert s3_client.list_objects_v2(Bucket=TEST_BUCKET_NAME)["KeyCount"] == 1
+
+
+# pylint: disable=unused-argument
+def test_unfinished_delete_jobs_resume(mocked_aws: None, tmp_path: Path):
+    s3_client = boto3.client("s3")
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="dir/file.txt", Body=b"")
+    job_store = FileJobStore(directory=str(tmp_path / "jobs"))
+    # e.g. left behind by an app that was stopped while the job was running
+    job_store.save(make_job(status=JobStatus.RUNNING).model_copy(update={"keys_scanned": 1000, "keys_deleted": 1000}))
+
+    async def start_runner_until_jobs_finish() -> None:
+        runner = make_runner(job_store)
+        async with runner.running():
+            while job_store.list_unfinished():
+                await asyncio.sleep(0.01)
+
+    asyncio.run(start_runner_until_jobs_finish())
+
+    job = job_store.get("job1")
+    assert job.status == JobStatus.COMPLETED
+    # progress made before the restart is kept
+    assert (job.keys_scanned, job.keys_deleted) == (1001, 1001)
+    assert s3_client.list_objects_v2(Bucket=TEST_BUCKET_NAME)["KeyCount"] == 0
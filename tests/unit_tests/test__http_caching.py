@@ -0,0 +1,43 @@
+"""Test cases for `http_caching`."""
+
+from datetime import (
+    datetime,
+    timezone,
+)
+
+from files_api.http_caching import (
+    ReadConditions,
+    format_http_date,
+    parse_http_date,
+    validator_headers,
+)
+
+TEST_DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+TEST_HTTP_DATE = "Mon, 01 Jan 2024 00:00:00 GMT"
+
+
+def test_http_date_round_trip():
+    assert format_http_date(TEST_DATE) == TEST_HTTP_DATE
+    assert parse_http_date(TEST_HTTP_DATE) == TEST_DATE
+    assert parse_http_date("not a date") is None
+    assert parse_http_date(None) is None
+
+
+def test_read_conditions_from_headers():
+    assert ReadConditions.from_headers(if_none_match=None, if_modified_since=None) == ReadConditions()
+    assert ReadConditions.from_headers(if_none_match=None, if_modified_since=TEST_HTTP_DATE) == ReadConditions(
+        if_modified_since=TEST_DATE
+    )
+    # If-Modified-Since is ignored when If-None-Match is present
+    assert ReadConditions.from_headers(if_none_match='"abc"', if_modified_since=TEST_HTTP_DATE) == ReadConditions(
+        if_none_match='"abc"'
+    )
+
+
+def test_validator_headers():
+    assert validator_headers(etag='"abc"', last_modified=TEST_DATE, cache_control="no-cache") == {
+        "ETag": '"abc"',
+        "Last-Modified": TEST_HTTP_DATE,
+        "Cache-Control": "no-cache",
+    }
+    assert validator_headers(etag=None, last_modified=None, cache_control=None) == {}
@@ -0,0 +1,50 @@
+"""Test cases for `http_ranges`."""
+
+import pytest
+
+from files_api.http_ranges import (
+    MAX_BYTE_RANGES,
+    ByteRange,
+    ByteRangeSpec,
+    parse_range_header,
+)
+
+
+@pytest.mark.parametrize(
+    "range_header, expected_specs",
+    [
+        ("bytes=0-99", [ByteRangeSpec(first=0, last=99)]),
+        ("bytes=100-", [ByteRangeSpec(first=100)]),
+        ("bytes=-500", [ByteRangeSpec(suffix_length=500)]),
+        (
+            "bytes=0-0, 10-19,-1",
+            [ByteRangeSpec(first=0, last=0), ByteRangeSpec(first=10, last=19), ByteRangeSpec(suffix_length=1)],
+        ),
+        # headers that must be ignored
+        (None, []),
+        ("", []),
+        ("items=0-9", []),
+        ("bytes=9-0", []),
+        ("bytes=-", []),
+        ("bytes=0-9,abc", []),
+        ("bytes=" + ",".join(["0-0"] * (MAX_BYTE_RANGES + 1)), []),
+    ],
+)
+def test_parse_range_header(range_header, expected_specs):
+    assert parse_range_header(range_header) == expected_specs
+
+
+@pytest.mark.parametrize(
+    "spec, expected_range",
+    [
+        (ByteRangeSpec(first=0, last=99), ByteRange(first=0, last=99)),
+        (ByteRangeSpec(first=0, last=5000), ByteRange(first=0, last=999)),
+        (ByteRangeSpec(first=990), ByteRange(first=990, last=999)),
+        (ByteRangeSpec(suffix_length=10), ByteRange(first=990, last=999)),
+        (ByteRangeSpec(suffix_length=5000), ByteRange(first=0, last=999)),
+        (ByteRangeSpec(first=1000), None),
+        (ByteRangeSpec(suffix_length=0), None),
+    ],
+)
+def test_resolve_byte_range_spec(spec, expected_range):
+    assert spec.resolve(complete_length=1000) == expected_range
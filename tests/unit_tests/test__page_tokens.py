@@ -0,0 +1,84 @@
+"""Test cases for `page_tokens`."""
+
+import pytest
+
+from files_api.page_tokens import (
+    InvalidPageTokenError,
+    PageCursor,
+    decode_page_token,
+    encode_page_token,
+)
+from files_api.s3.metadata_index import IndexSortKey
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        PageCursor(directory="", page_size=10, start_after="file.txt"),
+        PageCursor(directory="dir/ü/", page_size=1000, start_after="dir/ü/a b+c.txt", delimiter="/"),
+        PageCursor(
+            directory="",
+            page_size=10,
+            start_after="file.txt",
+            sort_by=IndexSortKey.LAST_MODIFIED,
+            descending=True,
+            start_after_value=1700000000.123456,
+        ),
+    ],
+)
+def test_page_token_round_trip(cursor: PageCursor):
+    page_token = encode_page_token(cursor)
+    assert page_token.isascii() and "=" not in page_token
+    assert decode_page_token(page_token) == cursor
+
+
+@pytest.mark.parametrize(
+    "page_token",
+    [
+        "not a token",
+        "bm90IGpzb24",
+        "e30",
+        "eyJkaXJlY3RvcnkiOiAxfQ",
+        "eyJkaXJlY3RvcnkiOiAiIiwgInBhZ2Vfc2l6ZSI6IDEwLCAic3RhcnRfYWZ0ZXIiOiAiIiwgInNvcnRfYnkiOiAiY29sb3IifQ",
+    ],
+)
+def test_decode_invalid_page_token(page_token: str):
+    with pytest.raises(InvalidPageTokenError):
+        decode_page_token(page_token)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        # out of the bounds of the `page_size` query parameter
+        PageCursor(directory="", page_size=-1, start_after="file.txt"),
+        PageCursor(directory="", page_size=0, start_after="file.txt"),
+        PageCursor(directory="", page_size=100_000, start_after="file.txt"),
+        PageCursor(directory="", page_size=True, start_after="file.txt"),
+        # missing or mistyped sort value for the order
+        PageCursor(directory="", page_size=10, start_after="file.txt", sort_by=IndexSortKey.SIZE),
+        PageCursor(
+            directory="", page_size=10, start_after="file.txt", sort_by=IndexSortKey.SIZE, start_after_value=1.5
+        ),
+        PageCursor(
+            directory="",
+            page_size=10,
+            start_after="file.txt",
+            sort_by=IndexSortKey.LAST_MODIFIED,
+            start_after_value=True,
+        ),
+        PageCursor(directory="", page_size=10, start_after="file.txt", start_after_value=42),
+    ],
+)
+def test_decode_page_token_with_invalid_values(cursor: PageCursor):
+    with pytest.raises(InvalidPageTokenError):
+        decode_page_token(encode_page_token(cursor))
+
+
+def test_cursor_after_subdirectory_skips_its_files():
+    cursor = PageCursor.after_entry(directory="dir/", page_size=10, last_entry="dir/sub/", delimiter="/")
+    assert cursor.start_after > "dir/sub/zzz/file.txt"
+    assert cursor.start_after < "dir/sub0"
+
+    cursor = PageCursor.after_entry(directory="dir/", page_size=10, last_entry="dir/file.txt", delimiter="/")
+    assert cursor.start_after == "dir/file.txt"
@@ -1,6 +1,17 @@
+from contextlib import contextmanager
+from typing import Iterator
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
 from fastapi import status
 from fastapi.testclient import TestClient
 
+from files_api.page_tokens import (
+    PageCursor,
+    encode_page_token,
+)
+from files_api.settings import Settings
 from tests.consts import TEST_BUCKET_NAME
 from tests.utils import delete_s3_bucket
 
@@ -18,20 +29,262 @@ def test_head_nonexistant_file(client: TestClient):
     assert response.status_code == status.HTTP_404_NOT_FOUND
 
 
+def test_get_file_unsatisfiable_range(client: TestClient):
+    client.put(f"/files/{NONEXISTANT_FILENAME}", files={"file_content": ("file.txt", b"0123456789")})
+
+    response = client.get(f"/files/{NONEXISTANT_FILENAME}", headers={"Range": "bytes=10-"})
+    assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+    assert response.headers["Content-Range"] == "bytes */10"
+
+    response = client.get(f"/files/{NONEXISTANT_FILENAME}", headers={"Range": "bytes=10-11, 20-"})
+    assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+    assert response.headers["Content-Range"] == "bytes */10"
+
+
+@contextmanager
+def file_replaced_after_head_object(client: TestClient, file_path: str) -> Iterator[None]:
+    """Replace the file right after each `HeadObject` call of the app, i.e. between two reads of one request."""
+
+    def replace_file(**kwargs) -> None:
+        boto3.client("s3").put_object(Bucket=TEST_BUCKET_NAME, Key=file_path, Body=b"abcdefghij")
+
+    s3_client = client.app.state.s3_client
+    s3_client.meta.events.register("after-call.s3.HeadObject", replace_file)
+    try:
+        yield
+    finally:
+        s3_client.meta.events.unregister("after-call.s3.HeadObject", replace_file)
+
+
+def test_get_file_byte_range_of_file_replaced_mid_request(client: TestClient):
+    client.put(f"/files/{NONEXISTANT_FILENAME}", files={"file_content": ("file.txt", b"0123456789")})
+
+    # one of the ranges is unsatisfiable, so the size of the file is looked up before the other is read
+    with file_replaced_after_head_object(client, NONEXISTANT_FILENAME):
+        response = client.get(f"/files/{NONEXISTANT_FILENAME}", headers={"Range": "bytes=0-1, 20-"})
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == "0"
+
+
+def test_get_file_byte_ranges_of_file_replaced_mid_request(client: TestClient):
+    client.put(f"/files/{NONEXISTANT_FILENAME}", files={"file_content": ("file.txt", b"0123456789")})
+
+    # the multipart response has already started when its parts are read, so it is cut short instead
+    with file_replaced_after_head_object(client, NONEXISTANT_FILENAME), pytest.raises(ClientError):
+        client.get(f"/files/{NONEXISTANT_FILENAME}", headers={"Range": "bytes=0-1, 4-5"})
+
+
 def test_delete_nonexistant_file(client: TestClient):
     response = client.delete(f"/files/{NONEXISTANT_FILENAME}")
     assert response.status_code == status.HTTP_404_NOT_FOUND
     assert response.json() == {"detail": "File not found"}
 
 
+def test_upload_file_without_file_content(client: TestClient):
+    response = client.put(f"/files/{NONEXISTANT_FILENAME}", files={"other_field": ("other.txt", b"content")})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json()["detail"][0]["loc"] == ["body", "file_content"]
+
+
 def test_get_files_invalid_page_size(client: TestClient):
     response = client.get("/files?page_size=-1")
     assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
 
-    response = client.get("/files?page_size=101")
+    response = client.get("/files?page_size=1001")
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_get_files_invalid_page_token(client: TestClient):
+    response = client.get("/files", params={"page_token": "not a token"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"detail": "Invalid page token"}
+
+    # the page size of a token is bound like that of the query parameter
+    page_token = encode_page_token(PageCursor(directory="", page_size=-1, start_after="file.txt"))
+    response = client.get("/files", params={"page_token": page_token})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_get_files_sorted_without_metadata_index(client: TestClient):
+    response = client.get("/files", params={"sort_by": "size"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = client.get("/files", params={"descending": True})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_get_directory_summary_invalid_depth(client: TestClient):
+    response = client.get("/summary", params={"depth": -1})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_reconcile_disabled_metadata_index(client: TestClient):
+    response = client.post("/admin/metadata-index/reconcile")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_bulk_delete_files_needs_exactly_one_target(client: TestClient):
+    response = client.post("/files/bulk-delete", json={})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    response = client.post("/files/bulk-delete", json={"file_paths": ["a.txt"], "directory": "dir/"})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    # an empty directory would delete the whole bucket
+    response = client.post("/files/bulk-delete", json={"directory": ""})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_copy_nonexistant_file(client: TestClient):
+    response = client.post("/files/copy", json={"source_path": "missing.txt", "destination_path": "copy.txt"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {"detail": "File not found"}
+
+    response = client.post("/files/move", json={"source_path": "missing.txt", "destination_path": "copy.txt"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_copy_file_onto_itself(client: TestClient):
+    response = client.post("/files/move", json={"source_path": "a.txt", "destination_path": "a.txt"})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_copy_directory_into_itself(client: TestClient):
+    for source_directory, destination_directory in [("a/", "a/b/"), ("a/b/", "a/"), ("a/", "")]:
+        response = client.post(
+            "/files/move-directory",
+            json={"source_directory": source_directory, "destination_directory": destination_directory},
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_bulk_upload_files_unsupported_body(client: TestClient):
+    response = client.post("/files/bulk-upload", content=b"content", headers={"Content-Type": "text/plain"})
+    assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+
+    response = client.post(
+        "/files/bulk-upload", content=b"not a tar archive", headers={"Content-Type": "application/x-tar"}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.parametrize(
+    "settings",
+    [{"bulk_upload_max_file_bytes": len(b"small")}],
+    indirect=True,
+)
+def test_bulk_upload_files_too_large(client: TestClient):
+    response = client.post(
+        "/files/bulk-upload",
+        files=[("files", ("small.txt", b"small")), ("files", ("large.txt", b"too large")), ("files", ("c.txt", b"c"))],
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert [(result["file_path"], result["status"]) for result in response.json()["results"]] == [
+        ("small.txt", "created"),
+        ("large.txt", "failed"),
+        ("c.txt", "created"),
+    ]
+    assert client.head("/files/large.txt").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_presigned_multipart_upload_invalid_sizes(client: TestClient):
+    for body in [
+        {"file_path": "file.txt", "size_bytes": 0},
+        {"file_path": "file.txt", "size_bytes": 10, "part_size_bytes": 1024},
+        {"file_path": "file.txt", "size_bytes": 10, "expires_in_seconds": 8 * 24 * 3600},
+    ]:
+        response = client.post("/presigned-urls/multipart-uploads", json=body)
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_complete_presigned_multipart_upload_with_invalid_parts(client: TestClient):
+    response = client.post("/presigned-urls/multipart-uploads", json={"file_path": "file.txt", "size_bytes": 10})
+    upload_id = response.json()["upload_id"]
+
+    response = client.post(
+        "/presigned-urls/multipart-uploads/complete",
+        json={
+            "file_path": "file.txt",
+            "upload_id": upload_id,
+            "parts": [{"part_number": 1, "etag": '"not-uploaded"'}],
+        },
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert client.head("/files/file.txt").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_abort_nonexistant_presigned_multipart_upload(client: TestClient):
+    response = client.post(
+        "/presigned-urls/multipart-uploads/abort", json={"file_path": "file.txt", "upload_id": "doesnotexist"}
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {"detail": "Upload not found"}
+
+
+@pytest.mark.parametrize("settings", [{"download_redirect_min_bytes": 0}], indirect=True)
+def test_get_nonexistant_file_with_redirects(client: TestClient):
+    response = client.get(f"/files/{NONEXISTANT_FILENAME}", follow_redirects=False)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_nonexistant_upload_session(client: TestClient):
+    assert client.get("/upload-sessions/doesnotexist").status_code == status.HTTP_404_NOT_FOUND
+    assert client.put("/upload-sessions/doesnotexist/parts/1", content=b"a").status_code == status.HTTP_404_NOT_FOUND
+    assert client.post("/upload-sessions/doesnotexist/complete").status_code == status.HTTP_404_NOT_FOUND
+    assert client.delete("/upload-sessions/doesnotexist").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_complete_upload_session_with_missing_parts(client: TestClient):
+    session_id = client.post("/upload-sessions", json={"file_path": "file.bin", "size_bytes": 4}).json()["session_id"]
+    response = client.post(f"/upload-sessions/{session_id}/complete")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"detail": "No parts were uploaded"}
+
+    client.put(f"/upload-sessions/{session_id}/parts/3", content=b"c")
+    response = client.post(f"/upload-sessions/{session_id}/complete")
+    assert response.json() == {"detail": "Missing parts: [1, 2]"}
+
+    client.put(f"/upload-sessions/{session_id}/parts/1", content=b"a")
+    client.put(f"/upload-sessions/{session_id}/parts/2", content=b"b")
+    response = client.post(f"/upload-sessions/{session_id}/complete")
+    assert response.json() == {"detail": "The parts add up to 3 bytes rather than 4"}
+
+    # parts other than the last must be at least 5 MiB
+    client.put(f"/upload-sessions/{session_id}/parts/3", content=b"cd")
+    assert client.post(f"/upload-sessions/{session_id}/complete").status_code == status.HTTP_400_BAD_REQUEST
+    # the session is left open to fix the parts
+    assert client.get(f"/upload-sessions/{session_id}").status_code == status.HTTP_200_OK
+
+
+@pytest.mark.parametrize(
+    "settings",
+    [{"upload_session_max_part_bytes": 5 * 1024 * 1024}],
+    indirect=True,
+)
+def test_upload_session_part_too_large(client: TestClient):
+    session_id = client.post("/upload-sessions", json={"file_path": "file.bin"}).json()["session_id"]
+    response = client.put(f"/upload-sessions/{session_id}/parts/1", content=b"a" * (5 * 1024 * 1024 + 1))
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+    response = client.put(f"/upload-sessions/{session_id}/parts/10001", content=b"a")
     assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
 
 
+def test_upload_session_aborted_behind_the_apis_back(client: TestClient):
+    session_id = client.post("/upload-sessions", json={"file_path": "file.bin"}).json()["session_id"]
+    (upload,) = boto3.client("s3").list_multipart_uploads(Bucket=TEST_BUCKET_NAME)["Uploads"]
+    boto3.client("s3").abort_multipart_upload(Bucket=TEST_BUCKET_NAME, Key="file.bin", UploadId=upload["UploadId"])
+
+    assert client.get(f"/upload-sessions/{session_id}").status_code == status.HTTP_404_NOT_FOUND
+    # the session is forgotten along with its upload
+    assert client.app.state.upload_session_store.get(session_id) is None
+
+
+def test_get_nonexistant_delete_job(client: TestClient):
+    assert client.get("/delete-jobs/doesnotexist").status_code == status.HTTP_404_NOT_FOUND
+    assert client.post("/delete-jobs/doesnotexist/cancel").status_code == status.HTTP_404_NOT_FOUND
+
+
 def test_unforseen_500_error(client: TestClient):
     # delete s3 bucket and all objects
     delete_s3_bucket(bucket_name=TEST_BUCKET_NAME)
@@ -1,7 +1,31 @@
+import io
+import json
+import os
+import tarfile
+import time
+import zipfile
+from datetime import (
+    datetime,
+    timezone,
+)
+from typing import (
+    Dict,
+    List,
+    Tuple,
+)
+
+import boto3
+import pytest
+import requests
 from fastapi import status
 from fastapi.testclient import TestClient
 
+from files_api.delete_jobs import DeletePrefixJob
+from files_api.main import create_app
+from files_api.s3.write_objects import MIN_MULTIPART_PART_SIZE_BYTES
 from files_api.schemas import GeneratedFileType
+from files_api.settings import Settings
+from tests.consts import TEST_BUCKET_NAME
 
 # Constants for testing
 TEST_FILE_PATH = "test.txt"
@@ -40,6 +64,140 @@ def test_upload_file_successful_request(client: TestClient):
     }
 
 
+def test_upload_large_file_uses_multipart_upload(client: TestClient):
+    settings: Settings = client.app.state.settings
+    large_file_content = os.urandom(settings.s3_multipart_part_size_bytes + 1024)
+
+    response = client.put(
+        "/files/large.bin",
+        files={"file_content": ("large.bin", large_file_content, "application/octet-stream")},
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = client.get("/files/large.bin")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == large_file_content
+
+    # objects created by multipart uploads have an ETag ending in "-<number of parts>"
+    head_object_response = boto3.client("s3").head_object(Bucket=settings.s3_bucket_name, Key="large.bin")
+    assert head_object_response["ETag"].endswith('-2"')
+
+
+def test_bulk_upload_files_from_form(client: TestClient):
+    client.put("/files/dir/a.txt", files={"file_content": ("a.txt", b"old content", TEST_FILE_CONTENT_TYPE)})
+
+    response = client.post(
+        "/files/bulk-upload",
+        params={"directory": "dir/"},
+        files=[
+            ("files", ("a.txt", TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)),
+            ("files", ("nested/b.txt", TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)),
+        ],
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "results": [
+            {"file_path": "dir/a.txt", "status": "updated", "error": None},
+            {"file_path": "dir/nested/b.txt", "status": "created", "error": None},
+        ]
+    }
+
+    response = client.get("/files/dir/nested/b.txt")
+    assert response.content == TEST_FILE_CONTENT
+    assert response.headers["Content-Type"].startswith(TEST_FILE_CONTENT_TYPE)
+    assert client.get("/files/dir/a.txt").content == TEST_FILE_CONTENT
+
+
+@pytest.mark.parametrize(
+    "compression, content_type",
+    [
+        ("", "application/x-tar"),
+        ("gz", "application/gzip"),
+        ("bz2", "application/x-bzip2"),
+        ("xz", "application/x-xz"),
+        ("xz", "application/x-compressed-tar"),
+    ],
+)
+def test_bulk_upload_files_from_tar(client: TestClient, compression: str, content_type: str):
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode=f"w:{compression}") as tar:
+        directory = tarfile.TarInfo("./dir")
+        directory.type = tarfile.DIRTYPE
+        tar.addfile(directory)
+        for file_path in ["./dir/a.txt", "b.txt"]:
+            member = tarfile.TarInfo(file_path)
+            member.size = len(TEST_FILE_CONTENT)
+            tar.addfile(member, io.BytesIO(TEST_FILE_CONTENT))
+
+    response = client.post("/files/bulk-upload", content=archive.getvalue(), headers={"Content-Type": content_type})
+    assert response.status_code == status.HTTP_200_OK
+    assert [(result["file_path"], result["status"]) for result in response.json()["results"]] == [
+        ("dir/a.txt", "created"),
+        ("b.txt", "created"),
+    ]
+    response = client.get("/files/dir/a.txt")
+    assert response.content == TEST_FILE_CONTENT
+    assert response.headers["Content-Type"].startswith(TEST_FILE_CONTENT_TYPE)
+
+
+def test_bulk_upload_files_from_zip(client: TestClient):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, mode="w") as zip_file:
+        zip_file.writestr("dir/", b"")
+        zip_file.writestr("dir/a.txt", TEST_FILE_CONTENT)
+
+    response = client.post(
+        "/files/bulk-upload", content=archive.getvalue(), headers={"Content-Type": "application/zip"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["results"] == [{"file_path": "dir/a.txt", "status": "created", "error": None}]
+    assert client.get("/files/dir/a.txt").content == TEST_FILE_CONTENT
+
+
+def upload_photos(client: TestClient) -> None:
+    for file_path in ["photos/2024/a.txt", "photos/2024/nested/b.txt", "photos/other.txt"]:
+        client.put(
+            f"/files/{file_path}", files={"file_content": (file_path, file_path.encode(), TEST_FILE_CONTENT_TYPE)}
+        )
+
+
+def test_download_archive_as_zip(client: TestClient):
+    upload_photos(client)
+
+    response = client.get("/archive", params={"directory": "photos/2024/"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Content-Type"] == "application/zip"
+    assert response.headers["Content-Disposition"] == 'attachment; filename="2024.zip"'
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.namelist() == ["2024/a.txt", "2024/nested/b.txt"]
+        assert archive.read("2024/nested/b.txt") == b"photos/2024/nested/b.txt"
+
+
+def test_download_archive_as_tar_gz(client: TestClient):
+    upload_photos(client)
+
+    response = client.get("/archive", params={"directory": "photos/2024/", "format": "tar.gz"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Content-Type"] == "application/gzip"
+    with tarfile.open(fileobj=io.BytesIO(response.content), mode="r:gz") as archive:
+        assert archive.getnames() == ["2024/a.txt", "2024/nested/b.txt"]
+        assert archive.extractfile("2024/a.txt").read() == b"photos/2024/a.txt"
+
+
+@pytest.mark.parametrize(
+    "settings",
+    [{"archive_prefetch_max_file_bytes": 0, "download_chunk_size_bytes": 1000}],
+    indirect=True,
+)
+def test_download_archive_streams_large_files(client: TestClient):
+    file_content = os.urandom(10_000)
+    client.put("/files/dir/large.bin", files={"file_content": ("large.bin", file_content)})
+
+    response = client.get("/archive", params={"directory": "dir/", "format": "tar"})
+    with tarfile.open(fileobj=io.BytesIO(response.content)) as archive:
+        assert archive.extractfile("dir/large.bin").read() == file_content
+
+
 def test_list_files_with_pagination(client: TestClient):
     # Upload files
     for i in range(15):
@@ -55,6 +213,176 @@ def test_list_files_with_pagination(client: TestClient):
     assert "next_page_token" in data
 
 
+def upload_files(client: TestClient, file_paths: List[str]) -> None:
+    for file_path in file_paths:
+        client.put(f"/files/{file_path}", files={"file_content": (file_path, TEST_FILE_CONTENT)})
+
+
+def list_all_files(client: TestClient, **params) -> Tuple[List[str], List[str]]:
+    """List every page, following only the page tokens, and return the file paths and directories listed."""
+    file_paths: List[str] = []
+    directories: List[str] = []
+    while params:
+        data = client.get("/files", params=params).json()
+        file_paths += [file["file_path"] for file in data["files"]]
+        directories += data["directories"]
+        # the token alone is enough to continue the listing with the same parameters
+        params = {"page_token": data["next_page_token"]} if data["next_page_token"] else {}
+    return file_paths, directories
+
+
+@pytest.mark.parametrize(
+    "settings",
+    [
+        {},
+        {"metadata_index_path": ":memory:"},
+    ],
+    ids=["s3", "metadata-index"],
+    indirect=True,
+)
+def test_list_files_pages_stay_in_directory(client: TestClient):
+    upload_files(client, ["a.txt"] + [f"dir/file_{i:02}.txt" for i in range(25)] + ["z.txt"])
+
+    file_paths, _ = list_all_files(client, directory="dir/", page_size=10)
+    assert file_paths == [f"dir/file_{i:02}.txt" for i in range(25)]
+
+
+def test_list_files_with_delimiter(client: TestClient):
+    upload_files(client, ["dir/a/1.txt", "dir/a/2.txt", "dir/b.txt", "dir/c/d/1.txt", "dir/e.txt", "dir/f/1.txt"])
+
+    response = client.get("/files", params={"directory": "dir/", "delimiter": "/", "page_size": 10})
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [file["file_path"] for file in data["files"]] == ["dir/b.txt", "dir/e.txt"]
+    assert data["directories"] == ["dir/a/", "dir/c/", "dir/f/"]
+    assert data["next_page_token"] is None
+
+    # a page ending with a subdirectory continues after the files under it
+    upload_files(client, [f"dir/g/{i:02}.txt" for i in range(10)] + [f"dir/h{i:02}.txt" for i in range(10)])
+    file_paths, directories = list_all_files(client, directory="dir/", delimiter="/", page_size=10)
+    assert file_paths == ["dir/b.txt", "dir/e.txt"] + [f"dir/h{i:02}.txt" for i in range(10)]
+    assert directories == ["dir/a/", "dir/c/", "dir/f/", "dir/g/"]
+
+
+INDEXED_SETTINGS = {"metadata_index_path": ":memory:"}
+
+
+def upload_sized_files(client: TestClient, sizes_by_path: Dict[str, int]) -> None:
+    for file_path, size in sizes_by_path.items():
+        client.put(f"/files/{file_path}", files={"file_content": (file_path, b"x" * size, TEST_FILE_CONTENT_TYPE)})
+
+
+@pytest.mark.parametrize("settings", [INDEXED_SETTINGS], indirect=True)
+def test_list_files_sorted_from_metadata_index(client: TestClient):
+    sizes_by_path = {f"dir/file_{i:02}.txt": (i * 7) % 25 for i in range(25)}
+    upload_sized_files(client, {**sizes_by_path, "other.txt": 100})
+
+    file_paths, _ = list_all_files(client, directory="dir/", page_size=10, sort_by="size", descending=True)
+    assert file_paths == sorted(sizes_by_path, key=lambda file_path: (sizes_by_path[file_path], file_path))[::-1]
+
+    files = client.get("/files", params={"directory": "dir/", "page_size": 100, "sort_by": "last_modified"}).json()
+    order = [(file["last_modified"], file["file_path"]) for file in files["files"]]
+    assert order == sorted(order) and len(order) == len(sizes_by_path)
+
+    client.delete("/files/dir/file_04.txt")
+    file_paths, _ = list_all_files(client, directory="dir/", page_size=10, sort_by="path", descending=True)
+    assert file_paths == [
+        file_path for file_path in sorted(sizes_by_path, reverse=True) if file_path != "dir/file_04.txt"
+    ]
+
+
+@pytest.mark.parametrize("settings", [INDEXED_SETTINGS], indirect=True)
+def test_reconcile_metadata_index(client: TestClient):
+    upload_files(client, ["a.txt", "b.txt"])
+    assert list_all_files(client, page_size=10)[0] == ["a.txt", "b.txt"]
+    # changed behind the API's back, so only found by a reconcile
+    boto3.client("s3").put_object(Bucket=TEST_BUCKET_NAME, Key="c.txt", Body=b"")
+    boto3.client("s3").delete_object(Bucket=TEST_BUCKET_NAME, Key="a.txt")
+    assert list_all_files(client, page_size=10)[0] == ["a.txt", "b.txt"]
+
+    response = client.post("/admin/metadata-index/reconcile")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"files_added": 1, "files_updated": 0, "files_removed": 1}
+    assert list_all_files(client, page_size=10)[0] == ["b.txt", "c.txt"]
+
+
+@pytest.mark.parametrize(
+    "settings",
+    [{}, INDEXED_SETTINGS],
+    ids=["s3", "metadata-index"],
+    indirect=True,
+)
+def test_get_directory_summary(client: TestClient):
+    upload_sized_files(
+        client, {"dir/a.txt": 10, "dir/sub/b.txt": 2000, "dir/sub/deep/c.txt": 30, "dir0.txt": 40, "other.txt": 80}
+    )
+
+    response = client.get("/summary", params={"directory": "dir/", "depth": 1})
+    assert response.status_code == status.HTTP_200_OK
+    summary = response.json()
+    assert (summary["directory"], summary["file_count"], summary["total_bytes"]) == ("dir/", 3, 2040)
+    assert summary["oldest_modified"] <= summary["newest_modified"]
+    assert [bucket["file_count"] for bucket in summary["size_histogram"]] == [2, 1, 0, 0, 0, 0, 0, 0]
+    assert summary["size_histogram"][0] == {"min_bytes": 0, "max_bytes": 1024, "file_count": 2, "total_bytes": 40}
+    assert summary["size_histogram"][-1]["max_bytes"] is None
+    ((subdirectory),) = summary["subdirectories"]
+    assert (subdirectory["directory"], subdirectory["file_count"], subdirectory["total_bytes"]) == (
+        "dir/sub/",
+        2,
+        2030,
+    )
+    # below the requested depth
+    assert subdirectory["subdirectories"] == []
+
+    summary = client.get("/summary").json()
+    assert (summary["file_count"], summary["total_bytes"], summary["subdirectories"]) == (5, 2160, [])
+
+
+def test_get_directory_summary_is_cached(client: TestClient):
+    upload_sized_files(client, {"dir/a.txt": 10})
+    summary = client.get("/summary", params={"directory": "dir/"}).json()
+
+    # the cached summary is returned until it expires, even after a write
+    upload_sized_files(client, {"dir/b.txt": 20})
+    assert client.get("/summary", params={"directory": "dir/"}).json() == summary
+    # summaries to another depth are cached separately
+    assert client.get("/summary", params={"directory": "dir/", "depth": 1}).json()["file_count"] == 2
+
+
+@pytest.mark.parametrize("settings", [{"summary_cache_ttl_seconds": 0}], indirect=True)
+def test_get_directory_summary_without_cache(client: TestClient):
+    upload_sized_files(client, {"dir/a.txt": 10})
+    assert client.get("/summary", params={"directory": "dir/"}).json()["file_count"] == 1
+
+    upload_sized_files(client, {"dir/b.txt": 20})
+    assert client.get("/summary", params={"directory": "dir/"}).json()["file_count"] == 2
+
+
+def test_stream_file_listing(client: TestClient):
+    upload_files(client, ["a.txt", "dir/b.txt", "dir/sub/c.txt", "z.txt"])
+
+    response = client.get("/listing", params={"directory": "dir/"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Content-Type"] == "application/x-ndjson"
+    files = [json.loads(line) for line in response.text.splitlines()]
+    assert [file["file_path"] for file in files] == ["dir/b.txt", "dir/sub/c.txt"]
+    assert files[0]["size_bytes"] == len(TEST_FILE_CONTENT)
+    # lines have the same fields as the files of `GET /files`
+    assert files[0] == client.get("/files", params={"directory": "dir/"}).json()["files"][0]
+
+
+def test_stream_file_listing_in_parallel(client: TestClient):
+    file_paths = ["dir/a.txt", "dir/b/1.txt", "dir/b/2.txt", "dir/c.txt", "dir/d/1.txt", "dir/d/e/1.txt", "dir/f.txt"]
+    upload_files(client, file_paths + ["other.txt"])
+
+    response = client.get("/listing", params={"directory": "dir/", "parallel": True})
+    assert response.status_code == status.HTTP_200_OK
+    assert [json.loads(line)["file_path"] for line in response.text.splitlines()] == file_paths
+
+    response = client.get("/listing", params={"directory": "dir/", "parallel": True, "ordered": False})
+    assert sorted(json.loads(line)["file_path"] for line in response.text.splitlines()) == file_paths
+
+
 def test_get_file_metadata(client: TestClient):
     # upload file
     client.put(
@@ -84,6 +412,274 @@ def test_get_file(client: TestClient):
     assert response.content == TEST_FILE_CONTENT
 
 
+def test_get_file_byte_range(client: TestClient):
+    client.put(
+        f"/files/{TEST_FILE_PATH}",
+        files={"file_content": (TEST_FILE_PATH, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+    )
+    file_size = len(TEST_FILE_CONTENT)
+
+    response = client.get(f"/files/{TEST_FILE_PATH}", headers={"Range": "bytes=0-4"})
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert response.content == TEST_FILE_CONTENT[0:5]
+    assert response.headers["Content-Range"] == f"bytes 0-4/{file_size}"
+    assert response.headers["Content-Length"] == "5"
+
+    # open-ended and suffix ranges
+    response = client.get(f"/files/{TEST_FILE_PATH}", headers={"Range": "bytes=7-"})
+    assert response.content == TEST_FILE_CONTENT[7:]
+    response = client.get(f"/files/{TEST_FILE_PATH}", headers={"Range": "bytes=-6"})
+    assert response.content == TEST_FILE_CONTENT[-6:]
+    assert response.headers["Content-Range"] == f"bytes {file_size - 6}-{file_size - 1}/{file_size}"
+
+
+def test_get_file_ignores_malformed_range(client: TestClient):
+    client.put(
+        f"/files/{TEST_FILE_PATH}",
+        files={"file_content": (TEST_FILE_PATH, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+    )
+
+    response = client.get(f"/files/{TEST_FILE_PATH}", headers={"Range": "bytes=4-0"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == TEST_FILE_CONTENT
+    assert response.headers["Accept-Ranges"] == "bytes"
+
+
+def test_get_file_multiple_byte_ranges(client: TestClient):
+    client.put(
+        f"/files/{TEST_FILE_PATH}",
+        files={"file_content": (TEST_FILE_PATH, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+    )
+    file_size = len(TEST_FILE_CONTENT)
+
+    response = client.get(f"/files/{TEST_FILE_PATH}", headers={"Range": "bytes=0-4, -6"})
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    media_type, _, boundary = response.headers["Content-Type"].partition("; boundary=")
+    assert media_type == "multipart/byteranges"
+    assert response.headers["Content-Length"] == str(len(response.content))
+
+    parts = response.content.split(f"--{boundary}".encode())
+    assert parts[0] == b"\r\n"
+    assert parts[-1] == b"--\r\n"
+    assert parts[1:-1] == [
+        (
+            f"\r\nContent-Type: {TEST_FILE_CONTENT_TYPE}\r\nContent-Range: bytes 0-4/{file_size}\r\n\r\n".encode()
+            + TEST_FILE_CONTENT[0:5]
+            + b"\r\n"
+        ),
+        (
+            f"\r\nContent-Type: {TEST_FILE_CONTENT_TYPE}\r\nContent-Range: bytes {file_size - 6}-{file_size - 1}"
+            f"/{file_size}\r\n\r\n".encode() + TEST_FILE_CONTENT[-6:] + b"\r\n"
+        ),
+    ]
+
+    # a range set with a single satisfiable range is answered like a single range
+    response = client.get(f"/files/{TEST_FILE_PATH}", headers={"Range": "bytes=2-3, 1000-2000"})
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert response.content == TEST_FILE_CONTENT[2:4]
+    assert response.headers["Content-Range"] == f"bytes 2-3/{file_size}"
+
+
+def test_get_file_conditional_requests(client: TestClient):
+    client.put(
+        f"/files/{TEST_FILE_PATH}",
+        files={"file_content": (TEST_FILE_PATH, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+    )
+
+    response = client.get(f"/files/{TEST_FILE_PATH}")
+    assert response.status_code == status.HTTP_200_OK
+    etag = response.headers["ETag"]
+    last_modified = response.headers["Last-Modified"]
+    assert response.headers["Cache-Control"] == "no-cache"
+
+    response = client.get(f"/files/{TEST_FILE_PATH}", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b""
+    assert response.headers["Cache-Control"] == "no-cache"
+
+    response = client.get(f"/files/{TEST_FILE_PATH}", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    # once the file changes, its new content is sent
+    client.put(
+        f"/files/{TEST_FILE_PATH}",
+        files={"file_content": (TEST_FILE_PATH, b"updated content", TEST_FILE_CONTENT_TYPE)},
+    )
+    response = client.get(f"/files/{TEST_FILE_PATH}", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == b"updated content"
+    assert response.headers["ETag"] != etag
+
+
+def test_get_file_metadata_conditional_requests(client: TestClient):
+    client.put(
+        f"/files/{TEST_FILE_PATH}",
+        files={"file_content": (TEST_FILE_PATH, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+    )
+
+    response = client.head(f"/files/{TEST_FILE_PATH}")
+    etag = response.headers["ETag"]
+
+    # the 304 repeats the validators so that caches can refresh their stored headers
+    response = client.head(f"/files/{TEST_FILE_PATH}", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["ETag"] == etag
+    assert response.headers["Last-Modified"]
+    assert response.headers["Cache-Control"] == "no-cache"
+
+    response = client.head(f"/files/{TEST_FILE_PATH}", headers={"If-None-Match": '"some-other-etag"'})
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_cache_control_setting(mocked_aws: None, settings: Settings):  # pylint: disable=unused-argument
+    with TestClient(
+        create_app(settings=settings.model_copy(update={"cache_control": "private, max-age=30"}))
+    ) as client:
+        client.put(
+            f"/files/{TEST_FILE_PATH}",
+            files={"file_content": (TEST_FILE_PATH, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+        )
+        assert client.get(f"/files/{TEST_FILE_PATH}").headers["Cache-Control"] == "private, max-age=30"
+        assert client.head(f"/files/{TEST_FILE_PATH}").headers["Cache-Control"] == "private, max-age=30"
+
+    with TestClient(create_app(settings=settings.model_copy(update={"cache_control": None}))) as client:
+        assert "Cache-Control" not in client.get(f"/files/{TEST_FILE_PATH}").headers
+
+
+def test_presigned_upload_and_download(client: TestClient):
+    response = client.post("/presigned-urls/upload", json={"file_path": TEST_FILE_PATH, "content_type": "text/plain"})
+    assert response.status_code == status.HTTP_200_OK
+    presigned_upload = response.json()
+    assert (presigned_upload["method"], presigned_upload["headers"]) == ("PUT", {"Content-Type": "text/plain"})
+    # the content goes straight to S3
+    s3_response = requests.put(
+        presigned_upload["url"], data=TEST_FILE_CONTENT, headers=presigned_upload["headers"], timeout=5
+    )
+    assert s3_response.status_code == status.HTTP_200_OK
+
+    response = client.post("/presigned-urls/download", json={"file_path": TEST_FILE_PATH, "expires_in_seconds": 60})
+    assert response.status_code == status.HTTP_200_OK
+    presigned_download = response.json()
+    assert presigned_download["method"] == "GET"
+    expires_in = datetime.fromisoformat(presigned_download["expires_at"]) - datetime.now(timezone.utc)
+    assert 0 < expires_in.total_seconds() <= 60
+    s3_response = requests.get(presigned_download["url"], timeout=5)
+    assert (s3_response.content, s3_response.headers["Content-Type"]) == (TEST_FILE_CONTENT, "text/plain")
+
+
+def test_presigned_multipart_upload(client: TestClient):
+    file_content = os.urandom(MIN_MULTIPART_PART_SIZE_BYTES * 2 + 3)
+    response = client.post(
+        "/presigned-urls/multipart-uploads",
+        json={
+            "file_path": TEST_FILE_PATH,
+            "size_bytes": len(file_content),
+            "part_size_bytes": MIN_MULTIPART_PART_SIZE_BYTES,
+        },
+    )
+    assert response.status_code == status.HTTP_200_OK
+    multipart_upload = response.json()
+    assert multipart_upload["part_size_bytes"] == MIN_MULTIPART_PART_SIZE_BYTES
+    assert [(part["part_number"], part["first_byte"], part["last_byte"]) for part in multipart_upload["parts"]] == [
+        (1, 0, MIN_MULTIPART_PART_SIZE_BYTES - 1),
+        (2, MIN_MULTIPART_PART_SIZE_BYTES, MIN_MULTIPART_PART_SIZE_BYTES * 2 - 1),
+        (3, MIN_MULTIPART_PART_SIZE_BYTES * 2, len(file_content) - 1),
+    ]
+
+    # the parts can be uploaded in any order
+    completed_parts = []
+    for part in reversed(multipart_upload["parts"]):
+        first_byte, end = part["first_byte"], part["last_byte"] + 1
+        s3_response = requests.put(part["url"], data=file_content[first_byte:end], timeout=5)
+        completed_parts.append({"part_number": part["part_number"], "etag": s3_response.headers["ETag"]})
+    response = client.post(
+        "/presigned-urls/multipart-uploads/complete",
+        json={"file_path": TEST_FILE_PATH, "upload_id": multipart_upload["upload_id"], "parts": completed_parts},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert client.get(f"/files/{TEST_FILE_PATH}").content == file_content
+
+
+def test_abort_presigned_multipart_upload(client: TestClient):
+    response = client.post("/presigned-urls/multipart-uploads", json={"file_path": TEST_FILE_PATH, "size_bytes": 10})
+    upload_id = response.json()["upload_id"]
+
+    response = client.post(
+        "/presigned-urls/multipart-uploads/abort", json={"file_path": TEST_FILE_PATH, "upload_id": upload_id}
+    )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    s3_client = boto3.client("s3")
+    assert "Uploads" not in s3_client.list_multipart_uploads(Bucket=TEST_BUCKET_NAME)
+
+
+@pytest.mark.parametrize("settings", [{"download_redirect_min_bytes": 10}], indirect=True)
+def test_get_large_file_redirects_to_s3(client: TestClient):
+    client.put("/files/small.txt", files={"file_content": ("small.txt", b"small")})
+    client.put(f"/files/{TEST_FILE_PATH}", files={"file_content": (TEST_FILE_PATH, TEST_FILE_CONTENT)})
+
+    assert client.get("/files/small.txt", follow_redirects=False).status_code == status.HTTP_200_OK
+
+    response = client.get(f"/files/{TEST_FILE_PATH}", follow_redirects=False)
+    assert response.status_code == status.HTTP_307_TEMPORARY_REDIRECT
+    assert response.headers["Cache-Control"] == "no-store"
+    assert requests.get(response.headers["Location"], timeout=5).content == TEST_FILE_CONTENT
+
+    # clients that cannot reach S3 can opt out
+    response = client.get(f"/files/{TEST_FILE_PATH}", params={"allow_redirect": False}, follow_redirects=False)
+    assert (response.status_code, response.content) == (status.HTTP_200_OK, TEST_FILE_CONTENT)
+
+
+def test_resumable_upload_session(client: TestClient):
+    part_contents = [os.urandom(MIN_MULTIPART_PART_SIZE_BYTES), os.urandom(MIN_MULTIPART_PART_SIZE_BYTES), b"end"]
+    response = client.post(
+        "/upload-sessions",
+        json={"file_path": TEST_FILE_PATH, "content_type": "video/mp4", "size_bytes": sum(map(len, part_contents))},
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    session_id = response.json()["session_id"]
+
+    # parts are sent in any order, and a part sent again replaces the previous one
+    part_responses = [
+        client.put(f"/upload-sessions/{session_id}/parts/{part_number}", content=part_contents[part_number - 1])
+        for part_number in [3, 1, 3]
+    ]
+    assert [response.json()["size_bytes"] for response in part_responses] == [3, MIN_MULTIPART_PART_SIZE_BYTES, 3]
+
+    # a resuming client learns which parts are missing
+    response = client.get(f"/upload-sessions/{session_id}")
+    assert [part["part_number"] for part in response.json()["parts"]] == [1, 3]
+    assert response.json()["bytes_received"] == MIN_MULTIPART_PART_SIZE_BYTES + 3
+
+    client.put(f"/upload-sessions/{session_id}/parts/2", content=part_contents[1])
+    response = client.post(f"/upload-sessions/{session_id}/complete")
+    assert response.status_code == status.HTTP_200_OK
+
+    response = client.get(f"/files/{TEST_FILE_PATH}")
+    assert (response.content, response.headers["Content-Type"]) == (b"".join(part_contents), "video/mp4")
+    # the session ended with the upload
+    assert client.get(f"/upload-sessions/{session_id}").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_resumable_upload_session_continues_on_another_worker(client: TestClient, settings: Settings):
+    session_id = client.post("/upload-sessions", json={"file_path": TEST_FILE_PATH}).json()["session_id"]
+    client.put(f"/upload-sessions/{session_id}/parts/1", content=b"part")
+
+    # another app sharing the session directory
+    with TestClient(create_app(settings=settings)) as other_client:
+        response = other_client.post(f"/upload-sessions/{session_id}/complete")
+        assert response.status_code == status.HTTP_200_OK
+    assert client.get(f"/files/{TEST_FILE_PATH}").content == b"part"
+
+
+def test_abort_upload_session(client: TestClient):
+    session_id = client.post("/upload-sessions", json={"file_path": TEST_FILE_PATH}).json()["session_id"]
+    client.put(f"/upload-sessions/{session_id}/parts/1", content=b"part")
+
+    assert client.delete(f"/upload-sessions/{session_id}").status_code == status.HTTP_204_NO_CONTENT
+    assert "Uploads" not in boto3.client("s3").list_multipart_uploads(Bucket=TEST_BUCKET_NAME)
+    assert client.get(f"/upload-sessions/{session_id}").status_code == status.HTTP_404_NOT_FOUND
+
+
 def test_delete_file(client: TestClient):
     # upload file
     client.put(
@@ -99,6 +695,135 @@ def test_delete_file(client: TestClient):
     assert response.status_code == status.HTTP_404_NOT_FOUND
 
 
+@pytest.mark.parametrize(
+    "settings",
+    [
+        {},
+        {"metadata_index_path": ":memory:"},
+    ],
+    ids=["s3", "metadata-index"],
+    indirect=True,
+)
+def test_bulk_delete_files(client: TestClient):
+    for file_path in ["a.txt", "dir/b.txt", "dir/c.txt"]:
+        client.put(
+            f"/files/{file_path}", files={"file_content": (file_path, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)}
+        )
+
+    response = client.post("/files/bulk-delete", json={"file_paths": ["a.txt", "missing.txt"]})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Content-Type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        {"file_path": "a.txt", "deleted": True, "error_code": None, "error_message": None},
+        {"file_path": "missing.txt", "deleted": True, "error_code": None, "error_message": None},
+    ]
+
+    response = client.post("/files/bulk-delete", json={"directory": "dir/"})
+    assert [json.loads(line)["file_path"] for line in response.text.splitlines()] == ["dir/b.txt", "dir/c.txt"]
+    assert client.get("/files").json()["files"] == []
+
+
+def test_copy_and_move_file(client: TestClient):
+    client.put("/files/a.txt", files={"file_content": ("a.txt", TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)})
+
+    response = client.post("/files/copy", json={"source_path": "a.txt", "destination_path": "b.txt"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "source_path": "a.txt",
+        "destination_path": "b.txt",
+        "message": "File copied from /a.txt to /b.txt",
+    }
+    assert client.get("/files/b.txt").content == TEST_FILE_CONTENT
+
+    response = client.post("/files/move", json={"source_path": "b.txt", "destination_path": "dir/c.txt"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["message"] == "File moved from /b.txt to /dir/c.txt"
+    assert client.head("/files/b.txt").status_code == status.HTTP_404_NOT_FOUND
+    response = client.get("/files/dir/c.txt")
+    assert response.content == TEST_FILE_CONTENT
+    assert response.headers["Content-Type"].startswith(TEST_FILE_CONTENT_TYPE)
+
+
+@pytest.mark.parametrize(
+    "settings",
+    [
+        {},
+        {"metadata_index_path": ":memory:"},
+    ],
+    ids=["s3", "metadata-index"],
+    indirect=True,
+)
+def test_copy_and_move_directory(client: TestClient):
+    for file_path in ["src/a.txt", "src/sub/b.txt", "other.txt"]:
+        client.put(
+            f"/files/{file_path}", files={"file_content": (file_path, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)}
+        )
+
+    response = client.post(
+        "/files/copy-directory", json={"source_directory": "src/", "destination_directory": "copy/"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Content-Type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        {
+            "source_path": source_path,
+            "destination_path": destination_path,
+            "succeeded": True,
+            "error_code": None,
+            "error_message": None,
+        }
+        for source_path, destination_path in [("src/a.txt", "copy/a.txt"), ("src/sub/b.txt", "copy/sub/b.txt")]
+    ]
+
+    response = client.post(
+        "/files/move-directory", json={"source_directory": "copy/", "destination_directory": "moved/"}
+    )
+    assert all(json.loads(line)["succeeded"] for line in response.text.splitlines())
+    assert [file["file_path"] for file in client.get("/files", params={"page_size": 10}).json()["files"]] == [
+        "moved/a.txt",
+        "moved/sub/b.txt",
+        "other.txt",
+        "src/a.txt",
+        "src/sub/b.txt",
+    ]
+
+
+def test_delete_job(client: TestClient):
+    for file_path in ["dir/a.txt", "dir/b.txt", "other.txt"]:
+        client.put(
+            f"/files/{file_path}", files={"file_content": (file_path, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)}
+        )
+
+    response = client.post("/delete-jobs", json={"directory": "dir/"})
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    job_id = response.json()["job_id"]
+
+    deadline = time.monotonic() + 10
+    while (job := client.get(f"/delete-jobs/{job_id}").json())["status"] in ("pending", "running"):
+        assert time.monotonic() < deadline, "the delete job did not finish in time"
+        time.sleep(0.01)
+
+    assert job["status"] == "completed"
+    assert (job["keys_scanned"], job["keys_deleted"], job["keys_failed"]) == (2, 2, 0)
+    assert [file["file_path"] for file in client.get("/files").json()["files"]] == ["other.txt"]
+
+    # a finished job can no longer be cancelled
+    assert client.post(f"/delete-jobs/{job_id}/cancel").status_code == status.HTTP_409_CONFLICT
+
+
+def test_cancel_delete_job(client: TestClient):
+    # a job no runner picks up, since jobs are only resumed at startup, so that it stays unfinished
+    job_store = client.app.state.delete_job_runner.job_store
+    job_store.save(DeletePrefixJob(job_id="job1", directory="dir/", created_at=datetime.now(timezone.utc)))
+    assert not client.get("/delete-jobs/job1").json()["cancel_requested"]
+
+    response = client.post("/delete-jobs/job1/cancel")
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.json()["cancel_requested"]
+    assert response.json()["status"] == "pending"
+    assert client.get("/delete-jobs/job1").json()["cancel_requested"]
+
+
 def test_generate_text(client: TestClient):
     """Test generating text using POST method."""
     response = client.post(
@@ -159,3 +884,39 @@ def test_generate_audio(client: TestClient):
     assert response.status_code == status.HTTP_200_OK
     assert response.content is not None
     assert response.headers["Content-Type"] == "audio/mpeg"
+
+
+def test_get_cache_stats(client: TestClient):
+    client.put(
+        f"/files/{TEST_FILE_PATH}",
+        files={"file_content": (TEST_FILE_PATH, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+    )
+    client.head(f"/files/{TEST_FILE_PATH}")
+    client.head(f"/files/{TEST_FILE_PATH}")
+
+    response = client.get("/admin/cache-stats")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["metadata_cache"] == {"hits": 1, "misses": 1, "evictions": 0, "size": 1}
+    # the content cache is disabled by default
+    assert response.json()["content_cache"] is None
+
+
+@pytest.mark.parametrize("settings", [{"content_cache_max_total_bytes": 1024}], indirect=True)
+def test_get_content_cache_stats(client: TestClient):
+    client.put(
+        f"/files/{TEST_FILE_PATH}",
+        files={"file_content": (TEST_FILE_PATH, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+    )
+    client.get(f"/files/{TEST_FILE_PATH}")
+    response = client.get(f"/files/{TEST_FILE_PATH}")
+    assert response.headers["Content-Length"] == str(len(TEST_FILE_CONTENT))
+    assert response.headers["ETag"]
+
+    response = client.get("/admin/cache-stats")
+    assert response.json()["content_cache"] == {
+        "hits": 1,
+        "misses": 1,
+        "evictions": 0,
+        "size": 1,
+        "size_bytes": len(TEST_FILE_CONTENT),
+    }
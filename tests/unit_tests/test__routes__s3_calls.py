@@ -0,0 +1,356 @@
+"""
+Assert how many calls to S3 each route makes.
+
+Every call to S3 adds a network round trip to the latency of a request, so these tests
+catch changes that quietly add calls to the hot paths.
+"""
+
+from typing import List
+
+import boto3
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from files_api.settings import Settings
+from tests.consts import TEST_BUCKET_NAME
+
+TEST_FILE_PATH = "test.txt"
+TEST_FILE_CONTENT = b"Hello, world!"
+TEST_FILE_CONTENT_TYPE = "text/plain"
+
+
+def upload_test_file(client: TestClient) -> None:
+    response = client.put(
+        f"/files/{TEST_FILE_PATH}",
+        files={"file_content": (TEST_FILE_PATH, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+    )
+    assert response.status_code in (status.HTTP_200_OK, status.HTTP_201_CREATED)
+
+
+def test_upload_new_file_s3_calls(client: TestClient, s3_calls: List[str]):
+    upload_test_file(client)
+    assert s3_calls == ["PutObject"]
+
+
+def test_upload_existing_file_s3_calls(client: TestClient, s3_calls: List[str]):
+    upload_test_file(client)
+    s3_calls.clear()
+
+    upload_test_file(client)
+    # the conditional create is rejected, then the object is replaced
+    assert s3_calls == ["PutObject", "PutObject"]
+
+
+def test_upload_large_file_s3_calls(client: TestClient, s3_calls: List[str]):
+    # larger than `CONDITIONAL_PUT_MAX_BYTES`, but still sent in a single part
+    files = {"file_content": (TEST_FILE_PATH, b"x" * (2 * 1024 * 1024), TEST_FILE_CONTENT_TYPE)}
+    assert client.put(f"/files/{TEST_FILE_PATH}", files=files).status_code == status.HTTP_201_CREATED
+    assert client.put(f"/files/{TEST_FILE_PATH}", files=files).status_code == status.HTTP_200_OK
+    # the object is looked up first, so that an update sends the content once rather than twice
+    assert s3_calls == ["HeadObject", "PutObject", "HeadObject", "PutObject"]
+
+
+def test_bulk_upload_files_s3_calls(client: TestClient, s3_calls: List[str]):
+    upload_test_file(client)
+    s3_calls.clear()
+
+    files = [("files", (f"file_{file_num}.txt", TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)) for file_num in range(3)]
+    files.append(("files", (TEST_FILE_PATH, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)))
+    assert client.post("/files/bulk-upload", files=files).status_code == status.HTTP_200_OK
+    # one conditional create per new file, plus a rewrite for the existing one
+    assert s3_calls == ["PutObject"] * 5
+
+
+def test_get_file_s3_calls(client: TestClient, s3_calls: List[str]):
+    upload_test_file(client)
+    s3_calls.clear()
+
+    assert client.get(f"/files/{TEST_FILE_PATH}").status_code == status.HTTP_200_OK
+    assert s3_calls == ["GetObject"]
+
+
+def test_get_file_byte_range_s3_calls(client: TestClient, s3_calls: List[str]):
+    upload_test_file(client)
+    s3_calls.clear()
+
+    # a single range is passed straight through to S3 without looking up the object size first
+    response = client.get(f"/files/{TEST_FILE_PATH}", headers={"Range": "bytes=0-4"})
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert s3_calls == ["GetObject"]
+
+
+def test_get_unmodified_file_s3_calls(client: TestClient, s3_calls: List[str]):
+    upload_test_file(client)
+    etag = client.head(f"/files/{TEST_FILE_PATH}").headers["ETag"]
+    s3_calls.clear()
+
+    # the condition is evaluated by S3 as part of the read itself
+    response = client.get(f"/files/{TEST_FILE_PATH}", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert s3_calls == ["GetObject"]
+
+
+def test_get_nonexistent_file_s3_calls(client: TestClient, s3_calls: List[str]):
+    assert client.get("/files/nonexistent.txt").status_code == status.HTTP_404_NOT_FOUND
+    assert s3_calls == ["GetObject"]
+
+
+def test_get_file_metadata_s3_calls(client: TestClient, s3_calls: List[str]):
+    upload_test_file(client)
+    s3_calls.clear()
+
+    assert client.head(f"/files/{TEST_FILE_PATH}").status_code == status.HTTP_200_OK
+    assert s3_calls == ["HeadObject"]
+
+
+def test_cached_file_metadata_s3_calls(client: TestClient, s3_calls: List[str]):
+    upload_test_file(client)
+    s3_calls.clear()
+
+    # repeated checks of a hot key are answered from the metadata cache
+    for _ in range(3):
+        assert client.head(f"/files/{TEST_FILE_PATH}").status_code == status.HTTP_200_OK
+    assert client.delete(f"/files/{TEST_FILE_PATH}").status_code == status.HTTP_204_NO_CONTENT
+    assert s3_calls == ["HeadObject", "DeleteObject"]
+
+    # the delete invalidated the cached metadata, then the missing object is cached as such
+    s3_calls.clear()
+    for _ in range(3):
+        assert client.head(f"/files/{TEST_FILE_PATH}").status_code == status.HTTP_404_NOT_FOUND
+    assert s3_calls == ["HeadObject"]
+
+    # uploading invalidates the cached 404
+    upload_test_file(client)
+    assert client.head(f"/files/{TEST_FILE_PATH}").status_code == status.HTTP_200_OK
+
+
+def test_delete_file_s3_calls(client: TestClient, s3_calls: List[str]):
+    upload_test_file(client)
+    s3_calls.clear()
+
+    assert client.delete(f"/files/{TEST_FILE_PATH}").status_code == status.HTTP_204_NO_CONTENT
+    # S3 deletes do not report whether the key existed, so a 404 needs a prior existence check
+    assert s3_calls == ["HeadObject", "DeleteObject"]
+
+
+def test_bulk_delete_files_s3_calls(client: TestClient, s3_calls: List[str]):
+    file_paths = [f"dir/file_{file_num}.txt" for file_num in range(5)]
+    for file_path in file_paths:
+        client.put(
+            f"/files/{file_path}", files={"file_content": (file_path, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)}
+        )
+    s3_calls.clear()
+
+    # up to 1000 files are deleted with one call, without checking that they exist first
+    assert client.post("/files/bulk-delete", json={"file_paths": file_paths}).status_code == status.HTTP_200_OK
+    assert s3_calls == ["DeleteObjects"]
+
+    s3_calls.clear()
+    assert client.post("/files/bulk-delete", json={"directory": "dir/"}).status_code == status.HTTP_200_OK
+    assert s3_calls == ["ListObjectsV2"]
+
+
+def test_copy_and_move_file_s3_calls(client: TestClient, s3_calls: List[str]):
+    upload_test_file(client)
+    s3_calls.clear()
+
+    body = {"source_path": TEST_FILE_PATH, "destination_path": "copy.txt"}
+    assert client.post("/files/copy", json=body).status_code == status.HTTP_200_OK
+    # the size decides between one copy request and a multipart copy
+    assert s3_calls == ["HeadObject", "CopyObject"]
+
+    s3_calls.clear()
+    assert client.post("/files/move", json=body).status_code == status.HTTP_200_OK
+    assert s3_calls == ["HeadObject", "CopyObject", "DeleteObject"]
+
+
+def test_move_directory_s3_calls(client: TestClient, s3_calls: List[str]):
+    for file_num in range(3):
+        client.put(f"/files/dir/file_{file_num}.txt", files={"file_content": ("file.txt", TEST_FILE_CONTENT)})
+    s3_calls.clear()
+
+    body = {"source_directory": "dir/", "destination_directory": "moved/"}
+    assert client.post("/files/move-directory", json=body).status_code == status.HTTP_200_OK
+    # sizes come from the listing, and the sources are deleted with one batched request
+    assert s3_calls == ["ListObjectsV2"] + ["CopyObject"] * 3 + ["DeleteObjects"]
+
+
+def test_download_archive_s3_calls(client: TestClient, s3_calls: List[str]):
+    for file_num in range(3):
+        client.put(f"/files/dir/file_{file_num}.txt", files={"file_content": ("file.txt", TEST_FILE_CONTENT)})
+    s3_calls.clear()
+
+    assert client.get("/archive", params={"directory": "dir/"}).status_code == status.HTTP_200_OK
+    # one listing page, then one read per file, with no existence checks
+    assert s3_calls == ["ListObjectsV2"] + ["GetObject"] * 3
+
+
+def test_list_files_s3_calls(client: TestClient, s3_calls: List[str]):
+    upload_test_file(client)
+    s3_calls.clear()
+
+    assert client.get("/files").status_code == status.HTTP_200_OK
+    assert s3_calls == ["ListObjectsV2"]
+
+
+def test_list_all_files_s3_calls(client: TestClient, s3_calls: List[str]):
+    s3_client = boto3.client("s3")
+    for file_num in range(2500):
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=f"file_{file_num:04}.txt", Body=b"")
+
+    params = {"page_size": 1000}
+    while params:
+        next_page_token = client.get("/files", params=params).json()["next_page_token"]
+        params = {"page_token": next_page_token} if next_page_token else None
+    # one listing request per page of 1000 files
+    assert s3_calls == ["ListObjectsV2"] * 3
+
+
+@pytest.mark.parametrize("settings", [{"metadata_index_path": ":memory:"}], indirect=True)
+def test_list_files_from_metadata_index_s3_calls(client: TestClient, s3_calls: List[str]):
+    upload_test_file(client)
+    s3_calls.clear()
+
+    # the file written since the last query is refreshed, then listings and summaries are answered locally
+    assert client.get("/files").json()["files"][0]["file_path"] == TEST_FILE_PATH
+    assert s3_calls == ["HeadObject"]
+    s3_calls.clear()
+
+    assert client.get("/files", params={"sort_by": "size"}).status_code == status.HTTP_200_OK
+    assert client.get("/summary").json()["file_count"] == 1
+    assert s3_calls == []
+
+
+def test_cached_directory_summary_s3_calls(client: TestClient, s3_calls: List[str]):
+    upload_test_file(client)
+    assert client.get("/summary").status_code == status.HTTP_200_OK
+    s3_calls.clear()
+
+    assert client.get("/summary").json()["file_count"] == 1
+    assert s3_calls == []
+
+
+def test_stream_file_listing_s3_calls(client: TestClient, s3_calls: List[str]):
+    s3_client = boto3.client("s3")
+    for file_num in range(1001):
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=f"file_{file_num:04}.txt", Body=b"")
+
+    response = client.get("/listing")
+    assert len(response.text.splitlines()) == 1001
+    # one listing request per 1000 files
+    assert s3_calls == ["ListObjectsV2"] * 2
+
+
+def test_stream_file_listing_in_parallel_s3_calls(client: TestClient, s3_calls: List[str]):
+    for directory in ["a", "b", "c"]:
+        client.put(f"/files/{directory}/file.txt", files={"file_content": ("file.txt", TEST_FILE_CONTENT)})
+    s3_calls.clear()
+
+    assert client.get("/listing", params={"parallel": True}).status_code == status.HTTP_200_OK
+    # one probe of the top directory and one of each subdirectory, then one listing per range
+    assert s3_calls == ["ListObjectsV2"] * (1 + 3 + 4)
+
+
+CONTENT_CACHE_SETTINGS = {"content_cache_max_total_bytes": 1024 * 1024}
+
+
+@pytest.mark.parametrize("settings", [CONTENT_CACHE_SETTINGS], indirect=True)
+def test_cached_file_content_s3_calls(client: TestClient, s3_calls: List[str]):
+    upload_test_file(client)
+    s3_calls.clear()
+
+    # the first read fills both caches, later reads are served from memory
+    for _ in range(3):
+        response = client.get(f"/files/{TEST_FILE_PATH}")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content == TEST_FILE_CONTENT
+    assert s3_calls == ["GetObject"]
+
+    # a write through the API invalidates the cached copy
+    client.put(
+        f"/files/{TEST_FILE_PATH}",
+        files={"file_content": (TEST_FILE_PATH, b"Hello, again!", TEST_FILE_CONTENT_TYPE)},
+    )
+    assert client.get(f"/files/{TEST_FILE_PATH}").content == b"Hello, again!"
+
+    # a delete through the API does too
+    assert client.delete(f"/files/{TEST_FILE_PATH}").status_code == status.HTTP_204_NO_CONTENT
+    assert client.get(f"/files/{TEST_FILE_PATH}").status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.parametrize(
+    "settings",
+    [{**CONTENT_CACHE_SETTINGS, "content_cache_revalidate": True, "metadata_cache_max_entries": 0}],
+    indirect=True,
+)
+def test_revalidated_file_content_s3_calls(client: TestClient, s3_calls: List[str]):
+    upload_test_file(client)
+    client.get(f"/files/{TEST_FILE_PATH}")
+    s3_calls.clear()
+
+    # the cached copy is revalidated with a conditional read that transfers no content
+    response = client.get(f"/files/{TEST_FILE_PATH}")
+    assert response.content == TEST_FILE_CONTENT
+    assert s3_calls == ["GetObject"]
+
+    # a change made directly to S3 is picked up by the revalidation
+    client.app.state.s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=TEST_FILE_PATH, Body=b"Changed in S3")
+    assert client.get(f"/files/{TEST_FILE_PATH}").content == b"Changed in S3"
+
+
+@pytest.mark.parametrize("settings", [{**CONTENT_CACHE_SETTINGS, "content_cache_max_object_bytes": 4}], indirect=True)
+def test_large_file_content_s3_calls(client: TestClient, s3_calls: List[str]):
+    upload_test_file(client)
+    s3_calls.clear()
+
+    # files above the size threshold are streamed from S3 on every read
+    for _ in range(2):
+        assert client.get(f"/files/{TEST_FILE_PATH}").content == TEST_FILE_CONTENT
+    assert s3_calls == ["GetObject", "GetObject"]
+
+
+def test_presigned_urls_s3_calls(client: TestClient, s3_calls: List[str]):
+    # presigning is done locally by the S3 client
+    assert (
+        client.post("/presigned-urls/download", json={"file_path": TEST_FILE_PATH}).status_code == status.HTTP_200_OK
+    )
+    assert client.post("/presigned-urls/upload", json={"file_path": TEST_FILE_PATH}).status_code == status.HTTP_200_OK
+    assert s3_calls == []
+
+    # only starting a multipart upload calls S3, however many parts are presigned
+    response = client.post(
+        "/presigned-urls/multipart-uploads", json={"file_path": TEST_FILE_PATH, "size_bytes": 100 * 1024**3}
+    )
+    assert len(response.json()["parts"]) > 1000
+    assert s3_calls == ["CreateMultipartUpload"]
+
+
+@pytest.mark.parametrize("settings", [{"download_redirect_min_bytes": 1}], indirect=True)
+def test_redirected_get_file_s3_calls(client: TestClient, s3_calls: List[str]):
+    upload_test_file(client)
+    s3_calls.clear()
+
+    # the size of the file is read once, then from the metadata cache
+    for _ in range(2):
+        response = client.get(f"/files/{TEST_FILE_PATH}", follow_redirects=False)
+        assert response.status_code == status.HTTP_307_TEMPORARY_REDIRECT
+    assert s3_calls == ["HeadObject"]
+
+
+def test_upload_session_s3_calls(client: TestClient, s3_calls: List[str]):
+    session_id = client.post("/upload-sessions", json={"file_path": TEST_FILE_PATH}).json()["session_id"]
+    assert s3_calls == ["CreateMultipartUpload"]
+    s3_calls.clear()
+
+    # parts go straight to S3, without reading or writing any other session state there
+    client.put(f"/upload-sessions/{session_id}/parts/1", content=TEST_FILE_CONTENT)
+    assert s3_calls == ["UploadPart"]
+    s3_calls.clear()
+
+    client.get(f"/upload-sessions/{session_id}")
+    assert s3_calls == ["ListParts"]
+    s3_calls.clear()
+
+    assert client.post(f"/upload-sessions/{session_id}/complete").status_code == status.HTTP_200_OK
+    assert s3_calls == ["ListParts", "CompleteMultipartUpload"]
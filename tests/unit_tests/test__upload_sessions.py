@@ -0,0 +1,66 @@
+"""Test cases for `upload_sessions`."""
+
+import asyncio
+from datetime import (
+    datetime,
+    timezone,
+)
+from pathlib import Path
+
+import boto3
+
+from files_api.s3.multipart_uploads import list_multipart_uploads
+from files_api.s3.write_objects import create_multipart_upload
+from files_api.upload_sessions import (
+    FileUploadSessionStore,
+    UploadSession,
+    UploadSessionSweeper,
+)
+from tests.consts import TEST_BUCKET_NAME
+
+
+def make_session(session_id: str, upload_id: str = "upload", created_at: datetime | None = None) -> UploadSession:
+    return UploadSession(
+        session_id=session_id,
+        file_path=f"{session_id}.bin",
+        upload_id=upload_id,
+        content_type="application/octet-stream",
+        created_at=created_at or datetime.now(timezone.utc),
+    )
+
+
+def test_file_upload_session_store(tmp_path: Path):
+    session_store = FileUploadSessionStore(directory=str(tmp_path / "sessions"))
+    assert session_store.get("session1") is None
+    assert session_store.list_all() == []
+
+    session = make_session("session1")
+    session_store.save(session)
+    session_store.save(make_session("session2"))
+    assert session_store.get("session1") == session
+    assert sorted(session.session_id for session in session_store.list_all()) == ["session1", "session2"]
+    # ids that could escape the store's directory are never looked up
+    assert session_store.get("../session1") is None
+
+    session_store.delete("session1")
+    session_store.delete("session1")
+    assert session_store.get("session1") is None
+
+
+# pylint: disable=unused-argument
+def test_sweep_aborts_idle_uploads_and_forgets_their_sessions(mocked_aws: None, tmp_path: Path):
+    s3_client = boto3.client("s3")
+    session_store = FileUploadSessionStore(directory=str(tmp_path / "sessions"))
+    old_upload_id = create_multipart_upload(TEST_BUCKET_NAME, "old.bin", s3_client=s3_client)
+    new_upload_id = create_multipart_upload(TEST_BUCKET_NAME, "new.bin", s3_client=s3_client)
+    orphan_upload_id = create_multipart_upload(TEST_BUCKET_NAME, "orphan.bin", s3_client=s3_client)
+    session_store.save(make_session("old", old_upload_id, created_at=datetime(2024, 1, 1, tzinfo=timezone.utc)))
+    session_store.save(make_session("new", new_upload_id))
+
+    sweeper = UploadSessionSweeper(session_store, TEST_BUCKET_NAME, s3_client, max_idle_seconds=3600)
+    aborted_uploads = asyncio.run(sweeper.sweep())
+
+    # uploads without a session are swept too, but a recent session keeps its upload alive
+    assert {upload.upload_id for upload in aborted_uploads} == {old_upload_id, orphan_upload_id}
+    assert [upload.upload_id for upload in list_multipart_uploads(TEST_BUCKET_NAME)] == [new_upload_id]
+    assert [session.session_id for session in session_store.list_all()] == ["new"]
@@ -1,3 +1,5 @@
+import time
+
 import boto3
 
 
@@ -7,3 +9,12 @@ def delete_s3_bucket(bucket_name: str) -> None:
     bucket = s3.Bucket(bucket_name)
     bucket.objects.all().delete()
     bucket.delete()
+
+
+def wait_for_metadata_index_scan(app, timeout_seconds: float = 5.0) -> None:
+    """Wait for the initial scan of the bucket into the app's metadata index, run in the background at startup."""
+    deadline = time.monotonic() + timeout_seconds
+    while not app.state.metadata_index.is_scanned(app.state.settings.s3_bucket_name):
+        if time.monotonic() > deadline:
+            raise TimeoutError("The metadata index did not finish scanning the bucket")
+        time.sleep(0.01)